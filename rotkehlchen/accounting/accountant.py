@@ -1,6 +1,9 @@
+import calendar
+import hashlib
 import logging
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union, cast
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union, cast
 
 import gevent
 
@@ -28,21 +31,84 @@ from rotkehlchen.exchanges.data_structures import (
 )
 from rotkehlchen.fval import FVal
 from rotkehlchen.history import PriceHistorian
-from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import EthereumTransaction, Fee, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.accounting import (
     TaxableAction,
     action_get_assets,
+    action_get_priced_assets,
     action_get_timestamp,
     action_get_type,
 )
 from rotkehlchen.utils.misc import timestamp_to_date
+from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads_dict
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# Bump this whenever a change in the processing of actions makes existing
+# accounting checkpoints invalid
+ACCOUNTING_CHECKPOINT_VERSION = 1
+
+
+class CheckpointBoundary(NamedTuple):
+    """A point in the sorted actions at which an accounting checkpoint can be taken
+
+    The checkpoint holds the state after processing all actions before `action_index`.
+    These are all the actions before `timestamp`, which is the start of a month.
+    """
+    timestamp: Timestamp
+    action_index: int
+    actions_digest: str
+
+
+def _next_month_start(timestamp: Timestamp) -> Timestamp:
+    date = datetime.utcfromtimestamp(timestamp)
+    year, month = (date.year + 1, 1) if date.month == 12 else (date.year, date.month + 1)
+    return Timestamp(calendar.timegm((year, month, 1, 0, 0, 0)))
+
+
+def get_checkpoint_boundaries(
+        actions: List[TaxableAction],
+        end_ts: Timestamp,
+) -> List[CheckpointBoundary]:
+    """Returns the checkpoint boundaries of the given time sorted actions up to end_ts
+
+    There is a boundary at the start of the first month after each month that
+    has actions. Each boundary has a digest of all the actions before it, so
+    that a checkpoint can be checked against the actions it is reused for.
+    """
+    boundaries: List[CheckpointBoundary] = []
+    digest = hashlib.sha256()
+    next_boundary_ts: Optional[Timestamp] = None
+    for idx, action in enumerate(actions):
+        timestamp = action_get_timestamp(action)
+        if next_boundary_ts is not None and next_boundary_ts <= timestamp:
+            if next_boundary_ts > end_ts:
+                return boundaries
+            boundaries.append(CheckpointBoundary(
+                timestamp=next_boundary_ts,
+                action_index=idx,
+                actions_digest=digest.hexdigest(),
+            ))
+            next_boundary_ts = None
+
+        if timestamp > end_ts:
+            return boundaries
+
+        digest.update(repr(action).encode())
+        if next_boundary_ts is None:
+            next_boundary_ts = _next_month_start(timestamp)
+
+    if next_boundary_ts is not None and next_boundary_ts <= end_ts:
+        boundaries.append(CheckpointBoundary(
+            timestamp=next_boundary_ts,
+            action_index=len(actions),
+            actions_digest=digest.hexdigest(),
+        ))
+    return boundaries
+
 
 class Accountant():
 
@@ -65,9 +131,11 @@ class Accountant():
 
         self.started_processing_timestamp = Timestamp(-1)
         self.currently_processing_timestamp = Timestamp(-1)
+        self.price_prefetch_progress = -1
 
     def __del__(self) -> None:
         del self.events
+        self.csvexporter.close()
         del self.csvexporter
 
     @property
@@ -112,6 +180,90 @@ class Accountant():
         )
         return Fee(fee_rate * trade.fee)
 
+    def _checkpoint_settings_digest(self) -> str:
+        """Returns a digest of all settings that affect the state kept in a checkpoint"""
+        ignored_assets = sorted(x.identifier for x in self.db.get_ignored_assets())
+        data = (
+            f'{ACCOUNTING_CHECKPOINT_VERSION}|{self.profit_currency.identifier}|'
+            f'{self.events.include_crypto2crypto}|{",".join(ignored_assets)}'
+        )
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def _find_resume_checkpoint(
+            self,
+            boundaries: List[CheckpointBoundary],
+            settings_digest: str,
+            start_ts: Timestamp,
+    ) -> Optional[CheckpointBoundary]:
+        """Finds the latest saved checkpoint before start_ts that is still valid
+        for the actions being processed and restores the accounting state from it"""
+        saved_digests = self.db.get_accounting_checkpoint_digests(
+            settings_digest=settings_digest,
+            to_ts=start_ts,
+        )
+        for boundary in reversed(boundaries):
+            if boundary.timestamp > start_ts:
+                continue
+            if saved_digests.get(boundary.timestamp) != boundary.actions_digest:
+                continue
+
+            state = self.db.get_accounting_checkpoint_state(
+                timestamp=boundary.timestamp,
+                settings_digest=settings_digest,
+            )
+            if state is None:
+                continue
+            self.events.restore_buys(rlk_jsonloads_dict(state))
+            log.debug(
+                'Resuming history processing from accounting checkpoint',
+                checkpoint_ts=boundary.timestamp,
+                skipped_actions=boundary.action_index,
+            )
+            return boundary
+
+        return None
+
+    def _save_checkpoint(self, boundary: CheckpointBoundary, settings_digest: str) -> None:
+        self.db.add_accounting_checkpoint(
+            timestamp=boundary.timestamp,
+            settings_digest=settings_digest,
+            actions_digest=boundary.actions_digest,
+            state=rlk_jsondumps(self.events.serialize_buys()),
+        )
+
+    def _set_price_prefetch_progress(self, done: int, total: int) -> None:
+        self.price_prefetch_progress = 100 if total == 0 else (100 * done) // total
+
+    def prefetch_prices(self, actions: List[TaxableAction], end_ts: Timestamp) -> None:
+        """Queries in one planned pass all the historical price data that processing
+        the given time sorted actions will need, so that processing them does not
+        stall on price queries.
+        """
+        ignored_assets = self.db.get_ignored_assets()
+        queries: Dict[Tuple[Asset, Asset], Tuple[Timestamp, Timestamp]] = {}
+        for action in actions:
+            timestamp = action_get_timestamp(action)
+            if timestamp > end_ts:
+                break
+
+            try:
+                assets = action_get_priced_assets(action)
+            except (UnknownAsset, UnsupportedAsset, DeserializationError):
+                continue  # will be reported when the action gets processed
+
+            for asset in assets:
+                if asset == self.profit_currency or asset in ignored_assets:
+                    continue
+                pair = (asset, self.profit_currency)
+                # actions are sorted so only the end of the range can move
+                start = queries[pair][0] if pair in queries else timestamp
+                queries[pair] = (start, timestamp)
+
+        PriceHistorian().prefetch_historical_prices(
+            queries=queries,
+            progress_cb=self._set_price_prefetch_progress,
+        )
+
     def add_asset_movement_to_events(self, movement: AssetMovement) -> None:
         """
         Adds the given asset movement to the processed events
@@ -266,7 +418,11 @@ class Accountant():
 
         start_ts here is the timestamp at which to start taking trades and other
         taxable events into account. Not where processing starts from. Processing
-        always starts from the very first event we find in the history.
+        starts from the very first event we find in the history, unless a valid
+        accounting checkpoint from before start_ts is found in the DB. Then the
+        state is restored from it and only the actions after it are processed.
+        Only the checkpoint at the start of the last month before start_ts is saved,
+        since that is the one a report of the same range resumes from.
         """
         log.info(
             'Start of history processing',
@@ -302,14 +458,42 @@ class Accountant():
         actions.sort(
             key=lambda action: action_get_timestamp(action),
         )
+        settings_digest = self._checkpoint_settings_digest()
+        boundaries = get_checkpoint_boundaries(actions=actions, end_ts=start_ts)
+        resume_boundary = self._find_resume_checkpoint(
+            boundaries=boundaries,
+            settings_digest=settings_digest,
+            start_ts=start_ts,
+        )
+        resume_index = 0 if resume_boundary is None else resume_boundary.action_index
+        # DeFi events don't touch the state kept in a checkpoint but they are
+        # accounted for irrespective of start_ts so they always need to be processed
+        actions_to_process = [
+            x for x in actions[:resume_index] if action_get_type(x) == 'defi_event'
+        ] + actions[resume_index:]
+        # The boundaries end at start_ts so the last one is the checkpoint a
+        # report of the same range resumes from
+        save_boundary = None
+        if len(boundaries) != 0 and boundaries[-1].action_index > resume_index:
+            save_boundary = boundaries[-1]
         # The first ts is the ts of the first action we have in history or 0 for empty history
-        first_ts = Timestamp(0) if len(actions) == 0 else action_get_timestamp(actions[0])
+        if len(actions_to_process) == 0:
+            first_ts = Timestamp(0)
+        else:
+            first_ts = action_get_timestamp(actions_to_process[0])
         self.currently_processing_timestamp = first_ts
         self.started_processing_timestamp = first_ts
+        self.price_prefetch_progress = 0
+        self.prefetch_prices(actions=actions_to_process, end_ts=end_ts)
 
         prev_time = Timestamp(0)
         count = 0
-        for action in actions:
+        for idx, action in enumerate(actions):
+            if idx < resume_index and action_get_type(action) != 'defi_event':
+                continue
+            if save_boundary is not None and idx == save_boundary.action_index:
+                self._save_checkpoint(save_boundary, settings_digest)
+
             try:
                 (
                     should_continue,
@@ -342,6 +526,9 @@ class Accountant():
                 )
                 continue
             except RemoteError as e:
+                # The action may be processed fine in a later run so a later
+                # checkpoint would not be reusable
+                save_boundary = None
                 ts = action_get_timestamp(action)
                 self.msg_aggregator.add_error(
                     f'Skipping action at '
@@ -364,9 +551,13 @@ class Accountant():
                 # API may time out
                 gevent.sleep(0.5)
             count += 1
+        else:
+            if save_boundary is not None and save_boundary.action_index == len(actions):
+                self._save_checkpoint(save_boundary, settings_digest)
 
+        # The files are only read from now on, when they are exported
+        self.csvexporter.close_files()
         self.events.calculate_asset_details()
-        Inquirer().save_historical_forex_data()
 
         sum_other_actions = (
             self.events.margin_positions_profit_loss +
@@ -1,6 +1,7 @@
 import logging
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
+from rotkehlchen.accounting.lots import BuyLots, CostBasisMethod
 from rotkehlchen.accounting.structures import DefiEvent
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants import BTC_BCH_FORK_TS, ETH_DAO_FORK_TS, ZERO
@@ -32,6 +33,8 @@ class TaxableEvents():
 
         self._taxfree_after_period: Optional[int] = None
         self._include_crypto2crypto: Optional[bool] = None
+        # The order in which sells use up the buys of an asset
+        self.cost_basis_method = CostBasisMethod.FIFO
 
     def reset(self, start_ts: Timestamp, end_ts: Timestamp) -> None:
         self.events = {}
@@ -45,6 +48,40 @@ class TaxableEvents():
         self.margin_positions_profit_loss = ZERO
         self.defi_profit_loss = ZERO
 
+    def serialize_buys(self) -> Dict[str, List[Tuple[int, str, str, str]]]:
+        """Returns the per asset queues of buys that are not yet sold
+
+        They are all the state that processing previous actions leaves behind
+        for processing later ones and so all that is needed to resume processing.
+        """
+        return {
+            asset.identifier: [
+                (x.timestamp, str(x.amount), str(x.rate), str(x.fee_rate)) for x in events.buys
+            ] for asset, events in self.events.items()
+        }
+
+    def restore_buys(self, data: Dict[str, List[Tuple[int, str, str, str]]]) -> None:
+        """Restores the per asset queues of buys from the result of serialize_buys"""
+        self.events = {
+            Asset(identifier): Events(
+                buys=BuyLots(
+                    buys=(
+                        BuyEvent(
+                            timestamp=Timestamp(x[0]),
+                            amount=FVal(x[1]),
+                            rate=FVal(x[2]),
+                            fee_rate=FVal(x[3]),
+                        ) for x in buys
+                    ),
+                    method=self.cost_basis_method,
+                ),
+                sells=[],
+            ) for identifier, buys in data.items()
+        }
+
+    def _new_events(self) -> Events:
+        return Events(buys=BuyLots(method=self.cost_basis_method), sells=[])
+
     @property
     def include_crypto2crypto(self) -> Optional[bool]:
         return self._include_crypto2crypto
@@ -118,28 +155,8 @@ class TaxableEvents():
         if asset not in self.events or len(self.events[asset].buys) == 0:
             return False
 
-        remaining_amount_from_last_buy = FVal('-1')
-        remaining_amount = amount
-        for idx, buy_event in enumerate(self.events[asset].buys):
-            if remaining_amount < buy_event.amount:
-                stop_index = idx
-                remaining_amount_from_last_buy = buy_event.amount - remaining_amount
-                # stop iterating since we found all buys to satisfy reduction
-                break
-            else:
-                remaining_amount -= buy_event.amount
-                if idx == len(self.events[asset].buys) - 1:
-                    stop_index = idx + 1
-
-        # Otherwise, delete all the used up buys from the list
-        del self.events[asset].buys[:stop_index]
-        # and modify the amount of the buy where we stopped if there is one
-        if remaining_amount_from_last_buy != FVal('-1'):
-            self.events[asset].buys[0].amount = remaining_amount_from_last_buy
-        elif remaining_amount != ZERO:
-            return False
-
-        return True
+        _, remaining_amount = self.events[asset].buys.consume(amount)
+        return remaining_amount == ZERO
 
     def handle_prefork_asset_buys(
             self,
@@ -239,7 +256,9 @@ class TaxableEvents():
 
         # else you are also selling some other asset to buy the bought asset
         log.debug(
-            f'Buying {bought_asset} with {paid_with_asset} also introduces a virtual sell event',
+            'Buying %s with %s also introduces a virtual sell event',
+            bought_asset,
+            paid_with_asset,
         )
         try:
             bought_asset_rate_in_profit_currency = self.get_rate_in_profit_currency(
@@ -334,7 +353,7 @@ class TaxableEvents():
         )
 
         if bought_asset not in self.events:
-            self.events[bought_asset] = Events([], [])
+            self.events[bought_asset] = self._new_events()
 
         gross_cost = bought_amount * buy_rate
         cost_in_profit_currency = gross_cost + fee_in_profit_currency
@@ -430,7 +449,9 @@ class TaxableEvents():
             return
 
         log.debug(
-            f'Selling {selling_asset} for {receiving_asset} also introduces a virtual buy event',
+            'Selling %s for %s also introduces a virtual buy event',
+            selling_asset,
+            receiving_asset,
         )
         # else then you are also buying some other asset through your sell
         self.add_buy(
@@ -478,7 +499,7 @@ class TaxableEvents():
             return
 
         if selling_asset not in self.events:
-            self.events[selling_asset] = Events([], [])
+            self.events[selling_asset] = self._new_events()
 
         self.events[selling_asset].sells.append(
             SellEvent(
@@ -625,9 +646,9 @@ class TaxableEvents():
     ) -> Tuple[FVal, FVal, FVal]:
         """
         When selling `selling_amount` of `selling_asset` at `timestamp` this function
-        calculates using the first-in-first-out rule the corresponding buy/s from
-        which to do profit calculation. Also applies the one year rule after which
-        a sell is not taxable in Germany.
+        calculates using the cost basis method of the asset's buys (first-in-first-out
+        by default) the corresponding buy/s from which to do profit calculation.
+        Also applies the one year rule after which a sell is not taxable in Germany.
 
         Returns a tuple of 3 values:
             - `taxable_amount`: The amount out of `selling_amount` that is taxable,
@@ -637,95 +658,68 @@ class TaxableEvents():
             - `taxfree_bought_cost`: How much it cost in `profit_currency` to buy
                                      the taxfree_amount (selling_amount - taxable_amount)
         """
-        remaining_sold_amount = selling_amount
-        stop_index = -1
         taxfree_bought_cost = ZERO
         taxable_bought_cost = ZERO
         taxable_amount = ZERO
         taxfree_amount = ZERO
-        remaining_amount_from_last_buy = FVal('-1')
-        for idx, buy_event in enumerate(self.events[selling_asset].buys):
+        buys = self.events[selling_asset].buys
+        if len(buys) == 0:
+            log.critical(
+                'No documented buy found for "{}" before {}'.format(
+                    selling_asset,
+                    timestamp_to_date(timestamp, formatstr='%d/%m/%Y %H:%M:%S'),
+                ),
+            )
+            # That means we had no documented buy for that asset. This is not good
+            # because we can't prove a corresponding buy and as such we are burdened
+            # calculating the entire sell as profit which needs to be taxed
+            return selling_amount, ZERO, ZERO
+
+        consumed_lots, remaining_sold_amount = buys.consume(selling_amount)
+        # There can be hundreds of thousands of lots so only build their log entries
+        # if they are going to be emitted
+        debug_enabled = log.isEnabledFor(logging.DEBUG)
+        for lot in consumed_lots:
             if self.taxfree_after_period is None:
                 at_taxfree_period = False
             else:
-                at_taxfree_period = (
-                    buy_event.timestamp + self.taxfree_after_period < timestamp
-                )
+                at_taxfree_period = lot.timestamp + self.taxfree_after_period < timestamp
 
-            if remaining_sold_amount < buy_event.amount:
-                stop_index = idx
-                buying_cost = remaining_sold_amount.fma(
-                    buy_event.rate,
-                    (buy_event.fee_rate * remaining_sold_amount),
-                )
-
-                if at_taxfree_period:
-                    taxfree_amount += remaining_sold_amount
-                    taxfree_bought_cost += buying_cost
-                else:
-                    taxable_amount += remaining_sold_amount
-                    taxable_bought_cost += buying_cost
+            buying_cost = lot.used_amount.fma(lot.rate, (lot.fee_rate * lot.used_amount))
+            if at_taxfree_period:
+                taxfree_amount += lot.used_amount
+                taxfree_bought_cost += buying_cost
+            else:
+                taxable_amount += lot.used_amount
+                taxable_bought_cost += buying_cost
 
-                remaining_amount_from_last_buy = buy_event.amount - remaining_sold_amount
+            if not debug_enabled:
+                continue
+            if lot.used_entirely:
                 log.debug(
-                    'Sell uses up part of historical buy',
+                    'Sell uses up entire historical buy',
                     sensitive_log=True,
                     tax_status='TAX-FREE' if at_taxfree_period else 'TAXABLE',
-                    used_amount=remaining_sold_amount,
-                    from_amount=buy_event.amount,
+                    bought_amount=lot.used_amount,
                     asset=selling_asset,
-                    trade_buy_rate=buy_event.rate,
+                    trade_buy_rate=lot.rate,
                     profit_currency=self.profit_currency,
-                    trade_timestamp=buy_event.timestamp,
+                    trade_timestamp=lot.timestamp,
                 )
-                # stop iterating since we found all buys to satisfy this sell
-                break
             else:
-                buying_cost = buy_event.amount.fma(
-                    buy_event.rate,
-                    (buy_event.fee_rate * buy_event.amount),
-                )
-                remaining_sold_amount -= buy_event.amount
-                if at_taxfree_period:
-                    taxfree_amount += buy_event.amount
-                    taxfree_bought_cost += buying_cost
-                else:
-                    taxable_amount += buy_event.amount
-                    taxable_bought_cost += buying_cost
-
                 log.debug(
-                    'Sell uses up entire historical buy',
+                    'Sell uses up part of historical buy',
                     sensitive_log=True,
                     tax_status='TAX-FREE' if at_taxfree_period else 'TAXABLE',
-                    bought_amount=buy_event.amount,
+                    used_amount=lot.used_amount,
+                    from_amount=lot.lot_amount,
                     asset=selling_asset,
-                    trade_buy_rate=buy_event.rate,
+                    trade_buy_rate=lot.rate,
                     profit_currency=self.profit_currency,
-                    trade_timestamp=buy_event.timestamp,
+                    trade_timestamp=lot.timestamp,
                 )
 
-                # If the sell used up the last historical buy
-                if idx == len(self.events[selling_asset].buys) - 1:
-                    stop_index = idx + 1
-
-        if len(self.events[selling_asset].buys) == 0:
-            log.critical(
-                'No documented buy found for "{}" before {}'.format(
-                    selling_asset,
-                    timestamp_to_date(timestamp, formatstr='%d/%m/%Y %H:%M:%S'),
-                ),
-            )
-            # That means we had no documented buy for that asset. This is not good
-            # because we can't prove a corresponding buy and as such we are burdened
-            # calculating the entire sell as profit which needs to be taxed
-            return selling_amount, ZERO, ZERO
-
-        # Otherwise, delete all the used up buys from the list
-        del self.events[selling_asset].buys[:stop_index]
-        # and modify the amount of the buy where we stopped if there is one
-        if remaining_amount_from_last_buy != FVal('-1'):
-            self.events[selling_asset].buys[0].amount = remaining_amount_from_last_buy
-        elif remaining_sold_amount != ZERO:
+        if remaining_sold_amount != ZERO:
             # if we still have sold amount but no buys to satisfy it then we only
             # found buys to partially satisfy the sell
             adjusted_amount = selling_amount - taxfree_amount
@@ -765,7 +759,7 @@ class TaxableEvents():
         rate = self.get_rate_in_profit_currency(gained_asset, timestamp)
 
         if gained_asset not in self.events:
-            self.events[gained_asset] = Events([], [])
+            self.events[gained_asset] = self._new_events()
 
         net_gain_amount = gained_amount - fee_in_asset
         gain_in_profit_currency = net_gain_amount * rate
@@ -814,9 +808,9 @@ class TaxableEvents():
         or with reading the response returned by the server
         """
         if margin.pl_currency not in self.events:
-            self.events[margin.pl_currency] = Events([], [])
+            self.events[margin.pl_currency] = self._new_events()
         if margin.fee_currency not in self.events:
-            self.events[margin.fee_currency] = Events([], [])
+            self.events[margin.fee_currency] = self._new_events()
 
         pl_currency_rate = self.get_rate_in_profit_currency(margin.pl_currency, margin.close_time)
         fee_currency_rate = self.get_rate_in_profit_currency(margin.pl_currency, margin.close_time)
@@ -0,0 +1,131 @@
+import heapq
+from collections import deque
+from enum import Enum
+from typing import Deque, Iterable, Iterator, List, NamedTuple, Tuple
+
+from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.exchanges.data_structures import BuyEvent
+from rotkehlchen.fval import FVal
+from rotkehlchen.typing import Timestamp
+
+
+class CostBasisMethod(Enum):
+    """The order in which the buys of an asset are used up by its sells"""
+    FIFO = 0  # First in - first out
+    LIFO = 1  # Last in - first out
+    HIFO = 2  # Highest (buy rate) in - first out
+
+
+class ConsumedLot(NamedTuple):
+    """The part of a buy that was used up by a sell or reduction"""
+    timestamp: Timestamp
+    rate: FVal
+    fee_rate: FVal
+    used_amount: FVal  # How much of the buy was used up
+    lot_amount: FVal  # How much of the buy was left before it was used
+
+    @property
+    def used_entirely(self) -> bool:
+        return self.used_amount == self.lot_amount
+
+
+class BuyLots():
+    """The buys of an asset that are not yet sold, in the order they get used up
+
+    FIFO and LIFO lots live in a deque which is consumed from the left or
+    the right respectively. HIFO lots live in a heap keyed by the negated buy
+    rate. Either way taking the next lot is amortized O(1) (O(log n) for HIFO)
+    and does not move the rest of the lots, as deleting a prefix of a list does.
+    """
+
+    def __init__(
+            self,
+            buys: Iterable[BuyEvent] = (),
+            method: CostBasisMethod = CostBasisMethod.FIFO,
+    ) -> None:
+        self.method = method
+        self._lots: Deque[BuyEvent] = deque()
+        # (negated rate, insertion counter, buy). The counter keeps equal rates
+        # in insertion order and means buys themselves are never compared
+        self._heap: List[Tuple[FVal, int, BuyEvent]] = []
+        self._counter = 0
+        for buy in buys:
+            self.append(buy)
+
+    def append(self, buy: BuyEvent) -> None:
+        if self.method == CostBasisMethod.HIFO:
+            heapq.heappush(self._heap, (-buy.rate, self._counter, buy))
+            self._counter += 1
+        else:
+            self._lots.append(buy)
+
+    def __len__(self) -> int:
+        if self.method == CostBasisMethod.HIFO:
+            return len(self._heap)
+        return len(self._lots)
+
+    def __iter__(self) -> Iterator[BuyEvent]:
+        """Iterates the lots in the order they would be used up"""
+        if self.method == CostBasisMethod.FIFO:
+            return iter(self._lots)
+        if self.method == CostBasisMethod.LIFO:
+            return reversed(self._lots)
+        return (entry[2] for entry in sorted(self._heap))
+
+    def __getitem__(self, index: int) -> BuyEvent:
+        """Returns the lot at index in the order they would be used up
+
+        Index 0, the next lot to be used, is O(1) for all methods.
+        """
+        if self.method == CostBasisMethod.FIFO:
+            return self._lots[index]
+        if self.method == CostBasisMethod.LIFO:
+            return self._lots[-1 - index]
+        if index == 0:
+            return self._heap[0][2]
+        return sorted(self._heap)[index][2]
+
+    def _pop(self) -> BuyEvent:
+        if self.method == CostBasisMethod.FIFO:
+            return self._lots.popleft()
+        if self.method == CostBasisMethod.LIFO:
+            return self._lots.pop()
+        return heapq.heappop(self._heap)[2]
+
+    def consume(self, amount: FVal) -> Tuple[List[ConsumedLot], FVal]:
+        """Uses up lots until `amount` is covered
+
+        A lot that is used up entirely is removed while one that is used up
+        partially is left as the next lot, with its amount reduced.
+
+        Returns the used lots in the order they were used and the part of
+        `amount` that the lots were not enough to cover.
+        """
+        consumed = []
+        remaining_amount = amount
+        while remaining_amount != ZERO and len(self) != 0:
+            buy = self[0]
+            if remaining_amount < buy.amount:
+                consumed.append(ConsumedLot(
+                    timestamp=buy.timestamp,
+                    rate=buy.rate,
+                    fee_rate=buy.fee_rate,
+                    used_amount=remaining_amount,
+                    lot_amount=buy.amount,
+                ))
+                # Reducing the amount does not change the lot's position
+                buy.amount = buy.amount - remaining_amount
+                remaining_amount = ZERO
+                break
+
+            self._pop()
+            consumed.append(ConsumedLot(
+                timestamp=buy.timestamp,
+                rate=buy.rate,
+                fee_rate=buy.fee_rate,
+                used_amount=buy.amount,
+                lot_amount=buy.amount,
+            ))
+            remaining_amount -= buy.amount
+
+        return consumed, remaining_amount
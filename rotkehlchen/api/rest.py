@@ -3,7 +3,7 @@ import hashlib
 import json
 import logging
 import traceback
-from functools import wraps
+from functools import partial, wraps
 from http import HTTPStatus
 from pathlib import Path
 from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Union, overload
@@ -44,6 +44,7 @@ from rotkehlchen.errors import (
 )
 from rotkehlchen.exchanges.data_structures import Trade
 from rotkehlchen.exchanges.manager import SUPPORTED_EXCHANGES
+from rotkehlchen.history import PriceHistorian
 from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.premium.premium import PremiumCredentials
@@ -69,6 +70,7 @@ from rotkehlchen.typing import (
     TradePair,
     TradeType,
 )
+from rotkehlchen.utils.network import get_transport_stats
 from rotkehlchen.utils.version_check import check_if_version_up_to_date
 
 if TYPE_CHECKING:
@@ -185,6 +187,8 @@ class RestAPI():
         self.task_lock = Semaphore()
         self.task_id = 0
         self.task_results: Dict[int, Any] = {}
+        # Partial results that running tasks report before they complete
+        self.task_progress: Dict[int, Dict[str, Any]] = {}
 
         self.trade_schema = TradeSchema()
 
@@ -199,6 +203,10 @@ class RestAPI():
         with self.task_lock:
             self.task_results[task_id] = result
 
+    def _write_task_progress(self, task_id: int, name: str, progress: Any) -> None:
+        with self.task_lock:
+            self.task_progress.setdefault(task_id, {})[name] = progress
+
     def _handle_killed_greenlets(self, greenlet: gevent.Greenlet) -> None:
         if not greenlet.exception:
             log.warning('handle_killed_greenlets without an exception')
@@ -233,8 +241,15 @@ class RestAPI():
         result = getattr(self, command)(**kwargs)
         self._write_task_result(task_id, result)
 
-    def _query_async(self, command: str, **kwargs: Any) -> Response:
+    def _query_async(self, command: str, report_progress: bool = False, **kwargs: Any) -> Response:
+        """Runs the command in a greenlet and returns the id of its task
+
+        If report_progress is True then the command is also given a progress_callback
+        with which it can report partial results while its task is pending.
+        """
         task_id = self._new_task_id()
+        if report_progress:
+            kwargs['progress_callback'] = partial(self._write_task_progress, task_id)
 
         greenlet = gevent.spawn(
             self._do_query_async,
@@ -298,13 +313,20 @@ class RestAPI():
                             'result': {'status': 'completed', 'outcome': process_result(ret)},
                             'message': '',
                         }
-                        # Also remove the greenlet from the killable_greenlets
+                        # Also remove the greenlet and any progress of the task
                         self.killable_greenlets.pop(idx)
+                        self.task_progress.pop(task_id, None)
                         return api_response(result=result_dict, status_code=HTTPStatus.OK)
                     else:
                         # Task is still pending and the greenlet is running
+                        pending_result: Dict[str, Any] = {'status': 'pending', 'outcome': None}
+                        if task_id in self.task_progress:
+                            # Include what the task reported as done so far
+                            pending_result['progress'] = process_result(
+                                self.task_progress[task_id],
+                            )
                         result_dict = {
-                            'result': {'status': 'pending', 'outcome': None},
+                            'result': pending_result,
                             'message': f'The task with id {task_id} is still pending',
                         }
                         return api_response(result=result_dict, status_code=HTTPStatus.OK)
@@ -327,10 +349,16 @@ class RestAPI():
         res = process_result(rates)
         return api_response(_wrap_in_ok_result(res), status_code=HTTPStatus.OK)
 
-    def _query_all_balances(self, save_data: bool, ignore_cache: bool) -> Dict[str, Any]:
+    def _query_all_balances(
+            self,
+            save_data: bool,
+            ignore_cache: bool,
+            progress_callback: Optional[Callable[[str, Any], None]] = None,
+    ) -> Dict[str, Any]:
         result = self.rotkehlchen.query_balances(
             requested_save_data=save_data,
             ignore_cache=ignore_cache,
+            progress_callback=progress_callback,
         )
         return {'result': result, 'message': ''}
 
@@ -344,6 +372,7 @@ class RestAPI():
         if async_query:
             return self._query_async(
                 command='_query_all_balances',
+                report_progress=True,
                 save_data=save_data,
                 ignore_cache=ignore_cache,
             )
@@ -526,9 +555,24 @@ class RestAPI():
             from_ts: Timestamp,
             to_ts: Timestamp,
             location: Optional[Location],
+            limit: Optional[int],
+            offset: int,
     ) -> Dict[str, Any]:
         try:
-            trades = self.rotkehlchen.query_trades(from_ts=from_ts, to_ts=to_ts, location=location)
+            if limit is None:
+                trades = self.rotkehlchen.query_trades(
+                    from_ts=from_ts,
+                    to_ts=to_ts,
+                    location=location,
+                )
+            else:
+                trades = self.rotkehlchen.query_trades_page(
+                    from_ts=from_ts,
+                    to_ts=to_ts,
+                    location=location,
+                    limit=limit,
+                    offset=offset,
+                )
         except RemoteError as e:
             return {'result': None, 'message': str(e), 'status_code': HTTPStatus.BAD_GATEWAY}
 
@@ -553,6 +597,8 @@ class RestAPI():
             to_ts: Timestamp,
             location: Optional[Location],
             async_query: bool,
+            limit: Optional[int],
+            offset: int,
     ) -> Response:
         if async_query:
             return self._query_async(
@@ -560,12 +606,16 @@ class RestAPI():
                 from_ts=from_ts,
                 to_ts=to_ts,
                 location=location,
+                limit=limit,
+                offset=offset,
             )
 
         response = self._get_trades(
             from_ts=from_ts,
             to_ts=to_ts,
             location=location,
+            limit=limit,
+            offset=offset,
         )
         result_dict = {'result': response['result'], 'message': response['message']}
         return api_response(process_result(result_dict), status_code=response['status_code'])
@@ -653,25 +703,36 @@ class RestAPI():
             from_timestamp: Timestamp,
             to_timestamp: Timestamp,
             location: Optional[Location],
+            limit: Optional[int],
+            offset: int,
     ) -> Dict[str, Any]:
         msg = ''
         status_code = HTTPStatus.OK
         result = None
         try:
-            movements = self.rotkehlchen.query_asset_movements(
-                from_ts=from_timestamp,
-                to_ts=to_timestamp,
-                location=location,
-            )
+            if limit is None:
+                movements = self.rotkehlchen.query_asset_movements(
+                    from_ts=from_timestamp,
+                    to_ts=to_timestamp,
+                    location=location,
+                )
+            else:
+                movements = self.rotkehlchen.query_asset_movements_page(
+                    from_ts=from_timestamp,
+                    to_ts=to_timestamp,
+                    location=location,
+                    limit=limit,
+                    offset=offset,
+                )
         except RemoteError as e:
             return {'result': None, 'message': str(e), 'status_code': HTTPStatus.BAD_GATEWAY}
 
         serialized_movements = [x.serialize() for x in movements]
-        limit = FREE_ASSET_MOVEMENTS_LIMIT if self.rotkehlchen.premium is None else -1
+        entries_limit = FREE_ASSET_MOVEMENTS_LIMIT if self.rotkehlchen.premium is None else -1
         result = {
             'entries': process_result_list(serialized_movements),
             'entries_found': self.rotkehlchen.data.db.get_entries_count('asset_movements'),
-            'entries_limit': limit,
+            'entries_limit': entries_limit,
         }
 
         return {'result': result, 'message': msg, 'status_code': status_code}
@@ -683,6 +744,8 @@ class RestAPI():
             to_timestamp: Timestamp,
             location: Optional[Location],
             async_query: bool,
+            limit: Optional[int],
+            offset: int,
     ) -> Response:
         if async_query:
             return self._query_async(
@@ -690,12 +753,16 @@ class RestAPI():
                 from_timestamp=from_timestamp,
                 to_timestamp=to_timestamp,
                 location=location,
+                limit=limit,
+                offset=offset,
             )
 
         response = self._get_asset_movements(
             from_timestamp=from_timestamp,
             to_timestamp=to_timestamp,
             location=location,
+            limit=limit,
+            offset=offset,
         )
         result_dict = {'result': response['result'], 'message': response['message']}
         return api_response(process_result(result_dict), status_code=response['status_code'])
@@ -888,6 +955,7 @@ class RestAPI():
         gevent.killall(self.killable_greenlets)
         with self.task_lock:
             self.task_results = {}
+            self.task_progress = {}
         self.rotkehlchen.logout()
         result_dict['result'] = True
         return api_response(result_dict, status_code=HTTPStatus.OK)
@@ -1081,13 +1149,14 @@ class RestAPI():
         return api_response(result_dict, status_code=HTTPStatus.OK)
 
     @require_loggedin_user()
-    def export_processed_history_csv(self, directory_path: Path) -> Response:
+    def export_processed_history_csv(self, directory_path: Path, compress: bool) -> Response:
         if len(self.rotkehlchen.accountant.csvexporter.all_events_csv) == 0:
             result_dict = wrap_in_fail_result('No history processed in order to perform an export')
             return api_response(result_dict, status_code=HTTPStatus.CONFLICT)
 
         result, message = self.rotkehlchen.accountant.csvexporter.create_files(
             dirpath=directory_path,
+            compress=compress,
         )
 
         if not result:
@@ -1095,6 +1164,21 @@ class RestAPI():
 
         return api_response(OK_RESULT, status_code=HTTPStatus.OK)
 
+    @staticmethod
+    def get_historical_price_memo_stats() -> Response:
+        result = process_result(PriceHistorian.get_price_memo_stats())
+        return api_response(_wrap_in_ok_result(result), status_code=HTTPStatus.OK)
+
+    @staticmethod
+    def clear_historical_price_memo() -> Response:
+        PriceHistorian.clear_price_memo()
+        return api_response(OK_RESULT, status_code=HTTPStatus.OK)
+
+    @staticmethod
+    def get_network_stats() -> Response:
+        result = process_result(get_transport_stats())
+        return api_response(_wrap_in_ok_result(result), status_code=HTTPStatus.OK)
+
     @require_loggedin_user()
     def query_periodic_data(self) -> Response:
         data = self.rotkehlchen.query_periodic_data()
@@ -1786,6 +1870,7 @@ class RestAPI():
             address: Optional[ChecksumEthAddress],
             from_timestamp: Timestamp,
             to_timestamp: Timestamp,
+            progress_callback: Optional[Callable[[str, Any], None]] = None,
     ) -> Dict[str, Any]:
         transactions: Optional[List[EthereumTransaction]]
         try:
@@ -1795,6 +1880,7 @@ class RestAPI():
                 to_ts=to_timestamp,
                 with_limit=self.rotkehlchen.premium is None,
                 recent_first=True,
+                progress_callback=progress_callback,
             )
             status_code = HTTPStatus.OK
             message = ''
@@ -1822,6 +1908,7 @@ class RestAPI():
         if async_query:
             return self._query_async(
                 command='_get_ethereum_transactions',
+                report_progress=True,
                 address=address,
                 from_timestamp=from_timestamp,
                 to_timestamp=to_timestamp,
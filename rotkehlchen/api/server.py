@@ -36,6 +36,7 @@ from rotkehlchen.api.v1.resources import (
     ExchangesResource,
     ExternalServicesResource,
     FiatExchangeRatesResource,
+    HistoricalPriceMemoResource,
     HistoryExportingResource,
     HistoryProcessingResource,
     IgnoredAssetsResource,
@@ -45,6 +46,7 @@ from rotkehlchen.api.v1.resources import (
     MakerDAOVaultsResource,
     ManuallyTrackedBalancesResource,
     MessagesResource,
+    NetworkStatsResource,
     OwnedAssetsResource,
     PeriodicDataResource,
     PingResource,
@@ -56,6 +58,7 @@ from rotkehlchen.api.v1.resources import (
     StatisticsValueDistributionResource,
     TagsResource,
     TradesResource,
+    UniswapBalancesResource,
     UserPasswordChangeResource,
     UserPremiumKeyResource,
     UserPremiumSyncResource,
@@ -65,7 +68,6 @@ from rotkehlchen.api.v1.resources import (
     WatchersResource,
     YearnVaultsBalancesResource,
     YearnVaultsHistoryResource,
-    UniswapBalancesResource,
     create_blueprint,
 )
 from rotkehlchen.logging import RotkehlchenLogsAdapter
@@ -124,6 +126,8 @@ URLS_V1: URLS = [
     ('/periodic/', PeriodicDataResource),
     ('/history/', HistoryProcessingResource),
     ('/history/export/', HistoryExportingResource),
+    ('/history/price_memo/', HistoricalPriceMemoResource),
+    ('/network/stats', NetworkStatsResource),
     ('/queried_addresses', QueriedAddressesResource),
     ('/blockchains/ETH/transactions', EthereumTransactionsResource),
     (
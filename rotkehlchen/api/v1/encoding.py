@@ -610,6 +610,17 @@ class TimerangeLocationQuerySchema(Schema):
     async_query = fields.Boolean(missing=False)
 
 
+class TimerangeLocationPaginatedQuerySchema(TimerangeLocationQuerySchema):
+    limit = fields.Integer(
+        validate=webargs.validate.Range(min=1, error='The limit should be a positive integer'),
+        missing=None,
+    )
+    offset = fields.Integer(
+        validate=webargs.validate.Range(min=0, error='The offset should not be negative'),
+        missing=0,
+    )
+
+
 class TradeSchema(Schema):
     timestamp = TimestampField(required=True)
     location = LocationField(required=True)
@@ -897,6 +908,7 @@ class HistoryProcessingSchema(Schema):
 
 class HistoryExportingSchema(Schema):
     directory_path = DirectoryField(required=True)
+    compress = fields.Boolean(missing=False)
 
 
 class BlockchainAccountDataSchema(Schema):
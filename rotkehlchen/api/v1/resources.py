@@ -45,7 +45,7 @@ from rotkehlchen.api.v1.encoding import (
     TagDeleteSchema,
     TagEditSchema,
     TagSchema,
-    TimerangeLocationQuerySchema,
+    TimerangeLocationPaginatedQuerySchema,
     TradeDeleteSchema,
     TradePatchSchema,
     TradeSchema,
@@ -344,7 +344,7 @@ class ManuallyTrackedBalancesResource(BaseResource):
 
 class TradesResource(BaseResource):
 
-    get_schema = TimerangeLocationQuerySchema()
+    get_schema = TimerangeLocationPaginatedQuerySchema()
     put_schema = TradeSchema()
     patch_schema = TradePatchSchema()
     delete_schema = TradeDeleteSchema()
@@ -356,12 +356,16 @@ class TradesResource(BaseResource):
             to_timestamp: Timestamp,
             location: Optional[Location],
             async_query: bool,
+            limit: Optional[int],
+            offset: int,
     ) -> Response:
         return self.rest_api.get_trades(
             from_ts=from_timestamp,
             to_ts=to_timestamp,
             location=location,
             async_query=async_query,
+            limit=limit,
+            offset=offset,
         )
 
     @use_kwargs(put_schema, location='json')  # type: ignore
@@ -427,7 +431,7 @@ class TradesResource(BaseResource):
 
 class AssetMovementsResource(BaseResource):
 
-    get_schema = TimerangeLocationQuerySchema()
+    get_schema = TimerangeLocationPaginatedQuerySchema()
 
     @use_kwargs(get_schema, location='json_and_query')  # type: ignore
     def get(
@@ -436,12 +440,16 @@ class AssetMovementsResource(BaseResource):
             to_timestamp: Timestamp,
             location: Optional[Location],
             async_query: bool,
+            limit: Optional[int],
+            offset: int,
     ) -> Response:
         return self.rest_api.get_asset_movements(
             from_timestamp=from_timestamp,
             to_timestamp=to_timestamp,
             location=location,
             async_query=async_query,
+            limit=limit,
+            offset=offset,
         )
 
 
@@ -646,8 +654,26 @@ class HistoryExportingResource(BaseResource):
     get_schema = HistoryExportingSchema()
 
     @use_kwargs(get_schema, location='json_and_query')  # type: ignore
-    def get(self, directory_path: Path) -> Response:
-        return self.rest_api.export_processed_history_csv(directory_path=directory_path)
+    def get(self, directory_path: Path, compress: bool) -> Response:
+        return self.rest_api.export_processed_history_csv(
+            directory_path=directory_path,
+            compress=compress,
+        )
+
+
+class HistoricalPriceMemoResource(BaseResource):
+
+    def get(self) -> Response:
+        return self.rest_api.get_historical_price_memo_stats()
+
+    def delete(self) -> Response:
+        return self.rest_api.clear_historical_price_memo()
+
+
+class NetworkStatsResource(BaseResource):
+
+    def get(self) -> Response:
+        return self.rest_api.get_network_stats()
 
 
 class PeriodicDataResource(BaseResource):
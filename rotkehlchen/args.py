@@ -2,6 +2,7 @@ import argparse
 import sys
 from typing import Any, List, Sequence, Union
 
+from rotkehlchen.constants.misc import DEFAULT_HISTORICAL_PRICE_MEMO_SIZE
 from rotkehlchen.utils.misc import get_system_spec
 
 
@@ -98,6 +99,15 @@ def app_args(prog: str, description: str) -> argparse.ArgumentParser:
         ),
         action='store_true',
     )
+    p.add_argument(
+        '--historical-price-memo-size',
+        help=(
+            'The maximum number of historical prices to keep memoized in memory '
+            'during history processing. 0 disables the memo.'
+        ),
+        type=int,
+        default=DEFAULT_HISTORICAL_PRICE_MEMO_SIZE,
+    )
     p.add_argument(
         'version',
         help='Shows the rotkehlchen version',
@@ -1,10 +1,10 @@
 from dataclasses import dataclass, field
 from functools import total_ordering
-from typing import Any, Optional
+from typing import Any, Optional, Tuple, Type, TypeVar
 
 from rotkehlchen.assets.resolver import AssetResolver
 from rotkehlchen.errors import DeserializationError, UnknownAsset, UnsupportedAsset
-from rotkehlchen.typing import AssetType, ChecksumEthAddress, EthTokenInfo, Timestamp
+from rotkehlchen.typing import AssetData, AssetType, ChecksumEthAddress, EthTokenInfo, Timestamp
 
 WORLD_TO_BITTREX = {
     # In Rotkehlchen Bitswift is BITS-2 but in Bittrex it's BITS
@@ -140,9 +140,11 @@ WORLD_TO_BINANCE = {
     'YOYOW': 'YOYO',
 }
 
+T = TypeVar('T', bound='Asset')
+
 
 @total_ordering
-@dataclass(init=True, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
+@dataclass(init=False, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
 class Asset():
     identifier: str
     name: str = field(init=False)
@@ -157,29 +159,50 @@ class Asset():
     cryptocompare: Optional[str] = field(init=False)
     coingecko: Optional[str] = field(init=False)
 
-    def __post_init__(self) -> None:
+    def __new__(cls: Type[T], identifier: str) -> T:
         """
-        Asset post initialization
+        Returns the asset for the given identifier
 
         The only thing that is given to initialize an asset is a string.
 
+        Assets are immutable so only one instance of each class is created per
+        asset. It is kept by the AssetResolver and returned by any later call
+        with the same identifier, making asset construction a dict lookup.
+
         If a non string is given then it's probably a deserialization error or
         invalid data were given to us by the server if an API was queried.
         """
-        if not isinstance(self.identifier, str):
+        if not isinstance(identifier, str):
             raise DeserializationError(
                 'Tried to initialize an asset out of a non-string identifier',
             )
 
-        canonical_id = AssetResolver().is_identifier_canonical(self.identifier)
+        resolver = AssetResolver()
+        instance = resolver.interned_assets.get((cls, identifier))
+        if instance is not None:
+            return instance
+
+        canonical_id = resolver.is_identifier_canonical(identifier)
         if canonical_id is None:
-            raise UnknownAsset(self.identifier)
-        # else let's make sure we got the canonical id in our data struct
-        object.__setattr__(self, 'identifier', canonical_id)
+            raise UnknownAsset(identifier)
+
+        instance = resolver.interned_assets.get((cls, canonical_id))
+        if instance is None:
+            instance = object.__new__(cls)
+            instance._set_asset_data(resolver.get_asset_data(canonical_id))
+            resolver.interned_assets[(cls, canonical_id)] = instance
 
-        data = AssetResolver().get_asset_data(self.identifier)
-        # Ugly hack to set attributes of a frozen data class as post init
+        resolver.interned_assets[(cls, identifier)] = instance
+        return instance
+
+    def __reduce__(self) -> Tuple[Type['Asset'], Tuple[str]]:
+        # Make sure copies and unpickled assets are also the interned instances
+        return self.__class__, (self.identifier,)
+
+    def _set_asset_data(self, data: AssetData) -> None:
+        # Ugly hack to set attributes of a frozen data class after creation
         # https://docs.python.org/3/library/dataclasses.html#frozen-instances
+        object.__setattr__(self, 'identifier', data.identifier)
         object.__setattr__(self, 'name', data.name)
         object.__setattr__(self, 'symbol', data.symbol)
         object.__setattr__(self, 'active', data.active)
@@ -267,16 +290,14 @@ class Asset():
             raise ValueError(f'Invalid comparison of asset with {type(other)}')
 
 
-@dataclass(init=True, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
+@dataclass(init=False, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
 class HasEthereumToken(Asset):
     """ Marker to denote assets having an Ethereum token address """
     ethereum_address: ChecksumEthAddress = field(init=False)
     decimals: int = field(init=False)
 
-    def __post_init__(self) -> None:
-        super().__post_init__()
-        data = AssetResolver().get_asset_data(self.identifier)  # pylint: disable=no-member
-
+    def _set_asset_data(self, data: AssetData) -> None:
+        super()._set_asset_data(data)
         if not data.ethereum_address:
             raise DeserializationError(
                 'Tried to initialize a non Ethereum asset as Ethereum Token',
@@ -286,7 +307,7 @@ class HasEthereumToken(Asset):
         object.__setattr__(self, 'decimals', data.decimals)
 
 
-@dataclass(init=True, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
+@dataclass(init=False, repr=True, eq=False, order=False, unsafe_hash=False, frozen=True)
 class EthereumToken(HasEthereumToken):
 
     def token_info(self) -> EthTokenInfo:
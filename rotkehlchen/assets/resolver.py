@@ -1,11 +1,13 @@
 import json
 import logging
+import sqlite3
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
 
 import requests
 
 from rotkehlchen.typing import AssetData, AssetType, ChecksumEthAddress, EthTokenInfo
+from rotkehlchen.utils.data_index import data_index_path, open_data_index
 
 log = logging.getLogger(__name__)
 
@@ -37,11 +39,27 @@ asset_type_mapping = {
 }
 
 
-def _get_latest_assets(data_directory: Path) -> Dict[str, Any]:
-    """Gets the latest assets either locally or from the remote
+ETH_TOKEN_TYPES = ('ethereum token', 'ethereum token and more')
+
+DB_CREATE_ASSETS_INDEX = """
+CREATE TABLE assets (
+    identifier TEXT NOT NULL PRIMARY KEY,
+    lowercase_identifier TEXT NOT NULL,
+    type TEXT NOT NULL,
+    ethereum_address TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX idx_assets_lowercase_identifier ON assets(lowercase_identifier);
+CREATE INDEX idx_assets_ethereum_address ON assets(ethereum_address);
+CREATE INDEX idx_assets_type ON assets(type);
+"""
+
+
+def _get_latest_assets(data_directory: Path) -> Path:
+    """Gets the path of the latest assets file either locally or from the remote
 
     Checks the remote (github) and if there is a newer file there it pulls it,
-    saves it and its md5 hash locally and returns the new assets.
+    saves it and its md5 hash locally and returns the path of the new assets file.
 
     If there is no new file (same hash) or if there is any problem contacting the remote
     then the builtin assets file is used.
@@ -64,6 +82,8 @@ def _get_latest_assets(data_directory: Path) -> Dict[str, Any]:
             # we need to download and save the new assets from github
             response = requests.get('https://raw.githubusercontent.com/rotki/rotki/develop/rotkehlchen/data/all_assets.json')  # noqa: E501
             remote_asset_data = response.text
+            # Make sure the new assets are valid before replacing the local ones
+            json.loads(remote_asset_data)
 
             # Make sure directory exists
             (data_directory / 'assets').mkdir(parents=True, exist_ok=True)
@@ -77,59 +97,107 @@ def _get_latest_assets(data_directory: Path) -> Dict[str, Any]:
                 f'Found newer remote assets file with version: {remote_meta["version"]} '
                 f' and {remote_meta["md5"]} md5 hash. Replaced local file',
             )
-            return json.loads(remote_asset_data)
+            return data_directory / 'assets' / 'all_assets.json'
 
         # else, same as all error cases use the current one
     except (requests.exceptions.ConnectionError, KeyError, json.decoder.JSONDecodeError):
         pass
 
     if our_downloaded_meta.is_file():
-        assets_file = data_directory / 'assets' / 'all_assets.json'
-    else:
-        assets_file = root_dir / 'data' / 'all_assets.json'
+        return data_directory / 'assets' / 'all_assets.json'
 
-    with open(assets_file, 'r') as f:
-        return json.loads(f.read())
+    return root_dir / 'data' / 'all_assets.json'
 
 
-def _attempt_initialization(
-        data_directory: Optional[Path],
-        saved_assets: Optional[Dict[str, Any]],
-) -> Tuple[Dict[str, Any], bool]:
-    """Reads the asset data either from builtin data or from the remote
-
-    1. If it's the very first time data is initialized (and data directory is not given)
-    then just get assets from the builtin file
-    2. If data directory is still not given but we have some saved assets return them directly
-    3. If data directory is given then we can finally do the comparison of local
-    saved and builtin file with the remote and return the most recent assets.
-
-    Returns a tuple of the most recent assets mapping it can get and a boolean denoting
-    if the remote check happened or not. If it did then we havethe most recent assets.
+def _attempt_initialization(data_directory: Optional[Path]) -> Tuple[Path, bool]:
+    """Finds the path of the assets file to use either from builtin data or from the remote
+
+    1. If data directory is not given then just use the builtin file
+    2. If data directory is given then we can finally do the comparison of local
+    saved and builtin file with the remote and return the most recent assets file.
+
+    Returns a tuple of the path of the most recent assets file it can get and a boolean
+    denoting if the remote check happened or not. If it did then we have the most
+    recent assets.
     """
     if not data_directory:
-        if saved_assets is not None:
-            # Do not read the all_assets file again if it has been already read
-            return saved_assets, False
-
-        # First initialization. Read the builtin all_assets.json
         root_dir = Path(__file__).resolve().parent.parent
-        with open(root_dir / 'data' / 'all_assets.json', 'r') as f:
-            assets = json.loads(f.read())
-
-        return assets, False
+        return root_dir / 'data' / 'all_assets.json', False
 
     # else we got the data directory so we can finally do the remote check
-    assets = _get_latest_assets(data_directory)
-    return assets, True
+    return _get_latest_assets(data_directory), True
+
+
+def _open_assets_index(
+        assets_file: Path,
+        data_directory: Optional[Path],
+) -> sqlite3.Connection:
+    """Opens the compiled index of the given assets file, compiling it if needed
+
+    The index is kept in the data directory, or in memory if there is none yet.
+    It is recompiled whenever the meta file next to the assets file, which holds
+    the version and md5 hash of the assets, changes.
+    """
+
+    def compile_assets(conn: sqlite3.Connection) -> None:
+        with open(assets_file, 'r') as f:
+            assets = json.loads(f.read())
+        conn.executescript(DB_CREATE_ASSETS_INDEX)
+        conn.executemany(
+            'INSERT INTO assets(identifier, lowercase_identifier, type, ethereum_address, data) '
+            'VALUES(?, ?, ?, ?, ?)',
+            [(
+                identifier,
+                identifier.lower(),
+                data['type'],
+                data.get('ethereum_address', None),
+                json.dumps(data, separators=(',', ':')),
+            ) for identifier, data in assets.items()],
+        )
+
+    with open(assets_file.with_suffix('.meta'), 'r') as f:
+        meta = f.read()
+    return open_data_index(
+        index_path=data_index_path(data_directory, 'all_assets'),
+        source_id=meta.strip(),
+        compile_tables=compile_assets,
+    )
+
+
+def _resolve_asset_data(identifier: str, data: Dict[str, Any]) -> AssetData:
+    # If an unknown asset is found (can happen if list is updated but code is not)
+    # then default to the "own chain" type"
+    asset_type = asset_type_mapping.get(data['type'], AssetType.OWN_CHAIN)
+    return AssetData(
+        identifier=identifier,
+        symbol=data['symbol'],
+        name=data['name'],
+        # If active is in the data use it, else we assume it's true
+        active=data.get('active', True),
+        asset_type=asset_type,
+        started=data.get('started', None),
+        ended=data.get('ended', None),
+        forked=data.get('forked', None),
+        swapped_for=data.get('swapped_for', None),
+        ethereum_address=data.get('ethereum_address', None),
+        decimals=data.get('ethereum_token_decimals', None),
+        cryptocompare=data.get('cryptocompare', None),
+        coingecko=data.get('coingecko', None),
+    )
 
 
 class AssetResolver():
     __instance = None
     remote_check_happened: bool = False
-    assets: Dict[str, Dict[str, Any]] = {}
-    lowercase_mapping: Dict[str, str] = {}
+    # Compiled index of the assets file in use. See utils/data_index.py
+    index: sqlite3.Connection
+    # Data of the assets resolved so far. Each asset is resolved on first use
+    asset_data: Dict[str, AssetData] = {}
+    # Canonical Asset instances keyed by (asset class, identifier as given).
+    # Filled and used by Asset construction in assets/asset.py
+    interned_assets: Dict[Tuple[type, str], Any] = {}
     eth_token_info: Optional[List[EthTokenInfo]] = None
+    all_assets: Optional[Dict[str, Dict[str, Any]]] = None
 
     def __new__(
             cls,
@@ -142,28 +210,59 @@ class AssetResolver():
         newer file exists on the remote and uses that. Once that's done the remote
         check flag is set to True.
 
+        The assets file is not parsed as a whole. Its compiled index is opened
+        and each asset is read from it only when first needed.
+
         From that point on all calls to AssetResolver() return the same data.
         """
         if AssetResolver.__instance is not None:
             if AssetResolver.__instance.remote_check_happened:  # type: ignore
                 return AssetResolver.__instance
+            if data_directory is None:
+                # Without a data directory the builtin assets would be used again
+                return AssetResolver.__instance
 
             # else we still have not performed the remote check
-            assets, check_happened = _attempt_initialization(
-                data_directory=data_directory,
-                saved_assets=AssetResolver.__instance.assets,
-            )
+            AssetResolver.__instance.index.close()
         else:
             # first initialization
-            assets, check_happened = _attempt_initialization(
-                data_directory=data_directory,
-                saved_assets=None,
-            )
             AssetResolver.__instance = object.__new__(cls)
 
-        AssetResolver.__instance.assets = assets
-        # Mapping of lowercase identifier to file identifier to make sure our comparisons
-        # are case insensitive. TODO: Eventially we can make this go away. We can achieve that by:
+        assets_file, check_happened = _attempt_initialization(data_directory)
+        AssetResolver.__instance.index = _open_assets_index(assets_file, data_directory)
+        AssetResolver.__instance.asset_data = {}
+        AssetResolver.__instance.interned_assets = {}
+        AssetResolver.__instance.eth_token_info = None
+        AssetResolver.__instance.all_assets = None
+        AssetResolver.__instance.remote_check_happened = check_happened
+
+        return AssetResolver.__instance
+
+    @property
+    def assets(self) -> Dict[str, Dict[str, Any]]:
+        """The data of all assets as found in the assets file
+
+        The whole index is read on first access and kept from then on, so this
+        should not be used for single asset lookups
+        """
+        if self.all_assets is None:
+            self.all_assets = {
+                identifier: json.loads(data) for identifier, data in
+                self.index.execute('SELECT identifier, data FROM assets ORDER BY rowid')
+            }
+        return self.all_assets
+
+    @staticmethod
+    def is_identifier_canonical(asset_identifier: str) -> Optional[str]:
+        """Checks if an asset identifier exists and if yes returns its canonical form
+
+        The canonical form is the one in the all_assets.json file and in the DB"""
+        instance = AssetResolver()
+        if asset_identifier in instance.asset_data:
+            return asset_identifier
+
+        # Comparisons of identifiers are case insensitive. TODO: Eventially we can
+        # make this go away. We can achieve that by:
         # 1. Lowercasing all identifiers in the assets.json file
         # 2. Writing a DB upgrade to do the same everywhere in the DB where
         # an asset identifier is used for the user. That last part is doable but
@@ -173,43 +272,49 @@ class AssetResolver():
         # we should now use the new lowercase identifiers. This is probably also
         # PITA.
         # ---> Think about it and if worth doing it address it
-        AssetResolver.__instance.lowercase_mapping = {k.lower(): k for k, _ in assets.items()}
-        AssetResolver.__instance.remote_check_happened = check_happened
-
-        return AssetResolver.__instance
+        result = instance.index.execute(
+            'SELECT identifier FROM assets WHERE lowercase_identifier=?',
+            (asset_identifier.lower(),),
+        ).fetchone()
+        return None if result is None else result[0]
 
     @staticmethod
-    def is_identifier_canonical(asset_identifier: str) -> Optional[str]:
-        """Checks if an asset identifier exists and if yes returns its canonical form
+    def get_asset_data(asset_identifier: str) -> AssetData:
+        """Get all asset data from the known assets file for valid asset symbol
 
-        The canonical form is the one in the all_assets.json file and in the DB"""
+        May raise:
+        - KeyError if the identifier is not the canonical identifier of a known asset
+        """
         instance = AssetResolver()
-        return instance.lowercase_mapping.get(asset_identifier.lower(), None)
+        result = instance.asset_data.get(asset_identifier, None)
+        if result is not None:
+            return result
+
+        entry = instance.index.execute(
+            'SELECT data FROM assets WHERE identifier=?',
+            (asset_identifier,),
+        ).fetchone()
+        if entry is None:
+            raise KeyError(asset_identifier)
+
+        result = _resolve_asset_data(asset_identifier, json.loads(entry[0]))
+        instance.asset_data[asset_identifier] = result
+        return result
 
     @staticmethod
-    def get_asset_data(asset_identifier: str) -> AssetData:
-        """Get all asset data from the known assets file for valid asset symbol"""
-        data = AssetResolver().assets[asset_identifier]
-        # If an unknown asset is found (can happen if list is updated but code is not)
-        # then default to the "own chain" type"
-        asset_type = asset_type_mapping.get(data['type'], AssetType.OWN_CHAIN)
-        result = AssetData(
-            identifier=asset_identifier,
-            symbol=data['symbol'],
-            name=data['name'],
-            # If active is in the data use it, else we assume it's true
-            active=data.get('active', True),
-            asset_type=asset_type,
-            started=data.get('started', None),
-            ended=data.get('ended', None),
-            forked=data.get('forked', None),
-            swapped_for=data.get('swapped_for', None),
-            ethereum_address=data.get('ethereum_address', None),
-            decimals=data.get('ethereum_token_decimals', None),
-            cryptocompare=data.get('cryptocompare', None),
-            coingecko=data.get('coingecko', None),
-        )
-        return result
+    def get_ethereum_token_identifier(address: ChecksumEthAddress) -> Optional[str]:
+        """Returns the identifier of the ethereum token with the given address
+
+        Returns None if no known token, or more than one, has the address
+        """
+        result = AssetResolver().index.execute(
+            f'SELECT identifier FROM assets WHERE ethereum_address=? AND type IN '
+            f'({",".join("?" * len(ETH_TOKEN_TYPES))}) LIMIT 2',
+            (address, *ETH_TOKEN_TYPES),
+        ).fetchall()
+        if len(result) != 1:
+            return None
+        return result[0][0]
 
     @staticmethod
     def get_all_eth_token_info() -> List[EthTokenInfo]:
@@ -217,13 +322,13 @@ class AssetResolver():
             return AssetResolver().eth_token_info  # type: ignore
         all_tokens = []
 
-        for identifier, asset_data in AssetResolver().assets.items():
-            # If an unknown asset is found (can happen if list is updated but code is not)
-            # then default to the "own chain" type"
-            asset_type = asset_type_mapping.get(asset_data['type'], AssetType.OWN_CHAIN)
-            if asset_type not in (AssetType.ETH_TOKEN_AND_MORE, AssetType.ETH_TOKEN):
-                continue
-
+        cursor = AssetResolver().index.execute(
+            f'SELECT identifier, data FROM assets WHERE type IN '
+            f'({",".join("?" * len(ETH_TOKEN_TYPES))}) ORDER BY rowid',
+            ETH_TOKEN_TYPES,
+        )
+        for identifier, entry in cursor:
+            asset_data = json.loads(entry)
             all_tokens.append(EthTokenInfo(
                 identifier=identifier,
                 address=ChecksumEthAddress(asset_data['ethereum_address']),
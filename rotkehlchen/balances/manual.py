@@ -33,16 +33,16 @@ class ManuallyTrackedBalanceWithValue(NamedTuple):
 def get_manually_tracked_balances(db: 'DBHandler') -> List[ManuallyTrackedBalanceWithValue]:
     """Gets the manually tracked balances"""
     balances = db.get_manually_tracked_balances()
+    try:
+        prices = Inquirer().find_usd_prices(x.asset for x in balances)
+    except RemoteError as e:
+        db.msg_aggregator.add_warning(
+            f'Could not find prices during manually tracked balance querying due to {str(e)}',
+        )
+        prices = {}
     balances_with_value = []
     for entry in balances:
-        try:
-            price = Inquirer().find_usd_price(entry.asset)
-        except RemoteError as e:
-            db.msg_aggregator.add_warning(
-                f'Could not find price for {entry.asset.identifier} during '
-                f'manually tracked balance querying due to {str(e)}',
-            )
-            price = Price(ZERO)
+        price = prices.get(entry.asset, Price(ZERO))
         # https://github.com/python/mypy/issues/2582 --> for the type ignore below
         balances_with_value.append(ManuallyTrackedBalanceWithValue(  # type: ignore
             **entry._asdict(),
@@ -1,66 +1,34 @@
-from typing import Dict, List, Tuple
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
 
 import requests
+from gevent.pool import Pool
 
 from rotkehlchen.errors import RemoteError, UnableToDecryptRemoteData
 from rotkehlchen.fval import FVal
+from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import BTCAddress
 from rotkehlchen.utils.misc import request_get_dict, satoshis_to_btc
 
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
 
-def _have_bc1_accounts(accounts: List[BTCAddress]) -> bool:
-    return any(account.lower()[0:3] == 'bc1' for account in accounts)
+# How many addresses are given to a single blockchain.info multiaddr query. This
+# keeps the length of the query url well below the limits of servers and proxies
+BLOCKCHAININFO_MULTIADDR_CHUNK_SIZE = 80
+# How many bitcoin API queries run at the same time
+BTC_QUERY_POOL_SIZE = 5
 
+# Mapping of address to whether it has had any transactions and to its balance
+AddressesStats = Dict[BTCAddress, Tuple[bool, FVal]]
 
-def get_bitcoin_addresses_balances(accounts: List[BTCAddress]) -> Dict[BTCAddress, FVal]:
-    """Queries blockchain.info or blockstream for the balances of accounts
-
-    May raise:
-    - RemotError if there is a problem querying blockchain.info or blockstream
-    """
-    source = 'blockchain.info'
-    balances: Dict[BTCAddress, FVal] = {}
-    try:
-        if _have_bc1_accounts(accounts):
-            # if 1 account is bech32 we have to query blockstream. blockchaininfo won't work
-            source = 'blockstream'
-            balances = {}
-            for account in accounts:
-                url = f'https://blockstream.info/api/address/{account}'
-                response_data = request_get_dict(url=url, handle_429=True, backoff_in_seconds=4)
-                stats = response_data['chain_stats']
-                balance = int(stats['funded_txo_sum']) - int(stats['spent_txo_sum'])
-                balances[account] = satoshis_to_btc(balance)
-        else:
-            params = '|'.join(accounts)
-            btc_resp = request_get_dict(
-                url=f'https://blockchain.info/multiaddr?active={params}',
-                handle_429=True,
-                # If we get a 429 then their docs suggest 10 seconds
-                # https://blockchain.info/q
-                backoff_in_seconds=10,
-            )
-            for idx, entry in enumerate(btc_resp['addresses']):
-                balances[accounts[idx]] = satoshis_to_btc(FVal(entry['final_balance']))
-    except (
-            requests.exceptions.ConnectionError,
-            UnableToDecryptRemoteData,
-            requests.exceptions.Timeout,
-    ) as e:
-        raise RemoteError(f'bitcoin external API request for balances failed due to {str(e)}') from e  # noqa: E501
-    except KeyError as e:
-        raise RemoteError(
-            f'Malformed response when querying bitcoin blockchain via {source}.'
-            f'Did not find key {e}',
-        ) from e
 
-    return balances
+def _is_bech32(account: BTCAddress) -> bool:
+    return account.lower()[0:3] == 'bc1'
 
 
-def _check_blockstream_for_transactions(
-        accounts: List[BTCAddress],
-) -> Dict[BTCAddress, Tuple[bool, FVal]]:
-    """May raise connection errors or KeyError"""
+def _check_blockstream_for_transactions(accounts: List[BTCAddress]) -> AddressesStats:
+    """May raise connection errors, RemoteError, UnableToDecryptRemoteData or KeyError"""
     have_transactions = {}
     for account in accounts:
         url = f'https://blockstream.info/api/address/{account}'
@@ -73,27 +41,131 @@ def _check_blockstream_for_transactions(
     return have_transactions
 
 
-def _check_blockchaininfo_for_transactions(
-        accounts: List[BTCAddress],
-) -> Dict[BTCAddress, Tuple[bool, FVal]]:
-    """May raise connection errors or KeyError"""
-    have_transactions = {}
+def _check_blockchaininfo_for_transactions(accounts: List[BTCAddress]) -> AddressesStats:
+    """May raise connection errors, RemoteError, UnableToDecryptRemoteData or KeyError"""
     params = '|'.join(accounts)
     btc_resp = request_get_dict(
         url=f'https://blockchain.info/multiaddr?active={params}',
         handle_429=True,
         # If we get a 429 then their docs suggest 10 seconds
-        # https://blockchain.infoq/
-        backoff_in_seconds=15,
+        # https://blockchain.info/q
+        backoff_in_seconds=10,
     )
-    for idx, entry in enumerate(btc_resp['addresses']):
-        balance = satoshis_to_btc(entry['final_balance'])
-        have_transactions[accounts[idx]] = (entry['n_tx'] != 0, balance)
+    returned = {}
+    for entry in btc_resp['addresses']:
+        balance = satoshis_to_btc(FVal(entry['final_balance']))
+        returned[entry['address']] = (entry['n_tx'] != 0, balance)
 
-    return have_transactions
+    # The addresses are not guaranteed to be returned in the order they were given
+    return {account: returned[account] for account in accounts}
+
+
+def _query_concurrently(
+        source: str,
+        query: Callable[[List[BTCAddress]], AddressesStats],
+        chunks: List[List[BTCAddress]],
+) -> Tuple[AddressesStats, List[Tuple[List[BTCAddress], str]]]:
+    """Runs query for each chunk of addresses in a bounded pool of greenlets
+
+    Returns the merged results of all successful queries and a list of the chunks
+    whose query failed along with the error of each failure.
+    """
+
+    def query_chunk(
+            chunk: List[BTCAddress],
+    ) -> Tuple[List[BTCAddress], Optional[AddressesStats], Optional[str]]:
+        try:
+            return chunk, query(chunk), None
+        except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout,
+                UnableToDecryptRemoteData,
+                RemoteError,
+        ) as e:
+            return chunk, None, str(e)
+        except KeyError as e:
+            return chunk, None, f'Malformed response. Did not find key {str(e)}'
+
+    results: AddressesStats = {}
+    failed = []
+    pool = Pool(BTC_QUERY_POOL_SIZE)
+    for chunk, result, error in pool.imap_unordered(query_chunk, chunks):
+        if result is None:
+            log.warning(
+                'Querying bitcoin addresses failed',
+                source=source,
+                num_addresses=len(chunk),
+                error=error,
+            )
+            failed.append((chunk, str(error)))
+        else:
+            results.update(result)
+
+    return results, failed
 
 
-def have_bitcoin_transactions(accounts: List[BTCAddress]) -> Dict[BTCAddress, Tuple[bool, FVal]]:
+def _query_bitcoin_addresses(accounts: List[BTCAddress]) -> AddressesStats:
+    """Queries whether each of the given addresses has had transactions and its balance
+
+    Bech32 addresses are not supported by blockchain.info's multiaddr so they are
+    queried one by one from blockstream. All other addresses are queried from
+    blockchain.info in chunks of many addresses per query. All queries run
+    concurrently in a bounded pool. If a blockchain.info query fails then its
+    addresses are queried one by one from blockstream instead.
+
+    May raise:
+    - RemoteError if any address could not be queried from any source
+    """
+    bech32_accounts = [x for x in accounts if _is_bech32(x)]
+    other_accounts = [x for x in accounts if not _is_bech32(x)]
+
+    results, failed_blockstream = _query_concurrently(
+        source='blockstream',
+        query=_check_blockstream_for_transactions,
+        chunks=[[x] for x in bech32_accounts],
+    )
+    blockchaininfo_results, failed_blockchaininfo = _query_concurrently(
+        source='blockchain.info',
+        query=_check_blockchaininfo_for_transactions,
+        chunks=[
+            other_accounts[x:x + BLOCKCHAININFO_MULTIADDR_CHUNK_SIZE]
+            for x in range(0, len(other_accounts), BLOCKCHAININFO_MULTIADDR_CHUNK_SIZE)
+        ],
+    )
+    results.update(blockchaininfo_results)
+    if len(failed_blockchaininfo) != 0:
+        fallback_results, failed_fallback = _query_concurrently(
+            source='blockstream',
+            query=_check_blockstream_for_transactions,
+            chunks=[[x] for chunk, _ in failed_blockchaininfo for x in chunk],
+        )
+        results.update(fallback_results)
+        failed_blockstream.extend(failed_fallback)
+
+    if len(failed_blockstream) != 0:
+        raise RemoteError(
+            f'Failed to query {sum(len(x) for x, _ in failed_blockstream)} bitcoin '
+            f'addresses. First error: {failed_blockstream[0][1]}',
+        )
+
+    return results
+
+
+def get_bitcoin_addresses_balances(accounts: List[BTCAddress]) -> Dict[BTCAddress, FVal]:
+    """Queries blockchain.info or blockstream for the balances of accounts
+
+    May raise:
+    - RemotError if there is a problem querying blockchain.info or blockstream
+    """
+    try:
+        stats = _query_bitcoin_addresses(accounts)
+    except RemoteError as e:
+        raise RemoteError(f'bitcoin external API request for balances failed due to {str(e)}') from e  # noqa: E501
+
+    return {account: balance for account, (_, balance) in stats.items()}
+
+
+def have_bitcoin_transactions(accounts: List[BTCAddress]) -> AddressesStats:
     """
     Takes a list of addresses and returns a mapping of which addresses have had transactions
     and also their current balance
@@ -102,22 +174,6 @@ def have_bitcoin_transactions(accounts: List[BTCAddress]) -> Dict[BTCAddress, Tu
     - RemoteError if any of the queried websites fail to be queried
     """
     try:
-        if _have_bc1_accounts(accounts):
-            source = 'blockstream'
-            have_transactions = _check_blockstream_for_transactions(accounts)
-        else:
-            source = 'blockchain.info'
-            have_transactions = _check_blockchaininfo_for_transactions(accounts)
-    except (
-            requests.exceptions.ConnectionError,
-            UnableToDecryptRemoteData,
-            requests.exceptions.Timeout,
-    ) as e:
+        return _query_bitcoin_addresses(accounts)
+    except RemoteError as e:
         raise RemoteError(f'bitcoin external API request for transactions failed due to {str(e)}') from e  # noqa: E501
-    except KeyError as e:
-        raise RemoteError(
-            f'Malformed response when querying bitcoin blockchain via {source}.'
-            f'Did not find key {str(e)}',
-        ) from e
-
-    return have_transactions
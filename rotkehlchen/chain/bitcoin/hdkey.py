@@ -3,9 +3,9 @@
 
 import hashlib
 import hmac
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import List, NamedTuple, Optional, Union, cast
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union, cast
 
 from base58check import b58decode, b58encode
 from coincurve import PrivateKey, PublicKey
@@ -87,22 +87,99 @@ def _parse_prefix(prefix: bytes) -> PrefixParsingResult:
     return result
 
 
+def _public_derivation_mac(pubkey: PublicKey, chain_code: bytes) -> hmac.HMAC:
+    """Returns the HMAC of a parent node that all of its non hardened children share
+
+    Copying it for each child saves keying the HMAC and serializing the parent pubkey
+    """
+    mac = hmac.new(chain_code, digestmod=hashlib.sha512)
+    mac.update(pubkey.format(COMPRESSED_PUBKEY))
+    return mac
+
+
+def _derive_public_child(
+        pubkey: PublicKey,
+        mac: hmac.HMAC,
+        index: int,
+) -> Tuple[PublicKey, bytes, int]:
+    """Derives the non hardened child at index of the given raw parent pubkey
+    using the parent's HMAC as returned by _public_derivation_mac
+
+    Returns the child pubkey, its chain code and its index. If the key at index
+    is invalid the spec says to derive at the next index, so the returned index
+    may be bigger than the given one.
+    """
+    while True:
+        # Data = serP(point(kpar)) || ser32(i))
+        child_mac = mac.copy()
+        child_mac.update(index.to_bytes(4, byteorder='big'))
+        digest = child_mac.digest()
+        try:
+            return pubkey.add(digest[:32]), digest[32:], index
+        except ValueError:
+            # NB: it is possible to derive an "impossible" key. If that
+            # happens the spec says to derive at the next index
+            index += 1
+
+
+def _pubkey_to_address(hint: str, pubkey: bytes) -> BTCAddress:
+    if hint == 'xpub':
+        return pubkey_to_base58_address(pubkey)
+    elif hint == 'ypub':
+        return pubkey_to_p2sh_p2wpkh_address(pubkey)
+    elif hint == 'zpub':
+        return pubkey_to_bech32_address(data=pubkey, witver=0)
+
+    raise AssertionError(f'Unknown hint {hint} ended up in an HDKey')
+
+
 @dataclass(init=True, repr=True, eq=True, order=False, unsafe_hash=False, frozen=True)
 class HDKey():
 
     path: Optional[str]
     network: str
-    depth: Optional[int]
-    parent_fingerprint: Optional[bytes]
-    index: Optional[int]
+    depth: int
+    parent_fingerprint: bytes
+    index: int
     parent: Optional['HDKey']  # forward type reference
-    chain_code: Optional[bytes]
-    fingerprint: bytes
-    xpub: Optional[str]
-    xpriv: Optional[str]
+    chain_code: bytes
     pubkey: PublicKey
     privkey: Optional[PrivateKey]
     hint: str
+    prefix: bytes
+    xpriv: Optional[str] = None
+    # The serialized xpub. Given for keys created from an xpub and only built
+    # when asked for derived keys, since address derivation does not need it
+    given_xpub: Optional[str] = field(default=None, repr=False, compare=False)
+    # Already derived children by index, so that derivation paths sharing parent
+    # nodes don't derive them again
+    children: Dict[int, 'HDKey'] = field(
+        default_factory=dict,
+        init=False,
+        repr=False,
+        compare=False,
+    )
+
+    @property
+    def xpub(self) -> str:
+        if self.given_xpub is None:
+            xpub = bytearray()
+            xpub.extend(self.prefix)
+            xpub.extend([self.depth])
+            xpub.extend(self.parent_fingerprint)
+            xpub.extend(self.index.to_bytes(4, byteorder='big'))
+            xpub.extend(self.chain_code)
+            xpub.extend(self.pubkey.format(COMPRESSED_PUBKEY))
+            checksum = hashlib.sha256(hashlib.sha256(xpub).digest()).digest()[:4]
+            xpub.extend(checksum)
+            # The key is frozen but the serialization is a cache and not part of its value
+            object.__setattr__(self, 'given_xpub', b58encode(bytes(xpub)).decode('ascii'))
+
+        return cast(str, self.given_xpub)
+
+    @property
+    def fingerprint(self) -> bytes:
+        return hash160(self.pubkey.format(COMPRESSED_PUBKEY))[:4]
 
     @staticmethod
     def from_xpub(xpub: str, path: Optional[str] = None) -> 'HDKey':
@@ -141,12 +218,11 @@ class HDKey():
             index=int.from_bytes(xpub_bytes[9:13], byteorder='big'),
             parent=None,
             chain_code=xpub_bytes[13:45],
-            fingerprint=hash160(pubkey.format(COMPRESSED_PUBKEY))[:4],
-            xpriv=None,
-            xpub=xpub,
-            privkey=None,
             pubkey=pubkey,
+            privkey=None,
             hint=result.hint,
+            prefix=xpub_bytes[0:4],
+            given_xpub=xpub,
         )
 
     @staticmethod
@@ -167,68 +243,6 @@ class HDKey():
             return int(str_idx[:-1]) + BIP32_HARDEN
         return int(str_idx)
 
-    def _child_from_xpub(self, index: int, child_xpub: str) -> 'HDKey':
-        """
-        Returns a new HDKey object based on the current object and the new
-            child xpub. Don't call this directly, it's for child derivation.
-        Args:
-            index      (int): the index of the child
-            child_xpub (str): the child's xpub
-        Returns
-            HDKey: the new child object
-        """
-        path: Optional[str]
-        if self.path is not None:
-            path = '{}/{}'.format(self.path, str(index))
-        else:
-            path = None
-        xpub_bytes = b58decode(child_xpub)
-        pubkey = xpub_bytes[45:78]
-
-        result = _parse_prefix(xpub_bytes[0:4])
-        if not result.is_public:
-            raise XPUBError('Given xpub is an extended private key')
-
-        return HDKey(
-            path=path,
-            network=result.network,
-            depth=xpub_bytes[4],
-            parent_fingerprint=xpub_bytes[5:9],
-            index=int.from_bytes(xpub_bytes[9:13], byteorder='big'),
-            parent=self,
-            chain_code=xpub_bytes[13:45],
-            fingerprint=hash160(pubkey)[:4],
-            xpriv=None,
-            xpub=child_xpub,
-            privkey=None,
-            pubkey=PublicKey(pubkey),
-            hint=result.hint,
-        )
-
-    def _make_child_xpub(
-            self,
-            child_pubkey: PublicKey,
-            index: int,
-            chain_code: bytes) -> str:
-        """
-        Makes a child xpub based on the current key and the child key info.
-        Args:
-            child_pubkey (bytes): the child pubkey
-            index          (int): the child index
-            chain_code   (bytes): the child chain code
-        Returns
-            (str): the child xpub
-        """
-        xpub = bytearray()
-
-        xpub.extend(b58decode(cast(str, self.xpub))[0:4])  # prefix
-        xpub.extend([cast(int, self.depth) + 1])               # depth
-        xpub.extend(self.fingerprint)                          # fingerprint
-        xpub.extend(index.to_bytes(4, byteorder='big'))        # index
-        xpub.extend(chain_code)                                # chain_code
-        xpub.extend(child_pubkey.format(COMPRESSED_PUBKEY))    # pubkey (comp)
-        return b58encode(bytes(xpub)).decode('ascii')
-
     @staticmethod
     def _parse_derivation(derivation_path: str) -> List[int]:
         """
@@ -293,61 +307,65 @@ class HDKey():
         Returns:
             (HDKey): the child
         """
-        # TODO: Break up this function
-
         # normalize the index, error if we can't derive the child
         index: int = self._normalize_index(idx)
-        if index >= BIP32_HARDEN and not self.privkey:
+        child = self.children.get(index)
+        if child is not None:
+            return child
+
+        if self.privkey:
+            raise NotImplementedError('Privkeys xpub derivation not implemented in Rotki')
+        if index >= BIP32_HARDEN:
             raise XPUBError('Need private key to derive XPUB hardened children')
 
-        # error if we can't derive a child
-        if not self.chain_code:
-            raise XPUBError('Cannot derive XPUB child without chain_code')
+        child_pubkey, chain_code, child_index = _derive_public_child(
+            pubkey=self.pubkey,
+            mac=_public_derivation_mac(self.pubkey, self.chain_code),
+            index=index,
+        )
+        path: Optional[str]
+        if self.path is not None:
+            path = '{}/{}'.format(self.path, str(child_index))
         else:
-            own_chain_code = self.chain_code
+            path = None
 
-        # start key derivation process
-        data = bytearray()
-        index_as_bytes = index.to_bytes(4, byteorder='big')
-        if index >= BIP32_HARDEN:
-            if not self.privkey:
-                raise XPUBError('Cannot derive XPUB for hardened index without privkey')
-            # Data = 0x00 || ser256(kpar) || ser32(i)
-            # (Note: The 0x00 pads the private key to make it 33 bytes long.)
-            data.extend(b'\x00')
-            data.extend(cast(bytes, self.privkey.secret))
-            data.extend(index_as_bytes)
-        else:
-            # Data = serP(point(kpar)) || ser32(i)).
-            data.extend(self.pubkey.format(COMPRESSED_PUBKEY))
-            data.extend(index_as_bytes)
+        child = HDKey(
+            path=path,
+            network=self.network,
+            depth=self.depth + 1,
+            parent_fingerprint=self.fingerprint,
+            index=child_index,
+            parent=self,
+            chain_code=chain_code,
+            pubkey=child_pubkey,
+            privkey=None,
+            hint=self.hint,
+            prefix=self.prefix,
+        )
+        self.children[index] = child
+        return child
 
-        mac = hmac.new(own_chain_code, digestmod=hashlib.sha512)
-        mac.update(data)
-        digest = mac.digest()  # noqa: E741
-        tweak, chain_code = digest[:32], digest[32:]
-        # end key derivation process
+    def derive_addresses(self, start_index: int, end_index: int) -> List[Tuple[int, BTCAddress]]:
+        """Derives the addresses of the children of the current node in [start_index, end_index)
 
-        try:
-            if self.privkey:
-                raise NotImplementedError('Privkeys xpub derivation not implemented in Rotki')
-                # if we have a private key, give the child a private key
-                # child_privkey = self.privkey.add(tweak)
-                # child_pubkey = PublicKey.from_secret(child_privkey.secret)
-            else:
-                # otherwise, just derive a pubkey
-                child_pubkey = self.pubkey.add(tweak)
-        except ValueError:
-            # NB: it is possible to derive an "impossible" key.
-            #     e.g. the privkey is too high, or is 0
-            #     if that happens, the spec says to derive at the next index
-            return self.derive_child(index + 1)
-
-        # no privkey here so make a new public child
-        child_xpub = self._make_child_xpub(
-            child_pubkey, index=index, chain_code=chain_code,
-        )
-        return self._child_from_xpub(index=index, child_xpub=child_xpub)
+        Works only on the raw public keys and chain code, without creating a node
+        for each child, so it is the fast way to derive many addresses.
+
+        Returns a list of tuples of each child index and its address
+        """
+        if self.privkey:
+            raise NotImplementedError('Privkeys xpub derivation not implemented in Rotki')
+        if end_index > BIP32_HARDEN:
+            raise XPUBError('Need private key to derive XPUB hardened children')
+
+        mac = _public_derivation_mac(self.pubkey, self.chain_code)
+        addresses = []
+        for index in range(start_index, end_index):
+            child_pubkey, _, _ = _derive_public_child(pubkey=self.pubkey, mac=mac, index=index)
+            address = _pubkey_to_address(self.hint, child_pubkey.format(COMPRESSED_PUBKEY))
+            addresses.append((index, address))
+
+        return addresses
 
     def generate_specific_address(self, addr_type: BTCAddressType) -> str:
         if addr_type == BTCAddressType.BASE58:
@@ -361,14 +379,4 @@ class HDKey():
             )
 
     def address(self) -> BTCAddress:
-        if self.hint == 'xpub':
-            return pubkey_to_base58_address(self.pubkey.format(COMPRESSED_PUBKEY))
-        elif self.hint == 'ypub':
-            return pubkey_to_p2sh_p2wpkh_address(self.pubkey.format(COMPRESSED_PUBKEY))
-        elif self.hint == 'zpub':
-            return pubkey_to_bech32_address(
-                data=self.pubkey.format(COMPRESSED_PUBKEY),
-                witver=0,
-            )
-
-        raise AssertionError(f'Unknown hint {self.hint} ended up in an HDKey')
+        return _pubkey_to_address(self.hint, self.pubkey.format(COMPRESSED_PUBKEY))
@@ -1,5 +1,5 @@
 import logging
-from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
 
 from gevent.lock import Semaphore
 
@@ -41,7 +41,7 @@ class XpubData(NamedTuple):
 
     def __hash__(self) -> int:
         """For uniqueness of an xpub we consider xpub + derivation path"""
-        return hash(self.xpub.xpub + (self.derivation_path if self.derivation_path else ''))  # type: ignore  # noqa: E501
+        return hash(self.xpub.xpub + (self.derivation_path if self.derivation_path else ''))  # noqa: E501
 
     def __eq__(self, other: Any) -> bool:
         """For uniqueness of an xpub we consider xpub + derivation path"""
@@ -75,10 +75,7 @@ def _derive_addresses_loop(
     addresses: List[XpubDerivedAddressData] = []
     should_continue = True
     while should_continue:
-        batch_addresses: List[Tuple[int, BTCAddress]] = []
-        for idx in range(step_index, step_index + XPUB_ADDRESS_STEP):
-            child = root.derive_child(idx)
-            batch_addresses.append((idx, child.address()))
+        batch_addresses = root.derive_addresses(step_index, step_index + XPUB_ADDRESS_STEP)
 
         have_tx_mapping = have_bitcoin_transactions([x[1] for x in batch_addresses])
         for idx, address in batch_addresses:
@@ -215,7 +212,7 @@ class XpubManager():
                 ) for x in new_addresses],
             )
         self.db.ensure_xpub_mappings_exist(
-            xpub=xpub_data.xpub.xpub,  # type: ignore
+            xpub=xpub_data.xpub.xpub,
             derivation_path=xpub_data.derivation_path,
             derived_addresses_data=derived_addresses_data,
         )
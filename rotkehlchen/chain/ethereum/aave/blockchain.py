@@ -231,6 +231,7 @@ class AaveBlockchainInquirer(AaveInquirer):
         )
         mint_data = set()
         mint_data_to_log_index = {}
+        mint_timestamps = self.ethereum.get_events_timestamps(mint_events)
         for event in mint_events:
             amount = hexstr_to_int(event['data'])
             if amount == 0:
@@ -238,7 +239,7 @@ class AaveBlockchainInquirer(AaveInquirer):
             entry = (
                 event['blockNumber'],
                 amount,
-                self.ethereum.get_event_timestamp(event),
+                mint_timestamps[event['blockNumber']],
                 event['transactionHash'],
             )
             mint_data.add(entry)
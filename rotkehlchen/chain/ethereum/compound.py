@@ -7,13 +7,18 @@ from typing_extensions import Literal
 
 from rotkehlchen.accounting.structures import Balance
 from rotkehlchen.assets.asset import Asset, EthereumToken
+from rotkehlchen.chain.ethereum.contracts import EthereumContract
 from rotkehlchen.chain.ethereum.graph import Graph, get_common_params
-from rotkehlchen.chain.ethereum.utils import token_normalized_value
+from rotkehlchen.chain.ethereum.utils import (
+    ContractCall,
+    multicall_contract_calls,
+    token_normalized_value,
+)
 from rotkehlchen.chain.ethereum.zerion import GIVEN_DEFI_BALANCES
 from rotkehlchen.constants.ethereum import CTOKEN_ABI, ERC20TOKEN_ABI, EthereumConstants
 from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.db.dbhandler import DBHandler
-from rotkehlchen.errors import BlockchainQueryError, RemoteError, UnknownAsset
+from rotkehlchen.errors import RemoteError, UnknownAsset
 from rotkehlchen.fval import FVal
 from rotkehlchen.history.price import query_usd_price_zero_if_error
 from rotkehlchen.inquirer import Inquirer
@@ -145,21 +150,33 @@ class Compound(EthereumModule):
             method_name='comptrollerImplementation',
         ))
 
-    def _get_apy(self, address: ChecksumEthAddress, supply: bool) -> Optional[FVal]:
-        method_name = 'supplyRatePerBlock' if supply else 'borrowRatePerBlock'
+    def _get_apys(
+            self,
+            markets: List[Tuple[ChecksumEthAddress, bool]],
+    ) -> Dict[Tuple[ChecksumEthAddress, bool], Optional[FVal]]:
+        """Queries the supply or borrow apy of each given cToken and supply flag
 
-        try:
-            rate = self.ethereum.call_contract(
-                contract_address=address,
-                abi=CTOKEN_ABI,
-                method_name=method_name,
-            )
-        except (RemoteError, BlockchainQueryError) as e:
-            log.error(f'Could not query cToken {address} for supply/borrow rate: {str(e)}')
-            return None
+        All rates are queried in as few multicall queries as possible. The apy of
+        a cToken whose rate can't be queried is None.
+        """
+        calls = [
+            ContractCall(
+                contract=EthereumContract(address=address, abi=CTOKEN_ABI, deployed_block=0),
+                method_name='supplyRatePerBlock' if supply else 'borrowRatePerBlock',
+            ) for address, supply in markets
+        ]
+        rates = multicall_contract_calls(self.ethereum, calls, require_success=False)
+        apys: Dict[Tuple[ChecksumEthAddress, bool], Optional[FVal]] = {}
+        for (address, supply), rate in zip(markets, rates):
+            if rate is None:
+                log.error(f'Could not query cToken {address} for supply/borrow rate')
+                apys[(address, supply)] = None
+                continue
+
+            apy = ((FVal(rate) / ETH_MANTISSA * BLOCKS_PER_DAY) + 1) ** (DAYS_PER_YEAR - 1) - 1  # noqa: E501
+            apys[(address, supply)] = apy
 
-        apy = ((FVal(rate) / ETH_MANTISSA * BLOCKS_PER_DAY) + 1) ** (DAYS_PER_YEAR - 1) - 1  # noqa: E501
-        return apy
+        return apys
 
     def get_balances(
             self,
@@ -171,6 +188,9 @@ class Compound(EthereumModule):
         else:
             defi_balances = given_defi_balances()
 
+        # The balance maps and keys of the entries whose apy is queried afterwards
+        # for the cToken and supply flag of the entry
+        apy_entries: List[Tuple[Dict[str, CompoundBalance], str, ChecksumEthAddress, bool]] = []
         for account, balance_entries in defi_balances.items():
             lending_map = {}
             borrowing_map = {}
@@ -210,7 +230,10 @@ class Compound(EthereumModule):
                     lending_map[underlying_asset.identifier] = CompoundBalance(
                         balance_type=BalanceType.ASSET,
                         balance=balance_entry.underlying_balances[0].balance,
-                        apy=self._get_apy(entry.token_address, supply=True),
+                        apy=None,
+                    )
+                    apy_entries.append(
+                        (lending_map, underlying_asset.identifier, entry.token_address, True),
                     )
                 else:  # 'Debt'
                     try:
@@ -225,7 +248,10 @@ class Compound(EthereumModule):
                     borrowing_map[asset.identifier] = CompoundBalance(
                         balance_type=BalanceType.DEBT,
                         balance=entry.balance,
-                        apy=self._get_apy(ctoken.ethereum_address, supply=False),
+                        apy=None,
+                    )
+                    apy_entries.append(
+                        (borrowing_map, asset.identifier, ctoken.ethereum_address, False),
                     )
 
             if lending_map == {} and borrowing_map == {} and rewards_map == {}:
@@ -237,6 +263,11 @@ class Compound(EthereumModule):
                 'borrowing': borrowing_map,
             }
 
+        markets = list({(address, supply) for _, _, address, supply in apy_entries})
+        apys = self._get_apys(markets)
+        for balances_map, key, address, supply in apy_entries:
+            balances_map[key] = balances_map[key]._replace(apy=apys[(address, supply)])
+
         return compound_balances
 
     def _get_borrow_events(
@@ -483,10 +514,9 @@ class Compound(EthereumModule):
             from_ts: Timestamp,
             to_ts: Timestamp,
     ) -> List[CompoundEvent]:
-        self.ethereum.etherscan.get_blocknumber_by_time(from_ts)
         from_block = max(
             COMP_DEPLOYED_BLOCK,
-            self.ethereum.etherscan.get_blocknumber_by_time(from_ts),
+            self.ethereum.get_blocknumber_by_time(from_ts),
         )
         argument_filters = {
             'from': COMPTROLLER_PROXY.address,
@@ -498,12 +528,13 @@ class Compound(EthereumModule):
             event_name='Transfer',
             argument_filters=argument_filters,
             from_block=from_block,
-            to_block=self.ethereum.etherscan.get_blocknumber_by_time(to_ts),
+            to_block=self.ethereum.get_blocknumber_by_time(to_ts),
         )
 
         events = []
+        timestamps = self.ethereum.get_events_timestamps(comp_events)
         for event in comp_events:
-            timestamp = self.ethereum.get_event_timestamp(event)
+            timestamp = timestamps[event['blockNumber']]
             amount = token_normalized_value(hexstr_to_int(event['data']), A_COMP)
             usd_price = query_usd_price_zero_if_error(
                 asset=A_COMP,
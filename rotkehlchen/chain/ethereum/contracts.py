@@ -1,8 +1,14 @@
-from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple, cast
 
+from eth_typing import HexStr
 from eth_typing.abi import Decodable
+from eth_utils import encode_hex, function_abi_to_4byte_selector
 from web3 import Web3
-from web3._utils.abi import get_abi_output_types
+from web3._utils.abi import get_abi_output_types, get_aligned_abi_inputs, merge_args_and_kwargs
+from web3._utils.contracts import encode_abi, find_matching_event_abi, find_matching_fn_abi
+from web3.contract import Contract
+from web3.types import ABI, ABIEvent, ABIFunction
 
 from rotkehlchen.typing import ChecksumEthAddress
 
@@ -10,6 +16,118 @@ if TYPE_CHECKING:
     from rotkehlchen.chain.ethereum.manager import EthereumManager, NodeName
 
 WEB3 = Web3()
+# Maximum number of compiled contracts kept in memory
+COMPILED_CONTRACTS_CACHE_SIZE = 256
+
+
+class CompiledFunction(NamedTuple):
+    abi: ABIFunction
+    selector: HexStr
+    output_types: List[str]
+
+
+class CompiledContract():
+    """The abi of a contract processed once for repeated encoding and decoding
+
+    Function abis are resolved along with their selectors and output types the
+    first time they are used, and so are event abis. Functions are looked up by
+    name and number of arguments. Overloaded functions with the same number of
+    arguments are resolved from the abi each time, as web3 does.
+    """
+
+    def __init__(self, address: ChecksumEthAddress, abi: List[Dict[str, Any]]) -> None:
+        self.address = address
+        self.abi = abi
+        self.functions: Dict[Tuple[str, int], CompiledFunction] = {}
+        self.events: Dict[str, ABIEvent] = {}
+        # web3 contract objects per web3 instance they are bound to
+        self.web3_contracts: Dict[int, Tuple[Web3, Contract]] = {}
+        self.ambiguous_functions: Set[Tuple[str, int]] = set()
+        seen_signatures = set()
+        for entry in abi:
+            if entry.get('type') != 'function':
+                continue
+            signature = (entry['name'], len(entry.get('inputs', [])))
+            if signature in seen_signatures:
+                self.ambiguous_functions.add(signature)
+            seen_signatures.add(signature)
+
+    def function(self, method_name: str, arguments: Sequence[Any]) -> CompiledFunction:
+        key = (method_name, len(arguments))
+        compiled_function = self.functions.get(key)
+        if compiled_function is not None:
+            return compiled_function
+
+        fn_abi = find_matching_fn_abi(cast(ABI, self.abi), WEB3.codec, method_name, arguments)
+        compiled_function = CompiledFunction(
+            abi=fn_abi,
+            selector=encode_hex(function_abi_to_4byte_selector(fn_abi)),  # type: ignore
+            output_types=get_abi_output_types(fn_abi),
+        )
+        if key not in self.ambiguous_functions:
+            self.functions[key] = compiled_function
+        return compiled_function
+
+    def event(self, event_name: str) -> ABIEvent:
+        event_abi = self.events.get(event_name)
+        if event_abi is None:
+            event_abi = find_matching_event_abi(abi=cast(ABI, self.abi), event_name=event_name)
+            self.events[event_name] = event_abi
+        return event_abi
+
+    def encode(self, method_name: str, arguments: Sequence[Any]) -> str:
+        compiled_function = self.function(method_name, arguments)
+        fn_arguments = merge_args_and_kwargs(compiled_function.abi, arguments, {})
+        _, aligned_arguments = get_aligned_abi_inputs(compiled_function.abi, fn_arguments)
+        return encode_abi(
+            WEB3,
+            compiled_function.abi,
+            aligned_arguments,
+            data=compiled_function.selector,
+        )
+
+    def decode(
+            self,
+            result: Decodable,
+            method_name: str,
+            arguments: Sequence[Any],
+    ) -> Tuple[Any, ...]:
+        compiled_function = self.function(method_name, arguments)
+        return WEB3.codec.decode_abi(compiled_function.output_types, result)
+
+    def web3_contract(self, web3: Web3) -> Contract:
+        """Returns the web3 contract object of this contract for the given web3 instance"""
+        entry = self.web3_contracts.get(id(web3))
+        if entry is None or entry[0] is not web3:
+            entry = (web3, web3.eth.contract(address=self.address, abi=self.abi))
+            self.web3_contracts[id(web3)] = entry
+        return entry[1]
+
+
+_compiled_contracts: 'OrderedDict[Tuple[ChecksumEthAddress, int], CompiledContract]' = OrderedDict()  # noqa: E501
+
+
+def compiled_contract(
+        address: ChecksumEthAddress,
+        abi: List[Dict[str, Any]],
+) -> CompiledContract:
+    """Returns the compiled contract for the given address and abi
+
+    The abis are module level constants, so they are told apart by identity. The
+    compiled contract keeps a reference to its abi so that the identity of a
+    cached abi can't be reused by another object.
+    """
+    key = (address, id(abi))
+    contract = _compiled_contracts.get(key)
+    if contract is None or contract.abi is not abi:
+        contract = CompiledContract(address=address, abi=abi)
+        _compiled_contracts[key] = contract
+        if len(_compiled_contracts) > COMPILED_CONTRACTS_CACHE_SIZE:
+            _compiled_contracts.popitem(last=False)
+    else:
+        _compiled_contracts.move_to_end(key)
+
+    return contract
 
 
 class EthereumContract(NamedTuple):
@@ -33,8 +151,10 @@ class EthereumContract(NamedTuple):
         )
 
     def encode(self, method_name: str, arguments: Optional[List[Any]] = None) -> str:
-        contract = WEB3.eth.contract(address=self.address, abi=self.abi)
-        return contract.encodeABI(method_name, args=arguments if arguments else [])
+        return compiled_contract(self.address, self.abi).encode(
+            method_name=method_name,
+            arguments=arguments if arguments else [],
+        )
 
     def decode(
             self,
@@ -42,10 +162,8 @@ class EthereumContract(NamedTuple):
             method_name: str,
             arguments: Optional[List[Any]] = None,
     ) -> Tuple[Any, ...]:
-        contract = WEB3.eth.contract(address=self.address, abi=self.abi)
-        fn_abi = contract._find_matching_fn_abi(
-            fn_identifier=method_name,
-            args=arguments if arguments else [],
+        return compiled_contract(self.address, self.abi).decode(
+            result=result,
+            method_name=method_name,
+            arguments=arguments if arguments else [],
         )
-        output_types = get_abi_output_types(fn_abi)
-        return WEB3.codec.decode_abi(output_types, result)
@@ -1,7 +1,8 @@
-from typing import TYPE_CHECKING, Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 from eth_utils.address import to_checksum_address
 
+from rotkehlchen.chain.ethereum.utils import ContractCall, multicall_contract_calls
 from rotkehlchen.constants.ethereum import MAKERDAO_PROXY_REGISTRY
 from rotkehlchen.db.dbhandler import DBHandler
 from rotkehlchen.premium.premium import Premium
@@ -58,6 +59,32 @@ class MakerDAOCommon(EthereumModule):
             return to_checksum_address(result)
         return None
 
+    def _get_accounts_proxies(
+            self,
+            addresses: List[ChecksumEthAddress],
+    ) -> Dict[ChecksumEthAddress, ChecksumEthAddress]:
+        """Returns a mapping of the given addresses that have a DSR proxy to their proxies
+
+        The proxies of all addresses are queried in as few multicall queries as possible.
+
+        May raise:
+        - RemoteError if etherscan is used and there is a problem with
+        reaching it or with the returned result.
+        - BlockchainQueryError if an ethereum node is used and the contract call
+        queries fail for some reason
+        """
+        results = multicall_contract_calls(
+            ethereum=self.ethereum,
+            calls=[
+                ContractCall(MAKERDAO_PROXY_REGISTRY, 'proxies', arguments=[address])
+                for address in addresses
+            ],
+        )
+        return {
+            address: to_checksum_address(result)
+            for address, result in zip(addresses, results) if int(result, 16) != 0
+        }
+
     def _get_accounts_having_maker_proxy(self) -> Dict[ChecksumEthAddress, ChecksumEthAddress]:
         """Returns a mapping of accounts that have DSR proxies to their proxies
 
@@ -74,13 +101,8 @@ class MakerDAOCommon(EthereumModule):
         if now - self.last_proxy_mapping_query_ts < MAKERDAO_REQUERY_PERIOD:
             return self.proxy_mappings
 
-        mapping = {}
         accounts = self.database.get_blockchain_accounts()
-        for account in accounts.eth:
-            proxy_result = self._get_account_proxy(account)
-            if proxy_result:
-                mapping[account] = proxy_result
-
+        mapping = self._get_accounts_proxies(accounts.eth)
         self.last_proxy_mapping_query_ts = ts_now()
         self.proxy_mappings = mapping
         return mapping
@@ -13,6 +13,7 @@ from rotkehlchen.chain.ethereum.makerdao.common import (
     RAY,
     MakerDAOCommon,
 )
+from rotkehlchen.chain.ethereum.utils import ContractCall, multicall_contract_calls
 from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.assets import A_DAI
 from rotkehlchen.constants.ethereum import MAKERDAO_DAI_JOIN, MAKERDAO_POT
@@ -169,19 +170,22 @@ class MakerDAODSR(MakerDAOCommon):
                 current_dai_price = Inquirer().find_usd_price(A_DAI)
             except RemoteError:
                 current_dai_price = Price(FVal(1))
-            for account, proxy in proxy_mappings.items():
-                guy_slice = MAKERDAO_POT.call(self.ethereum, 'pie', arguments=[proxy])
+            calls = [ContractCall(MAKERDAO_POT, 'chi'), ContractCall(MAKERDAO_POT, 'dsr')]
+            calls.extend(
+                ContractCall(MAKERDAO_POT, 'pie', arguments=[proxy])
+                for proxy in proxy_mappings.values()
+            )
+            chi, current_dsr, *guy_slices = multicall_contract_calls(self.ethereum, calls)
+            for account, guy_slice in zip(proxy_mappings, guy_slices):
                 if guy_slice == 0:
                     # no current DSR balance for this proxy
                     continue
-                chi = MAKERDAO_POT.call(self.ethereum, 'chi')
                 dai_balance = _dsrdai_to_dai(guy_slice * chi)
                 balances[account] = Balance(
                     amount=dai_balance,
                     usd_value=current_dai_price * dai_balance,
                 )
 
-            current_dsr = MAKERDAO_POT.call(self.ethereum, 'dsr')
             # Calculation is from here:
             # https://docs.makerdao.com/smart-contract-modules/rates-module#a-note-on-setting-rates
             current_dsr_percentage = ((FVal(current_dsr / RAY) ** 31622400) % 1) * 100
@@ -264,6 +268,7 @@ class MakerDAODSR(MakerDAOCommon):
             argument_filters=argument_filters,
             from_block=MAKERDAO_POT.deployed_block,
         )
+        join_timestamps = self.ethereum.get_events_timestamps(join_events)
         for join_event in join_events:
             try:
                 wad_val = hexstr_to_int(join_event['topics'][2])
@@ -287,7 +292,7 @@ class MakerDAODSR(MakerDAOCommon):
                 )
                 continue
 
-            timestamp = self.ethereum.get_event_timestamp(join_event)
+            timestamp = join_timestamps[join_event['blockNumber']]
             usd_price = query_usd_price_or_use_default(
                 asset=A_DAI,
                 time=timestamp,
@@ -318,6 +323,7 @@ class MakerDAODSR(MakerDAOCommon):
             argument_filters=argument_filters,
             from_block=MAKERDAO_POT.deployed_block,
         )
+        exit_timestamps = self.ethereum.get_events_timestamps(exit_events)
         for exit_event in exit_events:
             try:
                 wad_val = hexstr_to_int(exit_event['topics'][2])
@@ -341,7 +347,7 @@ class MakerDAODSR(MakerDAOCommon):
                 )
                 continue
 
-            timestamp = self.ethereum.get_event_timestamp(exit_event)
+            timestamp = exit_timestamps[exit_event['blockNumber']]
             usd_price = query_usd_price_or_use_default(
                 asset=A_DAI,
                 time=timestamp,
@@ -490,7 +496,7 @@ class MakerDAODSR(MakerDAOCommon):
             # https://twitter.com/MakerDAO/status/1239270910810411008
             return FVal('1018008449363110619399951035')
 
-        block_number = self.ethereum.etherscan.get_blocknumber_by_time(time)
+        block_number = self.ethereum.get_blocknumber_by_time(time)
         latest_block = self.ethereum.get_latest_block_number()
         blocks_queried = 0
         counter = 1
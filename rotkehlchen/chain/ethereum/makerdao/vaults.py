@@ -1,7 +1,7 @@
 import logging
 from collections import defaultdict
 from enum import Enum
-from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
 
 from eth_utils.address import to_checksum_address
 from gevent.lock import Semaphore
@@ -15,7 +15,12 @@ from rotkehlchen.chain.ethereum.makerdao.common import (
     WAD,
     MakerDAOCommon,
 )
-from rotkehlchen.chain.ethereum.utils import asset_normalized_value, token_normalized_value
+from rotkehlchen.chain.ethereum.utils import (
+    ContractCall,
+    asset_normalized_value,
+    multicall_contract_calls,
+    token_normalized_value,
+)
 from rotkehlchen.constants import ZERO
 from rotkehlchen.constants.assets import (
     A_BAT,
@@ -63,7 +68,7 @@ from rotkehlchen.fval import FVal
 from rotkehlchen.history.price import query_usd_price_or_use_default
 from rotkehlchen.inquirer import Inquirer
 from rotkehlchen.premium.premium import Premium
-from rotkehlchen.typing import ChecksumEthAddress, Timestamp
+from rotkehlchen.typing import ChecksumEthAddress, Price, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.misc import address_to_bytes32, hexstr_to_int, ts_now
 
@@ -72,6 +77,9 @@ if TYPE_CHECKING:
 
 log = logging.getLogger(__name__)
 
+# Gas assumed for a getCdpsAsc call, which iterates all the cdps of a proxy
+GET_CDPS_CALL_GAS = 1000000
+
 
 GEMJOIN_MAPPING = {
     'BAT-A': MAKERDAO_BAT_A_JOIN,
@@ -120,6 +128,11 @@ def _shift_num_right_by(num: int, digits: int) -> int:
     return int(str(num)[:-digits])
 
 
+def _stability_fee_from_jug_ilk(jug_ilk_result: Tuple[int, int]) -> FVal:
+    # jug_ilk_result[0] is the duty variable of the ilks in the contract
+    return FVal(jug_ilk_result[0] / RAY) ** (YEAR_IN_SECONDS) - 1
+
+
 class VaultEventType(Enum):
     DEPOSIT_COLLATERAL = 1
     WITHDRAW_COLLATERAL = 2
@@ -248,37 +261,92 @@ class MakerDAOVaults(MakerDAOCommon):
             return self.ilk_to_stability_fee[ilk]
 
         result = MAKERDAO_JUG.call(self.ethereum, 'ilks', arguments=[ilk])
-        # result[0] is the duty variable of the ilks in the contract
-        stability_fee = FVal(result[0] / RAY) ** (YEAR_IN_SECONDS) - 1
-        return stability_fee
+        return _stability_fee_from_jug_ilk(result)
+
+    def _query_vaults_data(
+            self,
+            cdps: List[Tuple[int, ChecksumEthAddress, ChecksumEthAddress, bytes]],
+    ) -> List[MakerDAOVault]:
+        """Queries the data of the given cdps, each given as identifier, owner, urn and ilk
+
+        The data of all vaults and of their collateral types are queried in as few
+        multicall queries as possible. Vaults of unsupported collateral types are skipped.
+
+        May raise:
+        - RemoteError if etherscan is used and there is a problem with
+        reaching it or with the returned result.
+        - BlockchainQueryError if an ethereum node is used and the contract call
+        queries fail for some reason
+        """
+        supported_cdps = []
+        for identifier, owner, urn, ilk in cdps:
+            collateral_type = ilk.split(b'\0', 1)[0].decode()
+            asset = COLLATERAL_TYPE_MAPPING.get(collateral_type, None)
+            if asset is None:
+                self.msg_aggregator.add_warning(
+                    f'Detected vault with collateral_type {collateral_type}. That '
+                    f'is not yet supported by rotki. Skipping...',
+                )
+                continue
 
-    def _query_vault_data(
+            supported_cdps.append((identifier, owner, urn, ilk))
+
+        if len(supported_cdps) == 0:
+            return []
+
+        ilks = list(dict.fromkeys(ilk for _, _, _, ilk in supported_cdps))
+        calls = [
+            ContractCall(MAKERDAO_VAT, 'urns', arguments=[ilk, urn])
+            for _, _, urn, ilk in supported_cdps
+        ]
+        for ilk in ilks:
+            calls.append(ContractCall(MAKERDAO_VAT, 'ilks', arguments=[ilk]))
+            calls.append(ContractCall(MAKERDAO_SPOT, 'ilks', arguments=[ilk]))
+            calls.append(ContractCall(MAKERDAO_JUG, 'ilks', arguments=[ilk]))
+        results = multicall_contract_calls(self.ethereum, calls)
+
+        ilk_results = {}
+        offset = len(supported_cdps)
+        for idx, ilk in enumerate(ilks):
+            ilk_results[ilk] = results[offset + 3 * idx:offset + 3 * idx + 3]
+        dai_usd_price = Inquirer().find_usd_price(A_DAI)
+        return [
+            self._make_vault(
+                identifier=identifier,
+                owner=owner,
+                urn=urn,
+                ilk=ilk,
+                urn_result=urn_result,
+                vat_ilk_result=ilk_results[ilk][0],
+                spot_ilk_result=ilk_results[ilk][1],
+                jug_ilk_result=ilk_results[ilk][2],
+                dai_usd_price=dai_usd_price,
+            ) for (identifier, owner, urn, ilk), urn_result in zip(supported_cdps, results)
+        ]
+
+    def _make_vault(
             self,
             identifier: int,
             owner: ChecksumEthAddress,
             urn: ChecksumEthAddress,
             ilk: bytes,
-    ) -> Optional[MakerDAOVault]:
+            urn_result: Tuple[int, int],
+            vat_ilk_result: Tuple[int, ...],
+            spot_ilk_result: Tuple[int, int],
+            jug_ilk_result: Tuple[int, int],
+            dai_usd_price: Price,
+    ) -> MakerDAOVault:
+        """Creates a vault from the results of the VAT urns and the VAT, SPOT and JUG ilks calls"""
         collateral_type = ilk.split(b'\0', 1)[0].decode()
-        asset = COLLATERAL_TYPE_MAPPING.get(collateral_type, None)
-        if asset is None:
-            self.msg_aggregator.add_warning(
-                f'Detected vault with collateral_type {collateral_type}. That '
-                f'is not yet supported by rotki. Skipping...',
-            )
-            return None
-
-        result = MAKERDAO_VAT.call(self.ethereum, 'urns', arguments=[ilk, urn])
+        asset = COLLATERAL_TYPE_MAPPING[collateral_type]
         # also known as ink in their contract
-        collateral_amount = FVal(result[0] / WAD)
-        normalized_debt = result[1]  # known as art in their contract
-        result = MAKERDAO_VAT.call(self.ethereum, 'ilks', arguments=[ilk])
-        rate = result[1]  # Accumulated Rates
-        spot = FVal(result[2])  # Price with Safety Margin
+        collateral_amount = FVal(urn_result[0] / WAD)
+        normalized_debt = urn_result[1]  # known as art in their contract
+        rate = vat_ilk_result[1]  # Accumulated Rates
+        spot = FVal(vat_ilk_result[2])  # Price with Safety Margin
         # How many DAI owner needs to pay back to the vault
         debt_value = FVal(((normalized_debt / WAD) * rate) / RAY)
-        result = MAKERDAO_SPOT.call(self.ethereum, 'ilks', arguments=[ilk])
-        mat = result[1]
+        mat = spot_ilk_result[1]
         liquidation_ratio = FVal(mat / RAY)
         price = FVal((spot / RAY) * liquidation_ratio)
         self.usd_price[asset.identifier] = price
@@ -294,7 +362,6 @@ class MakerDAOVaults(MakerDAOCommon):
         else:
             liquidation_price = (debt_value * liquidation_ratio) / collateral_amount
 
-        dai_usd_price = Inquirer().find_usd_price(A_DAI)
         return MakerDAOVault(
             identifier=identifier,
             owner=owner,
@@ -306,7 +373,10 @@ class MakerDAOVaults(MakerDAOCommon):
             collateralization_ratio=collateralization_ratio,
             liquidation_price=liquidation_price,
             urn=urn,
-            stability_fee=self.get_stability_fee(ilk),
+            stability_fee=self.ilk_to_stability_fee.get(
+                ilk,
+                _stability_fee_from_jug_ilk(jug_ilk_result),
+            ),
         )
 
     def _query_vault_details(
@@ -401,6 +471,7 @@ class MakerDAOVaults(MakerDAOCommon):
             from_block=gemjoin.deployed_block,
         ))
         deposit_tx_hashes = set()
+        timestamps = self.ethereum.get_events_timestamps(events)
         for event in events:
             tx_hash = event['transactionHash']
             if tx_hash in deposit_tx_hashes:
@@ -416,7 +487,7 @@ class MakerDAOVaults(MakerDAOCommon):
                 amount=hexstr_to_int(event['topics'][3]),
                 asset=vault.collateral_asset,
             )
-            timestamp = self.ethereum.get_event_timestamp(event)
+            timestamp = timestamps[event['blockNumber']]
             usd_price = query_usd_price_or_use_default(
                 asset=vault.collateral_asset,
                 time=timestamp,
@@ -442,6 +513,7 @@ class MakerDAOVaults(MakerDAOCommon):
             argument_filters=argument_filters,
             from_block=gemjoin.deployed_block,
         )
+        timestamps = self.ethereum.get_events_timestamps(events)
         for event in events:
             tx_hash = event['transactionHash']
             if tx_hash not in frob_event_tx_hashes:
@@ -451,7 +523,7 @@ class MakerDAOVaults(MakerDAOCommon):
                 amount=hexstr_to_int(event['topics'][3]),
                 asset=vault.collateral_asset,
             )
-            timestamp = self.ethereum.get_event_timestamp(event)
+            timestamp = timestamps[event['blockNumber']]
             usd_price = query_usd_price_or_use_default(
                 asset=vault.collateral_asset,
                 time=timestamp,
@@ -482,6 +554,7 @@ class MakerDAOVaults(MakerDAOCommon):
             argument_filters=argument_filters,
             from_block=MAKERDAO_VAT.deployed_block,
         )
+        timestamps = self.ethereum.get_events_timestamps(events)
         for event in events:
             given_amount = _shift_num_right_by(hexstr_to_int(event['topics'][3]), RAY_DIGITS)
             total_dai_wei += given_amount
@@ -489,7 +562,7 @@ class MakerDAOVaults(MakerDAOCommon):
                 token_amount=given_amount,
                 token=A_DAI,
             )
-            timestamp = self.ethereum.get_event_timestamp(event)
+            timestamp = timestamps[event['blockNumber']]
             usd_price = query_usd_price_or_use_default(
                 asset=A_DAI,
                 time=timestamp,
@@ -516,6 +589,7 @@ class MakerDAOVaults(MakerDAOCommon):
             argument_filters=argument_filters,
             from_block=MAKERDAO_DAI_JOIN.deployed_block,
         )
+        timestamps = self.ethereum.get_events_timestamps(events)
         for event in events:
             given_amount = hexstr_to_int(event['topics'][3])
             total_dai_wei -= given_amount
@@ -528,7 +602,7 @@ class MakerDAOVaults(MakerDAOCommon):
                 # withdrawing ETH. So we should ignore these as events
                 continue
 
-            timestamp = self.ethereum.get_event_timestamp(event)
+            timestamp = timestamps[event['blockNumber']]
             usd_price = query_usd_price_or_use_default(
                 asset=A_DAI,
                 time=timestamp,
@@ -554,6 +628,7 @@ class MakerDAOVaults(MakerDAOCommon):
         )
         sum_liquidation_amount = ZERO
         sum_liquidation_usd = ZERO
+        timestamps = self.ethereum.get_events_timestamps(events)
         for event in events:
             if isinstance(event['data'], str):
                 lot = event['data'][:66]
@@ -563,7 +638,7 @@ class MakerDAOVaults(MakerDAOCommon):
                 amount=hexstr_to_int(lot),
                 asset=vault.collateral_asset,
             )
-            timestamp = self.ethereum.get_event_timestamp(event)
+            timestamp = timestamps[event['blockNumber']]
             sum_liquidation_amount += amount
             usd_price = query_usd_price_or_use_default(
                 asset=vault.collateral_asset,
@@ -595,12 +670,14 @@ class MakerDAOVaults(MakerDAOCommon):
             events=vault_events,
         )
 
-    def _get_vaults_of_address(
+    def _get_vaults_of_addresses(
             self,
-            user_address: ChecksumEthAddress,
-            proxy_address: ChecksumEthAddress,
+            proxy_mappings: Dict[ChecksumEthAddress, ChecksumEthAddress],
     ) -> List[MakerDAOVault]:
-        """Gets the vaults of a single address
+        """Gets the vaults of the given addresses, owned by their given proxies
+
+        The cdps of all proxies and then the data of all the vaults are queried
+        in as few multicall queries as possible.
 
         May raise:
         - RemoteError if etherscan is used and there is a problem with
@@ -608,24 +685,25 @@ class MakerDAOVaults(MakerDAOCommon):
         - BlockchainQueryError if an ethereum node is used and the contract call
         queries fail for some reason
         """
-        result = MAKERDAO_GET_CDPS.call(
+        results = multicall_contract_calls(
             ethereum=self.ethereum,
-            method_name='getCdpsAsc',
-            arguments=[MAKERDAO_CDP_MANAGER.address, proxy_address],
+            calls=[
+                ContractCall(
+                    contract=MAKERDAO_GET_CDPS,
+                    method_name='getCdpsAsc',
+                    arguments=[MAKERDAO_CDP_MANAGER.address, proxy_address],
+                    gas=GET_CDPS_CALL_GAS,
+                ) for proxy_address in proxy_mappings.values()
+            ],
         )
+        cdps = []
+        for user_address, result in zip(proxy_mappings, results):
+            for identifier, urn, ilk in zip(*result):
+                cdps.append((identifier, user_address, to_checksum_address(urn), ilk))
 
-        vaults = []
-        for idx, identifier in enumerate(result[0]):
-            urn = to_checksum_address(result[1][idx])
-            vault = self._query_vault_data(
-                identifier=identifier,
-                owner=user_address,
-                urn=urn,
-                ilk=result[2][idx],
-            )
-            if vault:
-                vaults.append(vault)
-                self.vault_mappings[user_address].append(vault)
+        vaults = self._query_vaults_data(cdps)
+        for vault in vaults:
+            self.vault_mappings[vault.owner].append(vault)
 
         return vaults
 
@@ -653,12 +731,7 @@ class MakerDAOVaults(MakerDAOCommon):
         with self.lock:
             self.vault_mappings = defaultdict(list)
             proxy_mappings = self._get_accounts_having_maker_proxy()
-            vaults = []
-            for user_address, proxy in proxy_mappings.items():
-                vaults.extend(
-                    self._get_vaults_of_address(user_address=user_address, proxy_address=proxy),
-                )
-
+            vaults = self._get_vaults_of_addresses(proxy_mappings)
             self.last_vault_mapping_query_ts = ts_now()
             # Returns vaults sorted. Oldest identifier first
             vaults.sort(key=lambda vault: vault.identifier)
@@ -721,7 +794,7 @@ class MakerDAOVaults(MakerDAOCommon):
         proxy_address = self.proxy_mappings.get(address)
         if proxy_address:
             # get any vaults the proxy owns
-            self._get_vaults_of_address(user_address=address, proxy_address=proxy_address)
+            self._get_vaults_of_addresses({address: proxy_address})
 
     def on_account_removal(self, address: ChecksumEthAddress) -> None:
         super().on_account_removal(address)
@@ -1,7 +1,9 @@
+import hashlib
+import json
 import logging
 import random
 from enum import Enum
-from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union, cast
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union, cast
 from urllib.parse import urlparse
 
 import requests
@@ -11,17 +13,19 @@ from ens.main import ENS_MAINNET_ADDR
 from ens.utils import is_none_or_zero_address, normal_name_to_hash, normalize_name
 from eth_typing import BlockNumber
 from eth_utils.address import to_checksum_address
+from gevent.pool import Pool
 from typing_extensions import Literal
 from web3 import HTTPProvider, Web3
-from web3._utils.abi import get_abi_output_types
-from web3._utils.contracts import find_matching_event_abi
 from web3._utils.filters import construct_event_filter_params
 from web3.datastructures import MutableAttributeDict
 from web3.middleware.exception_retry_request import http_retry_request_middleware
+from web3.types import FilterParams
 
+from rotkehlchen.chain.ethereum.contracts import WEB3, compiled_contract
 from rotkehlchen.chain.ethereum.transactions import EthTransactions
 from rotkehlchen.constants.ethereum import ETH_SCAN
 from rotkehlchen.db.dbhandler import DBHandler
+from rotkehlchen.db.ranges import DBQueryRanges
 from rotkehlchen.errors import (
     BlockchainQueryError,
     DeserializationError,
@@ -42,6 +46,13 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 DEFAULT_ETH_RPC_TIMEOUT = 10
+# Logs of the latest blocks are not cached since those blocks may still be reorganized
+LOGS_CACHE_CONFIRMATIONS = 12
+# Timestamp of block 1. Block 0, the genesis block, has a timestamp of 0
+BLOCK_1_TIMESTAMP = 1438269988
+# Max number of blocks to query when searching for the block of a timestamp
+MAX_BLOCK_SEARCH_QUERIES = 10
+BLOCK_QUERY_POOL_SIZE = 4
 
 
 def _is_synchronized(current_block: int, latest_block: int) -> Tuple[bool, str]:
@@ -136,6 +147,7 @@ class EthereumManager():
         self.web3_mapping: Dict[NodeName, Web3] = {}
         self.own_rpc_endpoint = ethrpc_endpoint
         self.etherscan = etherscan
+        self.database = database
         self.msg_aggregator = msg_aggregator
         self.eth_rpc_timeout = eth_rpc_timeout
         self.transactions = EthTransactions(
@@ -399,11 +411,131 @@ class EthereumManager():
             num: int,
             call_order: Optional[Sequence[NodeName]] = None,
     ) -> Dict[str, Any]:
-        return self.query(
+        block_data = self.query(
             method=self._get_block_by_number,
             call_order=call_order if call_order is not None else self.default_call_order(),
             num=num,
         )
+        self.database.add_ethereum_blocks([(num, Timestamp(block_data['timestamp']))])
+        return block_data
+
+    def get_blocks_timestamps(self, block_numbers: Iterable[int]) -> Dict[int, Timestamp]:
+        """Returns a mapping of each of the given block numbers to its timestamp
+
+        The timestamps are read from the blocks index of the DB and only the blocks
+        that are missing from it are queried, each of them once, and then added to it.
+
+        May raise:
+        - RemoteError if an external service such as Etherscan is queried and
+        there is a problem with its query.
+        """
+        unique_block_numbers = list(set(block_numbers))
+        timestamps = self.database.get_ethereum_blocks_timestamps(unique_block_numbers)
+        missing_block_numbers = [x for x in unique_block_numbers if x not in timestamps]
+        if len(missing_block_numbers) == 0:
+            return timestamps
+
+        pool = Pool(BLOCK_QUERY_POOL_SIZE)
+        new_blocks = list(pool.imap_unordered(self._query_block, missing_block_numbers))
+        self.database.add_ethereum_blocks(new_blocks)
+        timestamps.update(new_blocks)
+        return timestamps
+
+    def _query_block(self, num: int) -> Tuple[int, Timestamp]:
+        """Queries the block with the given number and returns its number and timestamp
+
+        May raise:
+        - RemoteError if an external service such as Etherscan is queried and
+        there is a problem with its query.
+        """
+        block_data = self.query(
+            method=self._get_block_by_number,
+            call_order=self.default_call_order(),
+            num=num,
+        )
+        return block_data['number'], Timestamp(block_data['timestamp'])
+
+    def get_blocknumber_by_time(self, ts: Timestamp) -> int:
+        """Returns the number of the latest block mined at or before the given timestamp
+
+        The blocks index of the DB is searched for the blocks closest to the timestamp.
+        Until they are adjacent, the block number is interpolated between them and
+        the block at it is queried to narrow them down. Each queried block is added
+        to the index, in one write when the search ends, so it is used by the next
+        searches. If no web3 node is connected or the search does not finish after
+        MAX_BLOCK_SEARCH_QUERIES block queries, etherscan is asked for the block instead.
+
+        May raise:
+        - RemoteError if an external service such as Etherscan is queried and
+        there is a problem with its query.
+        """
+        if ts < BLOCK_1_TIMESTAMP:
+            return 0
+
+        before, after = self.database.get_ethereum_blocks_around_timestamp(ts)
+        if before is None or before[1] < BLOCK_1_TIMESTAMP:
+            before = (1, Timestamp(BLOCK_1_TIMESTAMP))
+        # Block timestamps are strictly increasing so no other block has this timestamp
+        if before[1] == ts:
+            return before[0]
+        if after is not None and after[0] - before[0] == 1:
+            return before[0]
+        if not self.connected_to_any_web3():
+            return self.etherscan.get_blocknumber_by_time(ts)
+
+        new_blocks: List[Tuple[int, Timestamp]] = []
+        try:
+            return self._search_blocknumber_by_time(
+                ts=ts,
+                before=before,
+                after=after,
+                new_blocks=new_blocks,
+            )
+        finally:
+            if len(new_blocks) != 0:
+                self.database.add_ethereum_blocks(new_blocks)
+
+    def _search_blocknumber_by_time(
+            self,
+            ts: Timestamp,
+            before: Tuple[int, Timestamp],
+            after: Optional[Tuple[int, Timestamp]],
+            new_blocks: List[Tuple[int, Timestamp]],
+    ) -> int:
+        """Interpolates the block of the given timestamp between the given blocks
+
+        Each queried block is appended to new_blocks.
+
+        May raise:
+        - RemoteError if an external service such as Etherscan is queried and
+        there is a problem with its query.
+        """
+        if after is None:
+            latest_block = self._query_block(self.get_latest_block_number())
+            new_blocks.append(latest_block)
+            if latest_block[1] <= ts:
+                return latest_block[0]
+            after = latest_block
+
+        for _ in range(MAX_BLOCK_SEARCH_QUERIES):
+            if after[0] - before[0] <= 1:
+                return before[0]
+
+            block_number = before[0] + (
+                (ts - before[1]) * (after[0] - before[0]) // (after[1] - before[1])
+            )
+            # Always narrow the range down, even if the estimate falls on its edges
+            block_number = min(max(block_number, before[0] + 1), after[0] - 1)
+            block = self._query_block(block_number)
+            new_blocks.append(block)
+            if block[1] <= ts:
+                before = block
+            else:
+                after = block
+
+        if after[0] - before[0] <= 1:
+            return before[0]
+        return self.etherscan.get_blocknumber_by_time(ts)
 
     def _get_block_by_number(self, web3: Optional[Web3], num: int) -> Dict[str, Any]:
         """Returns the block object corresponding to the given block number
@@ -497,9 +629,8 @@ class EthereumManager():
         - RemoteError if there is a problem with
         reaching etherscan or with the returned result
         """
-        web3 = Web3()
-        contract = web3.eth.contract(address=contract_address, abi=abi)
-        input_data = contract.encodeABI(method_name, args=arguments if arguments else [])
+        contract = compiled_contract(contract_address, abi)
+        input_data = contract.encode(method_name, arguments=arguments if arguments else [])
         result = self.etherscan.eth_call(
             to_address=contract_address,
             input_data=input_data,
@@ -510,12 +641,11 @@ class EthereumManager():
                 f'with arguments: {str(arguments)} via etherscan. Returned 0x result',
             )
 
-        fn_abi = contract._find_matching_fn_abi(
-            fn_identifier=method_name,
-            args=arguments,
+        output_data = contract.decode(
+            result=bytes.fromhex(result[2:]),
+            method_name=method_name,
+            arguments=arguments if arguments else [],
         )
-        output_types = get_abi_output_types(fn_abi)
-        output_data = web3.codec.decode_abi(output_types, bytes.fromhex(result[2:]))
 
         if len(output_data) == 1:
             return output_data[0]
@@ -604,7 +734,7 @@ class EthereumManager():
                 arguments=arguments,
             )
 
-        contract = web3.eth.contract(address=contract_address, abi=abi)
+        contract = compiled_contract(contract_address, abi).web3_contract(web3)
         try:
             method = getattr(contract.caller, method_name)
             result = method(*arguments if arguments else [])
@@ -624,16 +754,120 @@ class EthereumManager():
             to_block: Union[int, Literal['latest']] = 'latest',
             call_order: Sequence[NodeName] = (NodeName.OWN, NodeName.ETHERSCAN),
     ) -> List[Dict[str, Any]]:
-        return self.query(
-            method=self._get_logs,
-            call_order=call_order,
+        """Queries logs of an ethereum contract
+
+        The logs of each contract and topics filter are cached in the DB along with
+        the range of blocks they have been queried for, so that only the blocks
+        outside of that range are queried. Logs of the latest
+        LOGS_CACHE_CONFIRMATIONS blocks are not cached since they can still be
+        reorganized. The latest block is only queried if to_block is 'latest' or
+        may be one of those blocks according to the blocks index.
+
+        May raise:
+        - RemoteError if etherscan is used and there is a problem with
+        reaching it or with the returned result
+        """
+        filter_args = self._event_filter_args(
             contract_address=contract_address,
             abi=abi,
             event_name=event_name,
             argument_filters=argument_filters,
-            from_block=from_block,
-            to_block=to_block,
         )
+        filter_digest = hashlib.sha256(
+            f'{contract_address}{json.dumps(filter_args["topics"])}'.encode(),
+        ).hexdigest()
+        range_name = f'ethlogs_{filter_digest}'
+        if to_block == 'latest':
+            latest_block = self.get_latest_block_number(call_order=call_order)
+            until_block = latest_block
+        else:
+            until_block = to_block
+            known_block = self.database.get_ethereum_blocks_max_number()
+            if known_block is None or until_block > known_block - LOGS_CACHE_CONFIRMATIONS:
+                latest_block = self.get_latest_block_number(call_order=call_order)
+            else:
+                latest_block = known_block
+        cache_until_block = min(until_block, latest_block - LOGS_CACHE_CONFIRMATIONS)
+
+        events: List[Dict[str, Any]] = []
+        if from_block <= cache_until_block:
+            query_ranges = DBQueryRanges(self.database)
+            ranges_to_query = query_ranges.get_block_query_ranges(
+                name=range_name,
+                from_block=from_block,
+                to_block=cache_until_block,
+            )
+            for start_block, end_block in ranges_to_query:
+                new_events = self.query(
+                    method=self._get_logs,
+                    call_order=call_order,
+                    contract_address=contract_address,
+                    abi=abi,
+                    event_name=event_name,
+                    argument_filters=argument_filters,
+                    from_block=start_block,
+                    to_block=end_block,
+                )
+                self.database.add_ethereum_logs(
+                    filter_digest=filter_digest,
+                    logs=new_events,
+                    commit=False,
+                )
+                # Events from etherscan contain their block timestamp
+                self.database.add_ethereum_blocks(
+                    [
+                        (event['blockNumber'], Timestamp(event['timeStamp']))
+                        for event in new_events if 'timeStamp' in event
+                    ],
+                    commit=False,
+                )
+
+            # Commits the logs and blocks of all the queried ranges at once
+            query_ranges.update_used_block_query_range(
+                name=range_name,
+                from_block=from_block,
+                to_block=cache_until_block,
+                ranges_to_query=ranges_to_query,
+            )
+            events = self.database.get_ethereum_logs(
+                filter_digest=filter_digest,
+                from_block=from_block,
+                to_block=cache_until_block,
+            )
+
+        start_block = max(from_block, cache_until_block + 1)
+        if start_block <= until_block:
+            events.extend(self.query(
+                method=self._get_logs,
+                call_order=call_order,
+                contract_address=contract_address,
+                abi=abi,
+                event_name=event_name,
+                argument_filters=argument_filters,
+                from_block=start_block,
+                to_block=until_block,
+            ))
+
+        return events
+
+    @staticmethod
+    def _event_filter_args(
+            contract_address: ChecksumEthAddress,
+            abi: List,
+            event_name: str,
+            argument_filters: Dict[str, Any],
+    ) -> FilterParams:
+        event_abi = compiled_contract(contract_address, abi).event(event_name)
+        _, filter_args = construct_event_filter_params(
+            event_abi=event_abi,
+            abi_codec=WEB3.codec,
+            contract_address=contract_address,
+            argument_filters=argument_filters,
+        )
+        if event_abi['anonymous']:
+            # web3.py does not handle the anonymous events correctly and adds the first topic
+            filter_args['topics'] = filter_args['topics'][1:]
+        return filter_args
 
     def _get_logs(
             self,
@@ -651,18 +885,12 @@ class EthereumManager():
         - RemoteError if etherscan is used and there is a problem with
         reaching it or with the returned result
         """
-        event_abi = find_matching_event_abi(abi=abi, event_name=event_name)
-        _, filter_args = construct_event_filter_params(
-            event_abi=event_abi,
-            abi_codec=Web3().codec,
+        filter_args = self._event_filter_args(
             contract_address=contract_address,
+            abi=abi,
+            event_name=event_name,
             argument_filters=argument_filters,
-            fromBlock=from_block,
-            toBlock=to_block,
         )
-        if event_abi['anonymous']:
-            # web3.py does not handle the anonymous events correctly and adds the first topic
-            filter_args['topics'] = filter_args['topics'][1:]
         events: List[Dict[str, Any]] = []
         start_block = from_block
         if web3 is not None:
@@ -760,5 +988,19 @@ class EthereumManager():
 
         # event from web3
         block_number = event['blockNumber']
-        block_data = self.get_block_by_number(block_number)
-        return Timestamp(block_data['timestamp'])
+        return self.get_blocks_timestamps([block_number])[block_number]
+
+    def get_events_timestamps(self, events: List[Dict[str, Any]]) -> Dict[int, Timestamp]:
+        """Same as get_event_timestamp but for many events at once
+
+        Returns a mapping of the block number of each event to its timestamp. The
+        blocks of all web3 events are looked up in one go.
+        """
+        timestamps = {
+            event['blockNumber']: Timestamp(event['timeStamp'])
+            for event in events if 'timeStamp' in event
+        }
+        timestamps.update(self.get_blocks_timestamps(
+            event['blockNumber'] for event in events if 'timeStamp' not in event
+        ))
+        return timestamps
@@ -1,7 +1,10 @@
 import logging
 import random
 from collections import defaultdict
-from typing import Dict, List, Optional, Sequence, Tuple
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from gevent.pool import Pool
 
 from rotkehlchen.assets.asset import EthereumToken
 from rotkehlchen.assets.resolver import AssetResolver
@@ -54,6 +57,17 @@ TokensReturn = Tuple[
 
 ETHERSCAN_MAX_TOKEN_CHUNK_LENGTH = 120
 OTHER_MAX_TOKEN_CHUNK_LENGTH = 590
+# How many accounts are queried for a chunk of tokens in a single call. With
+# etherscan the accounts also take up part of the request uri length. With other
+# nodes the gas of a call grows with the number of balances it queries, so
+# 3 * 590 balances stay well below the gas a node gives to a single call.
+ETHERSCAN_MAX_ACCOUNTS_PER_CALL = 10
+OTHER_MAX_ACCOUNTS_PER_CALL = 3
+# How many token balance or price queries run at the same time
+TOKEN_QUERY_POOL_SIZE = 4
+
+# Token balances of accounts keyed by token identifier as returned by the queries
+AccountsTokenBalances = Dict[ChecksumEthAddress, Dict[str, FVal]]
 
 
 class EthTokens():
@@ -62,43 +76,72 @@ class EthTokens():
         self.db = database
         self.ethereum = ethereum
 
-    def detect_tokens_for_address(
+    def _detection_call_order(self) -> Sequence[NodeName]:
+        """Returns the nodes to query for a token detection call
+
+        Open nodes are randomly ordered for each call so that concurrent calls
+        are spread over them.
+        """
+        if not self.ethereum.connected_to_any_web3():
+            return (NodeName.ETHERSCAN,)
+
+        call_order = []
+        if NodeName.OWN in self.ethereum.web3_mapping:
+            call_order = [NodeName.OWN]
+        return call_order + random.sample(
+            (NodeName.MYCRYPTO, NodeName.BLOCKSCOUT, NodeName.AVADO_POOL),
+            3,
+        )
+
+    def _detection_queries(
             self,
-            address: ChecksumEthAddress,
-            token_usd_price: Dict[EthereumToken, Price],
-            etherscan_chunks: List[List[EthTokenInfo]],
-            other_chunks: List[List[EthTokenInfo]],
-    ) -> Dict[EthereumToken, FVal]:
-        balances: Dict[EthereumToken, FVal] = defaultdict(FVal)
+            addresses: List[ChecksumEthAddress],
+    ) -> List[Callable[[], AccountsTokenBalances]]:
+        """Returns the queries of the balances of all known tokens for the given addresses
+
+        Each query is for a chunk of the tokens and many of the addresses at once.
+        """
         if self.ethereum.connected_to_any_web3():
-            call_order = []
-            if NodeName.OWN in self.ethereum.web3_mapping:
-                call_order = [NodeName.OWN]
-            for chunk in other_chunks:
-                self._get_tokens_balance_and_price(
-                    address=address,
-                    tokens=chunk,
-                    balances=balances,
-                    token_usd_price=token_usd_price,
-                    call_order=call_order + random.sample(
-                        (NodeName.MYCRYPTO, NodeName.BLOCKSCOUT, NodeName.AVADO_POOL),
-                        3,
-                    ),
-                )
+            accounts_per_call = OTHER_MAX_ACCOUNTS_PER_CALL
+            tokens_per_call = OTHER_MAX_TOKEN_CHUNK_LENGTH
         else:
-            for chunk in etherscan_chunks:
-                self._get_tokens_balance_and_price(
-                    address=address,
-                    tokens=chunk,
-                    balances=balances,
-                    token_usd_price=token_usd_price,
-                    call_order=(NodeName.ETHERSCAN,),
-                )
+            accounts_per_call = ETHERSCAN_MAX_ACCOUNTS_PER_CALL
+            # With etherscan with chunks > 120, we get request uri too large
+            # so the limitation is not in the gas, but in the request uri length.
+            # The queried accounts are also part of the uri.
+            tokens_per_call = ETHERSCAN_MAX_TOKEN_CHUNK_LENGTH - accounts_per_call
 
-        # now that detection happened we also have to save it in the DB for the address
-        self.db.save_tokens_for_address(address, list(balances.keys()))
+        all_tokens = AssetResolver().get_all_eth_token_info()
+        return [
+            partial(
+                self._get_multitoken_multiaccount_balance,
+                tokens=tokens_chunk,
+                accounts=accounts_chunk,
+                call_order=self._detection_call_order(),
+            )
+            for accounts_chunk in get_chunks(addresses, n=accounts_per_call)
+            for tokens_chunk in get_chunks(all_tokens, n=tokens_per_call)
+        ]
 
-        return balances
+    def _saved_tokens_query(
+            self,
+            address: ChecksumEthAddress,
+            tokens: List[EthTokenInfo],
+    ) -> AccountsTokenBalances:
+        return {address: self._get_multitoken_account_balance(
+            tokens=tokens,
+            account=address,
+            call_order=None,  # use defaults
+        )}
+
+    @staticmethod
+    def _query_tokens_usd_price(tokens: List[EthereumToken]) -> Dict[EthereumToken, Price]:
+        """Queries the usd price of all of the given tokens at once"""
+        try:
+            prices = Inquirer().find_usd_prices(tokens)
+        except RemoteError:
+            prices = {}
+        return {token: prices.get(token, Price(ZERO)) for token in tokens}
 
     def query_tokens_for_addresses(
             self,
@@ -110,81 +153,59 @@ class EthTokens():
         If an address's tokens were recently autodetected they are not detected again but the
         balances are simply queried. Unless force_detection is True.
 
+        The tokens of all addresses to detect are queried in chunks of many addresses
+        each. All balance queries run concurrently and then the usd price of each
+        found token is queried once.
+
         Returns the token balances of each address and the usd prices of the tokens
         """
         log.debug(
             'Querying/detecting token balances for all addresses',
             force_detection=force_detection,
         )
-        all_tokens = AssetResolver().get_all_eth_token_info()
-        # With etherscan with chunks > 120, we get request uri too large
-        # so the limitation is not in the gas, but in the request uri length
-        etherscan_chunks = list(get_chunks(all_tokens, n=ETHERSCAN_MAX_TOKEN_CHUNK_LENGTH))
-        other_chunks = list(get_chunks(all_tokens, n=OTHER_MAX_TOKEN_CHUNK_LENGTH))
         now = ts_now()
-        token_usd_price: Dict[EthereumToken, Price] = {}
-        result = {}
-
+        detect_addresses = []
+        queries: List[Callable[[], AccountsTokenBalances]] = []
+        result: Dict[ChecksumEthAddress, Dict[EthereumToken, FVal]] = {}
         for address in addresses:
             saved_list = self.db.get_tokens_for_address_if_time(address=address, current_time=now)
             if force_detection or saved_list is None:
-                balances = self.detect_tokens_for_address(
-                    address=address,
-                    token_usd_price=token_usd_price,
-                    etherscan_chunks=etherscan_chunks,
-                    other_chunks=other_chunks,
-                )
+                detect_addresses.append(address)
+            elif len(saved_list) == 0:
+                continue  # Do not query if we know the address has no tokens
             else:
-                if len(saved_list) == 0:
-                    continue  # Do not query if we know the address has no tokens
-
-                balances = defaultdict(FVal)
-                self._get_tokens_balance_and_price(
+                queries.append(partial(
+                    self._saved_tokens_query,
                     address=address,
                     tokens=[x.token_info() for x in saved_list],
-                    balances=balances,
-                    token_usd_price=token_usd_price,
-                    call_order=None,  # use defaults
-                )
+                ))
 
-            result[address] = balances
+            result[address] = defaultdict(FVal)
 
-        return result, token_usd_price
+        queries.extend(self._detection_queries(detect_addresses))
+        pool = Pool(TOKEN_QUERY_POOL_SIZE)
+        for accounts_balances in pool.imap_unordered(lambda query: query(), queries):
+            for account, token_balances in accounts_balances.items():
+                for token_identifier, value in token_balances.items():
+                    result[account][EthereumToken(token_identifier)] += value
 
-    def _get_tokens_balance_and_price(
-            self,
-            address: ChecksumEthAddress,
-            tokens: List[EthTokenInfo],
-            balances: Dict[EthereumToken, FVal],
-            token_usd_price: Dict[EthereumToken, Price],
-            call_order: Optional[Sequence[NodeName]],
-    ) -> None:
-        ret = self._get_multitoken_account_balance(
-            tokens=tokens,
-            account=address,
-            call_order=call_order,
-        )
-        for token_identifier, value in ret.items():
-            token = EthereumToken(token_identifier)
-            balances[token] += value
-            if token in token_usd_price:
-                continue
-            # else get the price
-            try:
-                usd_price = Inquirer().find_usd_price(token)
-            except RemoteError:
-                usd_price = Price(ZERO)
-            token_usd_price[token] = usd_price
+        # now that detection happened we also have to save it in the DB for the addresses
+        for address in detect_addresses:
+            self.db.save_tokens_for_address(address, list(result[address].keys()))
+
+        tokens = list({token for balances in result.values() for token in balances})
+        return result, self._query_tokens_usd_price(tokens)
 
     def _get_multitoken_multiaccount_balance(
             self,
             tokens: List[EthTokenInfo],
             accounts: List[ChecksumEthAddress],
-    ) -> Dict[str, Dict[ChecksumEthAddress, FVal]]:
+            call_order: Optional[Sequence[NodeName]] = None,
+    ) -> AccountsTokenBalances:
         """Queries a list of accounts for balances of multiple tokens
 
-        Return a dictionary with keys being tokens and value a dictionary of
-        account to balances
+        Return a dictionary with keys being accounts and value a dictionary of
+        token identifier to balances. Accounts without any balance are not included.
 
         May raise:
         - RemoteError if an external service such as Etherscan is queried and
@@ -197,17 +218,18 @@ class EthTokens():
             eth_addresses=accounts,
             tokens_num=len(tokens),
         )
-        balances: Dict[str, Dict[ChecksumEthAddress, FVal]] = defaultdict(dict)
+        balances: AccountsTokenBalances = defaultdict(dict)
         result = ETH_SCAN.call(
             ethereum=self.ethereum,
             method_name='tokensBalances',
             arguments=[accounts, [x.address for x in tokens]],
+            call_order=call_order,
         )
         for acc_idx, account in enumerate(accounts):
             for tk_idx, token in enumerate(tokens):
                 token_amount = result[acc_idx][tk_idx]
                 if token_amount != 0:
-                    balances[token.identifier][account] = token_normalized_value(
+                    balances[account][token.identifier] = token_normalized_value(
                         token_amount=token_amount, token=token,
                     )
         return balances
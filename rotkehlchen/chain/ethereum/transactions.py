@@ -1,6 +1,8 @@
 import logging
 from collections import defaultdict
-from typing import Dict, List, Optional, Set
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from gevent.pool import Pool
 
 from rotkehlchen.db.dbhandler import DBHandler
 from rotkehlchen.db.ranges import DBQueryRanges
@@ -15,6 +17,8 @@ logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
 FREE_ETH_TX_LIMIT = 250
+# How many addresses have their transactions queried from etherscan at the same time
+ETH_TX_QUERY_POOL_SIZE = 8
 
 
 class EthTransactions(LockableQueryObject):
@@ -24,32 +28,22 @@ class EthTransactions(LockableQueryObject):
             database: DBHandler,
             etherscan: Etherscan,
             msg_aggregator: MessagesAggregator,
+            pool_size: int = ETH_TX_QUERY_POOL_SIZE,
     ) -> None:
         super().__init__()
         self.database = database
         self.etherscan = etherscan
         self.msg_aggregator = msg_aggregator
+        self.pool_size = pool_size
         self.tx_per_address: Dict[ChecksumEthAddress, int] = defaultdict(int)
 
-    def _single_address_query_transactions(
+    def _query_address_transactions(
             self,
             address: ChecksumEthAddress,
-            start_ts: Timestamp,
-            end_ts: Timestamp,
-            with_limit: bool,
-    ) -> List[EthereumTransaction]:
-        self.tx_per_address[address] = 0
-        transactions = self.database.get_ethereum_transactions(
-            from_ts=start_ts,
-            to_ts=end_ts,
-            address=address,
-        )
-        ranges = DBQueryRanges(self.database)
-        ranges_to_query = ranges.get_location_query_ranges(
-            location_string=f'ethtxs_{address}',
-            start_ts=start_ts,
-            end_ts=end_ts,
-        )
+            ranges_to_query: List[Tuple[Timestamp, Timestamp]],
+    ) -> Tuple[ChecksumEthAddress, List[EthereumTransaction]]:
+        """Queries etherscan for the normal and internal transactions of an address
+        in the given time ranges"""
         new_transactions = []
         for query_start_ts, query_end_ts in ranges_to_query:
             for internal in (False, True):
@@ -69,35 +63,72 @@ class EthTransactions(LockableQueryObject):
                         f'internal: {internal}',
                     )
 
-        # add new transactions to the DB
-        if new_transactions != []:
-            self.database.add_ethereum_transactions(new_transactions, from_etherscan=True)
-            # And since at least for now the increasingly negative nonce for the internal
-            # transactions happens only in the DB writing, requery the entire batch from
-            # the DB to get the updated transactions
-            transactions = self.database.get_ethereum_transactions(
-                from_ts=start_ts,
-                to_ts=end_ts,
-                address=address,
-            )
+        return address, new_transactions
 
-        # and also set the last queried timestamps for the address
-        ranges.update_used_query_range(
-            location_string=f'ethtxs_{address}',
-            start_ts=start_ts,
-            end_ts=end_ts,
-            ranges_to_query=ranges_to_query,
-        )
+    def _sync_transactions(
+            self,
+            accounts: List[ChecksumEthAddress],
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+            progress_callback: Optional[Callable[[str, Any], None]] = None,
+    ) -> None:
+        """Queries etherscan for the transactions of all given accounts that are not yet
+        in the DB and saves them
 
-        if with_limit:
-            transactions_queried_so_far = sum(x for _, x in self.tx_per_address.items())
-            remaining_num_tx = FREE_ETH_TX_LIMIT - transactions_queried_so_far
-            returning_tx_length = min(remaining_num_tx, len(transactions))
-            # Note down how many we got for this address
-            self.tx_per_address[address] = returning_tx_length
-            return transactions[:returning_tx_length]
+        The addresses are queried concurrently and the pace of the etherscan
+        calls is kept by the etherscan rate limiter. The new transactions and
+        the queried range of each address are written in the DB as soon as the
+        address is queried, so that an error in a later address does not lose
+        them. On such an error the queries of the remaining addresses are killed.
 
-        return transactions
+        If progress_callback is given it is called with each address once its
+        transactions are saved and the number of new transactions found for it.
+        """
+        ranges = DBQueryRanges(self.database)
+        ranges_per_address = {}
+        for address in accounts:
+            ranges_to_query = ranges.get_location_query_ranges(
+                location_string=f'ethtxs_{address}',
+                start_ts=start_ts,
+                end_ts=end_ts,
+            )
+            if len(ranges_to_query) != 0:
+                ranges_per_address[address] = ranges_to_query
+
+        pool = Pool(self.pool_size)
+        results = pool.imap_unordered(
+            self._query_address_transactions,
+            ranges_per_address.keys(),
+            ranges_per_address.values(),
+        )
+        try:
+            for idx, (address, address_transactions) in enumerate(results, start=1):
+                log.debug(
+                    'Queried etherscan transactions of address',
+                    address=address,
+                    new_transactions_num=len(address_transactions),
+                    queried_addresses=idx,
+                    total_addresses=len(ranges_per_address),
+                )
+                # add new transactions to the DB
+                if address_transactions != []:
+                    self.database.add_ethereum_transactions(
+                        address_transactions,
+                        from_etherscan=True,
+                    )
+
+                # and also set the last queried timestamps for the address
+                ranges.update_used_query_range(
+                    location_string=f'ethtxs_{address}',
+                    start_ts=start_ts,
+                    end_ts=end_ts,
+                    ranges_to_query=ranges_per_address[address],
+                )
+                if progress_callback is not None:
+                    progress_callback(address, len(address_transactions))
+        except BaseException:
+            pool.kill()
+            raise
 
     @protect_with_lock()
     def query(
@@ -107,10 +138,15 @@ class EthTransactions(LockableQueryObject):
             to_ts: Timestamp,
             with_limit: bool = False,
             recent_first: bool = False,
+            progress_callback: Optional[Callable[[str, Any], None]] = None,
     ) -> List[EthereumTransaction]:
         """Queries for all transactions (normal AND internal) of all ethereum accounts.
         Returns a list of all transactions of all accounts sorted by time.
 
+        The transactions of all accounts that are missing from the DB are first
+        queried concurrently from etherscan and saved in the DB. The progress of
+        that is reported to `progress_callback` as in `_sync_transactions`.
+
         If `with_limit` is true then the api limit is applied
 
         if `recent_first` is true then the transactions are returned with the most
@@ -127,14 +163,30 @@ class EthTransactions(LockableQueryObject):
         else:
             accounts = self.database.get_blockchain_accounts().eth
 
+        self._sync_transactions(
+            accounts=accounts,
+            start_ts=from_ts,
+            end_ts=to_ts,
+            progress_callback=progress_callback,
+        )
+        # Since at least for now the increasingly negative nonce for the internal
+        # transactions happens only in the DB writing, read everything from the DB
         for address in accounts:
-            new_transactions = self._single_address_query_transactions(
+            address_transactions = self.database.get_ethereum_transactions(
+                from_ts=from_ts,
+                to_ts=to_ts,
                 address=address,
-                start_ts=from_ts,
-                end_ts=to_ts,
-                with_limit=with_limit,
             )
-            transactions_set.update(set(new_transactions))
+            self.tx_per_address[address] = 0
+            if with_limit:
+                transactions_queried_so_far = sum(x for _, x in self.tx_per_address.items())
+                remaining_num_tx = FREE_ETH_TX_LIMIT - transactions_queried_so_far
+                returning_tx_length = min(remaining_num_tx, len(address_transactions))
+                # Note down how many we got for this address
+                self.tx_per_address[address] = returning_tx_length
+                address_transactions = address_transactions[:returning_tx_length]
+
+            transactions_set.update(set(address_transactions))
 
         transactions = list(transactions_set)
         transactions.sort(key=lambda tx: tx.timestamp, reverse=recent_first)
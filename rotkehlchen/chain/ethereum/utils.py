@@ -1,15 +1,31 @@
-from typing import TYPE_CHECKING, Any, List, Optional, Sequence, Tuple, Union
+import logging
+from typing import TYPE_CHECKING, Any, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+from eth_abi.exceptions import DecodingError
 
 from rotkehlchen.assets.asset import Asset, EthereumToken
 from rotkehlchen.chain.ethereum.contracts import EthereumContract
 from rotkehlchen.constants.ethereum import ETH_MULTICALL
-from rotkehlchen.errors import UnsupportedAsset
+from rotkehlchen.errors import BlockchainQueryError, RemoteError, UnsupportedAsset
 from rotkehlchen.fval import FVal
+from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import AssetType, ChecksumEthAddress, EthTokenInfo
 
 if TYPE_CHECKING:
     from rotkehlchen.chain.ethereum.manager import EthereumManager, NodeName
 
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# Gas available to all calls of a single multicall query. Nodes cap the gas of an
+# eth_call, by default to the block gas limit, so batches stay below that.
+MULTICALL_BATCH_GAS = 10000000
+# Maximum size in bytes of the call data of a single multicall query. Etherscan
+# takes the data of an eth_call in the query url, whose length is limited.
+MULTICALL_BATCH_DATA_SIZE = 4096
+# Gas a contract read is assumed to use if the caller gives no estimate
+CONTRACT_CALL_GAS = 100000
+
 
 def token_normalized_value_decimals(token_amount: int, token_decimals: int) -> FVal:
     return token_amount / (FVal(10) ** FVal(token_decimals))
@@ -63,3 +79,106 @@ def multicall_specific(
     ) for i in arguments]
     output = multicall(ethereum, calls, call_order)
     return [contract.decode(x, method_name, arguments[0]) for x in output]
+
+
+class ContractCall(NamedTuple):
+    """A contract read to be performed along with others in a multicall query"""
+    contract: EthereumContract
+    method_name: str
+    arguments: Optional[List[Any]] = None
+    # Estimate of the gas the call uses. Only used to size the multicall batches
+    gas: int = CONTRACT_CALL_GAS
+
+
+def _multicall_batches(
+        calls: Sequence[ContractCall],
+) -> List[List[Tuple[int, ContractCall, str]]]:
+    """Packs the index, call and encoded call data of each call into multicall batches"""
+    batches: List[List[Tuple[int, ContractCall, str]]] = []
+    batch: List[Tuple[int, ContractCall, str]] = []
+    batch_gas = batch_size = 0
+    for idx, call in enumerate(calls):
+        data = call.contract.encode(method_name=call.method_name, arguments=call.arguments)
+        # Besides its data each call adds its address, the offset and the
+        # length of its data to the arguments of aggregate
+        size = (len(data) - 2) // 2 + 128
+        if len(batch) != 0 and (
+                batch_gas + call.gas > MULTICALL_BATCH_GAS or
+                batch_size + size > MULTICALL_BATCH_DATA_SIZE
+        ):
+            batches.append(batch)
+            batch = []
+            batch_gas = batch_size = 0
+
+        batch.append((idx, call, data))
+        batch_gas += call.gas
+        batch_size += size
+
+    if len(batch) != 0:
+        batches.append(batch)
+    return batches
+
+
+def multicall_contract_calls(
+        ethereum: 'EthereumManager',
+        calls: Sequence[ContractCall],
+        call_order: Optional[Sequence['NodeName']] = None,
+        require_success: bool = True,
+) -> List[Any]:
+    """Performs the given contract reads in as few multicall queries as possible
+
+    The calls are packed into batches that fit in the gas a node gives to a
+    single eth_call and in the url length etherscan accepts. Returns the result
+    of each call in the order of the given calls, as call_contract would return it.
+
+    The multicall contract reverts if any of its calls reverts. So if the query
+    of a batch fails, or the result of a call can't be decoded, the affected
+    calls are performed one by one. If require_success is False a call that
+    fails this way gives None as its result instead of raising.
+
+    May raise:
+    - RemoteError if require_success is True and a call fails
+    """
+    results: List[Any] = [None] * len(calls)
+    for batch in _multicall_batches(calls):
+        failed = []
+        try:
+            output = multicall(
+                ethereum=ethereum,
+                calls=[(call.contract.address, data) for _, call, data in batch],
+                call_order=call_order,
+            )
+        except RemoteError as e:
+            log.warning(
+                'Multicall query failed. Performing its calls one by one',
+                num_calls=len(batch),
+                error=str(e),
+            )
+            failed = batch
+        else:
+            for entry, result in zip(batch, output):
+                idx, call, _ = entry
+                try:
+                    decoded = call.contract.decode(result, call.method_name, call.arguments)
+                except DecodingError:
+                    failed.append(entry)
+                    continue
+                results[idx] = decoded[0] if len(decoded) == 1 else decoded
+
+        for idx, call, _ in failed:
+            try:
+                results[idx] = call.contract.call(
+                    ethereum=ethereum,
+                    method_name=call.method_name,
+                    arguments=call.arguments,
+                    call_order=call_order,
+                )
+            except (RemoteError, BlockchainQueryError) as e:
+                if require_success:
+                    raise
+                log.warning(
+                    f'Could not call {call.method_name} of contract '
+                    f'{call.contract.address}: {str(e)}',
+                )
+
+    return results
@@ -5,7 +5,11 @@ from gevent.lock import Semaphore
 from rotkehlchen.accounting.structures import Balance
 from rotkehlchen.assets.asset import Asset, EthereumToken
 from rotkehlchen.chain.ethereum.structures import YearnVault, YearnVaultEvent
-from rotkehlchen.chain.ethereum.utils import token_normalized_value
+from rotkehlchen.chain.ethereum.utils import (
+    ContractCall,
+    multicall_contract_calls,
+    token_normalized_value,
+)
 from rotkehlchen.constants.ethereum import (
     ERC20TOKEN_ABI,
     MAX_BLOCKTIME_CACHE,
@@ -171,8 +175,9 @@ class YearnVaults(EthereumModule):
         self.premium = premium
         self.history_lock = Semaphore()
 
-    def _calculate_vault_roi(self, vault: YearnVault) -> FVal:
-        """
+    def _calculate_vaults_roi(self, vaults: List[YearnVault]) -> Dict[str, FVal]:
+        """Returns a mapping of the name of each of the given vaults to its ROI
+
         getPricePerFullShare A @ block X
         getPricePerFullShare B @ block Y
 
@@ -180,21 +185,30 @@ class YearnVaults(EthereumModule):
 
         So the numbers you see displayed on http://yearn.finance/vaults
         are ROI since launch of contract. All vaults start with pricePerFullShare = 1e18
+
+        The price per full share of all vaults is queried in as few multicall
+        queries as possible.
         """
+        if len(vaults) == 0:
+            return {}
+
         now_block_number = self.ethereum.get_latest_block_number()
-        price_per_full_share = self.ethereum.call_contract(
-            contract_address=vault.contract.address,
-            abi=YEARN_DAI_VAULT.abi,  # Any vault ABI will do
-            method_name='getPricePerFullShare',
+        prices_per_full_share = multicall_contract_calls(
+            ethereum=self.ethereum,
+            calls=[ContractCall(vault.contract, 'getPricePerFullShare') for vault in vaults],
         )
-        nominator = price_per_full_share - (10**18)
-        denonimator = now_block_number - vault.contract.deployed_block
-        return FVal(nominator) / FVal(denonimator) * BLOCKS_PER_YEAR / 10**18
+        roi_map = {}
+        for vault, price_per_full_share in zip(vaults, prices_per_full_share):
+            nominator = price_per_full_share - (10**18)
+            denonimator = now_block_number - vault.contract.deployed_block
+            roi_map[vault.name] = FVal(nominator) / FVal(denonimator) * BLOCKS_PER_YEAR / 10**18
+
+        return roi_map
 
     def _get_single_addr_balance(
             self,
             defi_balances: List['DefiProtocolBalances'],
-            roi_cache: Dict[str, FVal],
+            roi_map: Dict[str, FVal],
     ) -> Dict[str, YearnVaultBalance]:
         result = {}
         for balance in defi_balances:
@@ -217,17 +231,12 @@ class YearnVaults(EthereumModule):
                     )
                     continue
 
-                roi = roi_cache.get(underlying_symbol, None)
-                if roi is None:
-                    roi = self._calculate_vault_roi(vault)
-                    roi_cache[underlying_symbol] = roi
-
                 result[vault.name] = YearnVaultBalance(
                     underlying_token=underlying_asset,
                     vault_token=vault_asset,
                     underlying_value=balance.underlying_balances[0].balance,
                     vault_value=balance.base_balance.balance,
-                    roi=roi,
+                    roi=roi_map[vault.name],
                 )
 
         return result
@@ -241,10 +250,19 @@ class YearnVaults(EthereumModule):
         else:
             defi_balances = given_defi_balances()
 
-        roi_cache: Dict[str, FVal] = {}
+        vaults: Dict[str, YearnVault] = {}
+        for balances in defi_balances.values():
+            for balance in balances:
+                if balance.protocol.name != 'yearn.finance • Vaults':
+                    continue
+                vault = YEARN_VAULTS.get(balance.base_balance.token_symbol, None)
+                if vault is not None:
+                    vaults[vault.name] = vault
+
+        roi_map = self._calculate_vaults_roi(list(vaults.values()))
         result = {}
         for address, balances in defi_balances.items():
-            vault_balances = self._get_single_addr_balance(balances, roi_cache)
+            vault_balances = self._get_single_addr_balance(balances, roi_map)
             if len(vault_balances) != 0:
                 result[address] = vault_balances
 
@@ -268,8 +286,9 @@ class YearnVaults(EthereumModule):
             from_block=from_block,
             to_block=to_block,
         )
+        timestamps = self.ethereum.get_events_timestamps(deposit_events)
         for deposit_event in deposit_events:
-            timestamp = self.ethereum.get_event_timestamp(deposit_event)
+            timestamp = timestamps[deposit_event['blockNumber']]
             deposit_amount = token_normalized_value(
                 token_amount=hexstr_to_int(deposit_event['data']),
                 token=vault.underlying_token,
@@ -349,8 +368,9 @@ class YearnVaults(EthereumModule):
             from_block=from_block,
             to_block=to_block,
         )
+        timestamps = self.ethereum.get_events_timestamps(withdraw_events)
         for withdraw_event in withdraw_events:
-            timestamp = self.ethereum.get_event_timestamp(withdraw_event)
+            timestamp = timestamps[withdraw_event['blockNumber']]
             withdraw_amount = token_normalized_value(
                 token_amount=hexstr_to_int(withdraw_event['data']),
                 token=vault.token,
@@ -529,8 +549,8 @@ class YearnVaults(EthereumModule):
             else:
                 defi_balances = given_defi_balances()
 
-            from_block = self.ethereum.etherscan.get_blocknumber_by_time(from_timestamp)
-            to_block = self.ethereum.etherscan.get_blocknumber_by_time(to_timestamp)
+            from_block = self.ethereum.get_blocknumber_by_time(from_timestamp)
+            to_block = self.ethereum.get_blocknumber_by_time(to_timestamp)
             history: Dict[ChecksumEthAddress, Dict[str, YearnVaultHistory]] = {}
 
             for address in addresses:
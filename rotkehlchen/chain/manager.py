@@ -393,10 +393,19 @@ class ChainManager(CacheableObject, LockableQueryObject):
         should_query_eth = not blockchain or blockchain == SupportedBlockchain.ETHEREUM
         should_query_btc = not blockchain or blockchain == SupportedBlockchain.BITCOIN
 
+        # The chains are independent so query them at the same time
+        greenlets = []
         if should_query_eth:
-            self.query_ethereum_balances(force_token_detection=force_token_detection)
+            greenlets.append(gevent.spawn(
+                self.query_ethereum_balances,
+                force_token_detection=force_token_detection,
+            ))
         if should_query_btc:
-            self.query_btc_balances()
+            greenlets.append(gevent.spawn(self.query_btc_balances))
+        gevent.joinall(greenlets)
+        # Re-raise the error of any failed chain query now that all have finished
+        for greenlet in greenlets:
+            greenlet.get()
 
         return self.get_balances_update()
 
@@ -712,6 +721,8 @@ class ChainManager(CacheableObject, LockableQueryObject):
                     blockchain),
             )
 
+        # Any cached balance query result was for the previous set of accounts
+        self.flush_cache('query_balances')
         return self.get_balances_update()
 
     def _query_ethereum_tokens(
@@ -1,40 +1,105 @@
 # flake8: noqa
 
 import json
-import os
+import sqlite3
+from pathlib import Path
 from typing import Any, Dict, List, Optional
 
 from rotkehlchen.chain.ethereum.contracts import EthereumContract
 from rotkehlchen.serialization.deserialize import deserialize_ethereum_address
+from rotkehlchen.utils.data_index import data_index_path, open_data_index
+from rotkehlchen.utils.hashing import file_md5
 
 MAX_BLOCKTIME_CACHE = 250  # 55 mins with 13 secs avg block time
 ZERO_ADDRESS = deserialize_ethereum_address('0x0000000000000000000000000000000000000000')
 AAVE_ETH_RESERVE_ADDRESS = deserialize_ethereum_address('0xEeeeeEeeeEeEeeEeEeEeeEEEeeeeEeeeeeeeEEeE')
 
+DB_CREATE_ETHEREUM_CONSTANTS_INDEX = """
+CREATE TABLE contracts (
+    name TEXT NOT NULL PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE abi_entries (
+    name TEXT NOT NULL PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+def _open_ethereum_constants_index(data_directory: Optional[Path]) -> sqlite3.Connection:
+    """Opens the compiled index of the contracts and abi json files, compiling it if needed
+
+    The index is kept in the data directory, or in memory if there is none yet.
+    """
+    builtin_data_dir = Path(__file__).resolve().parent.parent / 'data'
+    contracts_file = builtin_data_dir / 'eth_contracts.json'
+    abi_file = builtin_data_dir / 'eth_abi.json'
+
+    def compile_constants(conn: sqlite3.Connection) -> None:
+        conn.executescript(DB_CREATE_ETHEREUM_CONSTANTS_INDEX)
+        for table, filepath in (('contracts', contracts_file), ('abi_entries', abi_file)):
+            with open(filepath, 'r') as f:
+                entries = json.loads(f.read())
+            conn.executemany(
+                f'INSERT INTO {table}(name, data) VALUES(?, ?)',
+                [(name, json.dumps(x, separators=(',', ':'))) for name, x in entries.items()],
+            )
+
+    return open_data_index(
+        index_path=data_index_path(data_directory, 'eth_constants'),
+        source_id=f'{file_md5(contracts_file)}|{file_md5(abi_file)}',
+        compile_tables=compile_constants,
+    )
 
 
 class EthereumConstants():
-    __instance = None
-    contracts: Dict[str, Dict[str, Any]] = {}
-    abi_entries: Dict[str, List[Dict[str, Any]]] = {}
+    """Contracts and abi entries of the eth_contracts.json and eth_abi.json files
 
-    def __new__(cls) -> 'EthereumConstants':
-        if EthereumConstants.__instance is not None:
-            return EthereumConstants.__instance  # type: ignore
+    The files are not parsed as a whole. Their compiled index is opened and
+    each entry is read from it only when needed.
 
-        EthereumConstants.__instance = object.__new__(cls)
+    Since the constants are used at import time the index is first compiled in
+    memory. Once a data directory is given it is reopened from there.
+    """
+    __instance: Optional['EthereumConstants'] = None
+    index: sqlite3.Connection
+    in_data_directory: bool = False
 
-        dir_path = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
-        with open(os.path.join(dir_path, 'data', 'eth_contracts.json'), 'r') as f:
-            contracts = json.loads(f.read())
+    def __new__(cls, data_directory: Path = None) -> 'EthereumConstants':
+        if EthereumConstants.__instance is not None:
+            if EthereumConstants.__instance.in_data_directory or data_directory is None:
+                return EthereumConstants.__instance
 
-        with open(os.path.join(dir_path, 'data', 'eth_abi.json'), 'r') as f:
-            abi_entries = json.loads(f.read())
+            # else the index is still in memory
+            EthereumConstants.__instance.index.close()
+        else:
+            # first initialization
+            EthereumConstants.__instance = object.__new__(cls)
 
-        EthereumConstants.__instance.contracts = contracts
-        EthereumConstants.__instance.abi_entries = abi_entries
+        EthereumConstants.__instance.index = _open_ethereum_constants_index(data_directory)
+        EthereumConstants.__instance.in_data_directory = data_directory is not None
         return EthereumConstants.__instance
 
+    def _get_entry(self, table: str, name: str) -> Optional[Any]:
+        result = self.index.execute(f'SELECT data FROM {table} WHERE name=?', (name,)).fetchone()
+        return None if result is None else json.loads(result[0])
+
+    def _get_all_entries(self, table: str) -> Dict[str, Any]:
+        return {
+            name: json.loads(data) for name, data in
+            self.index.execute(f'SELECT name, data FROM {table} ORDER BY rowid')
+        }
+
+    @property
+    def contracts(self) -> Dict[str, Dict[str, Any]]:
+        """All entries of the contracts json file. Not to be used for single lookups"""
+        return self._get_all_entries('contracts')
+
+    @property
+    def abi_entries(self) -> Dict[str, List[Dict[str, Any]]]:
+        """All entries of the abi json file. Not to be used for single lookups"""
+        return self._get_all_entries('abi_entries')
+
     @staticmethod
     def get() -> Dict[str, Dict[str, Any]]:
         return EthereumConstants().contracts
@@ -45,7 +110,7 @@ class EthereumConstants():
 
         Returns None if missing
         """
-        contract = EthereumConstants().contracts.get(name, None)
+        contract = EthereumConstants()._get_entry('contracts', name)
         if contract is None:
             return None
 
@@ -71,7 +136,7 @@ class EthereumConstants():
 
         Returns None if missing
         """
-        return EthereumConstants().abi_entries.get(name, None)
+        return EthereumConstants()._get_entry('abi_entries', name)
 
     @staticmethod
     def abi(name: str) -> List[Dict[str, Any]]:
@@ -16,6 +16,8 @@ EV_DEFI = EventType('defi_event')
 ZERO = FVal(0)
 ONE = FVal(1)
 
+DEFAULT_HISTORICAL_PRICE_MEMO_SIZE = 100000
+
 
 # API URLS
 KRAKEN_BASE_URL = 'https://api.kraken.com'
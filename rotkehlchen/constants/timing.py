@@ -14,3 +14,6 @@ QUERY_RETRY_TIMES = 5
 # By default 10 minutes.
 # TODO: Make configurable!
 CACHE_RESPONSE_FOR_SECS = 600
+# Maximum number of cached api query results kept per object. Least recently
+# used results are evicted first.
+CACHE_RESPONSE_MAX_ENTRIES = 64
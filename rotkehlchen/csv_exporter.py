@@ -1,7 +1,10 @@
 import csv
+import gzip
 import logging
+import shutil
+import tempfile
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple, Union
+from typing import IO, Any, Callable, Dict, List, Optional, Tuple, Union
 
 from rotkehlchen.accounting.structures import DefiEvent
 from rotkehlchen.assets.asset import Asset
@@ -19,7 +22,7 @@ from rotkehlchen.constants import (
 )
 from rotkehlchen.constants.assets import A_ETH
 from rotkehlchen.fval import FVal
-from rotkehlchen.logging import RotkehlchenLogsAdapter, make_sensitive
+from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import AssetMovementCategory, EmptyStr, EventType, Fee, Location, Timestamp
 from rotkehlchen.utils.misc import taxable_gain_for_sell, timestamp_to_date
 
@@ -36,18 +39,60 @@ FILENAME_DEFI_EVENTS_CSV = 'defi_events.csv'
 FILENAME_ALL_CSV = 'all_events.csv'
 
 
-def _dict_to_csv_file(path: Path, dictionary_list: List) -> None:
-    """Takes a filepath and a list of dictionaries representing the rows and writes them
-    into the file as a CSV"""
-    if len(dictionary_list) == 0:
-        log.debug('Skipping writting empty CSV for {}'.format(path))
-        return
+class CSVWriter():
+    """Writes the rows of a CSV file to disk as they are added
+
+    The header is made from the keys of the first row. The file is only
+    created, in the directory returned by get_directory, when the first row is
+    added, so no file is made for a CSV without rows.
+    """
+
+    def __init__(self, filename: str, get_directory: Callable[[], Path]) -> None:
+        self.filename = filename
+        self.path: Optional[Path] = None
+        self.rows = 0
+        self._get_directory = get_directory
+        self._file: Optional[IO[str]] = None
+        self._writer: Optional[csv.DictWriter] = None
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def writerow(self, row: Dict[str, Any]) -> None:
+        if self._writer is None:
+            self.path = self._get_directory() / self.filename
+            self._file = open(self.path, 'w')
+            self._writer = csv.DictWriter(self._file, row.keys())
+            self._writer.writeheader()
+        self._writer.writerow(row)
+        self.rows += 1
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def export(self, path: Path, compress: bool) -> None:
+        """Copies the rows written so far to path, gzip compressed if compress is True
+
+        May raise:
+        - PermissionError if path can't be written to
+        """
+        if self.path is None:
+            log.debug('Skipping writting empty CSV for {}'.format(path))
+            return
+
+        self.flush()
+        if not compress:
+            shutil.copyfile(self.path, path)
+            return
 
-    with open(path, 'w') as f:
-        w = csv.DictWriter(f, dictionary_list[0].keys())
-        w.writeheader()
-        for dic in dictionary_list:
-            w.writerow(dic)
+        with open(self.path, 'rb') as source, gzip.open(path, 'wb') as target:
+            shutil.copyfileobj(source, target)
 
 
 class CSVExporter():
@@ -62,20 +107,71 @@ class CSVExporter():
         self.profit_currency = profit_currency
         self.create_csv = create_csv
         self.all_events: List[Dict[str, Any]] = []
+        self._csv_directory: Optional[tempfile.TemporaryDirectory] = None
         self.reset_csv_lists()
 
     def reset_csv_lists(self) -> None:
-        # TODO: Further specify the types here in more detail. Get rid of "Any"
-        if self.create_csv:
-            self.trades_csv: List[Dict[str, Any]] = []
-            self.loan_profits_csv: List[Dict[str, Any]] = []
-            self.asset_movements_csv: List[Dict[str, Any]] = []
-            self.tx_gas_costs_csv: List[Dict[str, Any]] = []
-            self.margin_positions_csv: List[Dict[str, Any]] = []
-            self.loan_settlements_csv: List[Dict[str, Any]] = []
-            self.defi_events_csv: List[Dict[str, Any]] = []
-            self.all_events_csv: List[Dict[str, Any]] = []
-            self.all_events = []
+        """Starts new CSV files for the rows of the next history processing
+
+        The rows are streamed to files in a temporary directory as they are added
+        so that they don't have to be kept in memory until they are exported. The
+        directory is only created when the first row is added.
+        """
+        if not self.create_csv:
+            return
+
+        self.close()
+        self.trades_csv = CSVWriter(FILENAME_TRADES_CSV, self._get_csv_directory)
+        self.loan_profits_csv = CSVWriter(FILENAME_LOAN_PROFITS_CSV, self._get_csv_directory)
+        self.asset_movements_csv = CSVWriter(
+            FILENAME_ASSET_MOVEMENTS_CSV,
+            self._get_csv_directory,
+        )
+        self.tx_gas_costs_csv = CSVWriter(FILENAME_GAS_CSV, self._get_csv_directory)
+        self.margin_positions_csv = CSVWriter(FILENAME_MARGIN_CSV, self._get_csv_directory)
+        self.loan_settlements_csv = CSVWriter(
+            FILENAME_LOAN_SETTLEMENTS_CSV,
+            self._get_csv_directory,
+        )
+        self.defi_events_csv = CSVWriter(FILENAME_DEFI_EVENTS_CSV, self._get_csv_directory)
+        self.all_events_csv = CSVWriter(FILENAME_ALL_CSV, self._get_csv_directory)
+        self.all_events = []
+
+    def _get_csv_directory(self) -> Path:
+        if self._csv_directory is None:
+            self._csv_directory = tempfile.TemporaryDirectory(prefix='rotki_csv_')
+        return Path(self._csv_directory.name)
+
+    def _csv_writers(self) -> List[CSVWriter]:
+        return [
+            self.trades_csv,
+            self.loan_profits_csv,
+            self.asset_movements_csv,
+            self.tx_gas_costs_csv,
+            self.margin_positions_csv,
+            self.loan_settlements_csv,
+            self.defi_events_csv,
+            self.all_events_csv,
+        ]
+
+    def close_files(self) -> None:
+        """Closes the CSV files of the last history processing once it is done
+
+        The files are kept so that they can still be exported."""
+        if self._csv_directory is None:
+            return
+
+        for writer in self._csv_writers():
+            writer.close()
+
+    def close(self) -> None:
+        """Closes the CSV files of the last history processing and deletes them"""
+        if self._csv_directory is None:
+            return
+
+        self.close_files()
+        self._csv_directory.cleanup()
+        self._csv_directory = None
 
     def add_to_allevents(
             self,
@@ -132,20 +228,27 @@ class CSVExporter():
             'time': timestamp,
             'is_virtual': is_virtual,
         }
-        log.debug('csv event', **make_sensitive(entry))
+        if log.isEnabledFor(logging.DEBUG):
+            log.debug('csv event', sensitive_log=True, **entry)
         self.all_events.append(entry)
-        new_entry = entry.copy()
-        new_entry['net_profit_or_loss'] = net_profit_or_loss_csv
-        new_entry['time'] = timestamp_to_date(timestamp, formatstr='%d/%m/%Y %H:%M:%S')
-        new_entry[f'paid_in_{self.profit_currency.identifier}'] = paid_in_profit_currency
-        key = f'taxable_received_in_{self.profit_currency.identifier}'
-        new_entry[key] = taxable_received_in_profit_currency
-        key = f'taxable_bought_cost_in_{self.profit_currency.identifier}'
-        new_entry[key] = taxable_bought_cost
-        del new_entry['paid_in_profit_currency']
-        del new_entry['taxable_received_in_profit_currency']
-        del new_entry['taxable_bought_cost_in_profit_currency']
-        self.all_events_csv.append(new_entry)
+        # The formulas above refer to the columns of the CSV by their order here
+        self.all_events_csv.writerow({
+            'type': event_type,
+            'location': entry['location'],
+            'paid_asset': exported_paid_asset,
+            'paid_in_asset': paid_in_asset,
+            'taxable_amount': taxable_amount,
+            'received_asset': exported_received_asset,
+            'received_in_asset': received_in_asset,
+            'net_profit_or_loss': net_profit_or_loss_csv,
+            'time': timestamp_to_date(timestamp, formatstr='%d/%m/%Y %H:%M:%S'),
+            'is_virtual': is_virtual,
+            f'paid_in_{self.profit_currency.identifier}': paid_in_profit_currency,
+            f'taxable_received_in_{self.profit_currency.identifier}': (
+                taxable_received_in_profit_currency
+            ),
+            f'taxable_bought_cost_in_{self.profit_currency.identifier}': taxable_bought_cost,
+        })
 
     def add_buy(
             self,
@@ -164,7 +267,7 @@ class CSVExporter():
             return
 
         exchange_rate_key = f'exchanged_asset_{self.profit_currency.identifier}_exchange_rate'
-        self.trades_csv.append({
+        self.trades_csv.writerow({
             'type': 'buy',
             'location': str(location),
             'asset': bought_asset.identifier,
@@ -227,7 +330,7 @@ class CSVExporter():
         )
         row = len(self.trades_csv) + 2
         taxable_profit_formula = '=IF(H{}=0,0,L{}-K{})'.format(row, row, row)
-        self.trades_csv.append({
+        self.trades_csv.writerow({
             'type': 'sell',
             'location': str(location),
             'asset': selling_asset.identifier,
@@ -274,7 +377,7 @@ class CSVExporter():
 
         row = len(self.loan_settlements_csv) + 2
         loss_formula = '=C{}*D{}+E{}'.format(row, row, row)
-        self.loan_settlements_csv.append({
+        self.loan_settlements_csv.writerow({
             'asset': asset.identifier,
             'location': str(location),
             'amount': amount,
@@ -309,7 +412,7 @@ class CSVExporter():
         if not self.create_csv:
             return
 
-        self.loan_profits_csv.append({
+        self.loan_profits_csv.writerow({
             'location': str(location),
             'open_time': timestamp_to_date(open_time, formatstr='%d/%m/%Y %H:%M:%S'),
             'close_time': timestamp_to_date(close_time, formatstr='%d/%m/%Y %H:%M:%S'),
@@ -345,7 +448,7 @@ class CSVExporter():
         # Note:  We are not getting the fee info in here but they are not needed
         # in the final CSV export.
 
-        self.margin_positions_csv.append({
+        self.margin_positions_csv.writerow({
             'name': margin_notes,
             'location': str(location),
             'time': timestamp_to_date(timestamp, formatstr='%d/%m/%Y %H:%M:%S'),
@@ -377,7 +480,7 @@ class CSVExporter():
         if not self.create_csv:
             return
 
-        self.asset_movements_csv.append({
+        self.asset_movements_csv.writerow({
             'time': timestamp_to_date(timestamp, formatstr='%d/%m/%Y %H:%M:%S'),
             'exchange': str(exchange),
             'type': str(category),
@@ -407,7 +510,7 @@ class CSVExporter():
         if not self.create_csv:
             return
 
-        self.tx_gas_costs_csv.append({
+        self.tx_gas_costs_csv.writerow({
             'time': timestamp_to_date(timestamp, formatstr='%d/%m/%Y %H:%M:%S'),
             'transaction_hash': transaction_hash.hex(),
             'eth_burned_as_gas': eth_burned_as_gas,
@@ -429,7 +532,7 @@ class CSVExporter():
         if not self.create_csv:
             return
 
-        self.defi_events_csv.append({
+        self.defi_events_csv.writerow({
             'time': timestamp_to_date(event.timestamp, formatstr='%d/%m/%Y %H:%M:%S'),
             'type': str(event.event_type),
             'asset': str(event.asset),
@@ -466,44 +569,19 @@ class CSVExporter():
             timestamp=event.timestamp,
         )
 
-    def create_files(self, dirpath: Path) -> Tuple[bool, str]:
+    def create_files(self, dirpath: Path, compress: bool = False) -> Tuple[bool, str]:
+        """Exports the CSV files of the last history processing to dirpath
+
+        If compress is True the files are gzip compressed and get a .gz suffix.
+        """
         if not self.create_csv:
             return True, ''
 
+        suffix = '.gz' if compress else ''
         try:
             dirpath.mkdir(parents=True, exist_ok=True)
-            _dict_to_csv_file(
-                dirpath / FILENAME_TRADES_CSV,
-                self.trades_csv,
-            )
-            _dict_to_csv_file(
-                dirpath / FILENAME_LOAN_PROFITS_CSV,
-                self.loan_profits_csv,
-            )
-            _dict_to_csv_file(
-                dirpath / FILENAME_ASSET_MOVEMENTS_CSV,
-                self.asset_movements_csv,
-            )
-            _dict_to_csv_file(
-                dirpath / FILENAME_GAS_CSV,
-                self.tx_gas_costs_csv,
-            )
-            _dict_to_csv_file(
-                dirpath / FILENAME_MARGIN_CSV,
-                self.margin_positions_csv,
-            )
-            _dict_to_csv_file(
-                dirpath / FILENAME_LOAN_SETTLEMENTS_CSV,
-                self.loan_settlements_csv,
-            )
-            _dict_to_csv_file(
-                dirpath / FILENAME_DEFI_EVENTS_CSV,
-                self.defi_events_csv,
-            )
-            _dict_to_csv_file(
-                dirpath / FILENAME_ALL_CSV,
-                self.all_events_csv,
-            )
+            for writer in self._csv_writers():
+                writer.export(dirpath / f'{writer.filename}{suffix}', compress=compress)
         except PermissionError as e:
             return False, str(e)
 
@@ -6,7 +6,7 @@ import shutil
 import tempfile
 from json.decoder import JSONDecodeError
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Sequence, Set, Tuple, Union, cast
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Set, Tuple, Union, cast
 
 from eth_utils import is_checksum_address
 from pysqlcipher3 import dbapi2 as sqlcipher
@@ -105,6 +105,13 @@ KDF_ITER = 64000
 DBINFO_FILENAME = 'dbinfo.json'
 
 DBTupleType = Literal['trade', 'asset_movement', 'margin_position', 'ethereum_transaction']
+# Index of the timestamp at which each type of written tuple is accounted for
+DB_TUPLE_TIMESTAMP_INDEX: Dict[DBTupleType, int] = {
+    'trade': 1,
+    'asset_movement': 3,
+    'margin_position': 3,  # close_time
+    'ethereum_transaction': 1,
+}
 
 
 def _protect_password_sqlcipher(password: str) -> str:
@@ -849,6 +856,7 @@ class DBHandler:
         - {exchange_name}_asset_movements
         - aave_events_{address}
         - yearn_vaults_events_{address}
+        - ethlogs_{filter_digest}
         """
         cursor = self.conn.cursor()
         query = cursor.execute(
@@ -872,6 +880,7 @@ class DBHandler:
 
     def purge_exchange_data(self, exchange_name: str) -> None:
         self.delete_used_query_range_for_exchange(exchange_name)
+        self.invalidate_accounting_checkpoints(from_ts=Timestamp(0), commit=False)
         cursor = self.conn.cursor()
         cursor.execute(
             'DELETE FROM trades WHERE location = ?;',
@@ -892,6 +901,12 @@ class DBHandler:
             ('ethtxs\\_%', '\\'),
         )
         cursor.execute('DELETE FROM ethereum_transactions;')
+        cursor.execute(
+            'DELETE FROM used_query_ranges WHERE name LIKE ? ESCAPE ?;',
+            ('ethlogs\\_%', '\\'),
+        )
+        cursor.execute('DELETE FROM ethereum_logs_cache;')
+        self.invalidate_accounting_checkpoints(from_ts=Timestamp(0), commit=False)
         self.conn.commit()
         self.update_last_write()
 
@@ -905,7 +920,117 @@ class DBHandler:
         self.update_last_write()
 
     def update_used_block_query_range(self, name: str, from_block: int, to_block: int) -> None:
-        self.update_used_query_range(name, from_block, to_block)  # type: ignore
+        """Same as update_used_query_range but for the block ranges of the ethereum
+        logs cache. Since that is only a cache it does not update the last write
+        timestamp of the DB."""
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'INSERT OR REPLACE INTO used_query_ranges(name, start_ts, end_ts) VALUES (?, ?, ?)',
+            (name, str(from_block), str(to_block)),
+        )
+        self.conn.commit()
+
+    def add_ethereum_logs(
+            self,
+            filter_digest: str,
+            logs: List[Dict[str, Any]],
+            commit: bool = True,
+    ) -> None:
+        """Caches the given logs of the ethereum log filter with the given digest
+
+        Logs that are already cached are ignored. The cache does not update the
+        last write timestamp of the DB."""
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            'INSERT OR IGNORE INTO ethereum_logs_cache('
+            'filter_digest, block_number, log_index, log) VALUES (?, ?, ?, ?)',
+            [
+                (filter_digest, entry['blockNumber'], entry['logIndex'], json.dumps(dict(entry)))
+                for entry in logs
+            ],
+        )
+        if commit:
+            self.conn.commit()
+
+    def get_ethereum_logs(
+            self,
+            filter_digest: str,
+            from_block: int,
+            to_block: int,
+    ) -> List[Dict[str, Any]]:
+        """Returns the cached logs of the ethereum log filter with the given digest
+        that are in the given block range, ordered by block and log index"""
+        cursor = self.conn.cursor()
+        query = cursor.execute(
+            'SELECT log FROM ethereum_logs_cache WHERE filter_digest=? AND '
+            'block_number>=? AND block_number<=? ORDER BY block_number, log_index;',
+            (filter_digest, from_block, to_block),
+        )
+        return [json.loads(entry[0]) for entry in query]
+
+    def add_ethereum_blocks(
+            self,
+            blocks: List[Tuple[int, Timestamp]],
+            commit: bool = True,
+    ) -> None:
+        """Adds the given block number and timestamp pairs to the ethereum blocks index
+
+        The index is only a cache of chain data so writing to it does not update
+        the last write timestamp of the DB.
+        """
+        cursor = self.conn.cursor()
+        cursor.executemany(
+            'INSERT OR IGNORE INTO ethereum_blocks(block_number, timestamp) VALUES (?, ?)',
+            blocks,
+        )
+        if commit:
+            self.conn.commit()
+
+    def get_ethereum_blocks_timestamps(self, block_numbers: List[int]) -> Dict[int, Timestamp]:
+        """Returns the timestamps of the given blocks that are in the ethereum blocks index"""
+        cursor = self.conn.cursor()
+        result = {}
+        # Keep the number of bound parameters under the sqlite limit
+        for idx in range(0, len(block_numbers), 500):
+            chunk = block_numbers[idx:idx + 500]
+            query = cursor.execute(
+                f'SELECT block_number, timestamp FROM ethereum_blocks WHERE '
+                f'block_number IN ({",".join("?" * len(chunk))});',
+                chunk,
+            )
+            for block_number, timestamp in query:
+                result[block_number] = Timestamp(timestamp)
+
+        return result
+
+    def get_ethereum_blocks_max_number(self) -> Optional[int]:
+        """Returns the number of the latest block of the ethereum blocks index"""
+        cursor = self.conn.cursor()
+        return cursor.execute('SELECT MAX(block_number) FROM ethereum_blocks;').fetchone()[0]
+
+    def get_ethereum_blocks_around_timestamp(
+            self,
+            timestamp: Timestamp,
+    ) -> Tuple[Optional[Tuple[int, Timestamp]], Optional[Tuple[int, Timestamp]]]:
+        """Returns the blocks of the ethereum blocks index that are closest to the
+        given timestamp, the latest one mined at or before it and the first one
+        mined after it. Each of them is None if there is no such block in the index.
+        """
+        cursor = self.conn.cursor()
+        before = cursor.execute(
+            'SELECT block_number, timestamp FROM ethereum_blocks WHERE timestamp<=? '
+            'ORDER BY timestamp DESC LIMIT 1;',
+            (timestamp,),
+        ).fetchone()
+        after = cursor.execute(
+            'SELECT block_number, timestamp FROM ethereum_blocks WHERE timestamp>? '
+            'ORDER BY timestamp ASC LIMIT 1;',
+            (timestamp,),
+        ).fetchone()
+        return (
+            (before[0], Timestamp(before[1])) if before is not None else None,
+            (after[0], Timestamp(after[1])) if after is not None else None,
+        )
 
     def get_last_balance_save_time(self) -> Timestamp:
         cursor = self.conn.cursor()
@@ -1382,12 +1507,14 @@ class DBHandler:
             **kwargs: Any,
     ) -> None:
         cursor = self.conn.cursor()
+        written_tuples = tuples
         try:
             cursor.executemany(query, tuples)
         except sqlcipher.IntegrityError:  # pylint: disable=no-member
             # That means that one of the tuples hit a constraint, most probably
             # already existing in the DB, in which case we resort to writing them
             # one by one to only reject the duplicates
+            written_tuples = []
 
             nonces_set: Set[int] = set()
             if tuple_type == 'ethereum_transaction':
@@ -1396,6 +1523,7 @@ class DBHandler:
             for entry in tuples:
                 try:
                     cursor.execute(query, entry)
+                    written_tuples.append(entry)
                 except sqlcipher.IntegrityError:  # pylint: disable=no-member
                     if tuple_type == 'ethereum_transaction':
                         nonce = entry[10]
@@ -1422,6 +1550,7 @@ class DBHandler:
                             entry = tuple(entry_list)
                             try:
                                 cursor.execute(query, entry)
+                                written_tuples.append(entry)
                                 # Success so just go to the next entry
                                 continue
                             except sqlcipher.IntegrityError:  # pylint: disable=no-member
@@ -1448,6 +1577,13 @@ class DBHandler:
                 except sqlcipher.InterfaceError:  # pylint: disable=no-member
                     log.critical(f'Interface error with tuple: {entry}')
 
+        if len(written_tuples) != 0:
+            timestamp_index = DB_TUPLE_TIMESTAMP_INDEX[tuple_type]
+            self.invalidate_accounting_checkpoints(
+                from_ts=min(Timestamp(x[timestamp_index]) for x in written_tuples),
+                commit=False,
+            )
+
         self.conn.commit()
         self.update_last_write()
 
@@ -1494,6 +1630,25 @@ class DBHandler:
 
         The returned list is ordered from oldest to newest
         """
+        return list(self.iterate_margin_positions(from_ts=from_ts, to_ts=to_ts, location=location))
+
+    def iterate_margin_positions(
+            self,
+            from_ts: Optional[Timestamp] = None,
+            to_ts: Optional[Timestamp] = None,
+            location: Optional[str] = None,
+            after: Optional[Tuple[Timestamp, str]] = None,
+            recent_first: bool = False,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+    ) -> Iterator[MarginPosition]:
+        """Lazily yields margin positions optionally filtered by time and location
+
+        The positions are ordered by (close_time, id), from oldest to newest unless
+        recent_first is True. They can be paged through either by giving the
+        (close_time, identifier) of the last position of the previous page as after,
+        or by using limit and offset.
+        """
         cursor = self.conn.cursor()
         query = (
             'SELECT id,'
@@ -1509,10 +1664,19 @@ class DBHandler:
         )
         if location is not None:
             query += f'WHERE location="{deserialize_location(location).serialize_for_db()}" '
-        query, bindings = form_query_to_filter_timestamps(query, 'close_time', from_ts, to_ts)
+        query, bindings = form_query_to_filter_timestamps(
+            query=query,
+            timestamp_attribute='close_time',
+            from_ts=from_ts,
+            to_ts=to_ts,
+            id_attribute='id',
+            after=after,
+            recent_first=recent_first,
+            limit=limit,
+            offset=offset,
+        )
         results = cursor.execute(query, bindings)
 
-        margin_positions = []
         for result in results:
             try:
                 if result[2] == '0':
@@ -1542,9 +1706,7 @@ class DBHandler:
                     f'Unknown asset {e.asset_name} found',
                 )
                 continue
-            margin_positions.append(margin)
-
-        return margin_positions
+            yield margin
 
     def add_asset_movements(self, asset_movements: List[AssetMovement]) -> None:
         movement_tuples: List[Tuple[Any, ...]] = []
@@ -1591,6 +1753,28 @@ class DBHandler:
 
         The returned list is ordered from oldest to newest
         """
+        return list(self.iterate_asset_movements(from_ts=from_ts, to_ts=to_ts, location=location))
+
+    def iterate_asset_movements(
+            self,
+            from_ts: Optional[Timestamp] = None,
+            to_ts: Optional[Timestamp] = None,
+            location: Optional[str] = None,
+            after: Optional[Tuple[Timestamp, str]] = None,
+            recent_first: bool = False,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+            locations: Optional[List[str]] = None,
+    ) -> Iterator[AssetMovement]:
+        """Lazily yields asset movements optionally filtered by time and location
+
+        Instead of a single location a list of locations can also be given.
+
+        The movements are ordered by (time, id), from oldest to newest unless
+        recent_first is True. They can be paged through either by giving the
+        (timestamp, identifier) of the last movement of the previous page as after,
+        or by using limit and offset.
+        """
         cursor = self.conn.cursor()
         query = (
             'SELECT id,'
@@ -1607,10 +1791,24 @@ class DBHandler:
         )
         if location is not None:
             query += f'WHERE location="{deserialize_location(location).serialize_for_db()}" '
-        query, bindings = form_query_to_filter_timestamps(query, 'time', from_ts, to_ts)
+        elif locations is not None:
+            db_locations = ','.join(
+                f'"{deserialize_location(x).serialize_for_db()}"' for x in locations
+            )
+            query += f'WHERE location IN ({db_locations}) '
+        query, bindings = form_query_to_filter_timestamps(
+            query=query,
+            timestamp_attribute='time',
+            from_ts=from_ts,
+            to_ts=to_ts,
+            id_attribute='id',
+            after=after,
+            recent_first=recent_first,
+            limit=limit,
+            offset=offset,
+        )
         results = cursor.execute(query, bindings)
 
-        asset_movements = []
         for result in results:
             try:
                 movement = AssetMovement(
@@ -1639,9 +1837,7 @@ class DBHandler:
                     f'Unknown asset {e.asset_name} found',
                 )
                 continue
-            asset_movements.append(movement)
-
-        return asset_movements
+            yield movement
 
     def get_entries_count(
             self,
@@ -1719,6 +1915,26 @@ class DBHandler:
 
         The returned list is ordered from oldest to newest
         """
+        return list(self.iterate_ethereum_transactions(
+            from_ts=from_ts,
+            to_ts=to_ts,
+            address=address,
+        ))
+
+    def iterate_ethereum_transactions(
+            self,
+            from_ts: Optional[Timestamp] = None,
+            to_ts: Optional[Timestamp] = None,
+            address: Optional[ChecksumEthAddress] = None,
+            recent_first: bool = False,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+    ) -> Iterator[EthereumTransaction]:
+        """Lazily yields ethereum transactions optionally filtered by time and/or address
+
+        The transactions are ordered from oldest to newest unless recent_first is True.
+        They can be paged through by using limit and offset.
+        """
         cursor = self.conn.cursor()
         query = """
             SELECT tx_hash,
@@ -1735,10 +1951,17 @@ class DBHandler:
         """
         if address is not None:
             query += f'WHERE (from_address="{address}" OR to_address="{address}") '
-        query, bindings = form_query_to_filter_timestamps(query, 'timestamp', from_ts, to_ts)
+        query, bindings = form_query_to_filter_timestamps(
+            query=query,
+            timestamp_attribute='timestamp',
+            from_ts=from_ts,
+            to_ts=to_ts,
+            recent_first=recent_first,
+            limit=limit,
+            offset=offset,
+        )
         results = cursor.execute(query, bindings)
 
-        ethereum_transactions = []
         for result in results:
             try:
                 tx = EthereumTransaction(
@@ -1761,9 +1984,7 @@ class DBHandler:
                 )
                 continue
 
-            ethereum_transactions.append(tx)
-
-        return ethereum_transactions
+            yield tx
 
     def delete_data_for_ethereum_address(self, address: ChecksumEthAddress) -> None:
         """Deletes all ethereum related data from the DB for a single ethereum address"""
@@ -1797,6 +2018,7 @@ class DBHandler:
             f'to_address="{address}" AND from_address NOT IN ({",".join(questionmarks)});',
             other_eth_accounts,
         )
+        self.invalidate_accounting_checkpoints(from_ts=Timestamp(0), commit=False)
 
         self.conn.commit()
         self.update_last_write()
@@ -1873,6 +2095,8 @@ class DBHandler:
         if cursor.rowcount == 0:
             return False, 'Tried to edit non existing trade id'
 
+        # The trade may have been moved in time so play it safe
+        self.invalidate_accounting_checkpoints(from_ts=Timestamp(0), commit=False)
         self.conn.commit()
         return True, ''
 
@@ -1886,6 +2110,29 @@ class DBHandler:
 
         The returned list is ordered from oldest to newest
         """
+        return list(self.iterate_trades(from_ts=from_ts, to_ts=to_ts, location=location))
+
+    def iterate_trades(
+            self,
+            from_ts: Optional[Timestamp] = None,
+            to_ts: Optional[Timestamp] = None,
+            location: Optional[Location] = None,
+            after: Optional[Tuple[Timestamp, str]] = None,
+            recent_first: bool = False,
+            limit: Optional[int] = None,
+            offset: Optional[int] = None,
+            locations: Optional[List[Location]] = None,
+    ) -> Iterator[Trade]:
+        """Lazily yields trades optionally filtered by time and location
+
+        Instead of a single location a list of locations can also be given.
+
+        Each trade is only read from the DB and deserialized once it is consumed.
+        The trades are ordered by (time, id), from oldest to newest unless
+        recent_first is True. They can be paged through either by giving the
+        (timestamp, identifier) of the last trade of the previous page as after,
+        or by using limit and offset.
+        """
         cursor = self.conn.cursor()
         query = (
             'SELECT id,'
@@ -1902,10 +2149,22 @@ class DBHandler:
         )
         if location is not None:
             query += f'WHERE location="{location.serialize_for_db()}" '
-        query, bindings = form_query_to_filter_timestamps(query, 'time', from_ts, to_ts)
+        elif locations is not None:
+            db_locations = ','.join(f'"{x.serialize_for_db()}"' for x in locations)
+            query += f'WHERE location IN ({db_locations}) '
+        query, bindings = form_query_to_filter_timestamps(
+            query=query,
+            timestamp_attribute='time',
+            from_ts=from_ts,
+            to_ts=to_ts,
+            id_attribute='id',
+            after=after,
+            recent_first=recent_first,
+            limit=limit,
+            offset=offset,
+        )
         results = cursor.execute(query, bindings)
 
-        trades = []
         for result in results:
             try:
                 trade = Trade(
@@ -1931,18 +2190,73 @@ class DBHandler:
                     f'Unknown asset {e.asset_name} found',
                 )
                 continue
-            trades.append(trade)
-
-        return trades
+            yield trade
 
     def delete_trade(self, trade_id: str) -> Tuple[bool, str]:
         cursor = self.conn.cursor()
-        cursor.execute('DELETE FROM trades WHERE id=?', (trade_id,))
-        if cursor.rowcount == 0:
+        cursor.execute('SELECT time FROM trades WHERE id=?', (trade_id,))
+        result = cursor.fetchone()
+        if result is None:
             return False, 'Tried to delete non-existing trade'
+        cursor.execute('DELETE FROM trades WHERE id=?', (trade_id,))
+        self.invalidate_accounting_checkpoints(from_ts=Timestamp(result[0]), commit=False)
         self.conn.commit()
         return True, ''
 
+    def add_accounting_checkpoint(
+            self,
+            timestamp: Timestamp,
+            settings_digest: str,
+            actions_digest: str,
+            state: str,
+    ) -> None:
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'INSERT OR REPLACE INTO accounting_checkpoints('
+            'timestamp, settings_digest, actions_digest, state) VALUES(?, ?, ?, ?)',
+            (timestamp, settings_digest, actions_digest, state),
+        )
+        # Checkpoints are only a cache of the history processing so they don't
+        # update the last write timestamp of the DB
+        self.conn.commit()
+
+    def get_accounting_checkpoint_digests(
+            self,
+            settings_digest: str,
+            to_ts: Timestamp,
+    ) -> Dict[Timestamp, str]:
+        """Returns the actions digest of all checkpoints up to to_ts for the given settings"""
+        cursor = self.conn.cursor()
+        query = cursor.execute(
+            'SELECT timestamp, actions_digest FROM accounting_checkpoints '
+            'WHERE settings_digest=? AND timestamp<=?',
+            (settings_digest, to_ts),
+        )
+        return {Timestamp(x[0]): x[1] for x in query}
+
+    def get_accounting_checkpoint_state(
+            self,
+            timestamp: Timestamp,
+            settings_digest: str,
+    ) -> Optional[str]:
+        cursor = self.conn.cursor()
+        result = cursor.execute(
+            'SELECT state FROM accounting_checkpoints WHERE timestamp=? AND settings_digest=?',
+            (timestamp, settings_digest),
+        ).fetchone()
+        return None if result is None else result[0]
+
+    def invalidate_accounting_checkpoints(self, from_ts: Timestamp, commit: bool = True) -> None:
+        """Deletes all accounting checkpoints that include actions at or after from_ts
+
+        A checkpoint includes all actions before its timestamp so any change in the
+        history at from_ts makes all checkpoints after it stale.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM accounting_checkpoints WHERE timestamp > ?', (from_ts,))
+        if commit:
+            self.conn.commit()
+
     def set_rotkehlchen_premium(self, credentials: PremiumCredentials) -> None:
         """Save the rotki premium credentials in the DB"""
         cursor = self.conn.cursor()
@@ -2337,7 +2651,7 @@ class DBHandler:
             ),
         )
         # Delete the tag mappings for the xpub itself (type ignore is for xpub is not None
-        key = xpub_data.xpub.xpub + xpub_data.serialize_derivation_path_for_db()  # type: ignore
+        key = xpub_data.xpub.xpub + xpub_data.serialize_derivation_path_for_db()
         cursor.execute('DELETE FROM tag_mappings WHERE object_reference=?', (key,))
         # Delete any derived addresses
         cursor.execute(
@@ -2366,7 +2680,7 @@ class DBHandler:
         """
         cursor = self.conn.cursor()
         try:
-            key = xpub_data.xpub.xpub + xpub_data.serialize_derivation_path_for_db()  # type: ignore # noqa: E501
+            key = xpub_data.xpub.xpub + xpub_data.serialize_derivation_path_for_db()
             # Delete the tag mappings for the xpub itself (type ignore is for xpub is not None)
             cursor.execute('DELETE FROM tag_mappings WHERE object_reference=?', (key,))
             insert_tag_mappings(
@@ -0,0 +1,119 @@
+import logging
+import sqlite3
+from json.decoder import JSONDecodeError
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from rotkehlchen.assets.asset import Asset
+from rotkehlchen.fval import FVal
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.typing import Price
+from rotkehlchen.utils.serialization import rlk_jsonloads_dict
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+FOREX_DB_FILENAME = 'price_history_forex.db'
+OLD_FOREX_JSON_FILENAME = 'price_history_forex.json'
+
+DB_CREATE_FOREX_RATES = """
+CREATE TABLE IF NOT EXISTS forex_rates (
+    date TEXT NOT NULL,
+    from_currency TEXT NOT NULL,
+    to_currency TEXT NOT NULL,
+    rate TEXT NOT NULL,
+    PRIMARY KEY (date, from_currency, to_currency)
+) WITHOUT ROWID;
+"""
+
+
+class ForexRatesDB():
+    """Persistent store of daily fiat exchange rates keyed by (date, from, to)
+
+    Rates are not user specific and are kept in their own unencrypted sqlite DB
+    in the data directory. Each new rate is a single insert and each lookup a
+    single primary key search, so nothing has to be loaded or rewritten as a whole.
+    """
+
+    def __init__(self, data_directory: Path) -> None:
+        self.conn = sqlite3.connect(str(data_directory / FOREX_DB_FILENAME))
+        # This is just a cache of remote data so durability can be relaxed
+        self.conn.execute('PRAGMA journal_mode=WAL;')
+        self.conn.execute('PRAGMA synchronous=NORMAL;')
+        self.conn.executescript(DB_CREATE_FOREX_RATES)
+        self._migrate_json_cache(data_directory / OLD_FOREX_JSON_FILENAME)
+
+    def _migrate_json_cache(self, filepath: Path) -> None:
+        """Moves the rates of the old price_history_forex.json cache in the DB"""
+        if not filepath.exists():
+            return
+
+        try:
+            with open(filepath, 'r') as f:
+                data = rlk_jsonloads_dict(f.read())
+            entries = [
+                (date, from_currency, to_currency, str(rate))
+                for date, from_rates in data.items()
+                for from_currency, to_rates in from_rates.items()
+                for to_currency, rate in to_rates.items()
+            ]
+            self._write_entries(entries)
+        except (OSError, JSONDecodeError, AttributeError) as e:
+            log.warning(f'Could not migrate old forex cache {filepath} due to {str(e)}')
+        else:
+            log.debug(f'Migrated {len(entries)} rates of old forex cache {filepath}')
+
+        try:
+            filepath.unlink()
+        except OSError as e:
+            log.warning(f'Could not remove old forex cache {filepath} due to {str(e)}')
+
+    def _write_entries(self, entries: List[Tuple[str, str, str, str]]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO forex_rates(date, from_currency, to_currency, rate) '
+                'VALUES(?, ?, ?, ?)',
+                entries,
+            )
+
+    def get_rate(self, date: str, from_currency: Asset, to_currency: Asset) -> Optional[Price]:
+        """Returns the cached rate of the pair at the given %Y-%m-%d date, if any"""
+        result = self.conn.execute(
+            'SELECT rate FROM forex_rates WHERE date=? AND from_currency=? AND to_currency=?',
+            (date, from_currency.identifier, to_currency.identifier),
+        ).fetchone()
+        if result is None:
+            return None
+        return Price(FVal(result[0]))
+
+    def get_rates(
+            self,
+            date: str,
+            from_currency: Asset,
+            to_currencies: Iterable[Asset],
+    ) -> Dict[Asset, Price]:
+        """Bulk loads the cached rates from one currency to many at the given date
+
+        Currencies with no cached rate are missing from the result
+        """
+        cached = dict(self.conn.execute(
+            'SELECT to_currency, rate FROM forex_rates WHERE date=? AND from_currency=?',
+            (date, from_currency.identifier),
+        ))
+        return {
+            currency: Price(FVal(cached[currency.identifier]))
+            for currency in to_currencies if currency.identifier in cached
+        }
+
+    def add_rate(self, date: str, from_currency: Asset, to_currency: Asset, rate: FVal) -> None:
+        self._write_entries([(date, from_currency.identifier, to_currency.identifier, str(rate))])
+
+    def add_rates(self, date: str, from_currency: Asset, rates: Dict[str, FVal]) -> None:
+        """Saves many rates from one currency at the given date in a single transaction
+
+        The rates are keyed by the identifier of the currency they convert to
+        """
+        self._write_entries([
+            (date, from_currency.identifier, to_currency, str(rate))
+            for to_currency, rate in rates.items()
+        ])
@@ -51,3 +51,48 @@ class DBQueryRanges():
             start_ts=min(starts),
             end_ts=max(ends),
         )
+
+    def get_block_query_ranges(
+            self,
+            name: str,
+            from_block: int,
+            to_block: int,
+    ) -> List[Tuple[int, int]]:
+        """Same as get_location_query_ranges but for a range of blocks"""
+        queried_range = self.db.get_used_query_range(name)
+        if not queried_range:
+            ranges_to_query = [(from_block, to_block)]
+        else:
+            ranges_to_query = []
+            if from_block < queried_range[0]:
+                ranges_to_query.append((from_block, queried_range[0] - 1))
+
+            if to_block > queried_range[1]:
+                ranges_to_query.append((queried_range[1] + 1, to_block))
+
+        return ranges_to_query
+
+    def update_used_block_query_range(
+            self,
+            name: str,
+            from_block: int,
+            to_block: int,
+            ranges_to_query: List[Tuple[int, int]],
+    ) -> None:
+        """Depending on the ranges to query and the given blocks update the DB
+
+        The already queried range is kept, so the range only ever grows"""
+        starts = [x[0] for x in ranges_to_query]
+        starts.append(from_block)
+        ends = [x[1] for x in ranges_to_query]
+        ends.append(to_block)
+        queried_range = self.db.get_used_query_range(name)
+        if queried_range:
+            starts.append(queried_range[0])
+            ends.append(queried_range[1])
+
+        self.db.update_used_block_query_range(
+            name=name,
+            from_block=min(starts),
+            to_block=max(ends),
+        )
@@ -166,6 +166,19 @@ CREATE TABLE IF NOT EXISTS xpubs (
 );
 """
 
+# Snapshots of the accounting state (the per asset buy queues) right before
+# the first action at or after timestamp. They are only valid for the same
+# accounting settings and the same actions before timestamp.
+DB_CREATE_ACCOUNTING_CHECKPOINTS = """
+CREATE TABLE IF NOT EXISTS accounting_checkpoints (
+    timestamp INTEGER NOT NULL,
+    settings_digest TEXT NOT NULL,
+    actions_digest TEXT NOT NULL,
+    state TEXT NOT NULL,
+    PRIMARY KEY (timestamp, settings_digest)
+);
+"""
+
 DB_CREATE_XPUB_MAPPINGS = """
 CREATE TABLE IF NOT EXISTS xpub_mappings (
     address TEXT NOT NULL,
@@ -289,6 +302,29 @@ CREATE TABLE IF NOT EXISTS used_query_ranges (
 );
 """
 
+# Logs of an ethereum contract event filter. The filter is identified by the digest
+# of the contract address and the topics. The block range for which the logs of
+# each filter have been queried is kept in the used_query_ranges table.
+DB_CREATE_ETHEREUM_LOGS_CACHE = """
+CREATE TABLE IF NOT EXISTS ethereum_logs_cache (
+    filter_digest TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    log TEXT NOT NULL,
+    PRIMARY KEY (filter_digest, block_number, log_index)
+);
+"""
+
+# Timestamps of the ethereum blocks seen so far, used to answer block number to
+# timestamp and timestamp to block number lookups without querying the chain
+DB_CREATE_ETHEREUM_BLOCKS = """
+CREATE TABLE IF NOT EXISTS ethereum_blocks (
+    block_number INTEGER NOT NULL PRIMARY KEY,
+    timestamp INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_ethereum_blocks_timestamp ON ethereum_blocks(timestamp);
+"""
+
 DB_CREATE_SETTINGS = """
 CREATE TABLE IF NOT EXISTS settings (
     name VARCHAR[24] NOT NULL PRIMARY KEY,
@@ -296,10 +332,33 @@ CREATE TABLE IF NOT EXISTS settings (
 );
 """
 
+# Secondary indexes for the access paths of the hot tables. Time range queries,
+# optionally filtered by location/asset/address, are served by an index whose last
+# column is the time so that results also come out ordered. The timed_balances and
+# timed_location_data indexes are covering so that snapshot queries never touch
+# the table itself. MAX(time) lookups are served by the (time, ...) primary keys.
+DB_CREATE_INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_trades_time ON trades(time);
+CREATE INDEX IF NOT EXISTS idx_trades_location_time ON trades(location, time);
+CREATE INDEX IF NOT EXISTS idx_asset_movements_time ON asset_movements(time);
+CREATE INDEX IF NOT EXISTS idx_asset_movements_location_time
+    ON asset_movements(location, time);
+CREATE INDEX IF NOT EXISTS idx_ethereum_transactions_timestamp
+    ON ethereum_transactions(timestamp);
+CREATE INDEX IF NOT EXISTS idx_ethereum_transactions_from_timestamp
+    ON ethereum_transactions(from_address, timestamp);
+CREATE INDEX IF NOT EXISTS idx_ethereum_transactions_to_timestamp
+    ON ethereum_transactions(to_address, timestamp);
+CREATE INDEX IF NOT EXISTS idx_timed_balances_currency_time
+    ON timed_balances(currency, time, amount, usd_value);
+CREATE INDEX IF NOT EXISTS idx_timed_location_data_location_time
+    ON timed_location_data(location, time, usd_value);
+"""
+
 DB_SCRIPT_CREATE_TABLES = """
 PRAGMA foreign_keys=off;
 BEGIN TRANSACTION;
-{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}
+{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}{}
 COMMIT;
 PRAGMA foreign_keys=on;
 """.format(
@@ -326,4 +385,8 @@ PRAGMA foreign_keys=on;
     DB_CREATE_YEARN_VAULT_EVENTS,
     DB_CREATE_XPUBS,
     DB_CREATE_XPUB_MAPPINGS,
+    DB_CREATE_ACCOUNTING_CHECKPOINTS,
+    DB_CREATE_ETHEREUM_LOGS_CACHE,
+    DB_CREATE_ETHEREUM_BLOCKS,
+    DB_CREATE_INDEXES,
 )
@@ -22,6 +22,10 @@ from rotkehlchen.db.upgrades.v16_v17 import upgrade_v16_to_v17
 from rotkehlchen.db.upgrades.v17_v18 import upgrade_v17_to_v18
 from rotkehlchen.db.upgrades.v18_v19 import upgrade_v18_to_v19
 from rotkehlchen.db.upgrades.v19_v20 import upgrade_v19_to_v20
+from rotkehlchen.db.upgrades.v20_v21 import upgrade_v20_to_v21
+from rotkehlchen.db.upgrades.v21_v22 import upgrade_v21_to_v22
+from rotkehlchen.db.upgrades.v22_v23 import upgrade_v22_to_v23
+from rotkehlchen.db.upgrades.v23_v24 import upgrade_v23_to_v24
 from rotkehlchen.errors import DBUpgradeError
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 
@@ -153,6 +157,22 @@ UPGRADES_LIST = [
         from_version=19,
         function=upgrade_v19_to_v20,
     ),
+    UpgradeRecord(
+        from_version=20,
+        function=upgrade_v20_to_v21,
+    ),
+    UpgradeRecord(
+        from_version=21,
+        function=upgrade_v21_to_v22,
+    ),
+    UpgradeRecord(
+        from_version=22,
+        function=upgrade_v22_to_v23,
+    ),
+    UpgradeRecord(
+        from_version=23,
+        function=upgrade_v23_to_v24,
+    ),
 ]
 
 
@@ -0,0 +1,16 @@
+from typing import TYPE_CHECKING
+
+from rotkehlchen.db.schema import DB_CREATE_INDEXES
+
+if TYPE_CHECKING:
+    from rotkehlchen.db.dbhandler import DBHandler
+
+
+def upgrade_v20_to_v21(db: 'DBHandler') -> None:
+    """Upgrades the DB from v20 to v21
+
+    - Create the secondary indexes of the trades, asset_movements,
+    ethereum_transactions, timed_balances and timed_location_data tables
+    """
+    db.conn.executescript(DB_CREATE_INDEXES)
+    db.conn.commit()
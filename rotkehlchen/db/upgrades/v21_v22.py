@@ -0,0 +1,15 @@
+from typing import TYPE_CHECKING
+
+from rotkehlchen.db.schema import DB_CREATE_ACCOUNTING_CHECKPOINTS
+
+if TYPE_CHECKING:
+    from rotkehlchen.db.dbhandler import DBHandler
+
+
+def upgrade_v21_to_v22(db: 'DBHandler') -> None:
+    """Upgrades the DB from v21 to v22
+
+    - Create the accounting_checkpoints table
+    """
+    db.conn.executescript(DB_CREATE_ACCOUNTING_CHECKPOINTS)
+    db.conn.commit()
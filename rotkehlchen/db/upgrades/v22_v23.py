@@ -0,0 +1,15 @@
+from typing import TYPE_CHECKING
+
+from rotkehlchen.db.schema import DB_CREATE_ETHEREUM_LOGS_CACHE
+
+if TYPE_CHECKING:
+    from rotkehlchen.db.dbhandler import DBHandler
+
+
+def upgrade_v22_to_v23(db: 'DBHandler') -> None:
+    """Upgrades the DB from v22 to v23
+
+    - Create the ethereum_logs_cache table
+    """
+    db.conn.executescript(DB_CREATE_ETHEREUM_LOGS_CACHE)
+    db.conn.commit()
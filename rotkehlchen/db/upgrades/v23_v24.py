@@ -0,0 +1,15 @@
+from typing import TYPE_CHECKING
+
+from rotkehlchen.db.schema import DB_CREATE_ETHEREUM_BLOCKS
+
+if TYPE_CHECKING:
+    from rotkehlchen.db.dbhandler import DBHandler
+
+
+def upgrade_v23_to_v24(db: 'DBHandler') -> None:
+    """Upgrades the DB from v23 to v24
+
+    - Create the ethereum_blocks table and its timestamp index
+    """
+    db.conn.executescript(DB_CREATE_ETHEREUM_BLOCKS)
+    db.conn.commit()
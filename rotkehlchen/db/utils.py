@@ -1,6 +1,6 @@
 from enum import Enum
 from sqlite3 import Cursor
-from typing import TYPE_CHECKING, Dict, List, NamedTuple, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple, Union
 
 from typing_extensions import Literal
 
@@ -76,29 +76,52 @@ def form_query_to_filter_timestamps(
         timestamp_attribute: str,
         from_ts: Optional[Timestamp],
         to_ts: Optional[Timestamp],
-) -> Tuple[str, Union[Tuple, Tuple[Timestamp], Tuple[Timestamp, Timestamp]]]:
-    """Formulates the query string and its bindings to filter for timestamps"""
-    bindings: Union[Tuple, Tuple[Timestamp], Tuple[Timestamp, Timestamp]] = ()
-    got_from_ts = from_ts is not None
-    got_to_ts = to_ts is not None
-    if (got_from_ts or got_to_ts):
-        if 'WHERE' not in query:
-            query += 'WHERE '
-        else:
-            query += 'AND '
-
-    if got_from_ts:
-        query += f'{timestamp_attribute} >= ? '
-        bindings = (from_ts,)
-        if got_to_ts:
-            query += f'AND {timestamp_attribute} <= ? '
-            bindings = (from_ts, to_ts)
-    elif got_to_ts:
-        query += f'AND {timestamp_attribute} <= ? '
-        bindings = (to_ts,)
-
-    query += f'ORDER BY {timestamp_attribute} ASC;'
-    return query, bindings
+        id_attribute: Optional[str] = None,
+        after: Optional[Tuple[Timestamp, str]] = None,
+        recent_first: bool = False,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+) -> Tuple[str, Tuple[Any, ...]]:
+    """Formulates the query string and its bindings to filter for timestamps
+
+    If an id_attribute is given the results are ordered by (timestamp, id) so that
+    they can be paged through with keyset pagination. To get the next page `after`
+    should be the (timestamp, id) of the last entry of the previous page.
+    The results can also be paged through with limit and offset.
+    """
+    conditions = []
+    bindings: List[Any] = []
+    if from_ts is not None:
+        conditions.append(f'{timestamp_attribute} >= ?')
+        bindings.append(from_ts)
+    if to_ts is not None:
+        conditions.append(f'{timestamp_attribute} <= ?')
+        bindings.append(to_ts)
+
+    comparison = '<' if recent_first else '>'
+    if after is not None:
+        assert id_attribute is not None, 'keyset pagination requires an id attribute'
+        conditions.append(
+            f'({timestamp_attribute} {comparison} ? OR '
+            f'({timestamp_attribute} = ? AND {id_attribute} {comparison} ?))',
+        )
+        bindings.extend((after[0], after[0], after[1]))
+
+    if len(conditions) != 0:
+        query += 'AND ' if 'WHERE' in query else 'WHERE '
+        query += ' AND '.join(conditions) + ' '
+
+    order = 'DESC' if recent_first else 'ASC'
+    query += f'ORDER BY {timestamp_attribute} {order}'
+    if id_attribute is not None:
+        query += f', {id_attribute} {order}'
+    if limit is not None or offset is not None:
+        # A negative limit means no limit in sqlite
+        query += ' LIMIT ? OFFSET ?'
+        bindings.extend((limit if limit is not None else -1, offset if offset else 0))
+
+    query += ';'
+    return query, tuple(bindings)
 
 
 def deserialize_tags_from_db(val: Optional[str]) -> Optional[List[str]]:
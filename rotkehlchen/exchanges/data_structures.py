@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.crypto import sha3
@@ -29,6 +29,9 @@ from rotkehlchen.typing import (
 )
 from rotkehlchen.user_messages import MessagesAggregator
 
+if TYPE_CHECKING:
+    from rotkehlchen.accounting.lots import BuyLots
+
 
 def hash_id(hashable: str) -> TradeID:
     id_bytes = sha3(hashable.encode())
@@ -54,7 +57,7 @@ class SellEvent:
 
 
 class Events(NamedTuple):
-    buys: List[BuyEvent]
+    buys: 'BuyLots'
     sells: List[SellEvent]
 
 
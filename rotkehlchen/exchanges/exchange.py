@@ -1,8 +1,6 @@
 import logging
 from typing import TYPE_CHECKING, Any, Callable, List, Optional, Tuple
 
-import requests
-
 from rotkehlchen.db.ranges import DBQueryRanges
 from rotkehlchen.errors import RemoteError
 from rotkehlchen.exchanges.data_structures import AssetMovement, MarginPosition, Trade
@@ -10,6 +8,7 @@ from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.serialization.deserialize import deserialize_location
 from rotkehlchen.typing import ApiKey, ApiSecret, T_ApiKey, T_ApiSecret, Timestamp
 from rotkehlchen.utils.interfaces import CacheableObject, LockableQueryObject, protect_with_lock
+from rotkehlchen.utils.network import create_session
 
 if TYPE_CHECKING:
     from rotkehlchen.db.dbhandler import DBHandler
@@ -47,8 +46,7 @@ class ExchangeInterface(CacheableObject, LockableQueryObject):
         self.api_key = api_key
         self.secret = secret
         self.first_connection_made = False
-        self.session = requests.session()
-        self.session.headers.update({'User-Agent': 'rotkehlchen'})
+        self.session = create_session()
         log.info(f'Initialized {name} exchange')
 
     def query_balances(self, **kwargs: Any) -> Tuple[Optional[dict], str]:
@@ -138,6 +136,21 @@ class ExchangeInterface(CacheableObject, LockableQueryObject):
             to_ts=end_ts,
             location=deserialize_location(self.name),
         )
+        # finally append the new trades to the already returned DB trades
+        trades.extend(self.sync_trade_history(start_ts=start_ts, end_ts=end_ts))
+        return trades
+
+    @protect_with_lock()
+    def sync_trade_history(
+            self,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+    ) -> List[Trade]:
+        """Queries the remote exchange for the trades of the user in any part of the
+        given time range that has not been queried before and saves them in the DB
+
+        Returns only the newly queried trades.
+        """
         ranges = DBQueryRanges(self.db)
         ranges_to_query = ranges.get_location_query_ranges(
             location_string=f'{self.name}_trades',
@@ -168,10 +181,7 @@ class ExchangeInterface(CacheableObject, LockableQueryObject):
             end_ts=end_ts,
             ranges_to_query=ranges_to_query,
         )
-        # finally append them to the already returned DB trades
-        trades.extend(new_trades)
-
-        return trades
+        return new_trades
 
     def query_margin_history(
             self,
@@ -228,6 +238,20 @@ class ExchangeInterface(CacheableObject, LockableQueryObject):
             to_ts=end_ts,
             location=self.name,
         )
+        asset_movements.extend(self.sync_deposits_withdrawals(start_ts=start_ts, end_ts=end_ts))
+        return asset_movements
+
+    @protect_with_lock()
+    def sync_deposits_withdrawals(
+            self,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+    ) -> List[AssetMovement]:
+        """Queries the exchange for the deposits/withdrawals of the user in any part of
+        the given time range that has not been queried before and saves them in the DB
+
+        Returns only the newly queried asset movements.
+        """
         ranges = DBQueryRanges(self.db)
         ranges_to_query = ranges.get_location_query_ranges(
             location_string=f'{self.name}_asset_movements',
@@ -249,9 +273,7 @@ class ExchangeInterface(CacheableObject, LockableQueryObject):
             end_ts=end_ts,
             ranges_to_query=ranges_to_query,
         )
-        asset_movements.extend(new_movements)
-
-        return asset_movements
+        return new_movements
 
     def query_history_with_callbacks(
             self,
@@ -35,7 +35,7 @@ from rotkehlchen.exchanges.exchange import ExchangeInterface
 from rotkehlchen.exchanges.utils import deserialize_asset_movement_address, get_key_if_has_val
 from rotkehlchen.fval import FVal
 from rotkehlchen.inquirer import Inquirer
-from rotkehlchen.logging import RotkehlchenLogsAdapter, make_sensitive
+from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.serialization.deserialize import (
     deserialize_asset_amount,
     deserialize_asset_amount_force_positive,
@@ -150,7 +150,7 @@ def process_polo_loans(
     new_data = []
 
     for loan in reversed(data):
-        log.debug('processing poloniex loan', **make_sensitive(loan))
+        log.debug('processing poloniex loan', sensitive_log=True, **loan)
         try:
             close_time = deserialize_timestamp_from_poloniex_date(loan['close'])
             open_time = deserialize_timestamp_from_poloniex_date(loan['open'])
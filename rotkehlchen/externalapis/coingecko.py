@@ -12,6 +12,7 @@ from rotkehlchen.errors import RemoteError
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import Price
+from rotkehlchen.utils.network import create_session
 from rotkehlchen.utils.serialization import rlk_jsonloads
 
 logger = logging.getLogger(__name__)
@@ -32,6 +33,8 @@ class CoingeckoAssetData(NamedTuple):
     images: CoingeckoImageURLs
 
 
+# Max number of coins to ask for in a single simple price query
+COINGECKO_SIMPLE_PRICE_MAX_IDS = 100
 COINGECKO_SIMPLE_VS_CURRENCIES = [
     "btc",
     "eth",
@@ -97,8 +100,7 @@ COINGECKO_SIMPLE_VS_CURRENCIES = [
 class Coingecko():
 
     def __init__(self) -> None:
-        self.session = requests.session()
-        self.session.headers.update({'User-Agent': 'rotkehlchen'})
+        self.session = create_session()
 
     @overload  # noqa: F811
     def _query(
@@ -241,3 +243,45 @@ class Coingecko():
                 f'processing the result.',
             )
             return Price(ZERO)
+
+    def simple_prices(self, from_assets: List[Asset], to_asset: Asset) -> Dict[Asset, Price]:
+        """Same as simple_price but for many assets, with as few queries as possible
+
+        Assets that are not supported in coingecko or whose price is not returned
+        are not part of the result.
+
+        May raise:
+        - RemoteError if there is a problem querying coingecko
+        """
+        vs_currency = to_asset.identifier.lower()
+        if vs_currency not in COINGECKO_SIMPLE_VS_CURRENCIES:
+            log.warning(
+                f'Tried to query coingecko simple prices to {to_asset.identifier}. '
+                f'But to_asset is not supported in simple price query',
+            )
+            return {}
+
+        coin_to_assets: Dict[str, List[Asset]] = {}
+        for asset in from_assets:
+            if asset.coingecko is not None:
+                coin_to_assets.setdefault(asset.coingecko, []).append(asset)
+
+        prices = {}
+        coins = list(coin_to_assets)
+        for idx in range(0, len(coins), COINGECKO_SIMPLE_PRICE_MAX_IDS):
+            chunk = coins[idx:idx + COINGECKO_SIMPLE_PRICE_MAX_IDS]
+            result = self._query(
+                module='simple/price',
+                options={
+                    'ids': ','.join(chunk),
+                    'vs_currencies': vs_currency,
+                })
+            for coin in chunk:
+                try:
+                    price = Price(FVal(result[coin][vs_currency]))
+                except KeyError:
+                    continue
+                for asset in coin_to_assets[coin]:
+                    prices[asset] = price
+
+        return prices
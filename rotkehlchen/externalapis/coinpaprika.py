@@ -3,10 +3,10 @@ import sys
 from typing import Any, Dict, List, Optional
 
 import gevent
-import requests
 
 from rotkehlchen.errors import RemoteError
 from rotkehlchen.typing import EthAddress
+from rotkehlchen.utils.network import create_session, record_retry
 from rotkehlchen.utils.serialization import rlk_jsonloads_dict, rlk_jsonloads_list
 
 KNOWN_TO_MISS_FROM_PAPRIKA = (
@@ -602,14 +602,16 @@ class CoinPaprika():
     def __init__(self) -> None:
         self.prefix = 'https://api.coinpaprika.com/v1/'
         self.backoff_limit = 180
+        self.session = create_session()
 
     def _query(self, path: str) -> str:
         backoff = INITIAL_BACKOFF
         while True:
-            response = requests.get(f'{self.prefix}{path}')
+            response = self.session.get(f'{self.prefix}{path}')
             if response.status_code == 429 and backoff < self.backoff_limit:
                 gevent.sleep(backoff)
                 backoff *= 2
+                record_retry(response.url)
                 continue
             elif response.status_code != 200:
                 raise RemoteError(
@@ -4,10 +4,11 @@ import os
 import re
 from json.decoder import JSONDecodeError
 from pathlib import Path
-from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, NewType, Optional
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NewType, Optional, Tuple
 
 import gevent
 import requests
+from gevent.pool import Pool
 from typing_extensions import Literal
 
 from rotkehlchen.assets.asset import Asset
@@ -23,14 +24,16 @@ from rotkehlchen.errors import (
 from rotkehlchen.externalapis.interface import ExternalServiceWithApiKey
 from rotkehlchen.fval import FVal
 from rotkehlchen.history import PriceHistorian
+from rotkehlchen.history.price_store import (
+    PRICE_STORE_SUFFIX,
+    PriceHistoryFile,
+    migrate_json_price_history,
+    write_price_history_file,
+)
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import ExternalService, Price, Timestamp
-from rotkehlchen.utils.misc import (
-    convert_to_int,
-    timestamp_to_date,
-    ts_now,
-    write_history_data_in_file,
-)
+from rotkehlchen.utils.misc import convert_to_int, timestamp_to_date, ts_now
+from rotkehlchen.utils.network import create_session, record_retry
 from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads_dict
 
 logger = logging.getLogger(__name__)
@@ -42,6 +45,10 @@ PairCacheKey = NewType('PairCacheKey', T_PairCacheKey)
 
 RATE_LIMIT_MSG = 'You are over your rate limit please upgrade your account!'
 CRYPTOCOMPARE_QUERY_RETRY_TIMES = 10
+# How many pair histories to query from cryptocompare at the same time when prefetching
+CRYPTOCOMPARE_PREFETCH_CONCURRENCY = 4
+# Max length of the comma separated symbols of a pricemulti query
+CRYPTOCOMPARE_PRICEMULTI_MAX_FSYMS_LENGTH = 300
 CRYPTOCOMPARE_SPECIAL_CASES_MAPPING = {
     Asset('TLN'): A_WETH,
     Asset('BLY'): A_USDT,
@@ -133,38 +140,6 @@ CRYPTOCOMPARE_SPECIAL_CASES_MAPPING = {
 CRYPTOCOMPARE_SPECIAL_CASES = CRYPTOCOMPARE_SPECIAL_CASES_MAPPING.keys()
 
 
-class PriceHistoryEntry(NamedTuple):
-    time: Timestamp
-    low: Price
-    high: Price
-
-
-class PriceHistoryData(NamedTuple):
-    data: List[PriceHistoryEntry]
-    start_time: Timestamp
-    end_time: Timestamp
-
-
-def _dict_history_to_entries(data: List[Dict[str, Any]]) -> List[PriceHistoryEntry]:
-    """Turns a list of dict of history entries to a list of proper objects"""
-    return [
-        PriceHistoryEntry(
-            time=Timestamp(entry['time']),
-            low=Price(FVal(entry['low'])),
-            high=Price(FVal(entry['high'])),
-        ) for entry in data
-    ]
-
-
-def _dict_history_to_data(data: Dict[str, Any]) -> PriceHistoryData:
-    """Turns a price history data dict entry into a proper object"""
-    return PriceHistoryData(
-        data=_dict_history_to_entries(data['data']),
-        start_time=Timestamp(data['start_time']),
-        end_time=Timestamp(data['end_time']),
-    )
-
-
 def _multiply_str_nums(a: str, b: str) -> str:
     """Multiples two string numbers and returns the result as a string"""
     return str(FVal(a) * FVal(b))
@@ -203,18 +178,22 @@ class Cryptocompare(ExternalServiceWithApiKey):
     def __init__(self, data_directory: Path, database: Optional[DBHandler]) -> None:
         super().__init__(database=database, service_name=ExternalService.CRYPTOCOMPARE)
         self.data_directory = data_directory
-        self.price_history: Dict[PairCacheKey, PriceHistoryData] = {}
+        self.price_history: Dict[PairCacheKey, PriceHistoryFile] = {}
         self.price_history_file: Dict[PairCacheKey, Path] = {}
-        self.session = requests.session()
-        self.session.headers.update({'User-Agent': 'rotkehlchen'})
+        self.session = create_session()
 
         # Check the data folder and remember the filenames of any cached history
         prefix = os.path.join(str(self.data_directory), 'price_history_')
         prefix = prefix.replace('\\', '\\\\')
-        regex = re.compile(prefix + r'(.*)\.json')
-        files_list = glob.glob(prefix + '*.json')
+        regex = re.compile(prefix + r'(.*)' + re.escape(PRICE_STORE_SUFFIX))
 
-        for file_ in files_list:
+        # Convert any old style JSON caches to the binary price history format
+        for file_ in glob.glob(prefix + '*.json'):
+            if file_.endswith('price_history_forex.json'):  # handled by the Inquirer
+                continue
+            migrate_json_price_history(Path(file_.replace('\\\\', '\\')))
+
+        for file_ in glob.glob(prefix + '*' + PRICE_STORE_SUFFIX):
             file_ = file_.replace('\\\\', '\\')
             match = regex.match(file_)
             assert match
@@ -269,6 +248,7 @@ class Cryptocompare(ExternalServiceWithApiKey):
                         )
                         gevent.sleep(backoff_seconds)
                         tries -= 1
+                        record_retry(querystr)
                         continue
                     else:
                         log.debug(
@@ -439,6 +419,66 @@ class Cryptocompare(ExternalServiceWithApiKey):
         result = self._api_query(path=query_path)
         return result
 
+    def query_endpoint_pricemulti(
+            self,
+            from_assets: List[Asset],
+            to_asset: Asset,
+    ) -> Dict[Asset, Price]:
+        """Returns the current prices of many assets compared to another asset
+
+        The assets are queried in as few pricemulti queries as the length limit of
+        their symbols allows. Special case assets are queried on their own. Assets that
+        are not known to cryptocompare or for which it has no price are not part of
+        the result.
+
+        - May raise RemoteError if there is a problem reaching the cryptocompare server
+        or with reading the response returned by the server
+        - May raise PriceQueryUnsupportedAsset if to_asset is not known to cryptocompare
+        """
+        try:
+            cc_to_asset_symbol = to_asset.to_cryptocompare()
+        except UnsupportedAsset as e:
+            raise PriceQueryUnsupportedAsset(e.asset_name)
+
+        prices = {}
+        symbol_to_assets: Dict[str, List[Asset]] = {}
+        for asset in from_assets:
+            if asset in CRYPTOCOMPARE_SPECIAL_CASES:
+                try:
+                    result = self.query_endpoint_price(from_asset=asset, to_asset=to_asset)
+                except PriceQueryUnsupportedAsset:
+                    continue
+                if cc_to_asset_symbol in result:
+                    prices[asset] = Price(FVal(result[cc_to_asset_symbol]))
+                continue
+
+            try:
+                symbol_to_assets.setdefault(asset.to_cryptocompare(), []).append(asset)
+            except UnsupportedAsset:
+                continue
+
+        chunks: List[List[str]] = []
+        chunk_length = CRYPTOCOMPARE_PRICEMULTI_MAX_FSYMS_LENGTH
+        for symbol in symbol_to_assets:
+            if chunk_length + len(symbol) + 1 > CRYPTOCOMPARE_PRICEMULTI_MAX_FSYMS_LENGTH:
+                chunks.append([])
+                chunk_length = 0
+            chunks[-1].append(symbol)
+            chunk_length += len(symbol) + 1
+
+        for chunk in chunks:
+            query_path = f'pricemulti?fsyms={",".join(chunk)}&tsyms={cc_to_asset_symbol}'
+            result = self._api_query(path=query_path)
+            for symbol in chunk:
+                try:
+                    price = Price(FVal(result[symbol][cc_to_asset_symbol]))
+                except KeyError:
+                    continue
+                for asset in symbol_to_assets[symbol]:
+                    prices[asset] = price
+
+        return prices
+
     def query_endpoint_pricehistorical(
             self,
             from_asset: Asset,
@@ -489,10 +529,13 @@ class Cryptocompare(ExternalServiceWithApiKey):
         if cache_key in self.price_history_file:
             if cache_key not in self.price_history:
                 try:
-                    with open(self.price_history_file[cache_key], 'r') as f:
-                        data = rlk_jsonloads_dict(f.read())
-                        self.price_history[cache_key] = _dict_history_to_data(data)
-                except (OSError, JSONDecodeError):
+                    self.price_history[cache_key] = PriceHistoryFile(
+                        self.price_history_file[cache_key],
+                    )
+                except (OSError, ValueError) as e:
+                    log.warning(
+                        f'Could not read cached price history for {cache_key} due to {str(e)}',
+                    )
                     return False
 
             in_range = (
@@ -511,11 +554,12 @@ class Cryptocompare(ExternalServiceWithApiKey):
             to_asset: Asset,
             timestamp: Timestamp,
             historical_data_start: Timestamp,
-    ) -> List[PriceHistoryEntry]:
+    ) -> PriceHistoryFile:
         """
         Get historical price data from cryptocompare
 
-        Returns a sorted list of price entries.
+        Returns a sorted sequence of price entries backed by the binary price history file
+        of the pair. Entries are only read from disk when accessed.
 
         - May raise RemoteError if there is a problem reaching the cryptocompare server
         or with reading the response returned by the server
@@ -531,7 +575,7 @@ class Cryptocompare(ExternalServiceWithApiKey):
         cache_key = PairCacheKey(from_asset.identifier + '_' + to_asset.identifier)
         got_cached_value = self._got_cached_price(cache_key, timestamp)
         if got_cached_value:
-            return self.price_history[cache_key].data
+            return self.price_history[cache_key]
 
         now_ts = ts_now()
         cryptocompare_hourquerylimit = 2000
@@ -608,30 +652,93 @@ class Cryptocompare(ExternalServiceWithApiKey):
         # Let's always check for data sanity for the hourly prices.
         _check_hourly_data_sanity(calculated_history, from_asset, to_asset)
         # and now since we actually queried the data let's also cache them
-        filename = self.data_directory / ('price_history_' + cache_key + '.json')
+        filename = self.data_directory / ('price_history_' + cache_key + PRICE_STORE_SUFFIX)
         log.info(
             'Updating price history cache',
             filename=filename,
             from_asset=from_asset,
             to_asset=to_asset,
         )
-        write_history_data_in_file(
+        # The stale mapping of the previous cache file needs to go before overwriting it
+        old_history = self.price_history.pop(cache_key, None)
+        if old_history is not None:
+            old_history.close()
+        write_price_history_file(
             data=calculated_history,
             filepath=filename,
             start_ts=historical_data_start,
             end_ts=now_ts,
         )
 
-        # Finally save the objects in memory and return them
-        data_including_time = {
-            'data': calculated_history,
-            'start_time': historical_data_start,
-            'end_time': end_date,
-        }
+        # Finally map the new file and return it
         self.price_history_file[cache_key] = filename
-        self.price_history[cache_key] = _dict_history_to_data(data_including_time)
+        self.price_history[cache_key] = PriceHistoryFile(filename)
+
+        return self.price_history[cache_key]
+
+    def prefetch_historical_data(
+            self,
+            pairs: Dict[Tuple[Asset, Asset], Tuple[Timestamp, Timestamp]],
+            historical_data_start: Timestamp,
+            progress_cb: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        """Makes sure the hourly price history of all given pairs is cached
+
+        `pairs` maps each (from_asset, to_asset) pair to the earliest and latest
+        timestamp for which a price will be needed. Each price history cache covers a
+        contiguous time range so a pair only needs to be queried if any of the two
+        timestamps falls outside of its cache. All pairs that need querying are
+        fetched concurrently.
+
+        `progress_cb` is called with the number of processed pairs and the number of
+        all pairs that needed querying, every time a pair is done.
 
-        return self.price_history[cache_key].data
+        Failures are only logged since the prices will be queried again, and any
+        errors properly handled, when they are actually needed.
+        """
+        missing_pairs = []
+        for (from_asset, to_asset), (start_ts, end_ts) in pairs.items():
+            cache_key = PairCacheKey(from_asset.identifier + '_' + to_asset.identifier)
+            cached = (
+                self._got_cached_price(cache_key, start_ts) and
+                self._got_cached_price(cache_key, end_ts)
+            )
+            if cached:
+                continue
+            missing_pairs.append((from_asset, to_asset, start_ts))
+
+        log.debug(
+            'Prefetching cryptocompare historical price data',
+            num_pairs=len(pairs),
+            num_missing_pairs=len(missing_pairs),
+        )
+        total = len(missing_pairs)
+        done = 0
+        if progress_cb is not None:
+            progress_cb(done, total)
+
+        def fetch(from_asset: Asset, to_asset: Asset, timestamp: Timestamp) -> None:
+            nonlocal done
+            try:
+                self.get_historical_data(
+                    from_asset=from_asset,
+                    to_asset=to_asset,
+                    timestamp=timestamp,
+                    historical_data_start=historical_data_start,
+                )
+            except (RemoteError, UnsupportedAsset, PriceQueryUnsupportedAsset) as e:
+                log.warning(
+                    f'Failed to prefetch historical price data of {from_asset.identifier} '
+                    f'to {to_asset.identifier} due to {str(e)}',
+                )
+            done += 1
+            if progress_cb is not None:
+                progress_cb(done, total)
+
+        pool = Pool(CRYPTOCOMPARE_PREFETCH_CONCURRENCY)
+        for from_asset, to_asset, timestamp in missing_pairs:
+            pool.spawn(fetch, from_asset, to_asset, timestamp)
+        pool.join()
 
     def query_historical_price(
             self,
@@ -15,9 +15,13 @@ from rotkehlchen.serialization.deserialize import deserialize_timestamp
 from rotkehlchen.typing import ChecksumEthAddress, EthereumTransaction, ExternalService, Timestamp
 from rotkehlchen.user_messages import MessagesAggregator
 from rotkehlchen.utils.misc import convert_to_int, hex_or_bytes_to_int, hexstring_to_bytes
+from rotkehlchen.utils.network import create_session, record_retry
+from rotkehlchen.utils.ratelimit import TokenBucket
 from rotkehlchen.utils.serialization import rlk_jsonloads_dict
 
 ETHERSCAN_TX_QUERY_LIMIT = 10000
+# Etherscan allows up to 5 calls per second per API key
+ETHERSCAN_CALLS_PER_SECOND = 5
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -82,9 +86,15 @@ class Etherscan(ExternalServiceWithApiKey):
     def __init__(self, database: DBHandler, msg_aggregator: MessagesAggregator) -> None:
         super().__init__(database=database, service_name=ExternalService.ETHERSCAN)
         self.msg_aggregator = msg_aggregator
-        self.session = requests.session()
+        self.session = create_session()
         self.warning_given = False
-        self.session.headers.update({'User-Agent': 'rotkehlchen'})
+        # Paces all queries, including those made concurrently from many greenlets,
+        # so that they stay within the API key rate limit. Without an API key
+        # etherscan is even stricter and we rely on the backoff below.
+        self.rate_limiter = TokenBucket(
+            rate=ETHERSCAN_CALLS_PER_SECOND,
+            capacity=ETHERSCAN_CALLS_PER_SECOND,
+        )
 
     @overload  # noqa: F811
     def _query(  # pylint: disable=no-self-use
@@ -169,6 +179,7 @@ class Etherscan(ExternalServiceWithApiKey):
         backoff = 1
         backoff_limit = 33
         while backoff < backoff_limit:
+            self.rate_limiter.acquire()
             try:
                 response = self.session.get(query_str)
             except requests.exceptions.ConnectionError as e:
@@ -184,6 +195,7 @@ class Etherscan(ExternalServiceWithApiKey):
                             'Getting Etherscan max connections error even '
                             'after we incrementally backed off',
                         )
+                    record_retry(query_str)
                     continue
 
                 raise RemoteError(f'Etherscan API request failed due to {str(e)}')
@@ -223,6 +235,7 @@ class Etherscan(ExternalServiceWithApiKey):
                         # Etherscan will let the query go through eventually
                         if backoff * 2 < backoff_limit:
                             backoff = backoff * 2
+                        record_retry(query_str)
                         continue
 
                     transaction_endpoint_and_none_found = (
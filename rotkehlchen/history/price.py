@@ -1,10 +1,11 @@
 import logging
+from collections import OrderedDict
 from pathlib import Path
-from typing import TYPE_CHECKING, Optional
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Tuple
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants.assets import A_USD
-from rotkehlchen.constants.misc import ZERO
+from rotkehlchen.constants.misc import DEFAULT_HISTORICAL_PRICE_MEMO_SIZE, ZERO
 from rotkehlchen.errors import NoPriceForGivenTimestamp, RemoteError
 from rotkehlchen.fval import FVal
 from rotkehlchen.inquirer import Inquirer
@@ -19,6 +20,9 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# from asset identifier, to asset identifier, hour bucket
+PriceMemoKey = Tuple[str, str, int]
+
 
 def query_usd_price_or_use_default(
         asset: Asset,
@@ -64,16 +68,79 @@ def query_usd_price_zero_if_error(
     return usd_price
 
 
+class HistoricalPriceMemo():
+    """A bounded, least recently used memo of historical prices
+
+    Prices are keyed by the pair and the hour closest to the queried timestamp.
+    That is the granularity of the hourly price history so all timestamps of the
+    same bucket resolve to the same price.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.prices: 'OrderedDict[PriceMemoKey, Price]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(from_asset: Asset, to_asset: Asset, timestamp: Timestamp) -> PriceMemoKey:
+        # Round to the closest hour. Exactly half an hour goes to the earlier hour
+        # just like the search for the closest hourly price entry does.
+        return from_asset.identifier, to_asset.identifier, (timestamp + 1799) // 3600
+
+    def get(self, key: PriceMemoKey) -> Optional[Price]:
+        price = self.prices.get(key)
+        if price is None:
+            self.misses += 1
+            return None
+
+        self.prices.move_to_end(key)
+        self.hits += 1
+        return price
+
+    def add(self, key: PriceMemoKey, price: Price) -> None:
+        if self.max_size <= 0:
+            return
+
+        self.prices[key] = price
+        self.prices.move_to_end(key)
+        while len(self.prices) > self.max_size:
+            self.prices.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        self.prices.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self.prices),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': FVal(self.hits) / FVal(lookups) if lookups != 0 else ZERO,
+        }
+
+
 class PriceHistorian():
     __instance: Optional['PriceHistorian'] = None
     _historical_data_start: Timestamp
     _cryptocompare: 'Cryptocompare'
+    # Replaced at the first instantiation. Set here so that the memo stats can
+    # be read before the historian is initialized at the first login
+    _price_memo = HistoricalPriceMemo(max_size=DEFAULT_HISTORICAL_PRICE_MEMO_SIZE)
 
     def __new__(
             cls,
             data_directory: Path = None,
             history_date_start: str = None,
             cryptocompare: 'Cryptocompare' = None,
+            price_memo_size: int = DEFAULT_HISTORICAL_PRICE_MEMO_SIZE,
     ) -> 'PriceHistorian':
         if PriceHistorian.__instance is not None:
             return PriceHistorian.__instance
@@ -89,6 +156,7 @@ class PriceHistorian():
             formatstr="%d/%m/%Y",
         )
         PriceHistorian._cryptocompare = cryptocompare
+        PriceHistorian._price_memo = HistoricalPriceMemo(max_size=price_memo_size)
 
         return PriceHistorian.__instance
 
@@ -134,9 +202,50 @@ class PriceHistorian():
             # else cryptocompare also has historical fiat to fiat data
 
         instance = PriceHistorian()
-        return instance._cryptocompare.query_historical_price(
+        memo_key = HistoricalPriceMemo.make_key(from_asset, to_asset, timestamp)
+        price = instance._price_memo.get(memo_key)
+        if price is not None:
+            return price
+
+        price = instance._cryptocompare.query_historical_price(
             from_asset=from_asset,
             to_asset=to_asset,
             timestamp=timestamp,
             historical_data_start=instance._historical_data_start,
         )
+        instance._price_memo.add(memo_key, price)
+        return price
+
+    @staticmethod
+    def get_price_memo_stats() -> Dict[str, Any]:
+        """Returns the size and hit/miss counters of the historical price memo"""
+        return PriceHistorian._price_memo.stats()
+
+    @staticmethod
+    def clear_price_memo() -> None:
+        PriceHistorian._price_memo.clear()
+
+    @staticmethod
+    def prefetch_historical_prices(
+            queries: Dict[Tuple[Asset, Asset], Tuple[Timestamp, Timestamp]],
+            progress_cb: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        """Makes sure that the historical prices of all the given queries are cached
+
+        `queries` maps each (from_asset, to_asset) pair to the earliest and latest
+        timestamp at which its price will be needed. Pairs that don't go through the
+        cryptocompare price history, such as fiat to fiat pairs, are skipped.
+
+        Nothing is raised. Any errors will surface when the prices are actually queried.
+        """
+        pairs = {
+            (from_asset, to_asset): time_range
+            for (from_asset, to_asset), time_range in queries.items()
+            if from_asset != to_asset and not (from_asset.is_fiat() and to_asset.is_fiat())
+        }
+        instance = PriceHistorian()
+        instance._cryptocompare.prefetch_historical_data(
+            pairs=pairs,
+            historical_data_start=instance._historical_data_start,
+            progress_cb=progress_cb,
+        )
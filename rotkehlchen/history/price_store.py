@@ -0,0 +1,186 @@
+"""Binary, memory mapped storage of hourly historical price data
+
+Each traded pair gets its own file. The file starts with a fixed size header
+followed by fixed stride rows of (timestamp, low, high). Since the hourly data
+are guaranteed to be consecutive hours the row for a given timestamp can be
+found directly by index and only that row needs to be read and deserialized.
+
+Prices are kept as their exact decimal strings, padded to the width of the
+longest price of the file which is recorded in the header, so that reading
+them back gives the same FVal that was written.
+"""
+import logging
+import mmap
+import os
+import struct
+from json.decoder import JSONDecodeError
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Union, overload
+
+from rotkehlchen.fval import FVal
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.typing import Price, Timestamp
+from rotkehlchen.utils.serialization import rlk_jsonloads_dict
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+PRICE_STORE_MAGIC = b'RKPH'
+PRICE_STORE_VERSION = 2
+PRICE_STORE_SUFFIX = '.bin'
+# magic, version, start_time, end_time, width of the price fields
+_HEADER = struct.Struct('<4sHqqH')
+
+
+def _row_struct(price_width: int) -> struct.Struct:
+    """Returns the struct of the rows of timestamp, low, high"""
+    return struct.Struct(f'<q{price_width}s{price_width}s')
+
+
+class PriceHistoryEntry(NamedTuple):
+    time: Timestamp
+    low: Price
+    high: Price
+
+
+class PriceHistoryFile(Sequence[PriceHistoryEntry]):
+    """A read-only view over a binary hourly price history file
+
+    Rows are deserialized on access so opening a file costs nothing more
+    than mapping it in memory.
+
+    May raise:
+    - OSError if the file can't be opened
+    - ValueError if the file is not a valid price history file
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < _HEADER.size:
+                raise ValueError(f'Price history file {path} has unexpected size {size}')
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, start_time, end_time, price_width = _HEADER.unpack_from(self._mmap, 0)
+        if magic != PRICE_STORE_MAGIC or version != PRICE_STORE_VERSION:
+            self._mmap.close()
+            raise ValueError(f'Price history file {path} has an invalid header')
+
+        self._row = _row_struct(price_width)
+        if (size - _HEADER.size) % self._row.size != 0:
+            self._mmap.close()
+            raise ValueError(f'Price history file {path} has unexpected size {size}')
+
+        self.start_time = Timestamp(start_time)
+        self.end_time = Timestamp(end_time)
+        self._length = (size - _HEADER.size) // self._row.size
+
+    def __len__(self) -> int:
+        return self._length
+
+    @overload
+    def __getitem__(self, index: int) -> PriceHistoryEntry:
+        ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[PriceHistoryEntry]:  # noqa: F811
+        ...
+
+    def __getitem__(  # noqa: F811
+            self,
+            index: Union[int, slice],
+    ) -> Union[PriceHistoryEntry, List[PriceHistoryEntry]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._length))]
+
+        if index < 0:
+            index += self._length
+        if index < 0 or index >= self._length:
+            raise IndexError('price history index out of range')
+
+        time, low, high = self._row.unpack_from(self._mmap, _HEADER.size + index * self._row.size)
+        return PriceHistoryEntry(
+            time=Timestamp(time),
+            low=Price(FVal(low.rstrip())),
+            high=Price(FVal(high.rstrip())),
+        )
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def write_price_history_file(
+        data: List[Dict[str, Any]],
+        filepath: Path,
+        start_ts: Timestamp,
+        end_ts: Timestamp,
+) -> None:
+    """Writes a list of cryptocompare hourly price entries into a binary price history file
+
+    The file is first written to a temporary path and then moved in place so that
+    readers never see a partially written file. Any open PriceHistoryFile for the
+    same path should be closed before calling this.
+    """
+    log.info(
+        'Writing price history file',
+        filepath=filepath,
+        start_time=start_ts,
+        end_time=end_ts,
+    )
+    rows = [(
+        entry['time'],
+        str(FVal(entry['low'])).encode(),
+        str(FVal(entry['high'])).encode(),
+    ) for entry in data]
+    price_width = max((max(len(low), len(high)) for _, low, high in rows), default=1)
+    row_struct = _row_struct(price_width)
+    tmp_filepath = filepath.with_suffix(filepath.suffix + '.tmp')
+    with open(tmp_filepath, 'wb') as outfile:
+        outfile.write(_HEADER.pack(
+            PRICE_STORE_MAGIC,
+            PRICE_STORE_VERSION,
+            start_ts,
+            end_ts,
+            price_width,
+        ))
+        outfile.write(b''.join(
+            row_struct.pack(
+                time,
+                low.ljust(price_width),
+                high.ljust(price_width),
+            ) for time, low, high in rows
+        ))
+    os.replace(tmp_filepath, filepath)
+
+
+def migrate_json_price_history(json_filepath: Path) -> Optional[Path]:
+    """Converts an old style price_history_<pair>.json cache into a binary price history file
+
+    On success the JSON file is removed and the path of the new file is returned.
+    If the JSON file can't be read it is also removed, since it would be
+    requeried anyway, and None is returned.
+    """
+    filepath = json_filepath.with_suffix(PRICE_STORE_SUFFIX)
+    try:
+        with open(json_filepath, 'r') as f:
+            data = rlk_jsonloads_dict(f.read())
+        write_price_history_file(
+            data=data['data'],
+            filepath=filepath,
+            start_ts=Timestamp(data['start_time']),
+            end_ts=Timestamp(data['end_time']),
+        )
+    except (OSError, JSONDecodeError, KeyError, TypeError, ValueError) as e:
+        log.warning(f'Could not migrate price history file {json_filepath} due to {str(e)}')
+        result = None
+    else:
+        log.debug(f'Migrated price history file {json_filepath} to {filepath}')
+        result = filepath
+
+    try:
+        json_filepath.unlink()
+    except OSError as e:
+        log.warning(f'Could not remove old price history file {json_filepath} due to {str(e)}')
+
+    return result
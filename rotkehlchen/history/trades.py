@@ -1,10 +1,15 @@
 import logging
 from collections import defaultdict
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union, cast
+
+import gevent
+from gevent.pool import Pool
 
 from rotkehlchen.accounting.structures import DefiEvent, DefiEventType
 from rotkehlchen.assets.asset import Asset
+from rotkehlchen.chain.ethereum.structures import AaveSimpleEvent
 from rotkehlchen.constants.assets import A_DAI, A_USD
 from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.errors import RemoteError
@@ -25,6 +30,11 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# Maximum number of history sources (exchanges, ethereum transactions, DeFi modules)
+# that are queried at the same time
+HISTORY_QUERY_POOL_SIZE = 8
+# Seconds after which the history query of a single source is abandoned
+HISTORY_QUERY_SOURCE_TIMEOUT = 1800
 
 HistoryResult = Tuple[
     str,
@@ -67,6 +77,8 @@ class TradesHistorian():
             msg_aggregator: MessagesAggregator,
             exchange_manager: ExchangeManager,
             chain_manager: 'ChainManager',
+            pool_size: int = HISTORY_QUERY_POOL_SIZE,
+            source_timeout: int = HISTORY_QUERY_SOURCE_TIMEOUT,
     ) -> None:
 
         self.msg_aggregator = msg_aggregator
@@ -74,6 +86,247 @@ class TradesHistorian():
         self.db = db
         self.exchange_manager = exchange_manager
         self.chain_manager = chain_manager
+        self.pool_size = pool_size
+        self.source_timeout = source_timeout
+
+    def _get_makerdao_dsr_events(
+            self,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+    ) -> List[DefiEvent]:
+        defi_events: List[DefiEvent] = []
+        if self.chain_manager.makerdao_dsr is None:
+            return defi_events
+
+        dsr_gains = self.chain_manager.makerdao_dsr.get_dsr_gains_in_period(
+            from_ts=start_ts,
+            to_ts=end_ts,
+        )
+        for gain, timestamp in dsr_gains:
+            if gain > ZERO:
+                defi_events.append(DefiEvent(
+                    timestamp=timestamp,
+                    event_type=DefiEventType.DSR_LOAN_GAIN,
+                    asset=A_DAI,
+                    amount=gain,
+                ))
+
+        return defi_events
+
+    def _get_makerdao_vault_events(
+            self,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+    ) -> List[DefiEvent]:
+        defi_events: List[DefiEvent] = []
+        if self.chain_manager.makerdao_vaults is None:
+            return defi_events
+
+        vault_details = self.chain_manager.makerdao_vaults.get_vault_details()
+        # We count the loss on a vault in the period if the last event is within
+        # the given period. It's not a very accurate approach but it's good enough
+        # for now. A more detailed approach would need archive node or log querying
+        # to find owed debt at any given timestamp
+        for detail in vault_details:
+            last_event_ts = detail.events[-1].timestamp
+            if last_event_ts >= start_ts and last_event_ts <= end_ts:
+                defi_events.append(DefiEvent(
+                    timestamp=last_event_ts,
+                    event_type=DefiEventType.MAKERDAO_VAULT_LOSS,
+                    asset=A_USD,
+                    amount=detail.total_liquidated.usd_value + detail.total_interest_owed,
+                ))
+
+        return defi_events
+
+    def _get_yearn_vaults_events(
+            self,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+    ) -> List[DefiEvent]:
+        defi_events: List[DefiEvent] = []
+        if self.chain_manager.yearn_vaults is None:
+            return defi_events
+
+        yearn_vaults_history = self.chain_manager.yearn_vaults.get_history(
+            given_defi_balances=self.chain_manager.defi_balances,
+            addresses=self.chain_manager.queried_addresses_for_module('yearn_vaults'),
+            reset_db_data=False,
+            from_timestamp=start_ts,
+            to_timestamp=end_ts,
+        )
+        for _, vault_mappings in yearn_vaults_history.items():
+            for _, vault_history in vault_mappings.items():
+                # For the vaults since we can't get historical values of vault tokens
+                # yet, for the purposes of the tax report count everything as USD
+                defi_events.append(DefiEvent(
+                    timestamp=Timestamp(end_ts - 1),
+                    event_type=DefiEventType.YEARN_VAULTS_PNL,
+                    asset=A_USD,
+                    amount=vault_history.profit_loss.usd_value,
+                ))
+
+        return defi_events
+
+    def _get_compound_events(
+            self,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+    ) -> List[DefiEvent]:
+        defi_events: List[DefiEvent] = []
+        if self.chain_manager.compound is None:
+            return defi_events
+
+        compound_history = self.chain_manager.compound.get_history(
+            given_defi_balances=self.chain_manager.defi_balances,
+            addresses=self.chain_manager.queried_addresses_for_module('compound'),
+            reset_db_data=False,
+            from_timestamp=start_ts,
+            to_timestamp=end_ts,
+        )
+        for event in compound_history['events']:
+            skip_event = (
+                event.event_type != 'liquidation' and
+                (event.realized_pnl is None or event.realized_pnl.amount == ZERO)
+            )
+            if skip_event:
+                continue  # skip events with no realized profit/loss
+
+            if event.event_type == 'redeem':
+                defi_events.append(DefiEvent(
+                    timestamp=event.timestamp,
+                    event_type=DefiEventType.COMPOUND_LOAN_INTEREST,
+                    asset=event.to_asset,
+                    amount=event.realized_pnl.amount,
+                ))
+            elif event.event_type == 'repay':
+                defi_events.append(DefiEvent(
+                    timestamp=event.timestamp,
+                    event_type=DefiEventType.COMPOUND_DEBT_REPAY,
+                    asset=event.asset,
+                    amount=event.realized_pnl.amount,
+                ))
+            elif event.event_type == 'liquidation':
+                defi_events.append(DefiEvent(
+                    timestamp=event.timestamp,
+                    event_type=DefiEventType.COMPOUND_LIQUIDATION_DEBT_REPAID,
+                    asset=event.asset,
+                    amount=event.value.amount,
+                ))
+                defi_events.append(DefiEvent(
+                    timestamp=event.timestamp,
+                    event_type=DefiEventType.COMPOUND_LIQUIDATION_COLLATERAL_LOST,
+                    asset=event.to_asset,
+                    amount=event.to_value.amount,
+                ))
+            elif event.event_type == 'comp':
+                defi_events.append(DefiEvent(
+                    timestamp=event.timestamp,
+                    event_type=DefiEventType.COMPOUND_REWARDS,
+                    asset=event.asset,
+                    amount=event.realized_pnl.amount,
+                ))
+
+        return defi_events
+
+    def _get_aave_events(
+            self,
+            start_ts: Timestamp,
+            end_ts: Timestamp,
+    ) -> List[DefiEvent]:
+        defi_events: List[DefiEvent] = []
+        aave = self.chain_manager.aave
+        if aave is None:
+            return defi_events
+
+        mapping = aave.get_history(
+            given_defi_balances=self.chain_manager.defi_balances,
+            addresses=self.chain_manager.queried_addresses_for_module('aave'),
+            reset_db_data=False,
+            from_timestamp=start_ts,
+            to_timestamp=end_ts,
+        )
+
+        now = ts_now()
+        for _, aave_history in mapping.items():
+            total_amount_per_token: Dict[Asset, FVal] = defaultdict(FVal)
+            for event in aave_history.events:
+                if event.timestamp < start_ts:
+                    continue
+                if event.timestamp > end_ts:
+                    break
+
+                if event.event_type == 'interest':
+                    interest_event = cast(AaveSimpleEvent, event)
+                    defi_events.append(DefiEvent(
+                        timestamp=interest_event.timestamp,
+                        event_type=DefiEventType.AAVE_LOAN_INTEREST,
+                        asset=interest_event.asset,
+                        amount=interest_event.value.amount,
+                    ))
+                    total_amount_per_token[interest_event.asset] += interest_event.value.amount
+
+            for token, balance in aave_history.total_earned_interest.items():
+                # Αdd an extra event per token per address for the remaining not paid amount
+                if token in total_amount_per_token:
+                    defi_events.append(DefiEvent(
+                        timestamp=now,
+                        event_type=DefiEventType.AAVE_LOAN_INTEREST,
+                        asset=token,
+                        amount=balance.amount - total_amount_per_token[token],
+                    ))
+
+            # Add all losses from aave borrowing/liquidations
+            for asset, balance in aave_history.total_lost.items():
+                defi_events.append(DefiEvent(
+                    timestamp=now,
+                    event_type=DefiEventType.AAVE_LOSS,
+                    asset=asset,
+                    amount=balance.amount,
+                ))
+
+            # Add earned assets from aave liquidations
+            for asset, balance in aave_history.total_earned_liquidations.items():
+                defi_events.append(DefiEvent(
+                    timestamp=now,
+                    event_type=DefiEventType.AAVE_LOAN_INTEREST,
+                    asset=asset,
+                    amount=balance.amount,
+                ))
+
+        return defi_events
+
+    def _query_source(
+            self,
+            source_name: str,
+            method: Callable[[], None],
+            fail_callback: Callable[[str], None],
+    ) -> None:
+        """Runs the history query of a single source with a timeout
+
+        Remote errors and timeouts are only reported through fail_callback so that
+        a failing source does not affect any of the other sources.
+        """
+        try:
+            with gevent.Timeout(self.source_timeout):
+                method()
+        except gevent.Timeout:
+            msg = (
+                f'{source_name} history query did not finish within '
+                f'{self.source_timeout} seconds'
+            )
+            log.error(msg)
+            self.msg_aggregator.add_error(
+                f'{msg}. The final history result will not include it',
+            )
+            fail_callback(msg)
+        except RemoteError as e:
+            msg = str(e)
+            self.msg_aggregator.add_error(
+                f'There was an error when querying {source_name} history: {msg}. '
+                f'The final history result will not include it',
+            )
+            fail_callback(msg)
 
     def get_history(
             self,
@@ -81,7 +334,11 @@ class TradesHistorian():
             end_ts: Timestamp,
             has_premium: bool,
     ) -> HistoryResult:
-        """Creates trades and loans history from start_ts to end_ts"""
+        """Creates trades and loans history from start_ts to end_ts
+
+        All history sources, meaning every connected exchange, the ethereum transactions
+        and each DeFi module, are queried concurrently.
+        """
         log.info(
             'Get/create trade history',
             start_ts=start_ts,
@@ -92,6 +349,9 @@ class TradesHistorian():
         history: List[Union[Trade, MarginPosition]] = []
         asset_movements = []
         loans = []
+        eth_transactions: List[EthereumTransaction] = []
+        # DeFi events per source, so that they can be put together in a deterministic order
+        defi_events_per_source: Dict[str, List[DefiEvent]] = {}
         empty_or_error = ''
 
         def populate_history_cb(
@@ -117,36 +377,67 @@ class TradesHistorian():
                 ))
 
         def fail_history_cb(error_msg: str) -> None:
-            """This callback will run for failure in exchange history query"""
+            """This callback will run for failure in any history source query"""
             nonlocal empty_or_error
             empty_or_error += '\n' + error_msg
 
-        for _, exchange in self.exchange_manager.connected_exchanges.items():
-            exchange.query_history_with_callbacks(
+        def query_eth_transactions() -> None:
+            try:
+                eth_transactions.extend(self.chain_manager.ethereum.transactions.query(
+                    address=None,  # all addresses
+                    # We need to have full history of transactions available
+                    from_ts=Timestamp(0),
+                    to_ts=now,
+                    with_limit=False,  # at the moment ignore the limit for historical processing,
+                    recent_first=False,  # for history processing we need oldest first
+                ))
+            except RemoteError as e:
+                msg = str(e)
+                self.msg_aggregator.add_error(
+                    f'There was an error when querying etherscan for ethereum transactions: {msg}'
+                    f'The final history result will not include ethereum transactions',
+                )
+                fail_history_cb(msg)
+
+        def query_defi_events(source_name: str, method: Callable[..., List[DefiEvent]]) -> None:
+            defi_events_per_source[source_name] = method(start_ts=start_ts, end_ts=end_ts)
+
+        sources: List[Tuple[str, Callable[[], None]]] = []
+        for name, exchange in self.exchange_manager.connected_exchanges.items():
+            sources.append((name, partial(
+                exchange.query_history_with_callbacks,
                 # We need to have full history of exchanges available
                 start_ts=Timestamp(0),
                 end_ts=now,
                 success_callback=populate_history_cb,
                 fail_callback=fail_history_cb,
-            )
-
-        try:
-            eth_transactions = self.chain_manager.ethereum.transactions.query(
-                address=None,  # all addresses
-                # We need to have full history of transactions available
-                from_ts=Timestamp(0),
-                to_ts=now,
-                with_limit=False,  # at the moment ignore the limit for historical processing,
-                recent_first=False,  # for history processing we need oldest first
-            )
-        except RemoteError as e:
-            eth_transactions = []
-            msg = str(e)
-            self.msg_aggregator.add_error(
-                f'There was an error when querying etherscan for ethereum transactions: {msg}'
-                f'The final history result will not include ethereum transactions',
-            )
-            empty_or_error += '\n' + msg
+            )))
+        sources.append(('ethereum transactions', query_eth_transactions))
+        defi_sources: List[Tuple[str, Callable[..., List[DefiEvent]]]] = []
+        if has_premium:
+            defi_sources = [
+                ('makerdao dsr', self._get_makerdao_dsr_events),
+                ('makerdao vaults', self._get_makerdao_vault_events),
+                ('yearn vaults', self._get_yearn_vaults_events),
+                ('compound', self._get_compound_events),
+                ('aave', self._get_aave_events),
+            ]
+        for name, method in defi_sources:
+            sources.append((name, partial(query_defi_events, source_name=name, method=method)))
+
+        pool = Pool(self.pool_size)
+        greenlets = [
+            pool.spawn(
+                self._query_source,
+                source_name=name,
+                method=method,
+                fail_callback=fail_history_cb,
+            ) for name, method in sources
+        ]
+        pool.join()
+        # Re-raise any unexpected error now that all the other sources are done
+        for greenlet in greenlets:
+            greenlet.get()
 
         # Include the external trades in the history
         external_trades = self.db.get_trades(
@@ -157,167 +448,9 @@ class TradesHistorian():
         )
         history.extend(external_trades)
 
-        # Include makerdao DSR gains
         defi_events = []
-        if self.chain_manager.makerdao_dsr and has_premium:
-            dsr_gains = self.chain_manager.makerdao_dsr.get_dsr_gains_in_period(
-                from_ts=start_ts,
-                to_ts=end_ts,
-            )
-            for gain, timestamp in dsr_gains:
-                if gain > ZERO:
-                    defi_events.append(DefiEvent(
-                        timestamp=timestamp,
-                        event_type=DefiEventType.DSR_LOAN_GAIN,
-                        asset=A_DAI,
-                        amount=gain,
-                    ))
-
-        # Include makerdao vault events
-        if self.chain_manager.makerdao_vaults and has_premium:
-            vault_details = self.chain_manager.makerdao_vaults.get_vault_details()
-            # We count the loss on a vault in the period if the last event is within
-            # the given period. It's not a very accurate approach but it's good enough
-            # for now. A more detailed approach would need archive node or log querying
-            # to find owed debt at any given timestamp
-            for detail in vault_details:
-                last_event_ts = detail.events[-1].timestamp
-                if last_event_ts >= start_ts and last_event_ts <= end_ts:
-                    defi_events.append(DefiEvent(
-                        timestamp=last_event_ts,
-                        event_type=DefiEventType.MAKERDAO_VAULT_LOSS,
-                        asset=A_USD,
-                        amount=detail.total_liquidated.usd_value + detail.total_interest_owed,
-                    ))
-
-        # include yearn vault events
-        if self.chain_manager.yearn_vaults and has_premium:
-            yearn_vaults_history = self.chain_manager.yearn_vaults.get_history(
-                given_defi_balances=self.chain_manager.defi_balances,
-                addresses=self.chain_manager.queried_addresses_for_module('yearn_vaults'),
-                reset_db_data=False,
-                from_timestamp=start_ts,
-                to_timestamp=end_ts,
-            )
-            for _, vault_mappings in yearn_vaults_history.items():
-                for _, vault_history in vault_mappings.items():
-                    # For the vaults since we can't get historical values of vault tokens
-                    # yet, for the purposes of the tax report count everything as USD
-                    defi_events.append(DefiEvent(
-                        timestamp=Timestamp(end_ts - 1),
-                        event_type=DefiEventType.YEARN_VAULTS_PNL,
-                        asset=A_USD,
-                        amount=vault_history.profit_loss.usd_value,
-                    ))
-
-        # include compound events
-        if self.chain_manager.compound and has_premium:
-            compound_history = self.chain_manager.compound.get_history(
-                given_defi_balances=self.chain_manager.defi_balances,
-                addresses=self.chain_manager.queried_addresses_for_module('compound'),
-                reset_db_data=False,
-                from_timestamp=start_ts,
-                to_timestamp=end_ts,
-            )
-            for event in compound_history['events']:
-                skip_event = (
-                    event.event_type != 'liquidation' and
-                    (event.realized_pnl is None or event.realized_pnl.amount == ZERO)
-                )
-                if skip_event:
-                    continue  # skip events with no realized profit/loss
-
-                if event.event_type == 'redeem':
-                    defi_events.append(DefiEvent(
-                        timestamp=event.timestamp,
-                        event_type=DefiEventType.COMPOUND_LOAN_INTEREST,
-                        asset=event.to_asset,
-                        amount=event.realized_pnl.amount,
-                    ))
-                elif event.event_type == 'repay':
-                    defi_events.append(DefiEvent(
-                        timestamp=event.timestamp,
-                        event_type=DefiEventType.COMPOUND_DEBT_REPAY,
-                        asset=event.asset,
-                        amount=event.realized_pnl.amount,
-                    ))
-                elif event.event_type == 'liquidation':
-                    defi_events.append(DefiEvent(
-                        timestamp=event.timestamp,
-                        event_type=DefiEventType.COMPOUND_LIQUIDATION_DEBT_REPAID,
-                        asset=event.asset,
-                        amount=event.value.amount,
-                    ))
-                    defi_events.append(DefiEvent(
-                        timestamp=event.timestamp,
-                        event_type=DefiEventType.COMPOUND_LIQUIDATION_COLLATERAL_LOST,
-                        asset=event.to_asset,
-                        amount=event.to_value.amount,
-                    ))
-                elif event.event_type == 'comp':
-                    defi_events.append(DefiEvent(
-                        timestamp=event.timestamp,
-                        event_type=DefiEventType.COMPOUND_REWARDS,
-                        asset=event.asset,
-                        amount=event.realized_pnl.amount,
-                    ))
-
-        # include aave lending events
-        aave = self.chain_manager.aave
-        if aave is not None and has_premium:
-            mapping = aave.get_history(
-                given_defi_balances=self.chain_manager.defi_balances,
-                addresses=self.chain_manager.queried_addresses_for_module('aave'),
-                reset_db_data=False,
-                from_timestamp=start_ts,
-                to_timestamp=end_ts,
-            )
-
-            now = ts_now()
-            for _, aave_history in mapping.items():
-                total_amount_per_token: Dict[Asset, FVal] = defaultdict(FVal)
-                for event in aave_history.events:
-                    if event.timestamp < start_ts:
-                        continue
-                    if event.timestamp > end_ts:
-                        break
-
-                    if event.event_type == 'interest':
-                        defi_events.append(DefiEvent(
-                            timestamp=event.timestamp,
-                            event_type=DefiEventType.AAVE_LOAN_INTEREST,
-                            asset=event.asset,
-                            amount=event.value.amount,
-                        ))
-                        total_amount_per_token[event.asset] += event.value.amount
-
-                for token, balance in aave_history.total_earned_interest.items():
-                    # Αdd an extra event per token per address for the remaining not paid amount
-                    if token in total_amount_per_token:
-                        defi_events.append(DefiEvent(
-                            timestamp=now,
-                            event_type=DefiEventType.AAVE_LOAN_INTEREST,
-                            asset=token,
-                            amount=balance.amount - total_amount_per_token[token],
-                        ))
-
-                # Add all losses from aave borrowing/liquidations
-                for asset, balance in aave_history.total_lost.items():
-                    defi_events.append(DefiEvent(
-                        timestamp=now,
-                        event_type=DefiEventType.AAVE_LOSS,
-                        asset=asset,
-                        amount=balance.amount,
-                    ))
-
-                # Add earned assets from aave liquidations
-                for asset, balance in aave_history.total_earned_liquidations.items():
-                    defi_events.append(DefiEvent(
-                        timestamp=now,
-                        event_type=DefiEventType.AAVE_LOAN_INTEREST,
-                        asset=asset,
-                        amount=balance.amount,
-                    ))
+        for name, _ in defi_sources:
+            defi_events.extend(defi_events_per_source.get(name, []))
 
         history.sort(key=lambda trade: action_get_timestamp(trade))
         return (
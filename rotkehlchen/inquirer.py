@@ -3,9 +3,10 @@ from __future__ import unicode_literals  # isort:skip
 import logging
 from json.decoder import JSONDecodeError
 from pathlib import Path
-from typing import TYPE_CHECKING, Dict, Iterable, Optional
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional
 
 import requests
+from gevent.event import AsyncResult
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.chain.ethereum.defi import handle_defi_price_query
@@ -23,12 +24,14 @@ from rotkehlchen.constants.assets import (
     A_YFI,
     FIAT_CURRENCIES,
 )
+from rotkehlchen.db.forex import ForexRatesDB
 from rotkehlchen.errors import PriceQueryUnsupportedAsset, RemoteError, UnableToDecryptRemoteData
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import Price, Timestamp
 from rotkehlchen.utils.misc import request_get_dict, retry_calls, timestamp_to_date, ts_now
-from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads_dict
+from rotkehlchen.utils.network import SHARED_SESSION
+from rotkehlchen.utils.serialization import rlk_jsonloads_dict
 
 if TYPE_CHECKING:
     from rotkehlchen.chain.ethereum.manager import EthereumManager
@@ -39,6 +42,9 @@ if TYPE_CHECKING:
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
 
+# For how long a queried current usd price is reused
+CURRENT_PRICE_CACHE_SECS = 300
+
 SPECIAL_SYMBOLS = (
     'yyDAI+yUSDC+yUSDT+yBUSD',
     'yyDAI+yUSDC+yUSDT+yTUSD',
@@ -138,13 +144,21 @@ def _query_exchanges_rateapi(base: Asset, quote: Asset) -> Optional[Price]:
         return None
 
 
+class CachedPriceEntry(NamedTuple):
+    price: Price
+    time: Timestamp
+
+
 class Inquirer():
     __instance: Optional['Inquirer'] = None
-    _cached_forex_data: Dict
+    _forex_db: ForexRatesDB
     _data_directory: Path
     _cryptocompare: 'Cryptocompare'
     _coingecko: 'Coingecko'
     _ethereum: Optional['EthereumManager'] = None
+    _usd_price_cache: Dict[Asset, CachedPriceEntry]
+    # The asset prices that are currently being queried, mapped to the query result
+    _usd_price_queries: Dict[Asset, AsyncResult]
 
     def __new__(
             cls,
@@ -164,14 +178,9 @@ class Inquirer():
         Inquirer.__instance._data_directory = data_dir
         Inquirer._cryptocompare = cryptocompare
         Inquirer._coingecko = coingecko
-        filename = data_dir / 'price_history_forex.json'
-        try:
-            with open(filename, 'r') as f:
-                # we know price_history_forex contains a dict
-                data = rlk_jsonloads_dict(f.read())
-                Inquirer.__instance._cached_forex_data = data
-        except (OSError, JSONDecodeError):
-            Inquirer.__instance._cached_forex_data = {}
+        Inquirer.__instance._forex_db = ForexRatesDB(data_dir)
+        Inquirer.__instance._usd_price_cache = {}
+        Inquirer.__instance._usd_price_queries = {}
 
         return Inquirer.__instance
 
@@ -180,67 +189,126 @@ class Inquirer():
         Inquirer()._ethereum = ethereum
 
     @staticmethod
-    def _cryptocompare_find_usd_price(asset: Asset) -> Price:
+    def find_usd_price(asset: Asset) -> Price:
         """Returns the current USD price of the asset
 
-        Return Price(ZERO) if price can't be found.
-
-        May raise:
-        - RemoteError if the cryptocompare query has a problem
+        Returns Price(ZERO) if all options have been exhausted and errors are logged in the logs
         """
-        try:
-            result = Inquirer()._cryptocompare.query_endpoint_price(
-                from_asset=asset,
-                to_asset=A_USD,
-            )
-        except PriceQueryUnsupportedAsset:
-            log.error(
-                'Cryptocompare usd price for asset failed since it is not known to cryptocompare',
-                asset=asset,
-            )
-            return Price(ZERO)
-        if 'USD' not in result:
-            log.error('Cryptocompare usd price query failed', asset=asset)
-            return Price(ZERO)
+        return Inquirer().find_usd_prices([asset])[asset]
 
-        price = Price(FVal(result['USD']))
-        log.debug('Got usd price from cryptocompare', asset=asset, price=price)
-        return price
+    @staticmethod
+    def find_usd_prices(assets: Iterable[Asset]) -> Dict[Asset, Price]:
+        """Returns the current USD price of each of the given assets
+
+        Found prices are cached for CURRENT_PRICE_CACHE_SECS and shared by all callers.
+        The assets that are not cached are queried together and assets whose price
+        is already being queried by another caller are not queried again, their
+        query result is waited for instead.
+
+        The price of an asset is Price(ZERO) if all options have been exhausted and
+        errors are logged in the logs
+        """
+        instance = Inquirer()
+        now = ts_now()
+        prices = {}
+        pending_queries = {}
+        to_query = []
+        for asset in set(assets):
+            cached_entry = instance._usd_price_cache.get(asset)
+            if cached_entry is not None and now - cached_entry.time <= CURRENT_PRICE_CACHE_SECS:
+                prices[asset] = cached_entry.price
+            elif asset.identifier in SPECIAL_SYMBOLS:
+                # These query the prices of their underlying assets so they can't be
+                # part of the same query
+                prices[asset] = instance._find_defi_usd_price(asset)
+                if prices[asset] != Price(ZERO):
+                    instance._usd_price_cache[asset] = CachedPriceEntry(
+                        price=prices[asset],
+                        time=ts_now(),
+                    )
+            elif asset in instance._usd_price_queries:
+                pending_queries[asset] = instance._usd_price_queries[asset]
+            else:
+                to_query.append(asset)
+
+        if len(to_query) != 0:
+            query_result = AsyncResult()
+            for asset in to_query:
+                instance._usd_price_queries[asset] = query_result
+            try:
+                new_prices = instance._query_usd_prices(to_query)
+                now = ts_now()
+                for asset, price in new_prices.items():
+                    if price != Price(ZERO):
+                        instance._usd_price_cache[asset] = CachedPriceEntry(price=price, time=now)
+                query_result.set(new_prices)
+            except BaseException as e:
+                query_result.set_exception(e)
+                raise
+            finally:
+                for asset in to_query:
+                    instance._usd_price_queries.pop(asset, None)
+            prices.update(new_prices)
+
+        for asset, pending_query in pending_queries.items():
+            prices[asset] = pending_query.get()[asset]
+
+        return prices
 
     @staticmethod
-    def find_usd_price(asset: Asset) -> Price:
-        """Returns the current USD price of the asset
+    def _find_defi_usd_price(asset: Asset) -> Price:
+        """Returns the current USD price of a DeFi token of SPECIAL_SYMBOLS
 
-        Returns Price(ZERO) if all options have been exhausted and errors are logged in the logs
+        Returns Price(ZERO) if the price could not be found
         """
-        if asset.identifier in SPECIAL_SYMBOLS:
-            ethereum = Inquirer()._ethereum
-            assert ethereum, 'Inquirer should never be called before the injection of ethereum'
-            underlying_asset_price = get_underlying_asset_price(asset.identifier)
-            usd_price = handle_defi_price_query(
-                ethereum=ethereum,
-                token_symbol=asset.identifier,
-                underlying_asset_price=underlying_asset_price,
-            )
-            if usd_price is None:
-                return Price(ZERO)
+        ethereum = Inquirer()._ethereum
+        assert ethereum, 'Inquirer should never be called before the injection of ethereum'
+        underlying_asset_price = get_underlying_asset_price(asset.identifier)
+        usd_price = handle_defi_price_query(
+            ethereum=ethereum,
+            token_symbol=asset.identifier,
+            underlying_asset_price=underlying_asset_price,
+        )
+        if usd_price is None:
+            return Price(ZERO)
+
+        return Price(usd_price)
+
+    @staticmethod
+    def _query_usd_prices(assets: List[Asset]) -> Dict[Asset, Price]:
+        """Queries the current USD price of each of the given assets
 
-            return Price(usd_price)
+        All assets are first queried from cryptocompare and the ones it has no price
+        for from coingecko. Each of them with as few queries as possible.
 
+        Returns Price(ZERO) for the assets whose price could not be found
+        """
+        prices = {}
         try:
-            price = Inquirer()._cryptocompare_find_usd_price(asset)
-        except RemoteError:
-            price = Price(ZERO)
+            prices = Inquirer()._cryptocompare.query_endpoint_pricemulti(
+                from_assets=assets,
+                to_asset=A_USD,
+            )
+        except (RemoteError, PriceQueryUnsupportedAsset) as e:
+            log.error(f'Cryptocompare usd prices query failed due to {str(e)}')
 
-        if price == Price(ZERO):
+        missing_assets = [x for x in assets if prices.get(x, Price(ZERO)) == Price(ZERO)]
+        if len(missing_assets) != 0:
             try:
-                price = Inquirer()._coingecko.simple_price(from_asset=asset, to_asset=A_USD)
+                prices.update(Inquirer()._coingecko.simple_prices(
+                    from_assets=missing_assets,
+                    to_asset=A_USD,
+                ))
             except RemoteError as e:
                 log.error(
-                    f'Coingecko usd price query for {asset.identifier} failed due to {str(e)}',
+                    f'Coingecko usd price query for '
+                    f'{",".join(x.identifier for x in missing_assets)} failed due to {str(e)}',
                 )
-                price = Price(ZERO)
-        return price
+
+        for asset in missing_assets:
+            prices.setdefault(asset, Price(ZERO))
+        log.debug('Got usd prices', num_assets=len(assets))
+        return prices
 
     @staticmethod
     def get_fiat_usd_exchange_rates(
@@ -249,8 +317,7 @@ class Inquirer():
         rates = {A_USD: FVal(1)}
         if not currencies:
             currencies = FIAT_CURRENCIES[1:]
-        for currency in currencies:
-            rates[currency] = Inquirer().query_fiat_pair(A_USD, currency)
+        rates.update(Inquirer().query_fiat_pairs(A_USD, currencies))
         return rates
 
     @staticmethod
@@ -283,8 +350,8 @@ class Inquirer():
             location='query_exchangeratesapi',
             handle_429=False,
             backoff_in_seconds=0,
-            method_name='requests.get',
-            function=requests.get,
+            method_name='get',
+            function=SHARED_SESSION.get,
             # function's arguments
             url=query_str,
         )
@@ -300,15 +367,11 @@ class Inquirer():
         if 'rates' not in result or to_fiat_currency.identifier not in result['rates']:
             return None
 
-        if date not in instance._cached_forex_data:
-            instance._cached_forex_data[date] = {}
-
-        if from_fiat_currency not in instance._cached_forex_data[date]:
-            instance._cached_forex_data[date][from_fiat_currency] = {}
-
-        for key, value in result['rates'].items():
-            instance._cached_forex_data[date][from_fiat_currency][key] = FVal(value)
-
+        instance._forex_db.add_rates(
+            date=date,
+            from_currency=from_fiat_currency,
+            rates={key: FVal(value) for key, value in result['rates'].items()},
+        )
         rate = Price(FVal(result['rates'][to_fiat_currency.identifier]))
         log.debug('Exchangeratesapi query succesful', rate=rate)
         return rate
@@ -322,17 +385,7 @@ class Inquirer():
     ) -> None:
         assert from_currency.is_fiat(), 'fiat currency should have been provided'
         assert to_currency.is_fiat(), 'fiat currency should have been provided'
-        instance = Inquirer()
-        if date not in instance._cached_forex_data:
-            instance._cached_forex_data[date] = {}
-
-        if from_currency not in instance._cached_forex_data[date]:
-            instance._cached_forex_data[date][from_currency] = {}
-
-        msg = 'Cached value should not already exist'
-        assert to_currency not in instance._cached_forex_data[date][from_currency], msg
-        instance._cached_forex_data[date][from_currency][to_currency] = price
-        instance.save_historical_forex_data()
+        Inquirer()._forex_db.add_rate(date, from_currency, to_currency, price)
 
     @staticmethod
     def _get_cached_forex_data(
@@ -340,26 +393,15 @@ class Inquirer():
             from_currency: Asset,
             to_currency: Asset,
     ) -> Optional[Price]:
-        instance = Inquirer()
-        if date in instance._cached_forex_data:
-            if from_currency in instance._cached_forex_data[date]:
-                rate = instance._cached_forex_data[date][from_currency].get(to_currency)
-                if rate:
-                    log.debug(
-                        'Got cached forex rate',
-                        from_currency=from_currency.identifier,
-                        to_currency=to_currency.identifier,
-                        rate=rate,
-                    )
-                return rate
-        return None
-
-    @staticmethod
-    def save_historical_forex_data() -> None:
-        instance = Inquirer()
-        filename = instance._data_directory / 'price_history_forex.json'
-        with open(filename, 'w') as outfile:
-            outfile.write(rlk_jsondumps(instance._cached_forex_data))
+        rate = Inquirer()._forex_db.get_rate(date, from_currency, to_currency)
+        if rate:
+            log.debug(
+                'Got cached forex rate',
+                from_currency=from_currency.identifier,
+                to_currency=to_currency.identifier,
+                rate=rate,
+            )
+        return rate
 
     @staticmethod
     def query_fiat_pair(base: Asset, quote: Asset) -> Price:
@@ -398,3 +440,23 @@ class Inquirer():
 
         instance._save_forex_rate(date, base, quote, price)
         return price
+
+    @staticmethod
+    def query_fiat_pairs(base: Asset, quotes: Iterable[Asset]) -> Dict[Asset, Price]:
+        """Returns the current rates from the base fiat currency to each of the quotes
+
+        All of today's cached rates are loaded with a single query and only the
+        missing pairs are queried via query_fiat_pair.
+
+        May raise:
+        - ValueError if no rate, online or cached, can be found for one of the pairs
+        """
+        # quotes is iterated twice so a generator has to be turned into a list
+        quotes = list(quotes)
+        date = timestamp_to_date(ts_now(), formatstr='%Y-%m-%d')
+        instance = Inquirer()
+        rates = instance._forex_db.get_rates(date, base, quotes)
+        for quote in quotes:
+            if quote not in rates:
+                rates[quote] = instance.query_fiat_pair(base, quote)
+        return rates
@@ -3,8 +3,9 @@ import logging
 import random
 import re
 import string
+import sys
 import time
-from typing import Any, Dict, MutableMapping, Tuple
+from typing import Any, Callable, Dict, MutableMapping, Tuple
 
 from rotkehlchen.fval import FVal
 from rotkehlchen.typing import EthAddress
@@ -64,8 +65,21 @@ def random_hash() -> str:
     return '0x' + b.hex()
 
 
-def make_sensitive(data: Dict[str, Any]) -> Dict[str, Any]:
-    return dict(data, **{'sensitive_log': True})
+class LazyLogValue():
+    """A log entry value that is only computed if the log entry is emitted
+
+    Use it for values that are costly to compute and are logged at a level that
+    is usually disabled. For example:
+    log.debug('Queried balances', balances=LazyLogValue(serialize, balances))
+    """
+    __slots__ = ('func', 'args')
+
+    def __init__(self, func: Callable[..., Any], *args: Any) -> None:
+        self.func = func
+        self.args = args
+
+    def __call__(self) -> Any:
+        return self.func(*self.args)
 
 
 class LoggingSettings():
@@ -87,10 +101,70 @@ class LoggingSettings():
 
 
 class RotkehlchenLogsAdapter(logging.LoggerAdapter):
+    """Logs adapter that appends the kwargs of a log entry to its message
+
+    The level methods check whether the level is enabled before anything else,
+    so a disabled entry costs a single method call no matter its kwargs.
+    Values of the kwargs that are LazyLogValue are only computed if the entry
+    is emitted and positional args are formatted into the message as by the
+    logging module, only once the entry is handled.
+    """
 
     def __init__(self, logger: logging.Logger):
         return super().__init__(logger, extra={})
 
+    def debug(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self._emit(logging.DEBUG, msg, args, kwargs)
+
+    def info(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(logging.INFO):
+            self._emit(logging.INFO, msg, args, kwargs)
+
+    def warning(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(logging.WARNING):
+            self._emit(logging.WARNING, msg, args, kwargs)
+
+    def error(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(logging.ERROR):
+            self._emit(logging.ERROR, msg, args, kwargs)
+
+    def critical(self, msg: str, *args: Any, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(logging.CRITICAL):
+            self._emit(logging.CRITICAL, msg, args, kwargs)
+
+    def log(self, level: int, msg: str, *args: Any, **kwargs: Any) -> None:
+        if self.logger.isEnabledFor(level):
+            self._emit(level, msg, args, kwargs)
+
+    def _emit(
+            self,
+            level: int,
+            msg: str,
+            args: Tuple[Any, ...],
+            kwargs: MutableMapping[str, Any],
+    ) -> None:
+        if args:
+            # Escape the appended kwargs so that only msg is %-formatted with args
+            processed_msg, _ = self.process('', kwargs)
+            msg += processed_msg.replace('%', '%%')
+        else:
+            msg, _ = self.process(msg, kwargs)
+        # The record is made here instead of by Logger.log() since that would take
+        # this module for the caller. Frame 2 is the caller of the level method.
+        caller = sys._getframe(2)  # pylint: disable=protected-access
+        record = self.logger.makeRecord(
+            self.logger.name,
+            level,
+            caller.f_code.co_filename,
+            caller.f_lineno,
+            msg,
+            args,
+            None,
+            caller.f_code.co_name,
+        )
+        self.logger.handle(record)
+
     def process(self, msg: str, kwargs: MutableMapping[str, Any]) -> Tuple[str, Dict]:
         """
         This is the main post-processing function for Rotki logs
@@ -99,7 +173,8 @@ class RotkehlchenLogsAdapter(logging.LoggerAdapter):
         and if it is marks the log entry as sensitive. If it is sensitive, the values
         of the kwargs are anonymized via the pre-specified rules
 
-        This function also appends all kwargs to the final message.
+        This function also appends all kwargs to the final message, computing
+        the values that are LazyLogValue.
         """
         settings = LoggingSettings.get()
 
@@ -133,7 +208,10 @@ class RotkehlchenLogsAdapter(logging.LoggerAdapter):
         else:
             new_kwargs = kwargs
 
-        msg = msg + ','.join(' {}={}'.format(a[0], a[1]) for a in new_kwargs.items())
+        msg = msg + ','.join(
+            ' {}={}'.format(key, val() if isinstance(val, LazyLogValue) else val)
+            for key, val in new_kwargs.items()
+        )
         return msg, {}
 
 
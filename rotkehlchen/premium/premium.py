@@ -21,6 +21,7 @@ from rotkehlchen.errors import (
     RemoteError,
 )
 from rotkehlchen.typing import B64EncodedBytes, Timestamp
+from rotkehlchen.utils.network import create_session
 from rotkehlchen.utils.serialization import rlk_jsonloads_dict
 
 logger = logging.getLogger(__name__)
@@ -127,7 +128,7 @@ class Premium():
 
     def __init__(self, credentials: PremiumCredentials):
         self.status = SubscriptionStatus.UNKNOWN
-        self.session = requests.session()
+        self.session = create_session()
         self.apiversion = '1'
         self.uri = 'https://rotki.com/api/{}/'.format(self.apiversion)
         self.reset_credentials(credentials)
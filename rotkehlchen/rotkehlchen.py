@@ -5,14 +5,17 @@ import logging.config
 import os
 import time
 from collections import defaultdict
+from functools import partial
 from pathlib import Path
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Union, overload
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Union, overload
 
 import gevent
 from gevent.lock import Semaphore
+from gevent.pool import Pool
 from typing_extensions import Literal
 
 from rotkehlchen.accounting.accountant import Accountant
+from rotkehlchen.assets.asset import Asset
 from rotkehlchen.assets.resolver import AssetResolver
 from rotkehlchen.balances.manual import account_for_manually_tracked_balances
 from rotkehlchen.chain.bitcoin.xpub import XpubManager
@@ -23,6 +26,7 @@ from rotkehlchen.chain.ethereum.manager import (
 )
 from rotkehlchen.chain.manager import BlockchainBalancesUpdate, ChainManager
 from rotkehlchen.config import default_data_directory
+from rotkehlchen.constants.ethereum import EthereumConstants
 from rotkehlchen.data.importer import DataImporter
 from rotkehlchen.data_handler import DataHandler
 from rotkehlchen.db.settings import DBSettings, ModifiableDBSettings
@@ -82,6 +86,13 @@ LIMITS_MAPPING = {
 
 ICONS_BATCH_SIZE = 5
 ICONS_QUERY_SLEEP = 10
+# Maximum number of balance sources (exchanges, blockchains) queried at the same time
+BALANCES_QUERY_POOL_SIZE = 8
+# Seconds after which the balances query of a single source is abandoned
+BALANCES_QUERY_SOURCE_TIMEOUT = 300
+
+# The balances of a single location, as asset to amount and usd_value
+SourceBalances = Dict[Asset, Dict[str, Any]]
 
 
 class Rotkehlchen():
@@ -117,6 +128,8 @@ class Rotkehlchen():
         self.exchange_manager = ExchangeManager(msg_aggregator=self.msg_aggregator)
         # Initialize the AssetResolver singleton
         AssetResolver(data_directory=self.data_dir)
+        # Move the index of the ethereum constants to the data directory
+        EthereumConstants(data_directory=self.data_dir)
         self.data = DataHandler(self.data_dir, self.msg_aggregator)
         self.cryptocompare = Cryptocompare(data_directory=self.data_dir, database=None)
         self.coingecko = Coingecko()
@@ -224,6 +237,7 @@ class Rotkehlchen():
             data_directory=self.data_dir,
             history_date_start=historical_data_start,
             cryptocompare=self.cryptocompare,
+            price_memo_size=self.args.historical_price_memo_size,
         )
         self.accountant = Accountant(
             db=self.data.db,
@@ -285,6 +299,8 @@ class Rotkehlchen():
         # Reset rotkehlchen logger to default
         LoggingSettings(anonymized_logs=DEFAULT_ANONYMIZED_LOGS)
 
+        # Delete the CSV files of the last profit/loss report
+        self.accountant.csvexporter.close()
         del self.accountant
         del self.trades_historian
         del self.data_importer
@@ -585,6 +601,8 @@ class Rotkehlchen():
         if location is not None:
             trades = self.query_location_trades(from_ts, to_ts, location)
         else:
+            # counts of previous queries should not limit the trades of any location
+            self.actions_per_location['trade'].clear()
             trades = self.query_location_trades(from_ts, to_ts, Location.EXTERNAL)
             for name, exchange in self.exchange_manager.connected_exchanges.items():
                 exchange_trades = exchange.query_trade_history(start_ts=from_ts, end_ts=to_ts)
@@ -602,6 +620,76 @@ class Rotkehlchen():
         trades.sort(key=lambda x: x.timestamp, reverse=True)
         return trades
 
+    def query_trades_page(
+            self,
+            from_ts: Timestamp,
+            to_ts: Timestamp,
+            location: Optional[Location],
+            limit: int,
+            offset: int,
+    ) -> List[Trade]:
+        """Queries a single page of trades for the given location and time range.
+        If no location is given then all external and all exchange trades are queried.
+
+        Trades not yet queried from the exchanges are first saved in the DB and then
+        read from the DB, with the most recent trades first. The pages contain the same
+        trades as query_trades, so if the user does not have premium the trade limit is
+        applied per location in the same way.
+
+        May raise:
+        - RemoteError: If there are problems connecting to any of the remote exchanges
+        """
+        if location is None:
+            locations = [Location.EXTERNAL]
+            for name, exchange in self.exchange_manager.connected_exchanges.items():
+                exchange.sync_trade_history(start_ts=from_ts, end_ts=to_ts)
+                locations.append(deserialize_location(name))
+        else:
+            if location != Location.EXTERNAL:
+                location_exchange = self.exchange_manager.get(str(location))
+                if not location_exchange:
+                    logger.warn(
+                        f'Tried to query trades from {location} which is either not an '
+                        f'exchange or not an exchange the user has connected to',
+                    )
+                    return []
+                location_exchange.sync_trade_history(start_ts=from_ts, end_ts=to_ts)
+            locations = [location]
+
+        if self.premium is not None:
+            return list(self.data.db.iterate_trades(
+                from_ts=from_ts,
+                to_ts=to_ts,
+                locations=locations,
+                recent_first=True,
+                limit=limit,
+                offset=offset,
+            ))
+
+        # clear the trades queried for the locations, as query_trades does
+        if location is None:
+            self.actions_per_location['trade'].clear()
+        else:
+            self.actions_per_location['trade'][location] = 0
+        trades: List[Trade] = []
+        for trade_location in locations:
+            # No more than the limit can be taken from a single location
+            location_trades = list(self.data.db.iterate_trades(
+                from_ts=from_ts,
+                to_ts=to_ts,
+                location=trade_location,
+                limit=FREE_TRADES_LIMIT,
+            ))
+            trades = self._apply_actions_limit(
+                location=trade_location,
+                action_type='trade',
+                location_actions=location_trades,
+                all_actions=trades,
+            )
+
+        trades.sort(key=lambda x: x.timestamp, reverse=True)
+        return trades[offset:offset + limit]
+
     def query_location_trades(
             self,
             from_ts: Timestamp,
@@ -647,6 +735,7 @@ class Rotkehlchen():
             requested_save_data: bool = False,
             timestamp: Timestamp = None,
             ignore_cache: bool = False,
+            progress_callback: Optional[Callable[[str, SourceBalances], None]] = None,
     ) -> Dict[str, Any]:
         """Query all balances rotkehlchen can see.
 
@@ -658,32 +747,74 @@ class Rotkehlchen():
         to be saved in the DB
         If ignore_cache is True then all underlying calls that have a cache ignore it
 
+        All exchanges and the blockchains are queried at the same time. A source
+        that fails or does not finish in time is left out of the result and the
+        data are then not saved. If progress_callback is given it is called with
+        the name and the balances of each source as soon as it finishes.
+
         Returns a dictionary with the queried balances.
         """
         log.info('query_balances called', requested_save_data=requested_save_data)
 
-        balances = {}
-        problem_free = True
-        for _, exchange in self.exchange_manager.connected_exchanges.items():
+        def query_exchange(exchange: ExchangeInterface) -> Optional[SourceBalances]:
             exchange_balances, _ = exchange.query_balances(ignore_cache=ignore_cache)
-            # If we got an error, disregard that exchange but make sure we don't save data
-            if not isinstance(exchange_balances, dict):
-                problem_free = False
-            else:
-                balances[exchange.name] = exchange_balances
+            # If we got an error, disregard that exchange
+            return exchange_balances if isinstance(exchange_balances, dict) else None
+
+        def query_blockchain() -> Optional[SourceBalances]:
+            try:
+                blockchain_result = self.chain_manager.query_balances(
+                    blockchain=None,
+                    force_token_detection=ignore_cache,
+                    ignore_cache=ignore_cache,
+                )
+            except (RemoteError, EthSyncError) as e:
+                log.error(f'Querying blockchain balances failed due to: {str(e)}')
+                return None
 
-        try:
-            blockchain_result = self.chain_manager.query_balances(
-                blockchain=None,
-                force_token_detection=ignore_cache,
-                ignore_cache=ignore_cache,
-            )
-            balances['blockchain'] = {
+            return {
                 asset: balance.to_dict() for asset, balance in blockchain_result.totals.items()
             }
-        except (RemoteError, EthSyncError) as e:
-            problem_free = False
-            log.error(f'Querying blockchain balances failed due to: {str(e)}')
+
+        def query_source(
+                name: str,
+                method: Callable[[], Optional[SourceBalances]],
+        ) -> Optional[SourceBalances]:
+            try:
+                with gevent.Timeout(BALANCES_QUERY_SOURCE_TIMEOUT):
+                    source_balances = method()
+            except gevent.Timeout:
+                msg = (
+                    f'{name} balances query did not finish within '
+                    f'{BALANCES_QUERY_SOURCE_TIMEOUT} seconds'
+                )
+                log.error(msg)
+                self.msg_aggregator.add_error(f'{msg}. The balances will not include it')
+                return None
+
+            if source_balances is not None and progress_callback is not None:
+                progress_callback(name, source_balances)
+            return source_balances
+
+        sources: List[Tuple[str, Callable[[], Optional[SourceBalances]]]] = [
+            (exchange.name, partial(query_exchange, exchange))
+            for exchange in self.exchange_manager.connected_exchanges.values()
+        ]
+        sources.append(('blockchain', query_blockchain))
+        pool = Pool(BALANCES_QUERY_POOL_SIZE)
+        greenlets = [pool.spawn(query_source, name, method) for name, method in sources]
+        pool.join()
+
+        balances = {}
+        problem_free = True
+        # Keep the locations in the same order regardless of which finished first
+        for (name, _), greenlet in zip(sources, greenlets):
+            source_balances = greenlet.get()
+            # If a source failed make sure we don't save data
+            if source_balances is None:
+                problem_free = False
+            else:
+                balances[name] = source_balances
 
         balances = account_for_manually_tracked_balances(db=self.data.db, balances=balances)
 
@@ -813,6 +944,8 @@ class Rotkehlchen():
                 exchange=exchange,
             )
         else:
+            # counts of previous queries should not limit the movements of any location
+            self.actions_per_location['asset_movement'].clear()
             for _, exchange in self.exchange_manager.connected_exchanges.items():
                 movements = self._query_exchange_asset_movements(
                     from_ts=from_ts,
@@ -825,6 +958,75 @@ class Rotkehlchen():
         movements.sort(key=lambda x: x.timestamp, reverse=True)
         return movements
 
+    def query_asset_movements_page(
+            self,
+            from_ts: Timestamp,
+            to_ts: Timestamp,
+            location: Optional[Location],
+            limit: int,
+            offset: int,
+    ) -> List[AssetMovement]:
+        """Queries a single page of AssetMovements for the given location and time range.
+        If no location is given then all exchange asset movements are queried.
+
+        Asset movements not yet queried from the exchanges are first saved in the DB and
+        then read from the DB, with the most recent first. The pages contain the same
+        asset movements as query_asset_movements, so if the user does not have premium
+        the limit is applied per location in the same way.
+
+        May raise:
+        - RemoteError: If there are problems connecting to any of the remote exchanges
+        """
+        if location is None:
+            exchanges = list(self.exchange_manager.connected_exchanges.values())
+        else:
+            location_exchange = self.exchange_manager.get(str(location))
+            if not location_exchange:
+                logger.warn(
+                    f'Tried to query deposits/withdrawals from {location} which is either not an '
+                    f'exchange or not an exchange the user has connected to',
+                )
+                return []
+            exchanges = [location_exchange]
+
+        for exchange in exchanges:
+            exchange.sync_deposits_withdrawals(start_ts=from_ts, end_ts=to_ts)
+
+        if self.premium is not None:
+            return list(self.data.db.iterate_asset_movements(
+                from_ts=from_ts,
+                to_ts=to_ts,
+                locations=[exchange.name for exchange in exchanges],
+                recent_first=True,
+                limit=limit,
+                offset=offset,
+            ))
+
+        if location is None:
+            # counts of previous queries should not limit the movements of any location
+            self.actions_per_location['asset_movement'].clear()
+        movements: List[AssetMovement] = []
+        for exchange in exchanges:
+            movement_location = deserialize_location(exchange.name)
+            # clear the asset movements queried for this exchange
+            self.actions_per_location['asset_movement'][movement_location] = 0
+            # No more than the limit can be taken from a single location
+            location_movements = list(self.data.db.iterate_asset_movements(
+                from_ts=from_ts,
+                to_ts=to_ts,
+                location=exchange.name,
+                limit=FREE_ASSET_MOVEMENTS_LIMIT,
+            ))
+            movements = self._apply_actions_limit(
+                location=movement_location,
+                action_type='asset_movement',
+                location_actions=location_movements,
+                all_actions=movements,
+            )
+
+        movements.sort(key=lambda x: x.timestamp, reverse=True)
+        return movements[offset:offset + limit]
+
     def set_settings(self, settings: ModifiableDBSettings) -> Tuple[bool, str]:
         """Tries to set new settings. Returns True in success or False with message if error"""
         with self.lock:
@@ -881,15 +1083,16 @@ class Rotkehlchen():
         self.data.db.delete_used_query_range_for_exchange(name)
         return True, ''
 
-    def query_periodic_data(self) -> Dict[str, Union[bool, Timestamp]]:
+    def query_periodic_data(self) -> Dict[str, Union[bool, int, Timestamp]]:
         """Query for frequently changing data"""
-        result: Dict[str, Union[bool, Timestamp]] = {}
+        result: Dict[str, Union[bool, int, Timestamp]] = {}
 
         if self.user_is_logged_in:
             result['last_balance_save'] = self.data.db.get_last_balance_save_time()
             result['eth_node_connection'] = self.chain_manager.ethereum.web3_mapping.get(NodeName.OWN, None) is not None  # noqa : E501
             result['history_process_start_ts'] = self.accountant.started_processing_timestamp
             result['history_process_current_ts'] = self.accountant.currently_processing_timestamp
+            result['history_process_prefetch_progress'] = self.accountant.price_prefetch_progress
             result['last_data_upload_ts'] = Timestamp(self.premium_sync_manager.last_data_upload_ts)  # noqa : E501
         return result
 
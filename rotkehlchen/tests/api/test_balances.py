@@ -7,7 +7,9 @@ import gevent
 import pytest
 import requests
 
+from rotkehlchen.accounting.structures import Balance
 from rotkehlchen.balances.manual import ManuallyTrackedBalance
+from rotkehlchen.chain.manager import BlockchainBalances, BlockchainBalancesUpdate
 from rotkehlchen.constants.assets import A_BTC, A_ETH, A_EUR
 from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.fval import FVal
@@ -492,3 +494,59 @@ def test_multiple_balance_queries_not_concurrent(
         token_balances=setup.token_balances,
         also_btc=True,
     )
+
+
+@pytest.mark.parametrize('added_exchanges', [('binance', 'poloniex')])
+def test_query_all_balances_reports_progress_and_partial_results(
+        rotkehlchen_api_server_with_exchanges,
+):
+    """Test that all balance sources are queried at the same time, that the balances
+    of each source are reported while the task is pending and that a source which
+    does not finish in time is left out of the result"""
+    server = rotkehlchen_api_server_with_exchanges
+    rotki = server.rest_api.rotkehlchen
+    binance = rotki.exchange_manager.connected_exchanges['binance']
+    poloniex = rotki.exchange_manager.connected_exchanges['poloniex']
+
+    def slow_binance_balances(**kwargs):  # pylint: disable=unused-argument
+        gevent.sleep(4)
+        return {A_EUR: {'amount': FVal(1), 'usd_value': FVal(1)}}, ''
+
+    poloniex_result = {A_ETH: {'amount': FVal(2), 'usd_value': FVal(400)}}, ''
+    blockchain_result = BlockchainBalancesUpdate(
+        per_account=BlockchainBalances(db=rotki.data.db),
+        totals={A_BTC: Balance(amount=FVal(1), usd_value=FVal(10000))},
+    )
+    with ExitStack() as stack:
+        stack.enter_context(patch.object(binance, 'query_balances', side_effect=slow_binance_balances))  # noqa: E501
+        stack.enter_context(patch.object(poloniex, 'query_balances', return_value=poloniex_result))  # noqa: E501
+        stack.enter_context(patch.object(rotki.chain_manager, 'query_balances', return_value=blockchain_result))  # noqa: E501
+        stack.enter_context(patch('rotkehlchen.rotkehlchen.BALANCES_QUERY_SOURCE_TIMEOUT', 2))
+        response = requests.get(
+            api_url_for(server, "allbalancesresource"),
+            json={'async_query': True, 'save_data': True},
+        )
+        task_id = assert_ok_async_response(response)
+
+        gevent.sleep(1)
+        response = requests.get(
+            api_url_for(server, "specific_async_tasks_resource", task_id=task_id),
+        )
+        assert_proper_response(response)
+        result = response.json()['result']
+        assert result['status'] == 'pending'
+        assert result['progress'] == {
+            'poloniex': {'ETH': {'amount': '2', 'usd_value': '400'}},
+            'blockchain': {'BTC': {'amount': '1', 'usd_value': '10000'}},
+        }
+
+        outcome = wait_for_async_task_with_result(server, task_id)
+
+    assert outcome['location'].keys() == {'poloniex', 'blockchain'}
+    assert FVal(outcome['net_usd']) == FVal(10400)
+    assert 'EUR' not in outcome
+    errors = rotki.msg_aggregator.consume_errors()
+    assert len(errors) == 1
+    assert 'binance balances query did not finish within 2 seconds' in errors[0]
+    # Since a source was left out the balances should not have been saved
+    assert len(rotki.data.db.query_timed_balances(from_ts=None, to_ts=None, asset=A_ETH)) == 0
@@ -3,6 +3,7 @@ from contextlib import ExitStack
 from http import HTTPStatus
 from unittest.mock import patch
 
+import gevent
 import pytest
 import requests
 
@@ -13,6 +14,7 @@ from rotkehlchen.tests.utils.api import (
     api_url_for,
     assert_error_response,
     assert_ok_async_response,
+    assert_proper_response,
     assert_proper_response_with_result,
     wait_for_async_task,
 )
@@ -20,6 +22,7 @@ from rotkehlchen.tests.utils.factories import make_ethereum_address
 from rotkehlchen.tests.utils.mock import MockResponse
 from rotkehlchen.tests.utils.rotkehlchen import setup_balances
 from rotkehlchen.typing import EthereumTransaction
+from rotkehlchen.utils.ratelimit import TokenBucket
 
 EXPECTED_AFB7_TXS = [{
     'tx_hash': '0x13684203a4bf07aaed0112983cb380db6004acac772af2a5d46cb2a28245fbad',
@@ -584,3 +587,142 @@ def test_transaction_same_hash_same_nonce_two_tracked_accounts(
         result = assert_proper_response_with_result(response)
         assert len(result['entries']) == 2
         assert result['entries_found'] == 2
+
+
+@pytest.mark.parametrize('number_of_eth_accounts', [6])
+def test_query_transactions_of_many_addresses_concurrently(
+        rotkehlchen_api_server,
+        ethereum_accounts,
+):
+    """Test that the transactions of many addresses are queried concurrently from
+    etherscan and are written in the DB as each address is queried"""
+    rotki = rotkehlchen_api_server.rest_api.rotkehlchen
+    rotki.etherscan.rate_limiter = TokenBucket(rate=1000, capacity=1000)
+    in_flight = 0
+    max_in_flight = 0
+
+    def mocked_request_dict(url, *_args, **_kwargs):
+        nonlocal in_flight, max_in_flight
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        gevent.sleep(0.05)
+        in_flight -= 1
+        if '=txlistinternal&' in url:
+            payload = '{"status":"1","message":"OK","result":[]}'
+        elif '=txlist&' in url:
+            idx = next(i for i, x in enumerate(ethereum_accounts) if x in url)
+            tx_str = f"""{{"blockNumber":"{idx + 1}","timeStamp":"{idx + 1}","hash":"0x{idx + 1:064x}","nonce":"0","blockHash":"0xd3cabad6adab0b52ea632c386ea19403680571e682c62cb589b5abcd76de2159","transactionIndex":"0","from":"{ethereum_accounts[idx]}","to":"{make_ethereum_address()}","value":"1","gas":"2000000","gasPrice":"10000000000000","isError":"0","txreceipt_status":"","input":"0x","contractAddress":"","cumulativeGasUsed":"1436963","gasUsed":"1436963","confirmations":"1"}}"""  # noqa: E501
+            payload = f'{{"status":"1","message":"OK","result":[{tx_str}]}}'
+        elif '=getblocknobytime&' in url:
+            payload = '{"status":"1","message":"OK","result": "1"}'
+
+        return MockResponse(200, payload)
+
+    etherscan_patch = patch.object(rotki.etherscan.session, 'get', wraps=mocked_request_dict)
+    db_patch = patch.object(
+        rotki.data.db,
+        'add_ethereum_transactions',
+        wraps=rotki.data.db.add_ethereum_transactions,
+    )
+    with etherscan_patch, db_patch as add_transactions_mock:
+        response = requests.get(
+            api_url_for(
+                rotkehlchen_api_server,
+                'ethereumtransactionsresource',
+            ),
+        )
+        result = assert_proper_response_with_result(response)
+
+    assert len(result['entries']) == len(ethereum_accounts)
+    assert {x['from_address'] for x in result['entries']} == set(ethereum_accounts)
+    assert max_in_flight > 1
+    assert add_transactions_mock.call_count == len(ethereum_accounts)
+
+
+@pytest.mark.parametrize('number_of_eth_accounts', [3])
+def test_query_transactions_error_keeps_queried_addresses(
+        rotkehlchen_api_server,
+        ethereum_accounts,
+):
+    """Test that an error while querying the transactions of one address keeps the
+    transactions of the addresses already queried and stops the other queries"""
+    rotki = rotkehlchen_api_server.rest_api.rotkehlchen
+    rotki.etherscan.rate_limiter = TokenBucket(rate=1000, capacity=1000)
+    eth_transactions = rotki.chain_manager.ethereum.transactions
+    failing_address = ethereum_accounts[1]
+    slow_address = ethereum_accounts[2]
+    slow_queries_finished = 0
+
+    def mocked_get_transactions(account, **_kwargs):
+        nonlocal slow_queries_finished
+        if account == failing_address:
+            gevent.sleep(0.05)
+            raise ValueError('boom')
+        if account == slow_address:
+            gevent.sleep(1)
+            slow_queries_finished += 1
+        return []
+
+    with patch.object(rotki.etherscan, 'get_transactions', side_effect=mocked_get_transactions):
+        with pytest.raises(ValueError):
+            eth_transactions._sync_transactions(
+                accounts=ethereum_accounts,
+                start_ts=0,
+                end_ts=1600000000,
+            )
+
+    db = rotki.data.db
+    assert db.get_used_query_range(f'ethtxs_{ethereum_accounts[0]}') == (0, 1600000000)
+    assert db.get_used_query_range(f'ethtxs_{failing_address}') is None
+    assert db.get_used_query_range(f'ethtxs_{slow_address}') is None
+    gevent.sleep(1.1)
+    assert slow_queries_finished == 0, 'queries of the other addresses should be killed'
+
+
+@pytest.mark.parametrize('number_of_eth_accounts', [2])
+def test_query_transactions_reports_progress(rotkehlchen_api_server, ethereum_accounts):
+    """Test that the addresses whose transactions have been queried are reported
+    with the number of their new transactions while the task is pending"""
+    rotki = rotkehlchen_api_server.rest_api.rotkehlchen
+    rotki.etherscan.rate_limiter = TokenBucket(rate=1000, capacity=1000)
+    fast_address, slow_address = ethereum_accounts
+
+    def mocked_get_transactions(account, internal, **_kwargs):
+        if account == slow_address:
+            gevent.sleep(2)
+            return []
+        if internal:
+            return []
+        return [EthereumTransaction(
+            tx_hash=x.to_bytes(2, byteorder='little'),
+            timestamp=x,
+            block_number=x,
+            from_address=fast_address,
+            to_address=make_ethereum_address(),
+            value=x,
+            gas=x,
+            gas_price=x,
+            gas_used=x,
+            input_data=b'',
+            nonce=x,
+        ) for x in range(1, 4)]
+
+    with patch.object(rotki.etherscan, 'get_transactions', side_effect=mocked_get_transactions):
+        response = requests.get(
+            api_url_for(rotkehlchen_api_server, 'ethereumtransactionsresource'),
+            json={'async_query': True},
+        )
+        task_id = assert_ok_async_response(response)
+
+        gevent.sleep(1)
+        response = requests.get(
+            api_url_for(rotkehlchen_api_server, 'specific_async_tasks_resource', task_id=task_id),
+        )
+        assert_proper_response(response)
+        result = response.json()['result']
+        assert result['status'] == 'pending'
+        assert result['progress'] == {fast_address: 3}
+
+        outcome = wait_for_async_task(rotkehlchen_api_server, task_id)
+
+    assert len(outcome['result']['entries']) == 3
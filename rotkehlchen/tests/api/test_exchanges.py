@@ -716,3 +716,61 @@ def test_query_asset_movements_over_limit(
             assert len(result['entries']) == FREE_ASSET_MOVEMENTS_LIMIT - polo_entries_num
             assert result['entries_limit'] == FREE_ASSET_MOVEMENTS_LIMIT
             assert result['entries_found'] == all_movements_num
+
+
+@pytest.mark.parametrize('added_exchanges', [('binance', 'poloniex')])
+def test_query_asset_movements_pages_match_unpaged_result(rotkehlchen_api_server_with_exchanges):
+    """Test that for a non premium user the pages of asset movements add up to the
+    movements returned without paging, with the limit applied per location"""
+    start_ts = 0
+    end_ts = 1598453214
+    server = rotkehlchen_api_server_with_exchanges
+    rotki = server.rest_api.rotkehlchen
+    # Make sure online binance is not queried by setting query ranges
+    DBQueryRanges(rotki.data.db).update_used_query_range(
+        location_string='binance_asset_movements',
+        start_ts=start_ts,
+        end_ts=end_ts,
+        ranges_to_query=[],
+    )
+
+    def make_movements(location, num):
+        return [AssetMovement(
+            location=location,
+            category=AssetMovementCategory.DEPOSIT,
+            address=None,
+            transaction_id=None,
+            timestamp=x,
+            asset=A_BTC,
+            amount=FVal(x * 100),
+            fee_asset=A_BTC,
+            fee=FVal(x),
+            link=f'{location}_{x}') for x in range(num)
+        ]
+    # Leave room in the limit for some but not all of the poloniex movements
+    binance_movements = make_movements(Location.BINANCE, FREE_ASSET_MOVEMENTS_LIMIT - 2)
+    rotki.data.db.add_asset_movements(binance_movements)
+    # Movements of an exchange that is not connected anymore are not returned
+    rotki.data.db.add_asset_movements(make_movements(Location.KRAKEN, 10))
+    setup = mock_history_processing_and_exchanges(rotki)
+
+    def query_movements(json):
+        with setup.polo_patch:
+            response = requests.get(
+                api_url_for(server, 'assetmovementsresource'),
+                json={'from_timestamp': start_ts, 'to_timestamp': end_ts, **json},
+            )
+        return assert_proper_response_with_result(response)['entries']
+
+    # The first query returns the newly queried movements of an exchange after its
+    # DB movements, and from then on all of them are read from the DB by time
+    query_movements({})
+    unpaged_movements = query_movements({})
+    assert len(unpaged_movements) == FREE_ASSET_MOVEMENTS_LIMIT
+    assert 'kraken' not in {x['location'] for x in unpaged_movements}
+
+    page_size = 30
+    paged_movements = []
+    for offset in range(0, FREE_ASSET_MOVEMENTS_LIMIT + page_size, page_size):
+        paged_movements.extend(query_movements({'limit': page_size, 'offset': offset}))
+    assert paged_movements == unpaged_movements
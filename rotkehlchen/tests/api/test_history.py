@@ -5,6 +5,7 @@ import re
 from contextlib import ExitStack
 from http import HTTPStatus
 from pathlib import Path
+from unittest.mock import patch
 
 import pytest
 import requests
@@ -19,6 +20,7 @@ from rotkehlchen.constants import (
     EV_SELL,
     EV_TX_GAS_COST,
 )
+from rotkehlchen.constants.assets import A_ETH, A_USD
 from rotkehlchen.constants.misc import ZERO
 from rotkehlchen.csv_exporter import (
     FILENAME_ALL_CSV,
@@ -30,6 +32,7 @@ from rotkehlchen.csv_exporter import (
 )
 from rotkehlchen.exchanges.manager import SUPPORTED_EXCHANGES
 from rotkehlchen.fval import FVal
+from rotkehlchen.history import PriceHistorian
 from rotkehlchen.tests.utils.api import (
     api_url_for,
     assert_error_response,
@@ -233,6 +236,7 @@ def test_query_history_timerange(rotkehlchen_api_server_with_exchanges):
     assert data['result']['eth_node_connection'] is False
     assert data['result']['history_process_start_ts'] == 1428994442
     assert data['result']['history_process_current_ts'] == end_ts
+    assert data['result']['history_process_prefetch_progress'] == 100
 
 
 def test_query_history_errors(rotkehlchen_api_server):
@@ -616,3 +620,46 @@ def test_history_export_csv_errors(
         contained_in_msg='is not a directory',
         status_code=HTTPStatus.BAD_REQUEST,
     )
+
+
+@pytest.mark.parametrize('should_mock_price_queries', [False])
+def test_historical_price_memo(rotkehlchen_api_server):
+    """Test that repeated historical price queries are memoized and the stats are exposed"""
+    hour_ts = 1500001200
+    # Start from an empty memo as the historian is a singleton shared by all tests
+    PriceHistorian.clear_price_memo()
+    with patch.object(
+            PriceHistorian._cryptocompare,
+            'query_historical_price',
+            return_value=FVal('250'),
+    ) as price_mock:
+        for timestamp in (hour_ts, hour_ts + 60, hour_ts - 1799, hour_ts + 3600):
+            # Call through the class since other tests mock the singleton's instance method
+            price = PriceHistorian.query_historical_price(
+                from_asset=A_ETH,
+                to_asset=A_USD,
+                timestamp=timestamp,
+            )
+            assert price == FVal('250')
+
+    assert price_mock.call_count == 2
+    response = requests.get(
+        api_url_for(rotkehlchen_api_server, 'historicalpricememoresource'),
+    )
+    result = assert_proper_response_with_result(response)
+    assert result['size'] == 2
+    assert result['hits'] == 2
+    assert result['misses'] == 2
+    assert result['evictions'] == 0
+    assert FVal(result['hit_rate']) == FVal('0.5')
+
+    response = requests.delete(
+        api_url_for(rotkehlchen_api_server, 'historicalpricememoresource'),
+    )
+    assert_proper_response(response)
+    response = requests.get(
+        api_url_for(rotkehlchen_api_server, 'historicalpricememoresource'),
+    )
+    result = assert_proper_response_with_result(response)
+    assert result['size'] == 0
+    assert result['hits'] == 0
@@ -10,6 +10,7 @@ import requests
 from rotkehlchen.chain.ethereum.makerdao.dsr import _dsrdai_to_dai
 from rotkehlchen.constants.assets import A_DAI
 from rotkehlchen.constants.ethereum import (
+    ETH_MULTICALL,
     MAKERDAO_DAI_JOIN,
     MAKERDAO_POT,
     MAKERDAO_PROXY_REGISTRY,
@@ -27,6 +28,7 @@ from rotkehlchen.tests.utils.api import (
     wait_for_async_task_with_result,
 )
 from rotkehlchen.tests.utils.checks import assert_serialized_lists_equal
+from rotkehlchen.tests.utils.ethereum import mock_multicall_aggregate
 from rotkehlchen.tests.utils.factories import make_ethereum_address
 from rotkehlchen.tests.utils.makerdao import mock_proxies
 from rotkehlchen.tests.utils.mock import MockResponse
@@ -117,7 +119,7 @@ def mock_etherscan_for_dsr(
     account1_join1_move_event = f"""{{"address": "{MAKERDAO_VAT.address}", "topics": ["0xbb35783b00000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy1)}", "{MAKERDAO_POT.address}", "{int_to_32byteshexstr(account1_join1_deposit // 10 ** 27)}"], "data": "0x1", "blockNumber": "{hex(params.account1_join1_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account1_join1_blocknumber))}", "gasPrice": "0x1", "gasUsed": "0x1", "logIndex": "0x6c", "transactionHash": "0xf00", "transactionIndex": "0x79"}}"""  # noqa: E501
     account1_join2_event = f"""{{"address": "{MAKERDAO_POT.address}", "topics": ["0x049878f300000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy1)}", "{int_to_32byteshexstr(params.account1_join2_normalized_balance)}", "0x0000000000000000000000000000000000000000000000000000000000000000"], "data": "0x1", "blockNumber": "{hex(params.account1_join2_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account1_join2_blocknumber))}", "gasPrice": "0x1", "gasUsed": "0x1", "logIndex": "0x6c", "transactionHash": "0xf00", "transactionIndex": "0x79"}}"""  # noqa: E501
     account1_join2_deposit = params.account1_join2_normalized_balance * params.account1_join2_chi
-    account1_join2_move_event = f"""{{"address": "{MAKERDAO_VAT.address}", "topics": ["0xbb35783b00000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy1)}", "{MAKERDAO_POT.address}", "{int_to_32byteshexstr(account1_join2_deposit // 10 ** 27)}"], "data": "0x1", "blockNumber": "{hex(params.account1_join1_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account1_join2_blocknumber))}", "gasPrice": "0x1", "gasUsed": "0x1", "logIndex": "0x6c", "transactionHash": "0xf00", "transactionIndex": "0x79"}}"""  # noqa: E501
+    account1_join2_move_event = f"""{{"address": "{MAKERDAO_VAT.address}", "topics": ["0xbb35783b00000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy1)}", "{MAKERDAO_POT.address}", "{int_to_32byteshexstr(account1_join2_deposit // 10 ** 27)}"], "data": "0x1", "blockNumber": "{hex(params.account1_join2_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account1_join2_blocknumber))}", "gasPrice": "0x1", "gasUsed": "0x1", "logIndex": "0x6c", "transactionHash": "0xf00", "transactionIndex": "0x79"}}"""  # noqa: E501
 
     account1_exit1_event = f"""{{"address": "{MAKERDAO_POT.address}", "topics": ["0x7f8661a100000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy1)}", "{int_to_32byteshexstr(params.account1_exit1_normalized_balance)}", "0x0000000000000000000000000000000000000000000000000000000000000000"], "data": "0x1", "blockNumber": "{hex(params.account1_exit1_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account1_exit1_blocknumber))}", "gasPrice": "0x1", "gasUsed": "0x1", "logIndex": "0x6c", "transactionHash": "0xf00", "transactionIndex": "0x79"}}"""  # noqa: E501
     account1_exit1_withdrawal = (
@@ -129,6 +131,46 @@ def mock_etherscan_for_dsr(
     account2_join1_deposit = params.account2_join1_normalized_balance * params.account2_join1_chi
     account2_join1_move_event = f"""{{"address": "{MAKERDAO_VAT.address}", "topics": ["0xbb35783b00000000000000000000000000000000000000000000000000000000", "{address_to_32byteshexstr(proxy2)}", "{MAKERDAO_POT.address}", "{int_to_32byteshexstr(account2_join1_deposit // 10 ** 27)}"], "data": "0x1", "blockNumber": "{hex(params.account2_join1_blocknumber)}", "timeStamp": "{hex(blocknumber_to_timestamp(params.account2_join1_blocknumber))}", "gasPrice": "0x1", "gasUsed": "0x1", "logIndex": "0x6c", "transactionHash": "0fx00", "transactionIndex": "0x79"}}"""  # noqa: E501
 
+    def mock_eth_call(to_address, input_data):
+        if to_address == MAKERDAO_PROXY_REGISTRY.address:
+            if not input_data.startswith('0xc4552791'):
+                raise AssertionError(
+                    'Call to unexpected method of DSR ProxyRegistry during tests',
+                )
+
+            # It's a call to proxy registry. Return the mapping
+            if account1[2:].lower() in input_data:
+                result = address_to_32byteshexstr(proxy1)
+            elif account2[2:].lower() in input_data:
+                result = address_to_32byteshexstr(proxy2)
+            else:
+                result = '0x' + '0' * 64
+        elif to_address == MAKERDAO_POT.address:
+            if input_data.startswith('0x0bebac86'):  # pie
+                if proxy1[2:].lower() in input_data:
+                    result = int_to_32byteshexstr(params.account1_current_normalized_balance)
+                elif proxy2[2:].lower() in input_data:
+                    result = int_to_32byteshexstr(params.account2_current_normalized_balance)
+                else:
+                    # result = int_to_32byteshexstr(0)
+                    raise AssertionError('Pie call for unexpected account during tests')
+            elif input_data.startswith('0xc92aecc4'):  # chi
+                result = int_to_32byteshexstr(params.current_chi)
+            elif input_data.startswith('0x487bf082'):  # dsr
+                result = int_to_32byteshexstr(params.current_dsr)
+            else:
+                raise AssertionError(
+                    'Call to unexpected method of MakerDAO pot during tests',
+                )
+        elif to_address == ETH_MULTICALL.address:
+            result = mock_multicall_aggregate(input_data, mock_eth_call)
+        else:
+            raise AssertionError(
+                f'Etherscan call to unknown contract {to_address} during tests',
+            )
+
+        return result
+
     def mock_requests_get(url, *args, **kwargs):
         if 'etherscan.io/api?module=proxy&action=eth_blockNumber' in url:
             response = f'{{"status":"1","message":"OK","result":"{TEST_LATEST_BLOCKNUMBER_HEX}"}}'
@@ -138,44 +180,8 @@ def mock_etherscan_for_dsr(
                 'https://api.etherscan.io/api?module=proxy&action=eth_call&to=',
             )[1][:42]
             input_data = url.split('data=')[1].split('&apikey')[0]
-            if to_address == MAKERDAO_PROXY_REGISTRY.address:
-                if not input_data.startswith('0xc4552791'):
-                    raise AssertionError(
-                        'Call to unexpected method of DSR ProxyRegistry during tests',
-                    )
-
-                # It's a call to proxy registry. Return the mapping
-                if account1[2:].lower() in input_data:
-                    proxy_account = address_to_32byteshexstr(proxy1)
-                elif account2[2:].lower() in input_data:
-                    proxy_account = address_to_32byteshexstr(proxy2)
-                else:
-                    proxy_account = '0x' + '0' * 64
-                response = f'{{"status":"1","message":"OK","result":"{proxy_account}"}}'
-            elif to_address == MAKERDAO_POT.address:
-                if input_data.startswith('0x0bebac86'):  # pie
-                    if proxy1[2:].lower() in input_data:
-                        result = int_to_32byteshexstr(params.account1_current_normalized_balance)
-                    elif proxy2[2:].lower() in input_data:
-                        result = int_to_32byteshexstr(params.account2_current_normalized_balance)
-                    else:
-                        # result = int_to_32byteshexstr(0)
-                        raise AssertionError('Pie call for unexpected account during tests')
-                elif input_data.startswith('0xc92aecc4'):  # chi
-                    result = int_to_32byteshexstr(params.current_chi)
-                elif input_data.startswith('0x487bf082'):  # dsr
-                    result = int_to_32byteshexstr(params.current_dsr)
-                else:
-                    raise AssertionError(
-                        'Call to unexpected method of MakerDAO pot during tests',
-                    )
-
-                response = f'{{"status":"1","message":"OK","result":"{result}"}}'
-
-            else:
-                raise AssertionError(
-                    f'Etherscan call to unknown contract {to_address} during tests',
-                )
+            result = mock_eth_call(to_address, input_data)
+            response = f'{{"status":"1","message":"OK","result":"{result}"}}'
         elif 'etherscan.io/api?module=logs&action=getLogs' in url:
             contract_address = url.split('&address=')[1].split('&topic0')[0]
             topic0 = url.split('&topic0=')[1].split('&topic0_1')[0]
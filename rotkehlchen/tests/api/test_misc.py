@@ -5,6 +5,7 @@ import requests
 
 from rotkehlchen.tests.utils.api import api_url_for, assert_proper_response
 from rotkehlchen.utils.misc import get_system_spec
+from rotkehlchen.utils.network import record_retry
 
 
 def test_query_version_when_up_to_date(rotkehlchen_api_server):
@@ -80,3 +81,20 @@ def test_query_version_when_update_required(rotkehlchen_api_server):
     assert data['result']['our_version'] == our_version
     assert data['result']['latest_version'] == 'v99.99.99'
     assert 'v99.99.99' in data['result']['download_url']
+
+
+def test_query_network_stats(rotkehlchen_api_server):
+    """Test that the network stats endpoint returns the stats of the shared transport"""
+    record_retry('https://api.example.com/foo')
+    response = requests.get(api_url_for(rotkehlchen_api_server, 'networkstatsresource'))
+    assert_proper_response(response)
+    result = response.json()['result']
+    assert result['api.example.com']['retries'] >= 1
+    assert set(result['api.example.com'].keys()) == {
+        'requests',
+        'coalesced',
+        'retries',
+        'rate_limited',
+        'errors',
+        'latency_histogram',
+    }
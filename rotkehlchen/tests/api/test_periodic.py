@@ -30,10 +30,11 @@ def test_query_periodic(rotkehlchen_api_server_with_exchanges):
     assert_proper_response(response)
     data = response.json()
     assert data['message'] == ''
-    assert len(data['result']) == 5
+    assert len(data['result']) == 6
     assert data['result']['last_balance_save'] >= start_ts
     assert data['result']['eth_node_connection'] is False
     # Non -1 value tests for these exist in test_history.py::test_query_history_timerange
     assert data['result']['history_process_start_ts'] == -1
     assert data['result']['history_process_current_ts'] == -1
+    assert data['result']['history_process_prefetch_progress'] == -1
     assert data['result']['last_data_upload_ts'] == 0
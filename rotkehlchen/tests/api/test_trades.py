@@ -204,6 +204,126 @@ def test_query_trades_over_limit(rotkehlchen_api_server_with_exchanges, start_wi
             assert result['entries_found'] == all_trades_num
 
 
+@pytest.mark.parametrize('start_with_valid_premium', [False, True])
+@pytest.mark.parametrize('added_exchanges', [('binance', 'poloniex')])
+def test_query_trades_pagination(rotkehlchen_api_server_with_exchanges, start_with_valid_premium):
+    """Test that the trades endpoint can page through the trades, most recent first"""
+    rotki = rotkehlchen_api_server_with_exchanges.rest_api.rotkehlchen
+    setup = mock_history_processing_and_exchanges(rotki)
+
+    spam_trades = [Trade(
+        timestamp=x,
+        location=Location.EXTERNAL,
+        pair='BTC_EUR',
+        trade_type=TradeType.BUY,
+        amount=FVal(x + 1),
+        rate=FVal(1),
+        fee=FVal(0),
+        fee_currency=A_EUR,
+        link='',
+        notes='') for x in range(FREE_TRADES_LIMIT + 50)
+    ]
+    rotki.data.db.add_trades(spam_trades)
+
+    # Check a single page filtered by location. Without premium this comes first
+    # since the limit counts the trades of all locations returned so far
+    with setup.binance_patch, setup.polo_patch:
+        response = requests.get(
+            api_url_for(
+                rotkehlchen_api_server_with_exchanges,
+                "tradesresource",
+            ), json={'location': 'poloniex', 'limit': 2, 'offset': 1},
+        )
+    result = assert_proper_response_with_result(response)
+    assert [x['location'] for x in result['entries']] == ['poloniex', 'poloniex']
+
+    all_trades_num = FREE_TRADES_LIMIT + 50 + 5  # 5 = 3 polo and 2 binance
+    page_size = 100
+    entries = []
+    for offset in range(0, all_trades_num + page_size, page_size):
+        with setup.binance_patch, setup.polo_patch:
+            response = requests.get(
+                api_url_for(
+                    rotkehlchen_api_server_with_exchanges,
+                    "tradesresource",
+                ), json={'limit': page_size, 'offset': offset},
+            )
+        result = assert_proper_response_with_result(response)
+        assert len(result['entries']) <= page_size
+        assert result['entries_found'] == all_trades_num
+        entries.extend(result['entries'])
+
+    timestamps = [x['timestamp'] for x in entries]
+    assert timestamps == sorted(timestamps, reverse=True)
+    assert len({x['trade_id'] for x in entries}) == len(entries)
+    if start_with_valid_premium:
+        assert len(entries) == all_trades_num
+    else:
+        assert len(entries) == FREE_TRADES_LIMIT
+
+    # and that an invalid limit is rejected
+    response = requests.get(
+        api_url_for(
+            rotkehlchen_api_server_with_exchanges,
+            "tradesresource",
+        ), json={'limit': 0},
+    )
+    assert_error_response(
+        response=response,
+        contained_in_msg='The limit should be a positive integer',
+        status_code=HTTPStatus.BAD_REQUEST,
+    )
+
+
+@pytest.mark.parametrize('added_exchanges', [('binance', 'poloniex')])
+def test_query_trades_pages_match_unpaged_result(rotkehlchen_api_server_with_exchanges):
+    """Test that for a non premium user the pages of trades add up to the trades
+    returned without paging, with the limit applied per location"""
+    rotki = rotkehlchen_api_server_with_exchanges.rest_api.rotkehlchen
+    setup = mock_history_processing_and_exchanges(rotki)
+
+    def make_trades(location, num):
+        return [Trade(
+            timestamp=x,
+            location=location,
+            pair='BTC_EUR',
+            trade_type=TradeType.BUY,
+            amount=FVal(x + 1),
+            rate=FVal(1),
+            fee=FVal(0),
+            fee_currency=A_EUR,
+            link=f'{location}_{x}',
+            notes='') for x in range(num)
+        ]
+    # Leave room in the limit for some but not all of the exchange trades
+    rotki.data.db.add_trades(make_trades(Location.EXTERNAL, FREE_TRADES_LIMIT - 2))
+    # Trades of an exchange that is not connected anymore are not returned
+    rotki.data.db.add_trades(make_trades(Location.KRAKEN, 10))
+
+    def query_trades(json):
+        with setup.binance_patch, setup.polo_patch:
+            response = requests.get(
+                api_url_for(rotkehlchen_api_server_with_exchanges, 'tradesresource'),
+                json=json,
+            )
+        return assert_proper_response_with_result(response)['entries']
+
+    unpaged_trades = query_trades({})
+    assert len(unpaged_trades) == FREE_TRADES_LIMIT
+    assert 'kraken' not in {x['location'] for x in unpaged_trades}
+
+    page_size = 40
+    paged_trades = []
+    for offset in range(0, FREE_TRADES_LIMIT + page_size, page_size):
+        paged_trades.extend(query_trades({'limit': page_size, 'offset': offset}))
+    assert paged_trades == unpaged_trades
+
+    poloniex_trades = query_trades({'location': 'poloniex'})
+    assert query_trades({'location': 'poloniex', 'limit': 2, 'offset': 1}) == poloniex_trades[1:3]
+    external_trades = query_trades({'location': 'external'})
+    assert query_trades({'location': 'external', 'limit': 5, 'offset': 3}) == external_trades[3:8]
+
+
 def test_add_trades(rotkehlchen_api_server):
     """Test that adding trades to the trades endpoint works as expected"""
     # add a new external trade
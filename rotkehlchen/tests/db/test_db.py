@@ -90,6 +90,9 @@ TABLES_AT_INIT = [
     'tags',
     'xpubs',
     'xpub_mappings',
+    'accounting_checkpoints',
+    'ethereum_logs_cache',
+    'ethereum_blocks',
 ]
 
 
@@ -686,6 +689,70 @@ def test_add_trades(data_dir, username):
     assert returned_trades == [trade1, trade2, trade3]
 
 
+def test_iterate_trades_pagination(data_dir, username):
+    """Test that trades can be paged through with both keyset and limit/offset pagination"""
+    msg_aggregator = MessagesAggregator()
+    data = DataHandler(data_dir, msg_aggregator)
+    data.unlock(username, '123', create_new=True)
+
+    # Two trades per timestamp so that pages also split trades with the same time
+    trades = [Trade(
+        timestamp=1451606400 + x // 2,
+        location=Location.KRAKEN if x % 3 == 0 else Location.EXTERNAL,
+        pair='ETH_EUR',
+        trade_type=TradeType.BUY,
+        amount=FVal(x + 1),
+        rate=FVal('10'),
+        fee=Fee(FVal('0.01')),
+        fee_currency=A_EUR,
+        link=str(x),
+        notes='',
+    ) for x in range(25)]
+    data.db.add_trades(trades)
+    expected = sorted(trades, key=lambda x: (x.timestamp, x.identifier))
+    assert data.db.get_trades() == expected
+
+    for recent_first in (False, True):
+        for location in (None, Location.KRAKEN):
+            expected_trades = [x for x in expected if location in (None, x.location)]
+            if recent_first:
+                expected_trades.reverse()
+
+            keyset_trades = []
+            after = None
+            while True:
+                page = list(data.db.iterate_trades(
+                    location=location,
+                    after=after,
+                    recent_first=recent_first,
+                    limit=4,
+                ))
+                if len(page) == 0:
+                    break
+                keyset_trades.extend(page)
+                after = (page[-1].timestamp, page[-1].identifier)
+            assert keyset_trades == expected_trades
+
+            offset_trades = []
+            for offset in range(0, len(expected_trades), 4):
+                offset_trades.extend(data.db.iterate_trades(
+                    location=location,
+                    recent_first=recent_first,
+                    limit=4,
+                    offset=offset,
+                ))
+            assert offset_trades == expected_trades
+
+    # The filters by time still apply together with the pagination
+    result = list(data.db.iterate_trades(
+        from_ts=1451606401,
+        to_ts=1451606405,
+        after=(1451606401, expected[2].identifier),
+        limit=3,
+    ))
+    assert result == expected[3:6]
+
+
 def test_add_margin_positions(data_dir, username):
     """Test that adding and retrieving margin positions from the DB works fine.
 
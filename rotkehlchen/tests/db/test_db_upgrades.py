@@ -1062,6 +1062,167 @@ def test_upgrade_db_19_to_20(user_data_dir):
     assert db.get_version() == 20
 
 
+def test_upgrade_db_20_to_21(user_data_dir):
+    """Test upgrading the DB from version 20 to version 21.
+
+    Creates the secondary indexes of the hot tables
+    """
+    msg_aggregator = MessagesAggregator()
+    _use_prepared_db(user_data_dir, 'v19_rotkehlchen.db')
+    db = _init_db_with_target_version(
+        target_version=20,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    # Make it look like a v20 DB, which had no secondary indexes. Indexes of
+    # tables created after v21 are created along with their table.
+    cursor = db.conn.cursor()
+    index_names = [
+        x[0] for x in
+        cursor.execute(
+            'SELECT name FROM sqlite_master WHERE type="index" AND name LIKE "idx_%" '
+            'AND tbl_name != "ethereum_blocks";',
+        )
+    ]
+    assert len(index_names) == 9
+    for name in index_names:
+        cursor.execute(f'DROP INDEX {name};')
+    db.conn.commit()
+    db.disconnect()
+
+    # Execute upgrade
+    db = _init_db_with_target_version(
+        target_version=21,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    cursor = db.conn.cursor()
+    query = cursor.execute(
+        'SELECT name, tbl_name FROM sqlite_master WHERE type="index" AND name LIKE "idx_%" '
+        'AND tbl_name != "ethereum_blocks";',
+    )
+    assert set(query.fetchall()) == {
+        ('idx_trades_time', 'trades'),
+        ('idx_trades_location_time', 'trades'),
+        ('idx_asset_movements_time', 'asset_movements'),
+        ('idx_asset_movements_location_time', 'asset_movements'),
+        ('idx_ethereum_transactions_timestamp', 'ethereum_transactions'),
+        ('idx_ethereum_transactions_from_timestamp', 'ethereum_transactions'),
+        ('idx_ethereum_transactions_to_timestamp', 'ethereum_transactions'),
+        ('idx_timed_balances_currency_time', 'timed_balances'),
+        ('idx_timed_location_data_location_time', 'timed_location_data'),
+    }
+    # Finally also make sure that we have updated to the target version
+    assert db.get_version() == 21
+
+
+def test_upgrade_db_21_to_22(user_data_dir):
+    """Test upgrading the DB from version 21 to version 22.
+
+    Creates the accounting_checkpoints table
+    """
+    msg_aggregator = MessagesAggregator()
+    _use_prepared_db(user_data_dir, 'v19_rotkehlchen.db')
+    db = _init_db_with_target_version(
+        target_version=21,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    # Make it look like a v21 DB, which had no accounting checkpoints
+    cursor = db.conn.cursor()
+    cursor.execute('DROP TABLE accounting_checkpoints;')
+    db.conn.commit()
+    db.disconnect()
+
+    # Execute upgrade
+    db = _init_db_with_target_version(
+        target_version=22,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    cursor = db.conn.cursor()
+    query = cursor.execute(
+        'SELECT COUNT(*) FROM sqlite_master WHERE type="table" AND name="accounting_checkpoints";',
+    )
+    assert query.fetchone()[0] == 1
+    assert cursor.execute('SELECT COUNT(*) FROM accounting_checkpoints;').fetchone()[0] == 0
+    # Finally also make sure that we have updated to the target version
+    assert db.get_version() == 22
+
+
+def test_upgrade_db_22_to_23(user_data_dir):
+    """Test upgrading the DB from version 22 to version 23.
+
+    Creates the ethereum_logs_cache table
+    """
+    msg_aggregator = MessagesAggregator()
+    _use_prepared_db(user_data_dir, 'v19_rotkehlchen.db')
+    db = _init_db_with_target_version(
+        target_version=22,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    # Make it look like a v22 DB, which had no ethereum logs cache
+    cursor = db.conn.cursor()
+    cursor.execute('DROP TABLE ethereum_logs_cache;')
+    db.conn.commit()
+    db.disconnect()
+
+    # Execute upgrade
+    db = _init_db_with_target_version(
+        target_version=23,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    cursor = db.conn.cursor()
+    query = cursor.execute(
+        'SELECT COUNT(*) FROM sqlite_master WHERE type="table" AND name="ethereum_logs_cache";',
+    )
+    assert query.fetchone()[0] == 1
+    assert cursor.execute('SELECT COUNT(*) FROM ethereum_logs_cache;').fetchone()[0] == 0
+    # Finally also make sure that we have updated to the target version
+    assert db.get_version() == 23
+
+
+def test_upgrade_db_23_to_24(user_data_dir):
+    """Test upgrading the DB from version 23 to version 24.
+
+    Creates the ethereum_blocks table and its timestamp index
+    """
+    msg_aggregator = MessagesAggregator()
+    _use_prepared_db(user_data_dir, 'v19_rotkehlchen.db')
+    db = _init_db_with_target_version(
+        target_version=23,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    # Make it look like a v23 DB, which had no ethereum blocks index
+    cursor = db.conn.cursor()
+    cursor.execute('DROP TABLE ethereum_blocks;')
+    db.conn.commit()
+    db.disconnect()
+
+    # Execute upgrade
+    db = _init_db_with_target_version(
+        target_version=24,
+        user_data_dir=user_data_dir,
+        msg_aggregator=msg_aggregator,
+    )
+    cursor = db.conn.cursor()
+    query = cursor.execute(
+        'SELECT COUNT(*) FROM sqlite_master WHERE type="table" AND name="ethereum_blocks";',
+    )
+    assert query.fetchone()[0] == 1
+    query = cursor.execute(
+        'SELECT COUNT(*) FROM sqlite_master WHERE type="index" AND '
+        'name="idx_ethereum_blocks_timestamp";',
+    )
+    assert query.fetchone()[0] == 1
+    assert cursor.execute('SELECT COUNT(*) FROM ethereum_blocks;').fetchone()[0] == 0
+    # Finally also make sure that we have updated to the target version
+    assert db.get_version() == 24
+
+
 def test_db_newer_than_software_raises_error(data_dir, username):
     """
     If the DB version is greater than the current known version in the
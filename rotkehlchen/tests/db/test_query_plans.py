@@ -0,0 +1,179 @@
+from typing import Callable, List
+
+import pytest
+
+from rotkehlchen.assets.asset import Asset
+from rotkehlchen.constants import YEAR_IN_SECONDS
+from rotkehlchen.constants.assets import A_BTC, A_ETH, A_EUR, A_USD
+from rotkehlchen.db.dbhandler import DBHandler
+from rotkehlchen.db.utils import AssetBalance, LocationData
+from rotkehlchen.typing import Location, Timestamp
+
+DAY_IN_SECONDS = 86400
+START_TS = Timestamp(1451606400)
+END_TS = Timestamp(START_TS + 2 * YEAR_IN_SECONDS)
+SNAPSHOT_ASSETS = [A_BTC, A_ETH, A_EUR, A_USD] + [
+    Asset(x) for x in ('BCH', 'LTC', 'XMR', 'ZEC', 'DASH', 'XRP', 'DAI', 'MKR', 'REP', 'ETC')
+]
+SNAPSHOT_LOCATIONS = [
+    Location.KRAKEN,
+    Location.POLONIEX,
+    Location.BINANCE,
+    Location.BLOCKCHAIN,
+    Location.BANKS,
+    Location.TOTAL,
+]
+TEST_ADDRESS = '0x9531C059098e3d194fF87FebB587aB07B30B1306'
+
+
+def _populate_hot_tables(db: DBHandler) -> None:
+    """Fill the hot tables with two years of daily snapshots and some history"""
+    balances = []
+    location_data = []
+    for ts in range(START_TS, END_TS, DAY_IN_SECONDS):
+        for asset in SNAPSHOT_ASSETS:
+            balances.append(AssetBalance(
+                time=Timestamp(ts),
+                asset=asset,
+                amount='10',
+                usd_value='100',
+            ))
+        for location in SNAPSHOT_LOCATIONS:
+            location_data.append(LocationData(
+                time=Timestamp(ts),
+                location=location.serialize_for_db(),
+                usd_value='1000',
+            ))
+    db.add_multiple_balances(balances)
+    db.add_multiple_location_data(location_data)
+
+    cursor = db.conn.cursor()
+    locations = [x.serialize_for_db() for x in SNAPSHOT_LOCATIONS[:3]]
+    cursor.executemany(
+        'INSERT INTO trades(id, time, location, pair, type, amount, rate, fee, fee_currency, '
+        'link, notes) VALUES(?, ?, ?, "ETH_BTC", "A", "1", "0.01", "0.1", "ETH", "", "")',
+        [
+            (str(idx), START_TS + idx * 3600, locations[idx % len(locations)])
+            for idx in range(5000)
+        ],
+    )
+    cursor.executemany(
+        'INSERT INTO asset_movements(id, location, category, address, transaction_id, time, '
+        'asset, amount, fee_asset, fee, link) '
+        'VALUES(?, ?, "A", "", "", ?, "ETH", "1", "ETH", "0.01", "")',
+        [
+            (str(idx), locations[idx % len(locations)], START_TS + idx * 3600)
+            for idx in range(5000)
+        ],
+    )
+    cursor.executemany(
+        'INSERT INTO ethereum_transactions(tx_hash, timestamp, block_number, from_address, '
+        'to_address, value, gas, gas_price, gas_used, input_data, nonce) '
+        'VALUES(?, ?, 1, ?, ?, "1", "1", "1", "1", ?, 0)',
+        [
+            (
+                idx.to_bytes(32, byteorder='big'),
+                START_TS + idx * 3600,
+                TEST_ADDRESS if idx % 10 == 0 else f'0x{idx:040x}',
+                f'0x{idx + 1:040x}',
+                b'',
+            ) for idx in range(5000)
+        ],
+    )
+    db.conn.commit()
+
+
+def _query_plan(db: DBHandler, method: Callable[[], object]) -> List[str]:
+    """Runs the given DB method and returns the query plan of every SELECT it issued"""
+    statements: List[str] = []
+    db.conn.set_trace_callback(statements.append)
+    try:
+        method()
+    finally:
+        db.conn.set_trace_callback(None)
+
+    cursor = db.conn.cursor()
+    plan: List[str] = []
+    for statement in statements:
+        if not statement.lstrip().upper().startswith('SELECT'):
+            continue
+        plan.extend(x[3] for x in cursor.execute(f'EXPLAIN QUERY PLAN {statement}'))
+    return plan
+
+
+def _assert_uses_index(plan: List[str], index_name: str) -> None:
+    assert any(index_name in x for x in plan), f'{index_name} not used. Plan: {plan}'
+
+
+@pytest.fixture
+def populated_database(database):
+    _populate_hot_tables(database)
+    return database
+
+
+def test_history_queries_use_indexes(populated_database):
+    db = populated_database
+    mid_ts = Timestamp(START_TS + 100 * 3600)
+    plan = _query_plan(db, lambda: db.get_trades(from_ts=START_TS, to_ts=mid_ts))
+    _assert_uses_index(plan, 'idx_trades_time')
+    plan = _query_plan(db, lambda: db.get_trades(
+        from_ts=START_TS,
+        to_ts=mid_ts,
+        location=Location.KRAKEN,
+    ))
+    _assert_uses_index(plan, 'idx_trades_location_time')
+
+    plan = _query_plan(db, lambda: db.get_asset_movements(from_ts=START_TS, to_ts=mid_ts))
+    _assert_uses_index(plan, 'idx_asset_movements_time')
+    plan = _query_plan(db, lambda: db.get_asset_movements(
+        from_ts=START_TS,
+        to_ts=mid_ts,
+        location='kraken',
+    ))
+    _assert_uses_index(plan, 'idx_asset_movements_location_time')
+
+    plan = _query_plan(db, lambda: db.get_ethereum_transactions(
+        from_ts=START_TS,
+        to_ts=mid_ts,
+    ))
+    _assert_uses_index(plan, 'idx_ethereum_transactions_timestamp')
+    plan = _query_plan(db, lambda: db.get_ethereum_transactions(
+        from_ts=START_TS,
+        to_ts=mid_ts,
+        address=TEST_ADDRESS,
+    ))
+    _assert_uses_index(plan, 'idx_ethereum_transactions_from_timestamp')
+    _assert_uses_index(plan, 'idx_ethereum_transactions_to_timestamp')
+
+
+def test_snapshot_queries_use_indexes(populated_database):
+    """Test that the dashboard queries over the snapshot data use their indexes
+
+    Their timing is measured by tools/scripts/benchmark_snapshot_queries.py"""
+    db = populated_database
+
+    def query_timed_balances():
+        result = db.query_timed_balances(from_ts=START_TS, to_ts=END_TS, asset=A_ETH)
+        assert len(result) == (END_TS - START_TS) // DAY_IN_SECONDS
+
+    def get_latest_asset_value_distribution():
+        result = db.get_latest_asset_value_distribution()
+        assert len(result) == len(SNAPSHOT_ASSETS)
+
+    def get_latest_location_value_distribution():
+        result = db.get_latest_location_value_distribution()
+        assert len(result) == len(SNAPSHOT_LOCATIONS)
+
+    def get_netvalue_data():
+        times, _ = db.get_netvalue_data(from_ts=START_TS)
+        assert len(times) == (END_TS - START_TS) // DAY_IN_SECONDS
+
+    plan = _query_plan(db, query_timed_balances)
+    _assert_uses_index(plan, 'COVERING INDEX idx_timed_balances_currency_time')
+    plan = _query_plan(db, get_netvalue_data)
+    _assert_uses_index(plan, 'COVERING INDEX idx_timed_location_data_location_time')
+    # The latest snapshot is found through the (time, ...) primary keys
+    plan = _query_plan(db, get_latest_asset_value_distribution)
+    assert not any('SCAN' in x and 'timed_balances' in x for x in plan), plan
+    plan = _query_plan(db, get_latest_location_value_distribution)
+    assert not any('SCAN' in x and 'timed_location_data' in x for x in plan), plan
@@ -4,7 +4,7 @@ from unittest.mock import patch
 import pytest
 
 from rotkehlchen.assets.asset import Asset
-from rotkehlchen.constants.assets import A_BTC, A_USD
+from rotkehlchen.constants.assets import A_BTC, A_ETH, A_USD
 from rotkehlchen.errors import NoPriceForGivenTimestamp
 from rotkehlchen.externalapis.cryptocompare import Cryptocompare
 from rotkehlchen.fval import FVal
@@ -55,6 +55,83 @@ def test_cryptocompare_historical_data_use_cached_price(data_dir, database):
     assert result[1].high == FVal(20)
 
 
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_cryptocompare_json_price_history_migration(data_dir, database):
+    """Test that old JSON price history caches are converted to binary price history files"""
+    contents = """{"start_time": 0, "end_time": 1439394400,
+    "data": [{"time": 1438387200, "close": 10, "high": 10.5, "low": 9.5, "open": 10,
+    "volumefrom": 10, "volumeto": 10}, {"time": 1438390800, "close": 20, "high": 21,
+    "low": 19, "open": 20, "volumefrom": 20, "volumeto": 20}, {"time": 1438394400,
+    "close": 0.0001, "high": "0.000123456789012345678901", "low": "0.00001", "open": 20,
+    "volumefrom": 20, "volumeto": 20}]}"""
+    json_path = data_dir / 'price_history_SNGLS_BTC.json'
+    with open(json_path, 'w') as f:
+        f.write(contents)
+    # the forex cache shares the prefix but should be left alone
+    forex_path = data_dir / 'price_history_forex.json'
+    with open(forex_path, 'w') as f:
+        f.write('{}')
+
+    Cryptocompare(data_directory=data_dir, database=database)
+    assert not json_path.exists()
+    assert forex_path.exists()
+    binary_path = data_dir / 'price_history_SNGLS_BTC.bin'
+    assert binary_path.exists()
+
+    # A new instance should only see the binary file
+    cc = Cryptocompare(data_directory=data_dir, database=database)
+    with patch.object(cc, 'query_endpoint_histohour') as histohour_mock:
+        price = cc.query_historical_price(
+            from_asset=A_SNGLS,
+            to_asset=A_BTC,
+            timestamp=1438390900,
+            historical_data_start=0,
+        )
+        assert histohour_mock.call_count == 0
+    assert price == FVal(20)
+
+    history = cc.price_history['SNGLS_BTC']
+    assert history.start_time == 0
+    assert history.end_time == 1439394400
+    assert len(history) == 3
+    assert history[-1].time == 1438394400
+    # Prices are kept exactly, without rounding them to a float
+    assert history[-1].high == FVal('0.000123456789012345678901')
+    assert history[-1].low == FVal('0.00001')
+
+
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_cryptocompare_prefetch_historical_data(data_dir, database):
+    """Test that prefetching only queries the pairs whose cache does not cover the range"""
+    contents = """{"start_time": 0, "end_time": 1439390800,
+    "data": [{"time": 1438387200, "close": 10, "high": 10, "low": 10, "open": 10,
+    "volumefrom": 10, "volumeto": 10}]}"""
+    for pair in ('SNGLS_BTC', 'ETH_USD'):
+        with open(os.path.join(data_dir, f'price_history_{pair}.json'), 'w') as f:
+            f.write(contents)
+
+    cc = Cryptocompare(data_directory=data_dir, database=database)
+    progress = []
+    with patch.object(cc, 'get_historical_data') as historical_data_mock:
+        cc.prefetch_historical_data(
+            pairs={
+                # covered by the cache
+                (A_SNGLS, A_BTC): (1438387200, 1439390000),
+                # partially covered by the cache
+                (A_ETH, A_USD): (1438387200, 1539390000),
+                # not cached at all
+                (A_BTC, A_USD): (1438387200, 1439390000),
+            },
+            historical_data_start=0,
+            progress_cb=lambda done, total: progress.append((done, total)),
+        )
+
+    assert historical_data_mock.call_count == 2
+    queried = {(x[1]['from_asset'], x[1]['to_asset']) for x in historical_data_mock.call_args_list}
+    assert queried == {(A_ETH, A_USD), (A_BTC, A_USD)}
+    assert progress == [(0, 2), (1, 2), (2, 2)]
+
+
 @pytest.mark.skip(
     'Same test as test_end_to_end_tax_report::'
     'test_cryptocompare_asset_and_price_not_found_in_history_processing',
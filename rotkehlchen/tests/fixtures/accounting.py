@@ -155,11 +155,21 @@ def create_inquirer(data_directory, should_mock_current_price_queries, mocked_pr
 
     inquirer.find_usd_price = mock_find_usd_price  # type: ignore
 
+    def mock_find_usd_prices(assets):
+        return {asset: mocked_prices.get(asset, FVal('1.5')) for asset in assets}
+
+    inquirer.find_usd_prices = mock_find_usd_prices  # type: ignore
+
     def mock_query_fiat_pair(base, quote):  # pylint: disable=unused-argument
         return FVal(1)
 
     inquirer.query_fiat_pair = mock_query_fiat_pair  # type: ignore
 
+    def mock_query_fiat_pairs(base, quotes):  # pylint: disable=unused-argument
+        return {quote: FVal(1) for quote in quotes}
+
+    inquirer.query_fiat_pairs = mock_query_fiat_pairs  # type: ignore
+
     return inquirer
 
 
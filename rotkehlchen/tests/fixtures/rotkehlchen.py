@@ -5,6 +5,7 @@ from unittest.mock import patch
 import pytest
 
 import rotkehlchen.tests.utils.exchanges as exchange_tests
+from rotkehlchen.constants.misc import DEFAULT_HISTORICAL_PRICE_MEMO_SIZE
 from rotkehlchen.db.settings import DBSettings
 from rotkehlchen.history import PriceHistorian
 from rotkehlchen.premium.premium import Premium, PremiumCredentials
@@ -57,12 +58,14 @@ def cli_args(data_dir, ethrpc_endpoint):
         'logtarget',
         'loglevel',
         'logfromothermodules',
+        'historical_price_memo_size',
     ])
     args.loglevel = 'debug'
     args.logfromothermodules = False
     args.sleep_secs = 60
     args.data_dir = data_dir
     args.ethrpc_endpoint = ethrpc_endpoint
+    args.historical_price_memo_size = DEFAULT_HISTORICAL_PRICE_MEMO_SIZE
     return args
 
 
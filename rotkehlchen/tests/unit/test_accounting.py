@@ -1,12 +1,12 @@
 import pytest
 
 from rotkehlchen.constants.assets import A_BTC
-from rotkehlchen.exchanges.data_structures import MarginPosition
+from rotkehlchen.exchanges.data_structures import MarginPosition, trades_from_dictlist
 from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.accounting import accounting_history_process
 from rotkehlchen.tests.utils.constants import A_DASH
 from rotkehlchen.tests.utils.history import prices
-from rotkehlchen.typing import EthereumTransaction, Location
+from rotkehlchen.typing import EthereumTransaction, Location, Timestamp
 
 DUMMY_ADDRESS = '0x0'
 DUMMY_HASH = b''
@@ -502,3 +502,86 @@ def test_accounting_works_for_empty_history(accountant):
     )
     assert FVal(result['overview']['general_trade_profit_loss']).is_close('0')
     assert FVal(result['overview']['total_taxable_profit_loss']).is_close('0')
+
+
+@pytest.mark.parametrize('mocked_price_queries', [prices])
+def test_history_processing_resumes_from_checkpoint(accountant):
+    """Test that a second run over the same history resumes from a checkpoint
+    and that it gives the same results as processing the whole history"""
+    start_ts = Timestamp(1475000000)  # after all buys and before the sell
+    last_write_ts = accountant.db.get_last_write_ts()
+    first_result = accounting_history_process(accountant, start_ts, 1495751688, history1)
+    assert accountant.started_processing_timestamp == 1446979735
+    settings_digest = accountant._checkpoint_settings_digest()
+    checkpoints = accountant.db.get_accounting_checkpoint_digests(
+        settings_digest=settings_digest,
+        to_ts=Timestamp(1495751688),
+    )
+    # Only the one of the last month before start_ts, at the month after the first buys
+    assert set(checkpoints.keys()) == {1448928000}
+    # Checkpoints don't count as a DB write
+    assert accountant.db.get_last_write_ts() == last_write_ts
+
+    second_result = accounting_history_process(accountant, start_ts, 1495751688, history1)
+    # Processing started after the checkpoint of 01/12/2015
+    assert accountant.started_processing_timestamp == 1473505138
+    assert second_result['overview'] == first_result['overview']
+    assert accountant.general_trade_pl.is_close("290.8881306498")
+
+    # Adding older trades invalidates all checkpoints after them
+    accountant.db.add_trades(trades_from_dictlist(
+        given_trades=[dict(history1[0], timestamp=1448000000)],
+        start_ts=Timestamp(0),
+        end_ts=Timestamp(1495751688),
+        location='test',
+        msg_aggregator=accountant.msg_aggregator,
+    ))
+    assert accountant.db.get_accounting_checkpoint_digests(
+        settings_digest=settings_digest,
+        to_ts=Timestamp(1495751688),
+    ) == {}
+
+
+@pytest.mark.parametrize('mocked_price_queries', [prices])
+def test_history_processing_resumes_when_next_action_is_months_after_start(accountant):
+    """Test that the checkpoint saved for a range is the last one at or before its
+    start_ts when the first action after start_ts is after the next month start"""
+    history = history1[:3] + [{
+        'timestamp': 1480683904,
+        'pair': 'BTC_EUR',
+        'trade_type': 'sell',
+        'rate': 723.505,
+        'fee': 0,
+        'fee_currency': 'BTC',
+        'amount': 1,
+        'location': 'external',
+    }]
+    start_ts = Timestamp(1473600000)  # after the ETH buy of 10/09/2016
+    first_result = accounting_history_process(accountant, start_ts, 1495751688, history)
+    assert accountant.started_processing_timestamp == 1446979735
+    checkpoints = accountant.db.get_accounting_checkpoint_digests(
+        settings_digest=accountant._checkpoint_settings_digest(),
+        to_ts=Timestamp(1495751688),
+    )
+    # The month start after the ETH buy, 01/10/2016, is after start_ts
+    assert set(checkpoints.keys()) == {1448928000}
+
+    second_result = accounting_history_process(accountant, start_ts, 1495751688, history)
+    assert accountant.started_processing_timestamp == 1473505138
+    assert second_result['overview'] == first_result['overview']
+
+
+@pytest.mark.parametrize('mocked_price_queries', [prices])
+def test_history_processing_ignores_stale_checkpoint(accountant):
+    """Test that a checkpoint is not used if the actions before it changed"""
+    start_ts = Timestamp(1475000000)
+    accounting_history_process(accountant, start_ts, 1495751688, history1)
+    # Same history but with a smaller first BTC buy, which is not in the DB
+    history = [dict(history1[0], amount=1)] + history1[1:]
+    result = accounting_history_process(accountant, start_ts, 1495751688, history)
+    assert accountant.started_processing_timestamp == 1446979735
+
+    accountant.db.invalidate_accounting_checkpoints(Timestamp(0))
+    expected = accounting_history_process(accountant, start_ts, 1495751688, history)
+    assert accountant.started_processing_timestamp == 1446979735
+    assert result['overview'] == expected['overview']
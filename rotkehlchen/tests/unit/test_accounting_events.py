@@ -1,5 +1,6 @@
 import pytest
 
+from rotkehlchen.accounting.lots import BuyLots, CostBasisMethod
 from rotkehlchen.exchanges.data_structures import BuyEvent, Events
 from rotkehlchen.fval import FVal
 
@@ -8,7 +9,7 @@ from rotkehlchen.fval import FVal
 def test_search_buys_calculate_profit_after_year(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLots(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -60,7 +61,7 @@ def test_search_buys_calculate_profit_1_buy_consumed_by_1_sell(accountant):
     """
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLots(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -94,7 +95,7 @@ def test_search_buys_calculate_profit_1_buy_used_by_2_sells_taxable(accountant):
     """
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLots(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -147,7 +148,7 @@ def test_search_buys_calculate_profit_1_buy_used_by_2_sells_taxfree(accountant):
     """
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLots(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(5),
@@ -195,7 +196,7 @@ def test_search_buys_calculate_profit_1_buy_used_by_2_sells_taxfree(accountant):
 def test_search_buys_calculate_profit_sell_more_than_bought_within_year(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLots(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -234,7 +235,7 @@ def test_search_buys_calculate_profit_sell_more_than_bought_within_year(accounta
 def test_search_buys_calculate_profit_sell_more_than_bought_after_year(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLots(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -272,7 +273,7 @@ def test_search_buys_calculate_profit_sell_more_than_bought_after_year(accountan
 def test_reduce_asset_amount(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLots(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -307,7 +308,7 @@ def test_reduce_asset_amount(accountant):
 def test_reduce_asset_amount_exact(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLots(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -337,7 +338,7 @@ def test_reduce_asset_amount_not_bought(accountant):
 def test_reduce_asset_amount_more_that_bought(accountant):
     asset = 'BTC'
     events = accountant.events.events
-    events[asset] = Events([], [])
+    events[asset] = Events(BuyLots(), [])
     events[asset].buys.append(
         BuyEvent(
             amount=FVal(1),
@@ -357,3 +358,35 @@ def test_reduce_asset_amount_more_that_bought(accountant):
 
     assert not accountant.events.reduce_asset_amount(asset, FVal(3))
     assert (len(accountant.events.events[asset].buys)) == 0, 'all buys should be used'
+
+
+@pytest.mark.parametrize('method, expected_remaining', [
+    (CostBasisMethod.FIFO, [(1467378304, FVal(4)), (1477378304, FVal(3))]),
+    (CostBasisMethod.LIFO, [(1467378304, FVal(2)), (1446979735, FVal(5))]),
+    (CostBasisMethod.HIFO, [(1477378304, FVal(2)), (1446979735, FVal(5))]),
+])
+def test_search_buys_calculate_profit_cost_basis_methods(accountant, method, expected_remaining):
+    """Test that sells use up the buys in the order of the selected cost basis method"""
+    asset = 'BTC'
+    accountant.events.cost_basis_method = method
+    events = accountant.events.events
+    events[asset] = accountant.events._new_events()
+    events[asset].buys.append(
+        BuyEvent(amount=FVal(5), timestamp=1446979735, rate=FVal(268.1), fee_rate=FVal(0)),
+    )
+    events[asset].buys.append(
+        BuyEvent(amount=FVal(15), timestamp=1467378304, rate=FVal(612.45), fee_rate=FVal(0)),
+    )
+    events[asset].buys.append(
+        BuyEvent(amount=FVal(3), timestamp=1477378304, rate=FVal(603.415), fee_rate=FVal(0)),
+    )
+
+    accountant.events.search_buys_calculate_profit(
+        selling_amount=FVal(16),
+        selling_asset=asset,
+        timestamp=1480683904,  # 02/12/2016
+    )
+
+    remaining = [(x.timestamp, x.amount) for x in events[asset].buys]
+    assert remaining == expected_remaining
+    assert events[asset].buys[0].timestamp == expected_remaining[0][0]
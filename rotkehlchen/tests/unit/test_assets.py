@@ -1,4 +1,6 @@
+import copy
 import json
+import pickle
 import warnings as test_warnings
 from pathlib import Path
 
@@ -7,6 +9,9 @@ from eth_utils import is_checksum_address
 
 from rotkehlchen.assets.asset import Asset, EthereumToken
 from rotkehlchen.assets.resolver import AssetResolver, asset_type_mapping
+from rotkehlchen.assets.unknown_asset import UnknownEthereumToken
+from rotkehlchen.assets.utils import get_ethereum_token
+from rotkehlchen.constants.ethereum import ZERO_ADDRESS
 from rotkehlchen.errors import DeserializationError, UnknownAsset
 from rotkehlchen.externalapis.coingecko import Coingecko
 from rotkehlchen.typing import AssetType
@@ -53,6 +58,31 @@ def test_asset_equals():
     assert eth_asset == 'ETH'
 
 
+def test_assets_are_interned():
+    """Test that an asset is created only once and reused for any later construction"""
+    btc_asset = Asset('BTC')
+    assert Asset('BTC') is btc_asset
+    # Non canonical identifiers return the same instance
+    assert Asset('btc') is btc_asset
+    assert copy.copy(btc_asset) is btc_asset
+    assert copy.deepcopy({'a': [btc_asset]})['a'][0] is btc_asset
+    assert pickle.loads(pickle.dumps(btc_asset)) is btc_asset
+
+    # Each asset class gets its own instance
+    rdn_token = EthereumToken('RDN')
+    assert EthereumToken('RDN') is rdn_token
+    assert Asset('RDN') is not rdn_token
+    assert Asset('RDN') == rdn_token
+    assert not hasattr(Asset('RDN'), 'ethereum_address')
+
+    # Failed constructions are not interned
+    with pytest.raises(DeserializationError):
+        EthereumToken('BTC')
+    with pytest.raises(DeserializationError):
+        EthereumToken('BTC')
+    assert (EthereumToken, 'BTC') not in AssetResolver().interned_assets
+
+
 def test_ethereum_tokens():
     rdn_asset = EthereumToken('RDN')
     assert rdn_asset.ethereum_address == '0x255Aa6DF07540Cb5d3d297f0D0D4D84cb52bc8e6'
@@ -63,8 +93,24 @@ def test_ethereum_tokens():
         EthereumToken('BTC')
 
 
+def test_ethereum_token_lookup_by_address():
+    rdn_address = '0x255Aa6DF07540Cb5d3d297f0D0D4D84cb52bc8e6'
+    assert AssetResolver().get_ethereum_token_identifier(rdn_address) == 'RDN'
+    assert AssetResolver().get_ethereum_token_identifier(ZERO_ADDRESS) is None
+
+    token = get_ethereum_token(symbol='RDN', ethereum_address=rdn_address)
+    assert token is EthereumToken('RDN')
+    # A wrong symbol is not resolved to the known token with the address
+    token = get_ethereum_token(symbol='RDN-WRONG', ethereum_address=rdn_address)
+    assert isinstance(token, UnknownEthereumToken)
+    token = get_ethereum_token(symbol='RDN', ethereum_address=ZERO_ADDRESS)
+    assert isinstance(token, UnknownEthereumToken)
+
+
 def test_tokens_address_is_checksummed():
     """Test that all ethereum saved token asset addresses are checksummed"""
+    # The data of all assets are read once per resolver
+    assert AssetResolver().assets is AssetResolver().assets
     for _, asset_data in AssetResolver().assets.items():
         asset_type = asset_type_mapping[asset_data['type']]
         if asset_type not in (AssetType.ETH_TOKEN_AND_MORE, AssetType.ETH_TOKEN):
@@ -1,5 +1,11 @@
+from unittest.mock import patch
+
 import pytest
 
+from rotkehlchen.chain.bitcoin import (
+    BLOCKCHAININFO_MULTIADDR_CHUNK_SIZE,
+    get_bitcoin_addresses_balances,
+)
 from rotkehlchen.chain.bitcoin.hdkey import HDKey
 from rotkehlchen.chain.bitcoin.utils import (
     is_valid_btc_address,
@@ -8,12 +14,17 @@ from rotkehlchen.chain.bitcoin.utils import (
     pubkey_to_bech32_address,
 )
 from rotkehlchen.chain.bitcoin.xpub import XpubData
-from rotkehlchen.errors import XPUBError
+from rotkehlchen.errors import RemoteError, XPUBError
+from rotkehlchen.fval import FVal
+from rotkehlchen.tests.utils.blockchain import mock_bitcoin_balances_query
 from rotkehlchen.tests.utils.factories import (
     UNIT_BTC_ADDRESS1,
     UNIT_BTC_ADDRESS2,
     UNIT_BTC_ADDRESS3,
 )
+from rotkehlchen.tests.utils.mock import MockResponse
+from rotkehlchen.typing import BTCAddress
+from rotkehlchen.utils.network import SHARED_SESSION
 
 
 def test_is_valid_btc_address():
@@ -253,3 +264,63 @@ def test_is_valid_derivation_path():
     )
     assert not valid
     assert msg == expected_msg
+
+
+def test_bitcoin_balances_are_queried_in_chunks_with_fallback():
+    """Test that legacy addresses are queried from blockchain.info in chunks, bech32
+    addresses from blockstream and that a failed chunk falls back to blockstream"""
+    legacy_accounts = [BTCAddress(f'1Legacy{idx}') for idx in range(200)]
+    bech32_accounts = [BTCAddress(f'bc1qbech{idx}') for idx in range(3)]
+    btc_map = {x: str(idx * 100000000) for idx, x in enumerate(legacy_accounts + bech32_accounts)}
+    queried_urls = []
+
+    def mock_requests_get(url, *args, **kwargs):
+        queried_urls.append(url)
+        if 'blockchain.info' in url and '1Legacy199' in url:
+            return MockResponse(500, 'Internal server error')
+        return original_get(url, *args, **kwargs)
+
+    balances_patch = mock_bitcoin_balances_query(btc_map=btc_map, original_requests_get=None)
+    with balances_patch as original_get:
+        with patch.object(SHARED_SESSION, 'get', side_effect=mock_requests_get):
+            balances = get_bitcoin_addresses_balances(legacy_accounts + bech32_accounts)
+
+    assert balances == {x: FVal(y) / FVal(100000000) for x, y in btc_map.items()}
+    multiaddr_urls = [x for x in queried_urls if 'blockchain.info' in x]
+    assert len(multiaddr_urls) == 3
+    assert all(len(x.split('|')) <= BLOCKCHAININFO_MULTIADDR_CHUNK_SIZE for x in multiaddr_urls)
+    blockstream_urls = {x for x in queried_urls if 'blockstream.info' in x}
+    # The bech32 addresses and the addresses of the failed chunk
+    assert len(blockstream_urls) == 3 + 200 - 2 * BLOCKCHAININFO_MULTIADDR_CHUNK_SIZE
+
+
+def test_bitcoin_balances_query_fails_if_no_source_works():
+    def mock_requests_get(url, *args, **kwargs):  # pylint: disable=unused-argument
+        return MockResponse(500, 'Internal server error')
+
+    with patch.object(SHARED_SESSION, 'get', side_effect=mock_requests_get):
+        with pytest.raises(RemoteError):
+            get_bitcoin_addresses_balances([BTCAddress('1Legacy'), BTCAddress('bc1qbech')])
+
+
+@pytest.mark.parametrize('xpub', [
+    'xpub68V4ZQQ62mea7ZUKn2urQu47Bdn2Wr7SxrBxBDDwE3kjytj361YBGSKDT4WoBrE5htrSB8eAMe59NPnKrcAbiv2veN5GQUmfdjRddD1Hxrk',  # noqa: E501
+    'ypub6WkRUvNhspMCJLiLgeP7oL1pzrJ6wA2tpwsKtXnbmpdAGmHHcC6FeZeF4VurGU14dSjGpF2xLavPhgvCQeXd6JxYgSfbaD1wSUi2XmEsx33',  # noqa: E501
+    'zpub6quTRdxqWmerHdiWVKZdLMp9FY641F1F171gfT2RS4D1FyHnutwFSMiab58Nbsdu4fXBaFwpy5xyGnKZ8d6xn2j4r4yNmQ3Yp3yDDxQUo3q',  # noqa: E501
+])
+def test_derive_addresses_range(xpub):
+    """Test that deriving a range of addresses at once gives the same addresses as
+    deriving each child node and that derived nodes serialize to a usable xpub"""
+    root = HDKey.from_xpub(xpub=xpub, path='m')
+    assert root.xpub == xpub
+    receiving = root.derive_path('m/0')
+    assert root.derive_path('m/0') is receiving, 'parent nodes should be reused'
+
+    addresses = receiving.derive_addresses(5, 25)
+    assert [x[0] for x in addresses] == list(range(5, 25))
+    for idx, address in addresses:
+        assert root.derive_path(f'm/0/{idx}').address() == address
+
+    restored = HDKey.from_xpub(xpub=receiving.xpub)
+    assert restored.depth == root.depth + 1 and restored.index == 0
+    assert restored.derive_addresses(5, 25) == addresses
@@ -0,0 +1,106 @@
+import csv
+import gzip
+from pathlib import Path
+
+import pytest
+
+from rotkehlchen.constants.assets import A_BTC, A_ETH, A_EUR
+from rotkehlchen.csv_exporter import (
+    FILENAME_ALL_CSV,
+    FILENAME_LOAN_PROFITS_CSV,
+    FILENAME_TRADES_CSV,
+    CSVExporter,
+)
+from rotkehlchen.fval import FVal
+from rotkehlchen.typing import Fee, Location, Timestamp
+
+
+def _add_trades(exporter: CSVExporter) -> None:
+    exporter.add_buy(
+        location=Location.KRAKEN,
+        bought_asset=A_BTC,
+        rate=FVal(1000),
+        fee_cost=Fee(FVal(1)),
+        amount=FVal(2),
+        cost=FVal(2001),
+        paid_with_asset=A_EUR,
+        paid_with_asset_rate=FVal(1),
+        timestamp=Timestamp(1500000000),
+        is_virtual=False,
+    )
+    exporter.add_sell(
+        location=Location.KRAKEN,
+        selling_asset=A_BTC,
+        rate_in_profit_currency=FVal(1500),
+        total_fee_in_profit_currency=Fee(FVal(1)),
+        gain_in_profit_currency=FVal(1499),
+        selling_amount=FVal(1),
+        receiving_asset=A_ETH,
+        receiving_amount=FVal(5),
+        receiving_asset_rate_in_profit_currency=FVal(300),
+        taxable_amount=FVal(1),
+        taxable_bought_cost=FVal('1000.5'),
+        timestamp=Timestamp(1500001000),
+        is_virtual=False,
+    )
+
+
+def _read_csv(path: Path, compressed: bool):
+    opener = gzip.open if compressed else open
+    with opener(path, 'rt', newline='') as f:  # type: ignore
+        return list(csv.DictReader(f))
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_csv_rows_are_streamed_and_exported(tmpdir_factory, compress):
+    exporter = CSVExporter(
+        profit_currency=A_EUR,
+        user_directory=Path(tmpdir_factory.mktemp('user')),
+        create_csv=True,
+    )
+    assert exporter._csv_directory is None, 'the directory should be made with the first row'
+    _add_trades(exporter)
+    assert len(exporter.trades_csv) == 2
+    assert len(exporter.all_events_csv) == 2
+    assert len(exporter.all_events) == 2, 'events of the API response should be kept'
+    assert exporter.trades_csv.path.exists(), 'rows should be written as they are added'
+
+    dirpath = Path(tmpdir_factory.mktemp('export'))
+    assert exporter.create_files(dirpath, compress=compress) == (True, '')
+    suffix = '.gz' if compress else ''
+    assert not (dirpath / f'{FILENAME_LOAN_PROFITS_CSV}{suffix}').exists()
+
+    trades = _read_csv(dirpath / f'{FILENAME_TRADES_CSV}{suffix}', compress)
+    assert [x['type'] for x in trades] == ['buy', 'sell']
+    assert trades[1]['taxable_profit_loss_in_EUR'] == '=IF(H3=0,0,L3-K3)'
+    all_events = _read_csv(dirpath / f'{FILENAME_ALL_CSV}{suffix}', compress)
+    assert list(all_events[0].keys()) == [
+        'type',
+        'location',
+        'paid_asset',
+        'paid_in_asset',
+        'taxable_amount',
+        'received_asset',
+        'received_in_asset',
+        'net_profit_or_loss',
+        'time',
+        'is_virtual',
+        'paid_in_EUR',
+        'taxable_received_in_EUR',
+        'taxable_bought_cost_in_EUR',
+    ]
+    assert all_events[1]['net_profit_or_loss'] == '=IF(E3=0,0,L3-M3)'
+
+    # Once processing is done the files are closed but can still be exported
+    exporter.close_files()
+    assert exporter.trades_csv._file is None
+    assert exporter.create_files(dirpath, compress=compress) == (True, '')
+
+    # Processing history again starts new files and deletes the old ones
+    old_path = exporter.trades_csv.path
+    exporter.reset_csv_lists()
+    assert not old_path.exists()
+    assert exporter._csv_directory is None
+    assert len(exporter.trades_csv) == 0
+    assert len(exporter.all_events) == 0
+    exporter.close()
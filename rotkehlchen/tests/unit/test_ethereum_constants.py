@@ -1,6 +1,8 @@
+from eth_abi import encode_abi
 from eth_utils import is_checksum_address
 
-from rotkehlchen.constants.ethereum import EthereumConstants
+from rotkehlchen.chain.ethereum.contracts import WEB3, EthereumContract, compiled_contract
+from rotkehlchen.constants.ethereum import MAKERDAO_VAT, EthereumConstants
 
 
 def test_ethereum_contracts():
@@ -16,3 +18,31 @@ def test_ethereum_abi():
     """Test that the ethereum abi entries have legal data"""
     for _, entry in EthereumConstants().abi_entries.items():
         assert isinstance(entry, list)
+
+
+def test_compiled_contracts():
+    """Test that contracts are compiled once and encode and decode as web3 contracts do"""
+    address = '0x9531C059098e3d194fF87FebB587aB07B30B1306'
+    ilk = b'ETH-A'.ljust(32, b'\0')
+    contract = compiled_contract(MAKERDAO_VAT.address, MAKERDAO_VAT.abi)
+    assert compiled_contract(MAKERDAO_VAT.address, MAKERDAO_VAT.abi) is contract
+    web3_contract = WEB3.eth.contract(address=MAKERDAO_VAT.address, abi=MAKERDAO_VAT.abi)
+    assert MAKERDAO_VAT.encode('urns', [ilk, address]) == web3_contract.encodeABI(
+        'urns',
+        args=[ilk, address],
+    )
+    result = encode_abi(['uint256', 'uint256'], [5, 10])
+    assert MAKERDAO_VAT.decode(result, 'urns', [ilk, address]) == (5, 10)
+    assert contract.functions.keys() == {('urns', 2)}
+
+    # Overloaded functions with the same number of arguments are resolved by their types
+    abi = [{
+        'name': 'balance',
+        'type': 'function',
+        'inputs': [{'name': 'owner', 'type': input_type}],
+        'outputs': [{'name': '', 'type': output_type}],
+    } for input_type, output_type in (('address', 'uint256'), ('uint256', 'bool'))]
+    overloaded = EthereumContract(address=address, abi=abi, deployed_block=0)
+    assert overloaded.decode(encode_abi(['uint256'], [1]), 'balance', [address]) == (1,)
+    assert overloaded.decode(encode_abi(['bool'], [True]), 'balance', [1]) == (True,)
+    assert compiled_contract(address, abi).functions == {}
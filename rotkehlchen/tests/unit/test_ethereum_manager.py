@@ -1,17 +1,29 @@
+from unittest.mock import patch
+
 import pytest
 
-from rotkehlchen.chain.ethereum.manager import NodeName
+from rotkehlchen.chain.ethereum.contracts import EthereumContract
+from rotkehlchen.chain.ethereum.manager import (
+    BLOCK_1_TIMESTAMP,
+    MAX_BLOCK_SEARCH_QUERIES,
+    NodeName,
+)
+from rotkehlchen.chain.ethereum.utils import ContractCall, multicall_contract_calls
 from rotkehlchen.constants.ethereum import (
     ATOKEN_ABI,
     ERC20TOKEN_ABI,
+    ETH_MULTICALL,
     YEARN_YCRV_VAULT,
     ZERO_ADDRESS,
 )
+from rotkehlchen.errors import RemoteError
 from rotkehlchen.tests.utils.checks import assert_serialized_dicts_equal
 from rotkehlchen.tests.utils.ethereum import (
     ETHEREUM_TEST_PARAMETERS,
+    mock_multicall_aggregate,
     wait_until_all_nodes_connected,
 )
+from rotkehlchen.tests.utils.factories import make_ethereum_address
 
 
 @pytest.mark.parametrize(*ETHEREUM_TEST_PARAMETERS)
@@ -192,3 +204,195 @@ def test_get_log_and_receipt_etherscan_bad_tx_index(
         call_order=call_order,
     )
     assert all(x['transactionIndex'] == 0 for x in result['logs'])
+
+
+def test_multicall_contract_calls(ethereum_manager):
+    """Test that contract calls are batched in multicall queries and decoded in order
+
+    A call that reverts makes its whole multicall revert, so the calls of its
+    batch should be performed one by one.
+    """
+    token = EthereumContract(address=make_ethereum_address(), abi=ERC20TOKEN_ABI, deployed_block=0)
+    addresses = [make_ethereum_address() for _ in range(60)]
+    reverting_address = addresses[50][2:].lower()
+    multicall_queries = []
+    direct_queries = []
+
+    def mock_balance_of(to_address, input_data):
+        assert to_address == token.address
+        balance = [x[2:].lower() for x in addresses].index(input_data[-40:]) * 10
+        return '0x' + balance.to_bytes(32, byteorder='big').hex()
+
+    def mock_eth_call(to_address, input_data):
+        if reverting_address in input_data:
+            return '0x'
+        if to_address == ETH_MULTICALL.address:
+            multicall_queries.append(input_data)
+            return mock_multicall_aggregate(input_data, mock_balance_of)
+
+        direct_queries.append(input_data)
+        return mock_balance_of(to_address, input_data)
+
+    calls = [ContractCall(token, 'balanceOf', arguments=[x]) for x in addresses]
+    with patch.object(ethereum_manager.etherscan, 'eth_call', side_effect=mock_eth_call):
+        results = multicall_contract_calls(
+            ethereum=ethereum_manager,
+            calls=calls,
+            call_order=(NodeName.ETHERSCAN,),
+            require_success=False,
+        )
+        assert results == [None if x == 50 else x * 10 for x in range(60)]
+        # The calls don't fit in the maximum call data size of a single batch. The
+        # last batch reverts and its 11 calls that don't revert are done directly
+        assert len(multicall_queries) == 2
+        assert len(direct_queries) == 11
+
+        with pytest.raises(RemoteError):
+            multicall_contract_calls(
+                ethereum=ethereum_manager,
+                calls=calls,
+                call_order=(NodeName.ETHERSCAN,),
+            )
+
+
+def test_get_logs_is_cached(ethereum_manager):
+    """Test that logs are cached per filter and that only the blocks not already
+    queried are queried again, apart from the latest unconfirmed blocks"""
+    token_address = make_ethereum_address()
+    latest_block = 1000000
+    queried_ranges = []
+
+    def mock_get_logs(contract_address, topics, from_block, to_block):
+        assert contract_address == token_address
+        queried_ranges.append((from_block, to_block))
+        return [{
+            'address': str(token_address).lower(),
+            'topics': topics,
+            'data': '0x' + block.to_bytes(32, byteorder='big').hex(),
+            'blockNumber': hex(block),
+            'timeStamp': hex(1500000000 + block),
+            'gasPrice': '0x1',
+            'gasUsed': '0x1',
+            'logIndex': '0x0',
+            'transactionIndex': '0x0',
+            'transactionHash': '0x' + block.to_bytes(32, byteorder='big').hex(),
+        } for block in range(from_block - from_block % 1000 + 1000, to_block + 1, 1000)]
+
+    def get_logs():
+        return ethereum_manager.get_logs(
+            contract_address=token_address,
+            abi=ERC20TOKEN_ABI,
+            event_name='Transfer',
+            argument_filters={'to': ZERO_ADDRESS},
+            from_block=0,
+            call_order=(NodeName.ETHERSCAN,),
+        )
+
+    etherscan = ethereum_manager.etherscan
+    patch_get_logs = patch.object(etherscan, 'get_logs', side_effect=mock_get_logs)
+    patch_latest_block = patch.object(
+        etherscan,
+        'get_latest_block_number',
+        side_effect=lambda: latest_block,
+    )
+    last_write_ts = ethereum_manager.database.get_last_write_ts()
+    with patch_get_logs, patch_latest_block as latest_mock:
+        events = get_logs()
+        assert [x['blockNumber'] for x in events] == list(range(1000, latest_block + 1, 1000))
+        assert len(queried_ranges) == 5
+
+        queried_ranges = []
+        assert get_logs() == events
+        # Only the blocks that may still be reorganized are queried again
+        assert queried_ranges == [(latest_block - 11, latest_block)]
+
+        queried_ranges = []
+        latest_block += 5000
+        new_events = get_logs()
+        assert new_events[:-5] == events
+        assert [x['blockNumber'] for x in new_events[-5:]] == list(range(1001000, 1006000, 1000))
+        assert queried_ranges == [(1000000 - 11, 1005000 - 12), (1005000 - 11, 1005000)]
+
+        # A fixed block that is known to be confirmed is answered by the cache alone
+        queried_ranges = []
+        latest_block_queries = latest_mock.call_count
+        fixed_events = ethereum_manager.get_logs(
+            contract_address=token_address,
+            abi=ERC20TOKEN_ABI,
+            event_name='Transfer',
+            argument_filters={'to': ZERO_ADDRESS},
+            from_block=0,
+            to_block=500000,
+            call_order=(NodeName.ETHERSCAN,),
+        )
+        assert fixed_events == events[:500]
+        assert queried_ranges == []
+        assert latest_mock.call_count == latest_block_queries
+
+    # The logs cache is not counted as a DB write
+    assert ethereum_manager.database.get_last_write_ts() == last_write_ts
+
+
+def test_block_timestamps_index(ethereum_manager):
+    """Test that block timestamps are queried once and then answered by the blocks
+    index, and that the blocks of timestamps are found by searching the index"""
+    latest_block = 11000000
+    queried_blocks = []
+
+    def block_timestamp(block_number):
+        return BLOCK_1_TIMESTAMP + 13 * block_number + block_number % 7
+
+    def mock_get_block_by_number(block_number):
+        queried_blocks.append(block_number)
+        return {'number': block_number, 'timestamp': block_timestamp(block_number)}
+
+    etherscan = ethereum_manager.etherscan
+    patch_get_block = patch.object(
+        etherscan,
+        'get_block_by_number',
+        side_effect=mock_get_block_by_number,
+    )
+    patch_latest_block = patch.object(
+        etherscan,
+        'get_latest_block_number',
+        side_effect=lambda: latest_block,
+    )
+    patch_web3 = patch.object(ethereum_manager, 'connected_to_any_web3', return_value=True)
+    patch_blocknumber_by_time = patch.object(etherscan, 'get_blocknumber_by_time')
+    last_write_ts = ethereum_manager.database.get_last_write_ts()
+    with patch_get_block, patch_latest_block, patch_web3, patch_blocknumber_by_time as by_time:
+        assert ethereum_manager.get_blocknumber_by_time(BLOCK_1_TIMESTAMP - 1) == 0
+        assert ethereum_manager.get_blocknumber_by_time(BLOCK_1_TIMESTAMP) == 1
+        assert queried_blocks == []
+
+        block_numbers = [10000000, 10000002, 10000000, 10500000]
+        expected_timestamps = {x: block_timestamp(x) for x in block_numbers}
+        assert ethereum_manager.get_blocks_timestamps(block_numbers) == expected_timestamps
+        assert sorted(queried_blocks) == [10000000, 10000002, 10500000]
+        queried_blocks = []
+        assert ethereum_manager.get_blocks_timestamps(block_numbers) == expected_timestamps
+        assert queried_blocks == []
+
+        # Blocks 10000000 and 10000002 are known so the block of a timestamp between
+        # them only needs the block between them to be queried
+        assert ethereum_manager.get_blocknumber_by_time(block_timestamp(10000001) + 1) == 10000001
+        assert queried_blocks == [10000001]
+        queried_blocks = []
+        assert ethereum_manager.get_blocknumber_by_time(block_timestamp(10000001) - 1) == 10000000
+        assert queried_blocks == []
+
+        for block_number in (10250000, 10250001, 5000000, 10999999):
+            ts = block_timestamp(block_number)
+            assert ethereum_manager.get_blocknumber_by_time(ts) == block_number
+            assert ethereum_manager.get_blocknumber_by_time(ts - 1) == block_number - 1
+        assert len(queried_blocks) <= 8 * MAX_BLOCK_SEARCH_QUERIES
+        # The search is done by interpolating in the blocks index, without etherscan
+        assert by_time.call_count == 0
+
+        # Searching again is answered by the blocks index
+        queried_blocks = []
+        assert ethereum_manager.get_blocknumber_by_time(block_timestamp(5000000)) == 5000000
+        assert queried_blocks == []
+
+    # The blocks index is a cache so writing to it does not count as a DB write
+    assert ethereum_manager.database.get_last_write_ts() == last_write_ts
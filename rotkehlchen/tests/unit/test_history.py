@@ -1,7 +1,15 @@
-from rotkehlchen.constants.assets import A_ETH
+import time
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import gevent
+
+from rotkehlchen.constants.assets import A_BTC, A_ETH, A_USD
+from rotkehlchen.errors import RemoteError
 from rotkehlchen.exchanges.data_structures import Trade
 from rotkehlchen.fval import FVal
-from rotkehlchen.history.trades import limit_trade_list_to_period
+from rotkehlchen.history.price import HistoricalPriceMemo
+from rotkehlchen.history.trades import TradesHistorian, limit_trade_list_to_period
 from rotkehlchen.typing import Location, TradeType
 
 
@@ -57,3 +65,99 @@ def test_limit_trade_list_to_period():
     assert limit_trade_list_to_period(full_list, 1459427707, 1459427707) == [trade1]
     assert limit_trade_list_to_period(full_list, 1469427707, 1469427707) == [trade2]
     assert limit_trade_list_to_period(full_list, 1479427707, 1479427707) == [trade3]
+
+
+def test_historical_price_memo():
+    memo = HistoricalPriceMemo(max_size=2)
+    hour_ts = 1500001200
+    key = memo.make_key(A_ETH, A_USD, hour_ts)
+    # timestamps are bucketed to the closest hour. Exactly half an hour goes to the earlier one
+    assert memo.make_key(A_ETH, A_USD, hour_ts - 1799) == key
+    assert memo.make_key(A_ETH, A_USD, hour_ts + 1800) == key
+    assert memo.make_key(A_ETH, A_USD, hour_ts + 1801) != key
+    assert memo.make_key(A_BTC, A_USD, hour_ts) != key
+
+    assert memo.get(key) is None
+    memo.add(key, FVal(100))
+    assert memo.get(key) == FVal(100)
+    btc_key = memo.make_key(A_BTC, A_USD, hour_ts)
+    memo.add(btc_key, FVal(1000))
+    # make the ETH price the most recently used so that the BTC one gets evicted
+    assert memo.get(key) == FVal(100)
+    memo.add(memo.make_key(A_ETH, A_USD, hour_ts + 3600), FVal(101))
+    assert memo.get(btc_key) is None
+    assert memo.get(key) == FVal(100)
+
+    stats = memo.stats()
+    assert stats['size'] == 2
+    assert stats['max_size'] == 2
+    assert stats['hits'] == 3
+    assert stats['misses'] == 2
+    assert stats['evictions'] == 1
+    assert stats['hit_rate'] == FVal('0.6')
+
+    memo.clear()
+    assert memo.stats()['size'] == 0
+    assert memo.stats()['hits'] == 0
+
+    disabled_memo = HistoricalPriceMemo(max_size=0)
+    disabled_memo.add(key, FVal(100))
+    assert disabled_memo.get(key) is None
+
+
+def test_get_history_isolates_slow_and_failing_sources(function_scope_messages_aggregator):
+    """Test that history sources are queried concurrently and that a source that
+    hangs or fails does not affect the results of the other sources"""
+    trade = Trade(
+        timestamp=1459427707,
+        location=Location.KRAKEN,
+        pair='ETH_BTC',
+        trade_type=TradeType.BUY,
+        amount=FVal(1),
+        rate=FVal(1),
+        fee=FVal('0.1'),
+        fee_currency=A_ETH,
+        link='id1',
+    )
+
+    def good_query(success_callback, **kwargs):  # pylint: disable=unused-argument
+        success_callback([trade], [], [], None)
+
+    def slow_query(**kwargs):  # pylint: disable=unused-argument
+        gevent.sleep(10)
+
+    def failing_query(**kwargs):  # pylint: disable=unused-argument
+        raise RemoteError('exchange is down')
+
+    exchange_manager = MagicMock()
+    exchange_manager.connected_exchanges = {
+        'kraken': MagicMock(query_history_with_callbacks=good_query),
+        'binance': MagicMock(query_history_with_callbacks=slow_query),
+        'bittrex': MagicMock(query_history_with_callbacks=failing_query),
+    }
+    chain_manager = MagicMock()
+    chain_manager.ethereum.transactions.query.return_value = []
+    db = MagicMock()
+    db.get_trades.return_value = []
+    historian = TradesHistorian(
+        user_directory=Path('/'),
+        db=db,
+        msg_aggregator=function_scope_messages_aggregator,
+        exchange_manager=exchange_manager,
+        chain_manager=chain_manager,
+        source_timeout=1,
+    )
+
+    start = time.time()
+    empty_or_error, history, _, _, _, defi_events = historian.get_history(
+        start_ts=0,
+        end_ts=1600000000,
+        has_premium=False,
+    )
+    assert time.time() - start < 5
+    assert history == [trade]
+    assert defi_events == []
+    assert 'binance history query did not finish within 1 seconds' in empty_or_error
+    assert 'exchange is down' in empty_or_error
+    errors = function_scope_messages_aggregator.consume_errors()
+    assert len(errors) == 2
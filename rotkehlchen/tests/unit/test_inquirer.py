@@ -1,16 +1,18 @@
 from unittest.mock import patch
 
+import gevent
 import pytest
-import requests
 
 from rotkehlchen.assets.asset import Asset
 from rotkehlchen.constants import ZERO
-from rotkehlchen.constants.assets import A_CNY, A_EUR, A_GBP, A_JPY, A_USD
+from rotkehlchen.constants.assets import A_BTC, A_CNY, A_ETH, A_EUR, A_GBP, A_JPY, A_USD
 from rotkehlchen.fval import FVal
 from rotkehlchen.inquirer import _query_exchanges_rateapi
+from rotkehlchen.tests.fixtures.accounting import create_inquirer
 from rotkehlchen.tests.utils.mock import MockResponse
 from rotkehlchen.typing import Price
 from rotkehlchen.utils.misc import timestamp_to_date, ts_now
+from rotkehlchen.utils.network import SHARED_SESSION
 
 
 @pytest.mark.parametrize('use_clean_caching_directory', [True])
@@ -26,7 +28,7 @@ def test_query_realtime_price_apis(inquirer):
 @pytest.mark.parametrize('should_mock_current_price_queries', [False])
 def test_switching_to_backup_api(inquirer):
     count = 0
-    original_get = requests.get
+    original_get = SHARED_SESSION.get
 
     def mock_exchanges_rateapi_fail(url, timeout):  # pylint: disable=unused-argument
         nonlocal count
@@ -35,7 +37,7 @@ def test_switching_to_backup_api(inquirer):
             return MockResponse(501, '{"msg": "some error")')
         return original_get(url)
 
-    with patch('requests.get', side_effect=mock_exchanges_rateapi_fail):
+    with patch.object(SHARED_SESSION, 'get', side_effect=mock_exchanges_rateapi_fail):
         result = inquirer.query_fiat_pair(A_USD, A_EUR)
         assert result and isinstance(result, FVal)
         assert count > 1, 'requests.get should have been called more than once'
@@ -47,7 +49,7 @@ def test_caching(inquirer):
     def mock_exchanges_rate_api(url, timeout):  # pylint: disable=unused-argument
         return MockResponse(200, '{"rates":{"EUR":0.9165902841},"base":"USD","date":"2020-05-25"}')
 
-    with patch('requests.get', side_effect=mock_exchanges_rate_api):
+    with patch.object(SHARED_SESSION, 'get', side_effect=mock_exchanges_rate_api):
         result = inquirer.query_fiat_pair(A_USD, A_EUR)
         assert result == FVal('0.9165902841')
 
@@ -55,6 +57,52 @@ def test_caching(inquirer):
     assert inquirer.query_fiat_pair(A_USD, A_EUR) == FVal('0.9165902841')
 
 
+@pytest.mark.parametrize('should_mock_current_price_queries', [False])
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_forex_cache_persists_and_migrates_json(inquirer, data_dir):
+    """Test that cached forex rates survive a restart and that the old JSON cache is migrated"""
+    date = timestamp_to_date(ts_now(), formatstr='%Y-%m-%d')
+    inquirer._save_forex_rate(date, A_USD, A_EUR, FVal('0.9'))
+    # Also write an old style JSON forex cache that should be picked up by the next instance
+    with open(data_dir / 'price_history_forex.json', 'w') as f:
+        f.write('{"2019-01-01": {"EUR": {"JPY": "124.12", "CNY": "7.72"}}}')
+
+    new_inquirer = create_inquirer(
+        data_directory=data_dir,
+        should_mock_current_price_queries=False,
+        mocked_prices={},
+    )
+    assert not (data_dir / 'price_history_forex.json').exists()
+    api_patch = patch.object(SHARED_SESSION, 'get', side_effect=AssertionError('should not query'))
+    with api_patch:
+        assert new_inquirer.query_fiat_pair(A_USD, A_EUR) == FVal('0.9')
+        assert new_inquirer.query_historical_fiat_exchange_rates(
+            A_EUR,
+            A_JPY,
+            1546344000,  # 2019-01-01 12:00
+        ) == FVal('124.12')
+
+
+@pytest.mark.parametrize('should_mock_current_price_queries', [False])
+@pytest.mark.parametrize('use_clean_caching_directory', [True])
+def test_query_fiat_pairs_only_queries_missing_rates(inquirer):
+    date = timestamp_to_date(ts_now(), formatstr='%Y-%m-%d')
+    inquirer._save_forex_rate(date, A_USD, A_EUR, FVal('0.9'))
+    inquirer._save_forex_rate(date, A_USD, A_GBP, FVal('0.8'))
+    queried_urls = []
+
+    def mock_exchanges_rate_api(url, timeout):  # pylint: disable=unused-argument
+        queried_urls.append(url)
+        return MockResponse(200, '{"rates":{"JPY":107.5},"base":"USD","date":"2020-05-25"}')
+
+    with patch.object(SHARED_SESSION, 'get', side_effect=mock_exchanges_rate_api):
+        # A generator of the currencies works as well as a list
+        result = inquirer.get_fiat_usd_exchange_rates(x for x in (A_EUR, A_GBP, A_JPY))
+
+    assert result == {A_USD: FVal(1), A_EUR: FVal('0.9'), A_GBP: FVal('0.8'), A_JPY: FVal('107.5')}
+    assert len(queried_urls) == 1 and 'symbols=JPY' in queried_urls[0]
+
+
 @pytest.mark.parametrize('use_clean_caching_directory', [True])
 @pytest.mark.parametrize('should_mock_current_price_queries', [False])
 def test_fallback_to_cached_values_within_a_month(inquirer):  # pylint: disable=unused-argument
@@ -70,7 +118,7 @@ def test_fallback_to_cached_values_within_a_month(inquirer):  # pylint: disable=
     date = timestamp_to_date(now - 86400 * 31, formatstr='%Y-%m-%d')
     inquirer._save_forex_rate(date, A_EUR, A_CNY, FVal('7.719'))
 
-    with patch('requests.get', side_effect=mock_api_remote_fail):
+    with patch.object(SHARED_SESSION, 'get', side_effect=mock_api_remote_fail):
         # We fail to find a response but then go back 15 days and find the cached response
         result = inquirer.query_fiat_pair(A_EUR, A_JPY)
         assert result == eurjpy_val
@@ -88,3 +136,57 @@ def test_fallback_to_coingecko(inquirer):  # pylint: disable=unused-argument
     assert price != Price(ZERO)
     price = inquirer.find_usd_price(Asset('TLN'))
     assert price != Price(ZERO)
+
+
+@pytest.mark.parametrize('should_mock_current_price_queries', [False])
+def test_find_usd_prices_in_bulk(inquirer):
+    """Test that the prices of many assets are found with a single query to each
+    price source, that they are cached and that concurrent queries are coalesced"""
+    cryptocompare_urls = []
+    coingecko_urls = []
+
+    def mock_cryptocompare_get(url):
+        cryptocompare_urls.append(url)
+        gevent.sleep(0.1)
+        return MockResponse(200, '{"ETH": {"USD": 350.5}, "BTC": {"USD": 11000}}')
+
+    def mock_coingecko_get(url):
+        coingecko_urls.append(url)
+        return MockResponse(200, '{"audius": {"usd": 2.5}}')
+
+    cryptocompare_patch = patch.object(
+        inquirer._cryptocompare.session,
+        'get',
+        side_effect=mock_cryptocompare_get,
+    )
+    coingecko_patch = patch.object(
+        inquirer._coingecko.session,
+        'get',
+        side_effect=mock_coingecko_get,
+    )
+    expected_prices = {
+        A_ETH: FVal('350.5'),
+        A_BTC: FVal('11000'),
+        Asset('AUDIO'): FVal('2.5'),
+    }
+    with cryptocompare_patch, coingecko_patch:
+        greenlets = [
+            gevent.spawn(inquirer.find_usd_prices, list(expected_prices))
+            for _ in range(3)
+        ]
+        gevent.joinall(greenlets, raise_error=True)
+        for greenlet in greenlets:
+            assert greenlet.value == expected_prices
+        assert len(cryptocompare_urls) == 1
+        assert 'pricemulti?fsyms=' in cryptocompare_urls[0]
+        assert len(coingecko_urls) == 1
+        assert 'audius' in coingecko_urls[0]
+
+        # The prices are now cached
+        assert inquirer.find_usd_price(A_ETH) == FVal('350.5')
+        assert inquirer.find_usd_prices([A_BTC, Asset('AUDIO')]) == {
+            A_BTC: FVal('11000'),
+            Asset('AUDIO'): FVal('2.5'),
+        }
+        assert len(cryptocompare_urls) == 1
+        assert len(coingecko_urls) == 1
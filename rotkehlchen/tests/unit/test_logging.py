@@ -3,7 +3,7 @@ import logging
 import pytest
 
 from rotkehlchen.fval import FVal
-from rotkehlchen.logging import LoggingSettings, RotkehlchenLogsAdapter
+from rotkehlchen.logging import LazyLogValue, LoggingSettings, RotkehlchenLogsAdapter
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -44,3 +44,23 @@ def test_log_anonymization(anonymized_logs, caplog):
         else:
             msg = f'{key} entry should not have been modified'
             assert entry in caplog.text or entry + ',' in caplog.text
+
+
+def test_log_lazy_values(caplog):
+    """Test that lazy values and args are only computed for emitted log entries"""
+    LoggingSettings(anonymized_logs=False)
+    computed = []
+
+    def compute(value):
+        computed.append(value)
+        return value * 2
+
+    caplog.set_level(logging.INFO)
+    log.debug('Skipped entry', lazy=LazyLogValue(compute, 1))
+    assert computed == []
+    assert 'Skipped entry' not in caplog.text
+
+    log.info('Emitted %s entry', 'lazy', lazy=LazyLogValue(compute, 2), other='100%')
+    assert computed == [2]
+    assert 'Emitted lazy entry lazy=4, other=100%' in caplog.text
+    assert caplog.records[-1].filename == 'test_logging.py', 'caller should be recorded'
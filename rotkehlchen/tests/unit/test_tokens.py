@@ -1,9 +1,12 @@
+import math
 from unittest.mock import patch
 
 import pytest
 import requests
 
-from rotkehlchen.chain.ethereum.tokens import EthTokens
+from rotkehlchen.assets.asset import EthereumToken
+from rotkehlchen.assets.resolver import AssetResolver
+from rotkehlchen.chain.ethereum.tokens import ETHERSCAN_MAX_ACCOUNTS_PER_CALL, EthTokens
 from rotkehlchen.chain.ethereum.utils import token_normalized_value
 from rotkehlchen.fval import FVal
 from rotkehlchen.tests.utils.blockchain import mock_etherscan_query
@@ -82,3 +85,40 @@ def test_detected_tokens_cache(ethtokens, inquirer):  # pylint: disable=unused-a
             assert len(entry) == len(eth_map_entry)
             for token, val in entry.items():
                 assert token_normalized_value(eth_map_entry[token], token) == val
+
+
+def test_detect_tokens_of_many_addresses(ethtokens, inquirer):  # pylint: disable=unused-argument
+    """Test that the tokens of many addresses are detected with a few multi account queries"""
+    addresses = [make_ethereum_address() for _ in range(12)]
+    eth_map = {address: {'MKR': 1000 + idx} for idx, address in enumerate(addresses)}
+    eth_map[addresses[3]]['GNO'] = 5000
+    etherscan_patch = mock_etherscan_query(
+        eth_map=eth_map,
+        etherscan=ethtokens.ethereum.etherscan,
+        original_queries=None,
+        original_requests_get=requests.get,
+    )
+    ethtokens_max_chunks_patch = patch(
+        'rotkehlchen.chain.ethereum.tokens.ETHERSCAN_MAX_TOKEN_CHUNK_LENGTH',
+        new=800,
+    )
+
+    with etherscan_patch as etherscan_mock, ethtokens_max_chunks_patch:
+        result, token_usd_prices = ethtokens.query_tokens_for_addresses(addresses, False)
+
+    multiaccount_queries = [
+        x for x in etherscan_mock.call_args_list if 'data=0x06187b4f' in x[0][0]
+    ]
+    num_tokens = len(AssetResolver().get_all_eth_token_info())
+    token_chunks = math.ceil(num_tokens / (800 - ETHERSCAN_MAX_ACCOUNTS_PER_CALL))
+    account_chunks = math.ceil(len(addresses) / ETHERSCAN_MAX_ACCOUNTS_PER_CALL)
+    assert len(multiaccount_queries) == token_chunks * account_chunks
+    assert len(etherscan_mock.call_args_list) == len(multiaccount_queries)
+
+    assert set(result.keys()) == set(addresses)
+    for address, entry in result.items():
+        assert entry == {
+            EthereumToken(token): token_normalized_value(value, EthereumToken(token))
+            for token, value in eth_map[address].items()
+        }
+    assert set(token_usd_prices.keys()) == {EthereumToken('MKR'), EthereumToken('GNO')}
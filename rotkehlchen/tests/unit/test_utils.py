@@ -1,8 +1,11 @@
 import json
 import time
+from pathlib import Path
 from unittest.mock import patch
 
+import gevent
 import pytest
+import requests
 from hexbytes import HexBytes
 
 from rotkehlchen.errors import ConversionError, UnprocessableTradePair
@@ -10,13 +13,17 @@ from rotkehlchen.exchanges.data_structures import invert_pair
 from rotkehlchen.fval import FVal
 from rotkehlchen.serialization.serialize import process_result
 from rotkehlchen.tests.utils.mock import MockResponse
+from rotkehlchen.utils.data_index import open_data_index
 from rotkehlchen.utils.interfaces import CacheableObject, cache_response_timewise
 from rotkehlchen.utils.misc import (
     combine_dicts,
     combine_stat_dicts,
     convert_to_int,
     iso8601ts_to_timestamp,
+    ts_now,
 )
+from rotkehlchen.utils.network import Transport
+from rotkehlchen.utils.ratelimit import TokenBucket
 from rotkehlchen.utils.version_check import check_if_version_up_to_date
 
 
@@ -227,6 +234,190 @@ def test_cache_response_timewise_ignore_cache():
     assert instance.do_sum_call_count == 2
 
 
+def test_cache_response_timewise_keyword_args():
+    """Test that keyword arguments are part of the cache key irrespective of their order"""
+    instance = Foo()
+    assert instance.do_sum(arg1=1, arg2=1) == 2
+    assert instance.do_sum(arg1=2, arg2=2) == 4
+    assert instance.do_sum(arg2=2, arg1=2) == 4
+    assert instance.do_sum_call_count == 2
+    # Containers are converted to hashable keys
+    assert instance.do_sum([1], [2]) == [1, 2]
+    assert instance.do_sum([1], [2]) == [1, 2]
+    assert instance.do_sum_call_count == 3
+    # Unhashable arguments are not cached but still work
+    assert instance.do_sum(bytearray(b'a'), bytearray(b'b')) == bytearray(b'ab')
+    assert instance.do_sum(bytearray(b'a'), bytearray(b'b')) == bytearray(b'ab')
+    assert instance.do_sum_call_count == 5
+
+
+def test_cache_response_timewise_bounded_and_expiring():
+    """Test that the results cache is bounded, expires entries and keeps per function stats"""
+    instance = Foo()
+    instance.results_cache.max_size = 3
+    now = ts_now()
+    with patch('rotkehlchen.utils.interfaces.ts_now', return_value=now):
+        for i in range(5):
+            assert instance.do_sum(i, i) == 2 * i
+        assert len(instance.results_cache) == 3
+        assert instance.do_sum(4, 4) == 8
+        assert instance.do_sum(0, 0) == 0  # evicted so called again
+    assert instance.do_sum_call_count == 6
+
+    with patch('rotkehlchen.utils.interfaces.ts_now', return_value=now + instance.cache_ttl_secs):
+        assert instance.do_sum(4, 4) == 8  # expired so called again
+    assert instance.do_sum_call_count == 7
+
+    stats = instance.results_cache.stats()
+    assert stats['size'] == 3
+    assert stats['functions']['do_sum'] == {'hits': 1, 'misses': 7, 'evictions': 4}
+
+    instance.do_something()
+    instance.flush_cache('do_sum')
+    assert len(instance.results_cache) == 1
+    instance.flush_cache()
+    assert len(instance.results_cache) == 0
+
+
+def test_token_bucket_rate_limits_concurrent_callers():
+    bucket = TokenBucket(rate=20, capacity=2)
+    start = time.monotonic()
+    greenlets = [gevent.spawn(bucket.acquire) for _ in range(6)]
+    gevent.joinall(greenlets, raise_error=True)
+    # The first 2 calls go through as a burst and the other 4 wait for new tokens
+    assert time.monotonic() - start >= 4 / 20 - 0.01
+
+
+def test_transport_coalesces_identical_gets():
+    """Test that identical GETs in flight at the same time are sent once and counted"""
+    sent_urls = []
+
+    def mock_send(adapter, request, **kwargs):  # pylint: disable=unused-argument
+        sent_urls.append(request.url)
+        gevent.sleep(0.05)
+        response = requests.Response()
+        response.status_code = 429 if 'limited' in request.url else 200
+        response._content = b'{"a": 1}'
+        return response
+
+    transport = Transport()
+    session = requests.session()
+    session.mount('https://', transport)
+    url = 'https://api.example.com/foo'
+    with patch('requests.adapters.HTTPAdapter.send', new=mock_send):
+        greenlets = [gevent.spawn(session.get, url) for _ in range(3)]
+        greenlets.append(gevent.spawn(session.get, url, headers={'X-Key': 'b'}))
+        gevent.joinall(greenlets, raise_error=True)
+        session.get('https://api.example.com/limited')
+
+    assert sent_urls.count(url) == 2, 'GETs with different headers should not be coalesced'
+    assert all(x.value.json() == {'a': 1} for x in greenlets)
+    stats = transport.get_stats()['api.example.com']
+    assert stats['requests'] == 3
+    assert stats['coalesced'] == 2
+    assert stats['rate_limited'] == 1
+    assert sum(stats['latency_histogram'].values()) == 3
+
+
+def test_transport_coalesced_gets_on_failures():
+    """Test that callers waiting for an identical GET get only exceptions meant for
+    them and are bound by their own timeout"""
+    sent_urls = []
+
+    def mock_send(adapter, request, **kwargs):  # pylint: disable=unused-argument
+        sent_urls.append(request.url)
+        gevent.sleep(0.2)
+        if 'error' in request.url:
+            raise requests.exceptions.ConnectionError('boom')
+        response = requests.Response()
+        response.status_code = 200
+        response._content = b'{}'
+        return response
+
+    transport = Transport()
+    session = requests.session()
+    session.mount('https://', transport)
+
+    def get_with_timeout(url, seconds):
+        try:
+            with gevent.Timeout(seconds):
+                return session.get(url)
+        except gevent.Timeout:
+            return None
+
+    with patch('requests.adapters.HTTPAdapter.send', new=mock_send):
+        # An exception of the request in flight is raised to all callers
+        greenlets = [gevent.spawn(session.get, 'https://api.example.com/error') for _ in range(2)]
+        gevent.joinall(greenlets)
+        assert all(isinstance(x.exception, requests.exceptions.ConnectionError) for x in greenlets)
+        assert len(sent_urls) == 1
+
+        # A gevent.Timeout of the first caller does not end the query of the second,
+        # which makes its own request
+        url = 'https://api.example.com/foo'
+        first = gevent.spawn(get_with_timeout, url, 0.1)
+        second = gevent.spawn(get_with_timeout, url, 1)
+        gevent.joinall([first, second], raise_error=True)
+        assert first.value is None
+        assert second.value.status_code == 200
+        assert sent_urls.count(url) == 2
+
+        # A killed first caller does not kill the second
+        first = gevent.spawn(session.get, url)
+        second = gevent.spawn(session.get, url)
+        gevent.sleep(0.05)
+        first.kill()
+        assert second.get().status_code == 200
+        assert sent_urls.count(url) == 4
+
+        # A waiting caller is bound by its own requests timeout
+        first = gevent.spawn(session.get, url)
+        gevent.sleep(0)
+        with pytest.raises(requests.exceptions.ReadTimeout):
+            session.get(url, timeout=0.05)
+        first.join()
+
+
+def test_open_data_index(tmpdir):
+    """Test that a data index is compiled only when missing or when its source changes"""
+    compiled = []
+
+    def compile_tables(conn):
+        compiled.append(len(compiled))
+        conn.execute('CREATE TABLE entries (value INTEGER)')
+        conn.execute('INSERT INTO entries(value) VALUES(?)', (len(compiled),))
+
+    def read_value(conn):
+        return conn.execute('SELECT value FROM entries').fetchone()[0]
+
+    index_path = Path(tmpdir) / 'data.index'
+    conn = open_data_index(index_path, 'source1', compile_tables)
+    assert read_value(conn) == 1
+    assert index_path.is_file()
+    conn.close()
+
+    conn = open_data_index(index_path, 'source1', compile_tables)
+    assert read_value(conn) == 1
+    assert len(compiled) == 1
+    conn.close()
+
+    conn = open_data_index(index_path, 'source2', compile_tables)
+    assert read_value(conn) == 2
+    conn.close()
+    assert [x.name for x in Path(tmpdir).iterdir()] == ['data.index']
+
+    # Missing directories of the index are created
+    conn = open_data_index(Path(tmpdir) / 'indexes' / 'data.index', 'source1', compile_tables)
+    assert read_value(conn) == 3
+    conn.close()
+
+    # If the index can't be written or there is no path it is compiled in memory
+    conn = open_data_index(index_path / 'data.index', 'source1', compile_tables)
+    assert read_value(conn) == 4
+    conn = open_data_index(None, 'source1', compile_tables)
+    assert read_value(conn) == 5
+
+
 def test_convert_to_int():
     assert convert_to_int('5') == 5
     assert convert_to_int('37451082560000003241000000000003221111111111') == 37451082560000003241000000000003221111111111  # noqa: E501
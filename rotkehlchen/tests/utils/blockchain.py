@@ -28,6 +28,7 @@ from rotkehlchen.tests.utils.genesis import GENESIS_STUB
 from rotkehlchen.tests.utils.mock import MockResponse
 from rotkehlchen.typing import BTCAddress, ChecksumEthAddress
 from rotkehlchen.utils.misc import from_wei, satoshis_to_btc
+from rotkehlchen.utils.network import SHARED_SESSION
 
 logger = logging.getLogger(__name__)
 
@@ -543,7 +544,7 @@ def mock_bitcoin_balances_query(
             response = '{"addresses":['
             for idx, address in enumerate(addresses):
                 balance = btc_map.get(address, '0')
-                response += f'{{"address":"{address}", "final_balance":{balance}}}'
+                response += f'{{"address":"{address}", "final_balance":{balance}, "n_tx":1}}'
                 if idx < len(addresses) - 1:
                     response += ','
             response += ']}'
@@ -559,7 +560,7 @@ def mock_bitcoin_balances_query(
 
         return MockResponse(200, response)
 
-    return patch('rotkehlchen.utils.misc.requests.get', wraps=mock_requests_get)
+    return patch.object(SHARED_SESSION, 'get', wraps=mock_requests_get)
 
 
 def compare_account_data(expected: List[Dict], got: List[Dict]) -> None:
@@ -1,9 +1,13 @@
 import logging
 import os
+from typing import Callable
 
 import gevent
+from eth_utils.address import to_checksum_address
 
+from rotkehlchen.chain.ethereum.contracts import WEB3
 from rotkehlchen.chain.ethereum.manager import NodeName
+from rotkehlchen.typing import ChecksumEthAddress
 
 NODE_CONNECTION_TIMEOUT = 10
 
@@ -55,3 +59,21 @@ def wait_until_all_nodes_connected(
             f'Did not connect to nodes: {",".join(names)} due to '
             f'timeout of {NODE_CONNECTION_TIMEOUT}',
         )
+
+
+def mock_multicall_aggregate(
+        input_data: str,
+        eth_call: Callable[[ChecksumEthAddress, str], str],
+        block_number: int = 1,
+) -> str:
+    """Mocks the result of an eth_call to the aggregate method of the multicall contract
+
+    Each aggregated call is performed by calling eth_call with the address and the
+    input data of the call and the hex results are returned as multicall does.
+    """
+    calls = WEB3.codec.decode_abi(['(address,bytes)[]'], bytes.fromhex(input_data[10:]))[0]
+    outputs = [
+        bytes.fromhex(eth_call(to_checksum_address(address), '0x' + data.hex())[2:])
+        for address, data in calls
+    ]
+    return '0x' + WEB3.codec.encode_abi(['uint256', 'bytes[]'], [block_number, outputs]).hex()
@@ -1065,3 +1065,12 @@ def maybe_mock_historical_price_queries(
         return price
 
     historian.query_historical_price = mock_historical_price_query
+
+    def mock_prefetch_historical_prices(
+            queries,  # pylint: disable=unused-argument
+            progress_cb=None,
+    ):
+        if progress_cb is not None:
+            progress_cb(0, 0)
+
+    historian.prefetch_historical_prices = mock_prefetch_historical_prices
@@ -139,7 +139,7 @@ TradeID = NewType('TradeID', T_TradeID)
 
 class ResultCache(NamedTuple):
     """Represents a time-cached result of some API query"""
-    result: Dict
+    result: Any
     timestamp: Timestamp
 
 
@@ -1,13 +1,14 @@
-from typing import Optional, Tuple, Union
+from typing import List, Optional, Tuple, Union
 
 from rotkehlchen.accounting.structures import DefiEvent
 from rotkehlchen.assets.asset import Asset
-from rotkehlchen.constants.assets import A_ETH
+from rotkehlchen.constants.assets import A_BTC, A_ETH
 from rotkehlchen.exchanges.data_structures import (
     AssetMovement,
     Loan,
     MarginPosition,
     Trade,
+    TradeType,
     trade_get_assets,
 )
 from rotkehlchen.typing import EthereumTransaction, Timestamp
@@ -61,3 +62,31 @@ def action_get_assets(
         return action.currency, None
 
     raise AssertionError(f'TaxableAction of unknown type {type(action)} encountered')
+
+
+def action_get_priced_assets(action: TaxableAction) -> List[Asset]:
+    """Returns all assets whose historical price in the profit currency may be needed
+    at the action's timestamp when the action is processed
+
+    This is an over-approximation used to prefetch historical prices before
+    history processing, so it can include assets whose price ends up not being needed.
+
+    May raise:
+    - UnknownAsset/UnsupportedAsset/DeserializationError if a trade's pair can't be processed
+    """
+    if isinstance(action, Trade):
+        base, quote = trade_get_assets(action)
+        assets = [base, quote, action.fee_currency]
+        if action.trade_type == TradeType.SETTLEMENT_BUY:
+            assets.append(A_BTC)
+        return assets
+    elif isinstance(action, AssetMovement):
+        return [action.fee_asset]
+    elif isinstance(action, EthereumTransaction):
+        return [A_ETH]
+    elif isinstance(action, MarginPosition):
+        return [action.pl_currency]
+    elif isinstance(action, (Loan, DefiEvent)):
+        return [action_get_assets(action)[0]]
+
+    raise AssertionError(f'TaxableAction of unknown type {type(action)} encountered')
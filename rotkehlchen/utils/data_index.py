@@ -0,0 +1,138 @@
+"""Compiled and indexed copies of the JSON data files rotki ships with
+
+Parsing a big JSON data file builds every object in it before any single entry
+can be used. Instead each data file is compiled once into a small sqlite DB
+in the indexes directory of the user data directory, with the indexes needed
+to look its entries up. The compiled file is memory mapped and queried only
+for the entries actually used, so that processes share its pages and don't
+keep all of the data in memory.
+
+The compiled file records an identifier of the data it was compiled from,
+such as their md5 hash, and is recompiled whenever the data change. Until
+the data directory is known, for example while modules are imported, the
+data files are compiled in memory.
+"""
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import Callable, Optional
+
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+DATA_INDEX_SUFFIX = '.index'
+DATA_INDEX_DIRNAME = 'indexes'
+DATA_INDEX_MMAP_SIZE = 32 * 1024 * 1024
+
+DB_CREATE_INDEX_META = """
+CREATE TABLE IF NOT EXISTS index_meta (
+    name TEXT NOT NULL PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _open_compiled_index(index_path: Path, source_id: str) -> Optional[sqlite3.Connection]:
+    """Opens the compiled index at index_path if it exists and is up to date"""
+    if not index_path.is_file():
+        return None
+
+    conn = sqlite3.connect(
+        f'{index_path.as_uri()}?mode=ro',
+        uri=True,
+        check_same_thread=False,
+    )
+    try:
+        conn.execute(f'PRAGMA mmap_size={DATA_INDEX_MMAP_SIZE};')
+        result = conn.execute(
+            'SELECT value FROM index_meta WHERE name=?',
+            ('source_id',),
+        ).fetchone()
+    except sqlite3.DatabaseError as e:
+        log.warning(f'Could not read data index {index_path} due to {str(e)}')
+        result = None
+
+    if result is None or result[0] != source_id:
+        conn.close()
+        return None
+
+    return conn
+
+
+def _compile_index(
+        conn: sqlite3.Connection,
+        source_id: str,
+        compile_tables: Callable[[sqlite3.Connection], None],
+) -> None:
+    with conn:
+        conn.executescript(DB_CREATE_INDEX_META)
+        compile_tables(conn)
+        conn.execute(
+            'INSERT OR REPLACE INTO index_meta(name, value) VALUES(?, ?)',
+            ('source_id', source_id),
+        )
+
+
+def _compile_in_memory(
+        source_id: str,
+        compile_tables: Callable[[sqlite3.Connection], None],
+) -> sqlite3.Connection:
+    conn = sqlite3.connect(':memory:', check_same_thread=False)
+    _compile_index(conn, source_id, compile_tables)
+    return conn
+
+
+def data_index_path(data_directory: Optional[Path], name: str) -> Optional[Path]:
+    """Returns the path of the compiled index with the given name in the data directory
+
+    Returns None if there is no data directory, in which case the index is
+    compiled in memory.
+    """
+    if data_directory is None:
+        return None
+    return data_directory / DATA_INDEX_DIRNAME / f'{name}{DATA_INDEX_SUFFIX}'
+
+
+def open_data_index(
+        index_path: Optional[Path],
+        source_id: str,
+        compile_tables: Callable[[sqlite3.Connection], None],
+) -> sqlite3.Connection:
+    """Returns a read only connection to the compiled index at index_path
+
+    If the index does not exist or was compiled from other data than the ones
+    with the given source_id, compile_tables is called to create and fill its
+    tables from the current data. If index_path is None or the compiled file
+    can't be written the index is compiled in memory instead.
+    """
+    if index_path is None:
+        return _compile_in_memory(source_id, compile_tables)
+
+    conn = _open_compiled_index(index_path, source_id)
+    if conn is not None:
+        return conn
+
+    log.debug(f'Compiling data index {index_path}')
+    # Processes starting at the same time should not write the same temporary file
+    tmp_path = index_path.with_suffix(f'{index_path.suffix}.{os.getpid()}.tmp')
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        if tmp_path.exists():
+            tmp_path.unlink()
+        tmp_conn = sqlite3.connect(str(tmp_path))
+        try:
+            _compile_index(tmp_conn, source_id, compile_tables)
+        finally:
+            tmp_conn.close()
+        os.replace(tmp_path, index_path)
+        conn = _open_compiled_index(index_path, source_id)
+    except (OSError, sqlite3.Error) as e:
+        log.warning(f'Could not write data index {index_path} due to {str(e)}')
+
+    if conn is None:
+        return _compile_in_memory(source_id, compile_tables)
+
+    return conn
@@ -1,14 +1,21 @@
+import logging
 from abc import ABCMeta, abstractmethod
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 from functools import wraps
-from typing import Any, Callable, Dict
+from typing import Any, Callable, DefaultDict, Dict, Hashable, Optional, Tuple
 
 from gevent.lock import Semaphore
 
-from rotkehlchen.constants import CACHE_RESPONSE_FOR_SECS
-from rotkehlchen.typing import ChecksumEthAddress, ResultCache
+from rotkehlchen.constants import CACHE_RESPONSE_FOR_SECS, CACHE_RESPONSE_MAX_ENTRIES
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.typing import ChecksumEthAddress, ResultCache, Timestamp
 from rotkehlchen.utils.misc import ts_now
 
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+ResultsCacheKey = Tuple[str, Hashable]
+
 
 def _function_sig_key(name: str, arguments_matter: bool, *args: Any, **kwargs: Any) -> int:
     """Return a unique int identifying a function's call signature"""
@@ -22,6 +29,130 @@ def _function_sig_key(name: str, arguments_matter: bool, *args: Any, **kwargs: A
     return hash(function_sig)
 
 
+def _make_hashable(value: Any) -> Hashable:
+    """Turns a function argument into a hashable value that can be part of a cache key
+
+    Containers are converted recursively. Any other object is used as is, so
+    it needs to be hashable.
+
+    May raise:
+    - TypeError if the value or something it contains is not hashable
+    """
+    if isinstance(value, (list, tuple)):
+        return tuple(_make_hashable(x) for x in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_make_hashable(x) for x in value)
+    if isinstance(value, dict):
+        return frozenset((_make_hashable(k), _make_hashable(v)) for k, v in value.items())
+
+    hash(value)
+    return value
+
+
+def _function_call_key(*args: Any, **kwargs: Any) -> Hashable:
+    """Returns a key identifying the arguments of a function call
+
+    May raise:
+    - TypeError if an argument can't be made hashable
+    """
+    return (
+        tuple(_make_hashable(x) for x in args),
+        tuple((name, _make_hashable(kwargs[name])) for name in sorted(kwargs)),
+    )
+
+
+class CacheStats():
+    """Hit, miss and eviction counters of the cached results of a single function"""
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def serialize(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+
+class ResultsCache():
+    """A bounded cache of function call results that expire after a time to live
+
+    Entries are kept in least recently used order. When the cache is full
+    expired entries are removed first and then the least recently used ones.
+    """
+
+    def __init__(
+            self,
+            max_size: int = CACHE_RESPONSE_MAX_ENTRIES,
+            ttl_secs: int = CACHE_RESPONSE_FOR_SECS,
+    ) -> None:
+        self.max_size = max_size
+        # Can also be 0 which means cache is disabled.
+        self.ttl_secs = ttl_secs
+        self.entries: 'OrderedDict[ResultsCacheKey, ResultCache]' = OrderedDict()
+        self.function_stats: DefaultDict[str, CacheStats] = defaultdict(CacheStats)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, function_name: str, key: Hashable, now: Timestamp) -> Tuple[bool, Any]:
+        """Returns whether there is a fresh cached result for the call and the result"""
+        stats = self.function_stats[function_name]
+        entry = self.entries.get((function_name, key))
+        if entry is None:
+            stats.misses += 1
+            return False, None
+
+        if now - entry.timestamp >= self.ttl_secs:
+            del self.entries[(function_name, key)]
+            stats.misses += 1
+            stats.evictions += 1
+            return False, None
+
+        self.entries.move_to_end((function_name, key))
+        stats.hits += 1
+        return True, entry.result
+
+    def add(self, function_name: str, key: Hashable, result: Any, now: Timestamp) -> None:
+        if self.max_size <= 0 or self.ttl_secs <= 0:
+            return
+
+        self.entries[(function_name, key)] = ResultCache(result, now)
+        self.entries.move_to_end((function_name, key))
+        if len(self.entries) > self.max_size:
+            self._evict_expired(now)
+        while len(self.entries) > self.max_size:
+            (evicted_function_name, _), _ = self.entries.popitem(last=False)
+            self.function_stats[evicted_function_name].evictions += 1
+
+    def _evict_expired(self, now: Timestamp) -> None:
+        expired_keys = [
+            key for key, entry in self.entries.items()
+            if now - entry.timestamp >= self.ttl_secs
+        ]
+        for key in expired_keys:
+            del self.entries[key]
+            self.function_stats[key[0]].evictions += 1
+
+    def invalidate(self, function_name: Optional[str] = None) -> None:
+        """Removes all cached results, or only those of the given function"""
+        if function_name is None:
+            self.entries.clear()
+            return
+
+        for key in [x for x in self.entries if x[0] == function_name]:
+            del self.entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'size': len(self.entries),
+            'max_size': self.max_size,
+            'ttl_secs': self.ttl_secs,
+            'functions': {
+                name: stats.serialize() for name, stats in self.function_stats.items()
+            },
+        }
+
+
 class CacheableObject():
     """Interface for objects that can use timewise caches
 
@@ -31,9 +162,19 @@ class CacheableObject():
 
     def __init__(self) -> None:
         super().__init__()
-        self.results_cache: Dict[int, ResultCache] = {}
-        # Can also be 0 which means cache is disabled.
-        self.cache_ttl_secs = CACHE_RESPONSE_FOR_SECS
+        self.results_cache = ResultsCache()
+
+    @property
+    def cache_ttl_secs(self) -> int:
+        return self.results_cache.ttl_secs
+
+    @cache_ttl_secs.setter
+    def cache_ttl_secs(self, value: int) -> None:
+        self.results_cache.ttl_secs = value
+
+    def flush_cache(self, function_name: Optional[str] = None) -> None:
+        """Invalidates all cached results of the object, or only those of the given function"""
+        self.results_cache.invalidate(function_name)
 
 
 def cache_response_timewise() -> Callable:
@@ -46,33 +187,32 @@ def cache_response_timewise() -> Callable:
         - the Blockchain object
 
     If the special keyword argument ignore_cache=True is given then the cache check
-    is completely skipped
+    is completely skipped and the cached result is replaced by the new one.
+
+    Results are cached per positional and keyword arguments. Calls with arguments
+    that can't be made hashable are not cached at all.
     """
     def _cache_response_timewise(f: Callable) -> Callable:
         @wraps(f)
         def wrapper(wrappingobj: CacheableObject, *args: Any, **kwargs: Any) -> Any:
             ignore_cache = kwargs.pop('ignore_cache', False)
-            cache_key = _function_sig_key(f.__name__, False, *args, **kwargs)
+            try:
+                cache_key = _function_call_key(*args, **kwargs)
+            except TypeError:
+                log.debug(f'Not caching call of {f.__name__} with unhashable arguments')
+                return f(wrappingobj, *args, **kwargs)
+
+            cache = wrappingobj.results_cache
             now = ts_now()
             if ignore_cache is False:
-                # Check the cache
-                if cache_key in wrappingobj.results_cache:
-                    cache_life_secs = now - wrappingobj.results_cache[cache_key].timestamp
-
-            cache_miss = (
-                ignore_cache is True or
-                cache_key not in wrappingobj.results_cache or
-                cache_life_secs >= wrappingobj.cache_ttl_secs
-            )
-
-            if cache_miss:
-                # Call the function, write the result in cache and return it
-                result = f(wrappingobj, *args, **kwargs)
-                wrappingobj.results_cache[cache_key] = ResultCache(result, now)
-                return result
+                hit, result = cache.get(f.__name__, cache_key, now)
+                if hit:
+                    return result
 
-            # else hit the cache and return it
-            return wrappingobj.results_cache[cache_key].result
+            # Call the function, write the result in cache and return it
+            result = f(wrappingobj, *args, **kwargs)
+            cache.add(f.__name__, cache_key, result, now)
+            return result
 
         return wrapper
     return _cache_response_timewise
@@ -8,7 +8,6 @@ import re
 import sys
 import time
 from http import HTTPStatus
-from pathlib import Path
 from typing import Any, Callable, Dict, Iterator, List, TypeVar, Union
 
 import gevent
@@ -27,7 +26,8 @@ from rotkehlchen.errors import (
 from rotkehlchen.fval import FVal
 from rotkehlchen.logging import RotkehlchenLogsAdapter
 from rotkehlchen.typing import ChecksumEthAddress, Fee, Timestamp, TimestampMS
-from rotkehlchen.utils.serialization import rlk_jsondumps, rlk_jsonloads
+from rotkehlchen.utils.network import SHARED_SESSION, record_retry
+from rotkehlchen.utils.serialization import rlk_jsonloads
 
 logger = logging.getLogger(__name__)
 log = RotkehlchenLogsAdapter(logger)
@@ -180,6 +180,8 @@ def retry_calls(
                 )
                 gevent.sleep(backoff_in_seconds)
                 tries -= 1
+                if 'url' in kwargs:
+                    record_retry(kwargs['url'])
                 continue
 
             return result
@@ -198,6 +200,8 @@ def retry_calls(
                         times,
                         e,
                     ))
+            if 'url' in kwargs:
+                record_retry(kwargs['url'])
 
 
 def request_get(
@@ -220,7 +224,7 @@ def request_get(
         handle_429=handle_429,
         backoff_in_seconds=backoff_in_seconds,
         method_name=url,
-        function=requests.get,
+        function=SHARED_SESSION.get,
         # function's arguments
         url=url,
         timeout=timeout,
@@ -334,26 +338,6 @@ def get_system_spec() -> Dict[str, str]:
     return system_spec
 
 
-def write_history_data_in_file(
-        data: List[Dict[str, Any]],
-        filepath: Path,
-        start_ts: Timestamp,
-        end_ts: Timestamp,
-) -> None:
-    log.info(
-        'Writing history file',
-        filepath=filepath,
-        start_time=start_ts,
-        end_time=end_ts,
-    )
-    with open(filepath, 'w') as outfile:
-        history_dict: Dict[str, Any] = {}
-        history_dict['data'] = data
-        history_dict['start_time'] = start_ts
-        history_dict['end_time'] = end_ts
-        outfile.write(rlk_jsondumps(history_dict))
-
-
 def hexstr_to_int(value: str) -> int:
     """Turns a hexstring into an int
 
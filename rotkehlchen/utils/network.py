@@ -0,0 +1,213 @@
+import logging
+import time
+from collections import defaultdict
+from typing import Any, DefaultDict, Dict, Optional, Tuple, Union
+from urllib.parse import urlparse
+
+import requests
+from gevent.event import AsyncResult
+from gevent.lock import BoundedSemaphore
+from requests.adapters import HTTPAdapter
+
+from rotkehlchen.logging import RotkehlchenLogsAdapter
+from rotkehlchen.utils.ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+log = RotkehlchenLogsAdapter(logger)
+
+# How many requests may be in flight at the same time across all hosts
+MAX_CONCURRENT_REQUESTS = 32
+# How many connections are kept alive per host and for how many hosts
+HOST_POOL_SIZE = 10
+MAX_HOST_POOLS = 50
+# (requests per second, burst) allowed per host. Hosts not here are not paced.
+# Etherscan is paced by its client since its limit depends on the API key.
+HOST_RATE_LIMITS: Dict[str, Tuple[float, int]] = {
+    'api.coingecko.com': (100 / 60, 10),
+    'api.coinpaprika.com': (10, 10),
+}
+# Upper bounds in seconds of the buckets of the per host latency histograms
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class HostStats():
+    """Counters of the requests made to a single host"""
+
+    def __init__(self) -> None:
+        self.requests = 0
+        self.coalesced = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.errors = 0
+        # The last bucket counts requests slower than all of LATENCY_BUCKETS
+        self.latencies = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def record_latency(self, seconds: float) -> None:
+        for idx, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.latencies[idx] += 1
+                return
+        self.latencies[-1] += 1
+
+    def serialize(self) -> Dict[str, Any]:
+        histogram = {
+            f'<={bound}s': count for bound, count in zip(LATENCY_BUCKETS, self.latencies)
+        }
+        histogram[f'>{LATENCY_BUCKETS[-1]}s'] = self.latencies[-1]
+        return {
+            'requests': self.requests,
+            'coalesced': self.coalesced,
+            'retries': self.retries,
+            'rate_limited': self.rate_limited,
+            'errors': self.errors,
+            'latency_histogram': histogram,
+        }
+
+
+def _host(url: str) -> str:
+    return urlparse(url).hostname or ''
+
+
+def _total_timeout(
+        timeout: Union[None, float, Tuple[Optional[float], Optional[float]]],
+) -> Optional[float]:
+    """Returns the longest a request with the given requests timeout should be waited for"""
+    if isinstance(timeout, tuple):
+        if None in timeout:
+            return None
+        return sum(timeout)
+    return timeout
+
+
+class Transport(HTTPAdapter):
+    """The HTTP adapter that the sessions of all external API clients send through
+
+    Since there is one adapter, connections to a host are kept alive and reused
+    by all clients that query it. On top of that it:
+    - Limits how many requests are in flight at once across all hosts
+    - Paces requests to the hosts in HOST_RATE_LIMITS with a token bucket each
+    - Sends identical GET requests that are in flight at the same time only once,
+    handing the response, or the raised exception, to all callers
+    - Keeps per host stats of requests, retries, 429 responses and latencies
+    """
+
+    def __init__(self) -> None:
+        super().__init__(pool_connections=MAX_HOST_POOLS, pool_maxsize=HOST_POOL_SIZE)
+        self.concurrency = BoundedSemaphore(MAX_CONCURRENT_REQUESTS)
+        self.rate_limiters = {
+            host: TokenBucket(rate=rate, capacity=capacity)
+            for host, (rate, capacity) in HOST_RATE_LIMITS.items()
+        }
+        self.stats: DefaultDict[str, HostStats] = defaultdict(HostStats)
+        self.in_flight: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], AsyncResult] = {}
+
+    def send(  # type: ignore
+            self,
+            request: requests.PreparedRequest,
+            stream: bool = False,
+            **kwargs: Any,
+    ) -> requests.Response:
+        if request.method != 'GET' or request.body is not None or stream:
+            return self._send(request, stream=stream, **kwargs)
+
+        # Headers are part of the key since they can carry credentials
+        key = (str(request.url), tuple(sorted(request.headers.items())))
+        in_flight = self.in_flight.get(key)
+        if in_flight is not None:
+            timeout = _total_timeout(kwargs.get('timeout'))
+            # wait() does not raise on timeout, so a gevent.Timeout of the caller
+            # still reaches the caller's own `with gevent.Timeout` block
+            in_flight.wait(timeout)
+            if not in_flight.ready():
+                raise requests.exceptions.ReadTimeout(
+                    f'Identical request in flight did not finish in {timeout} seconds',
+                    request=request,
+                )
+            if in_flight.successful() and in_flight.value is None:
+                # The request in flight was killed, so make the request again
+                return self.send(request, stream=stream, **kwargs)
+            self.stats[_host(key[0])].coalesced += 1
+            return in_flight.get(block=False)
+
+        result = AsyncResult()
+        self.in_flight[key] = result
+        try:
+            response = self._send(request, stream=False, **kwargs)
+        except Exception as e:
+            result.set_exception(e)
+            raise
+        except BaseException:
+            # A GreenletExit or a gevent.Timeout is meant only for this greenlet.
+            # Wake up the waiting callers so that they make their own request.
+            result.set(None)
+            raise
+        else:
+            result.set(response)
+        finally:
+            del self.in_flight[key]
+
+        return response
+
+    def _send(
+            self,
+            request: requests.PreparedRequest,
+            stream: bool,
+            **kwargs: Any,
+    ) -> requests.Response:
+        host = _host(str(request.url))
+        stats = self.stats[host]
+        rate_limiter = self.rate_limiters.get(host)
+        if rate_limiter is not None:
+            rate_limiter.acquire()
+
+        with self.concurrency:
+            stats.requests += 1
+            start = time.monotonic()
+            try:
+                response = super().send(request, stream=stream, **kwargs)
+                if not stream:
+                    # Read the body while holding the slot so callers sharing the
+                    # response can all read it and the latency includes it
+                    response.content  # pylint: disable=pointless-statement
+            except requests.exceptions.RequestException:
+                stats.errors += 1
+                raise
+            finally:
+                stats.record_latency(time.monotonic() - start)
+
+        if response.status_code == 429:
+            stats.rate_limited += 1
+            log.debug('Got rate limited', host=host)
+        return response
+
+    def record_retry(self, url: str) -> None:
+        self.stats[_host(url)].retries += 1
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        return {host: stats.serialize() for host, stats in self.stats.items()}
+
+
+TRANSPORT = Transport()
+
+
+def create_session() -> requests.Session:
+    """Creates a requests session that sends its requests through the shared transport"""
+    session = requests.session()
+    session.mount('https://', TRANSPORT)
+    session.mount('http://', TRANSPORT)
+    session.headers.update({'User-Agent': 'rotkehlchen'})
+    return session
+
+
+# The session of queries that don't come from an API client with its own session
+SHARED_SESSION = create_session()
+
+
+def get_transport_stats() -> Dict[str, Dict[str, Any]]:
+    """Returns the request stats of each host queried so far"""
+    return TRANSPORT.get_stats()
+
+
+def record_retry(url: str) -> None:
+    """Counts a query of url that is made again after a failure or rate limit"""
+    TRANSPORT.record_retry(url)
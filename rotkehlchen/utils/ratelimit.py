@@ -0,0 +1,40 @@
+import time
+
+import gevent
+from gevent.lock import Semaphore
+
+
+class TokenBucket():
+    """A token bucket rate limiter for calls made from many greenlets
+
+    On average `rate` calls per second are let through, with bursts of up to
+    `capacity` calls. A caller that finds the bucket empty sleeps, yielding to
+    other greenlets, until a token is available. Waiting callers are served in
+    the order they arrived.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        assert rate > 0, 'rate should be positive'
+        assert capacity >= 1, 'capacity should be at least 1'
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.last_refill = time.monotonic()
+        self.lock = Semaphore()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(
+            float(self.capacity),
+            self.tokens + (now - self.last_refill) * self.rate,
+        )
+        self.last_refill = now
+
+    def acquire(self) -> None:
+        """Takes a token from the bucket, waiting for one to become available if needed"""
+        with self.lock:
+            self._refill()
+            if self.tokens < 1:
+                gevent.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+"""Times replaying a synthetic trade history through TaxableEvents
+
+Generates a history of buys and sells of a single asset, where buys slightly
+outnumber sells so that the queue of open buys keeps growing as it does for a
+market maker, and feeds it to TaxableEvents.search_buys_calculate_profit.
+"""
+
+import argparse
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from rotkehlchen.accounting.events import TaxableEvents
+from rotkehlchen.accounting.lots import CostBasisMethod
+from rotkehlchen.constants.assets import A_BTC, A_EUR
+from rotkehlchen.csv_exporter import CSVExporter
+from rotkehlchen.exchanges.data_structures import BuyEvent
+from rotkehlchen.fval import FVal
+from rotkehlchen.typing import Timestamp
+
+START_TS = 1500000000
+
+
+def replay(trades: int, method: CostBasisMethod, buy_probability: float) -> None:
+    taxable_events = TaxableEvents(
+        csv_exporter=CSVExporter(
+            profit_currency=A_EUR,
+            user_directory=Path(tempfile.gettempdir()),
+            create_csv=False,
+        ),
+        profit_currency=A_EUR,
+    )
+    taxable_events.cost_basis_method = method
+    taxable_events.taxfree_after_period = 365 * 86400
+    taxable_events.events[A_BTC] = taxable_events._new_events()
+    buys = taxable_events.events[A_BTC].buys
+
+    rng = random.Random(0)
+    start = time.perf_counter()
+    for idx in range(trades):
+        timestamp = Timestamp(START_TS + idx * 30)
+        amount = FVal(rng.randint(1, 1000)) / FVal(1000)
+        if rng.random() < buy_probability:
+            buys.append(BuyEvent(
+                timestamp=timestamp,
+                amount=amount,
+                rate=FVal(rng.randint(9000, 11000)),
+                fee_rate=FVal('0.1'),
+            ))
+        else:
+            taxable_events.search_buys_calculate_profit(
+                selling_amount=amount,
+                selling_asset=A_BTC,
+                timestamp=timestamp,
+            )
+    duration = time.perf_counter() - start
+    print(
+        f'{method.name}: {trades} trades in {duration:.2f} seconds '
+        f'({trades / duration:.0f} trades per second), {len(buys)} open buys left',
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--trades', type=int, default=1000000, help='Trades to replay')
+    parser.add_argument(
+        '--buy-probability',
+        type=float,
+        default=0.55,
+        help='Probability that each generated trade is a buy',
+    )
+    parser.add_argument(
+        '--method',
+        choices=[x.name for x in CostBasisMethod],
+        action='append',
+        help='Cost basis method to replay with. Can be given many times. Default is all',
+    )
+    args = parser.parse_args()
+
+    methods = args.method if args.method else [x.name for x in CostBasisMethod]
+    for method in methods:
+        replay(
+            trades=args.trades,
+            method=CostBasisMethod[method],
+            buy_probability=args.buy_probability,
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python
+"""Times encoding contract calls and decoding their results
+
+Compares building a web3 contract object and resolving the function abi for
+every call, as was done before contracts were compiled, with the compiled
+contracts that EthereumContract.encode() and decode() use.
+"""
+
+import argparse
+import time
+from typing import Any, Callable, List, Tuple
+
+from eth_abi import encode_abi as eth_encode_abi
+from web3._utils.abi import get_abi_output_types
+
+from rotkehlchen.chain.ethereum.contracts import WEB3, EthereumContract
+from rotkehlchen.constants.ethereum import ERC20TOKEN_ABI, ETH_MULTICALL, MAKERDAO_VAT
+from rotkehlchen.serialization.deserialize import deserialize_ethereum_address
+
+ADDRESS = deserialize_ethereum_address('0x9531C059098e3d194fF87FebB587aB07B30B1306')
+DAI_ADDRESS = deserialize_ethereum_address('0x6B175474E89094C44Da98b954EedeAC495271d0F')
+ILK = b'ETH-A'.ljust(32, b'\0')
+# (contract, method name, arguments, encoded result) of the benchmarked calls
+CALLS: List[Tuple[EthereumContract, str, List[Any], bytes]] = [
+    (
+        EthereumContract(address=DAI_ADDRESS, abi=ERC20TOKEN_ABI, deployed_block=0),
+        'balanceOf',
+        [ADDRESS],
+        eth_encode_abi(['uint256'], [10**18]),
+    ),
+    (
+        MAKERDAO_VAT,
+        'urns',
+        [ILK, ADDRESS],
+        eth_encode_abi(['uint256', 'uint256'], [10**18, 10**20]),
+    ),
+    (
+        ETH_MULTICALL,
+        'aggregate',
+        [[(DAI_ADDRESS, bytes.fromhex('70a08231') + bytes(32))] * 10],
+        eth_encode_abi(['uint256', 'bytes[]'], [1, [bytes(32)] * 10]),
+    ),
+]
+
+
+def encode_uncompiled(contract: EthereumContract, method_name: str, arguments: List[Any]) -> str:
+    web3_contract = WEB3.eth.contract(address=contract.address, abi=contract.abi)
+    return web3_contract.encodeABI(method_name, args=arguments)
+
+
+def decode_uncompiled(
+        contract: EthereumContract,
+        result: bytes,
+        method_name: str,
+        arguments: List[Any],
+) -> Tuple[Any, ...]:
+    web3_contract = WEB3.eth.contract(address=contract.address, abi=contract.abi)
+    fn_abi = web3_contract._find_matching_fn_abi(fn_identifier=method_name, args=arguments)
+    return WEB3.codec.decode_abi(get_abi_output_types(fn_abi), result)
+
+
+def time_calls(name: str, method: Callable[[], Any], iterations: int) -> None:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        method()
+    duration = time.perf_counter() - start
+    print(f'{name}: {iterations / duration:.0f} calls per second')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=2000, help='Calls per benchmark')
+    args = parser.parse_args()
+
+    for contract, method_name, arguments, result in CALLS:
+        assert contract.encode(method_name, arguments) == encode_uncompiled(
+            contract, method_name, arguments,
+        )
+        assert contract.decode(result, method_name, arguments) == decode_uncompiled(
+            contract, result, method_name, arguments,
+        )
+        time_calls(
+            f'{method_name} encode uncompiled',
+            lambda: encode_uncompiled(contract, method_name, arguments),
+            args.iterations,
+        )
+        time_calls(
+            f'{method_name} encode compiled',
+            lambda: contract.encode(method_name, arguments),
+            args.iterations,
+        )
+        time_calls(
+            f'{method_name} decode uncompiled',
+            lambda: decode_uncompiled(contract, result, method_name, arguments),
+            args.iterations,
+        )
+        time_calls(
+            f'{method_name} decode compiled',
+            lambda: contract.decode(result, method_name, arguments),
+            args.iterations,
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+"""Times reading all trades of a synthetic user DB via DBHandler.get_trades()
+
+Deserializing each trade row constructs the assets of its pair and fee, so
+this mostly measures the cost of Asset construction.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from rotkehlchen.assets.resolver import AssetResolver
+from rotkehlchen.db.dbhandler import DBHandler
+from rotkehlchen.user_messages import MessagesAggregator
+
+PAIRS = ('ETH_BTC', 'BTC_EUR', 'XMR_BTC', 'DAI_USDT', 'REP_ETH', 'LTC_USD', 'ZEC_BTC')
+FEE_CURRENCIES = ('BTC', 'ETH', 'EUR', 'USD')
+
+
+def populate_trades(db: DBHandler, num_trades: int) -> None:
+    cursor = db.conn.cursor()
+    cursor.executemany(
+        'INSERT INTO trades(id, time, location, pair, type, amount, rate, fee, fee_currency, '
+        'link, notes) VALUES(?, ?, "A", ?, "A", "1", "0.01", "0.1", ?, "", "")',
+        [
+            (
+                str(idx),
+                1451606400 + idx * 60,
+                PAIRS[idx % len(PAIRS)],
+                FEE_CURRENCIES[idx % len(FEE_CURRENCIES)],
+            ) for idx in range(num_trades)
+        ],
+    )
+    db.conn.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--trades', type=int, default=200000, help='Number of trades in the DB')
+    parser.add_argument('--runs', type=int, default=3, help='Number of timed get_trades() calls')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Initialize the assets as the app does when a user logs in
+        AssetResolver(data_directory=Path(tmpdir))
+        db = DBHandler(
+            user_data_dir=Path(tmpdir),
+            password='123',
+            msg_aggregator=MessagesAggregator(),
+            initial_settings=None,
+        )
+        populate_trades(db, args.trades)
+        for run in range(args.runs):
+            start = time.perf_counter()
+            trades = db.get_trades()
+            duration = time.perf_counter() - start
+            assert len(trades) == args.trades
+            print(f'run {run}: read {len(trades)} trades in {duration:.2f} seconds')
+
+
+if __name__ == '__main__':
+    main()
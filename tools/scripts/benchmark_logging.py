@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""Times log entries of RotkehlchenLogsAdapter with a disabled and an enabled level
+
+Compares the entries with how the logging module's LoggerAdapter, which the
+adapter extends, emits them.
+"""
+
+import argparse
+import logging
+import time
+from typing import Any, Callable, Dict
+
+from rotkehlchen.constants.assets import A_BTC
+from rotkehlchen.fval import FVal
+from rotkehlchen.logging import LazyLogValue, RotkehlchenLogsAdapter
+
+logger = logging.getLogger('benchmark')
+log = RotkehlchenLogsAdapter(logger)
+KWARGS: Dict[str, Any] = {
+    'tax_status': 'TAXABLE',
+    'used_amount': FVal('0.5'),
+    'from_amount': FVal('1.5'),
+    'asset': A_BTC,
+    'trade_buy_rate': FVal('9512.3'),
+    'profit_currency': 'EUR',
+    'trade_timestamp': 1500000000,
+}
+
+
+def time_entries(name: str, method: Callable[[], Any], iterations: int) -> None:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        method()
+    duration = time.perf_counter() - start
+    print(f'{name}: {iterations / duration:.0f} entries per second')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200000, help='Entries per benchmark')
+    args = parser.parse_args()
+
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    for level in (logging.INFO, logging.DEBUG):
+        logger.setLevel(level)
+        level_name = logging.getLevelName(level)
+        time_entries(
+            f'{level_name} level, LoggerAdapter debug entry',
+            lambda: logging.LoggerAdapter.debug(log, 'Entry', sensitive_log=True, **KWARGS),
+            args.iterations,
+        )
+        time_entries(
+            f'{level_name} level, debug entry',
+            lambda: log.debug('Entry', sensitive_log=True, **KWARGS),
+            args.iterations,
+        )
+        time_entries(
+            f'{level_name} level, debug entry with a lazy value',
+            lambda: log.debug('Entry', kwargs=LazyLogValue(str, KWARGS)),
+            args.iterations,
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python
+"""Times the dashboard queries over the balance snapshots of a synthetic user DB
+
+The DB holds a daily snapshot of the balances of a number of assets and of the
+value of a number of locations, as saved by the app.
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+from rotkehlchen.assets.asset import Asset
+from rotkehlchen.assets.resolver import AssetResolver
+from rotkehlchen.db.dbhandler import DBHandler
+from rotkehlchen.db.utils import AssetBalance, LocationData
+from rotkehlchen.typing import Location, Timestamp
+from rotkehlchen.user_messages import MessagesAggregator
+
+DAY_IN_SECONDS = 86400
+START_TS = 1451606400
+ASSETS = (
+    'BTC', 'ETH', 'EUR', 'USD', 'BCH', 'LTC', 'XMR', 'ZEC',
+    'DASH', 'XRP', 'DAI', 'MKR', 'REP', 'ETC',
+)
+LOCATIONS = (
+    Location.KRAKEN,
+    Location.POLONIEX,
+    Location.BINANCE,
+    Location.BLOCKCHAIN,
+    Location.BANKS,
+    Location.TOTAL,
+)
+
+
+def populate_snapshots(db: DBHandler, days: int) -> Timestamp:
+    """Adds a daily snapshot for the given number of days and returns the end timestamp"""
+    end_ts = Timestamp(START_TS + days * DAY_IN_SECONDS)
+    balances = []
+    location_data = []
+    for ts in range(START_TS, end_ts, DAY_IN_SECONDS):
+        for asset in ASSETS:
+            balances.append(AssetBalance(
+                time=Timestamp(ts),
+                asset=Asset(asset),
+                amount='10',
+                usd_value='100',
+            ))
+        for location in LOCATIONS:
+            location_data.append(LocationData(
+                time=Timestamp(ts),
+                location=location.serialize_for_db(),
+                usd_value='1000',
+            ))
+    db.add_multiple_balances(balances)
+    db.add_multiple_location_data(location_data)
+    return end_ts
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=730, help='Number of daily snapshots')
+    parser.add_argument('--runs', type=int, default=3, help='Number of timed calls per query')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # Initialize the assets as the app does when a user logs in
+        AssetResolver(data_directory=Path(tmpdir))
+        db = DBHandler(
+            user_data_dir=Path(tmpdir),
+            password='123',
+            msg_aggregator=MessagesAggregator(),
+            initial_settings=None,
+        )
+        end_ts = populate_snapshots(db, args.days)
+        queries: Dict[str, Callable[[], Any]] = {
+            'query_timed_balances': lambda: db.query_timed_balances(
+                from_ts=Timestamp(START_TS),
+                to_ts=end_ts,
+                asset=Asset('ETH'),
+            ),
+            'get_latest_asset_value_distribution': db.get_latest_asset_value_distribution,
+            'get_latest_location_value_distribution': (
+                db.get_latest_location_value_distribution
+            ),
+            'get_netvalue_data': lambda: db.get_netvalue_data(from_ts=Timestamp(START_TS)),
+        }
+        for name, query in queries.items():
+            for run in range(args.runs):
+                start = time.perf_counter()
+                query()
+                duration = time.perf_counter() - start
+                print(f'{name} run {run}: {duration * 1000:.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
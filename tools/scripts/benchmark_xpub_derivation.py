@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""Times deriving the receiving and change addresses of an xpub
+
+Compares deriving a full key node for each address via HDKey.derive_child()
+with deriving whole index ranges at once via HDKey.derive_addresses().
+"""
+
+import argparse
+import time
+from typing import Callable, List
+
+from rotkehlchen.chain.bitcoin.hdkey import HDKey
+from rotkehlchen.typing import BTCAddress
+
+XPUB = 'xpub68V4ZQQ62mea7ZUKn2urQu47Bdn2Wr7SxrBxBDDwE3kjytj361YBGSKDT4WoBrE5htrSB8eAMe59NPnKrcAbiv2veN5GQUmfdjRddD1Hxrk'  # noqa: E501
+
+
+def derive_per_node(account: HDKey, num_addresses: int) -> List[BTCAddress]:
+    addresses: List[BTCAddress] = []
+    for account_index in (0, 1):
+        root = account.derive_child(account_index)
+        addresses.extend(root.derive_child(idx).address() for idx in range(num_addresses))
+    return addresses
+
+
+def derive_ranges(account: HDKey, num_addresses: int) -> List[BTCAddress]:
+    addresses: List[BTCAddress] = []
+    for account_index in (0, 1):
+        root = account.derive_child(account_index)
+        addresses.extend(address for _, address in root.derive_addresses(0, num_addresses))
+    return addresses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--xpub', default=XPUB, help='The xpub to derive addresses from')
+    parser.add_argument(
+        '--addresses',
+        type=int,
+        default=10000,
+        help='Number of receiving and of change addresses to derive',
+    )
+    args = parser.parse_args()
+
+    results = []
+    method: Callable[[HDKey, int], List[BTCAddress]]
+    for method in (derive_per_node, derive_ranges):
+        # Start from a new key each time so no derived node is reused
+        account = HDKey.from_xpub(xpub=args.xpub, path='m')
+        start = time.perf_counter()
+        addresses = method(account, args.addresses)
+        duration = time.perf_counter() - start
+        results.append(addresses)
+        print(f'{method.__name__}: derived {len(addresses)} addresses in {duration:.2f} seconds')
+
+    assert results[0] == results[1]
+
+
+if __name__ == '__main__':
+    main()